@@ -20,7 +20,8 @@ from pathlib import Path
 from collections import defaultdict
 from datetime import datetime, timedelta
 from multiprocessing import Pool, cpu_count, Manager
-from functools import partial
+
+from raizen_power.extraction.map_manager import MapIndex, MapManager
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
@@ -31,80 +32,31 @@ SOURCE_DIR = Path("data/raw/OneDrive_2026-01-06/TERMO DE ADESÃO")
 MAPS_DIR = Path("maps")
 OUTPUT_DIR = Path("output")
 
-def load_maps():
-    """Carrega todos os mapas disponíveis."""
-    maps = {}
-    for map_file in MAPS_DIR.glob("*.json"):
-        try:
-            with open(map_file, 'r', encoding='utf-8') as f:
-                mapa = json.load(f)
-                maps[map_file.stem] = mapa
-        except Exception:
-            pass
-    return maps
+def load_maps() -> MapIndex:
+    """Carrega todos os mapas disponíveis e monta o índice de seleção."""
+    return MapManager(MAPS_DIR).index
 
-def select_best_map(text: str, pages: int, distributor: str, maps: dict) -> tuple:
-    """Seleciona o melhor mapa para um documento."""
-    candidates = []
-    text_lower = text.lower()
-    
-    for map_name, mapa in maps.items():
-        score = 0
-        
-        # Match distribuidora
-        map_dist = mapa.get("distribuidora_principal", "").upper()
-        if map_dist and map_dist in distributor.upper():
-            score += 10
-        
-        # Match páginas - peso maior para match exato
-        map_pages = mapa.get("paginas_analisadas", 0)
-        if map_pages == pages:
-            score += 15  # Aumentado de 5 para 15
-        elif abs(map_pages - pages) <= 1:
-            score += 3
-        
-        # Bonus se o nome do mapa contém o número de páginas correto
-        if f"_{pages}p" in map_name.lower() or f"_{pages:02d}p" in map_name.lower():
-            score += 10
-        
-        # Match tipo de documento
-        map_model = mapa.get("modelo_identificado", "").lower()
-        map_name_lower = map_name.lower()
-        
-        # Se o documento é ADITIVO/DISTRATO, priorizar esses mapas
-        if "distrato" in text_lower:
-            if "distrato" in map_model or "distrato" in map_name_lower:
-                score += 20
-            else:
-                score -= 5  # Penalizar mapas não-distrato
-        elif "aditivo" in text_lower:
-            if "aditivo" in map_model or "aditivo" in map_name_lower:
-                score += 20
-            else:
-                score -= 5  # Penalizar mapas não-aditivo
-        else:
-            # Documento normal (adesão), penalizar mapas de aditivo/distrato MUITO FORTE
-            if "aditivo" in map_name_lower or "distrato" in map_name_lower:
-                score -= 30  # Penalizar MUITO fortemente
-            if "adesão" in map_model or "adesao" in map_model:
-                score += 5
-        
-        if score > 0:
-            candidates.append((map_name, mapa, score))
-    
-    candidates.sort(key=lambda x: x[2], reverse=True)
-    
-    if candidates:
-        return candidates[0][0], candidates[0][1]
-    return None, None
+def select_best_map(text: str, pages: int, distributor: str, index: MapIndex) -> tuple:
+    """Seleciona o melhor mapa para um documento (consulta ao MapIndex)."""
+    selection = index.select_for_text(text, pages, distributor)
+    return selection.name, selection.mapa
 
-def process_single_pdf(pdf_path_str: str, maps: dict) -> dict:
+# Índice de mapas do processo worker (recebido uma vez pelo initializer)
+_WORKER_INDEX = None
+
+def _init_worker(index: MapIndex):
+    global _WORKER_INDEX
+    _WORKER_INDEX = index
+
+def process_single_pdf(pdf_path_str: str, index: MapIndex = None) -> dict:
     """Processa um único PDF (função para multiprocessing)."""
     # Re-import dentro do processo filho
     import warnings
     warnings.filterwarnings('ignore')
     
     pdf_path = Path(pdf_path_str)
+    if index is None:
+        index = _WORKER_INDEX
     
     result = {
         "file": pdf_path.name,
@@ -121,7 +73,7 @@ def process_single_pdf(pdf_path_str: str, maps: dict) -> dict:
         # Import dentro do processo
         from raizen_power.extraction.table_extractor import open_pdf, extract_all_text_from_pdf
         from raizen_power.analysis.classifier import identify_distributor_from_text
-        from raizen_power.apply_map import extract_with_map
+        from raizen_power.extraction.apply_map import extract_with_map
         
         with open_pdf(str(pdf_path)) as pdf:
             result["pages"] = len(pdf.pages)
@@ -129,7 +81,7 @@ def process_single_pdf(pdf_path_str: str, maps: dict) -> dict:
         
         result["distributor"] = identify_distributor_from_text(text)
         
-        map_name, mapa = select_best_map(text, result["pages"], result["distributor"], maps)
+        map_name, mapa = select_best_map(text, result["pages"], result["distributor"], index)
         
         if mapa:
             result["map_used"] = map_name
@@ -239,13 +191,11 @@ def extract_all_parallel(source_dir: Path, timeout_minutes: int = 60, num_worker
     print(f"PROCESSANDO EM {num_workers} WORKERS...")
     print(f"{'='*60}\n")
     
-    # Create partial function with maps
-    process_func = partial(process_single_pdf, maps=maps)
-    
     # Process in batches for better progress tracking
     batch_size = 100
     
-    with Pool(processes=num_workers) as pool:
+    # O índice de mapas vai para cada worker uma vez (initializer)
+    with Pool(processes=num_workers, initializer=_init_worker, initargs=(maps,)) as pool:
         for batch_start in range(0, total, batch_size):
             # Check timeout
             if datetime.now() >= end_time:
@@ -256,7 +206,7 @@ def extract_all_parallel(source_dir: Path, timeout_minutes: int = 60, num_worker
             batch = pdf_paths[batch_start:batch_end]
             
             # Process batch
-            batch_results = pool.map(process_func, batch)
+            batch_results = pool.map(process_single_pdf, batch)
             
             # Collect results
             for result in batch_results:
@@ -7,7 +7,8 @@ Fluxo:
 3. Se não existe: Fallback para mapas da mesma distribuidora
 4. Se nenhum: Fallback para mapa genérico
 
-Vantagem: Seleção direta, sem scoring, escala com novos mapas.
+Vantagem: Seleção direta, sem scoring, escala com novos mapas
+(MapIndex.select_by_folder, com cache por pasta).
 """
 import json
 import re
@@ -19,127 +20,32 @@ import warnings
 warnings.filterwarnings('ignore')
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from raizen_power.extraction.map_manager import MapIndex, MapManager
+
 # Paths
 SOURCE_DIR = Path("contratos_organizados")
 MAPS_DIR = Path("maps")
 OUTPUT_DIR = Path("output")
 
 
-def load_maps():
-    """Carrega todos os mapas e indexa por nome."""
-    maps = {}
-    for map_file in MAPS_DIR.glob("*.json"):
-        try:
-            with open(map_file, 'r', encoding='utf-8') as f:
-                maps[map_file.stem] = json.load(f)
-        except Exception:
-            pass
-    return maps
-
-
-def find_exact_map(distributor: str, pages: int, maps: dict) -> tuple:
-    """
-    Busca mapa EXATO para a combinação distribuidora/páginas.
-    
-    Tenta variações do nome:
-    - CEMIG_11p_v1
-    - CEMIG_11p_v2
-    - CEMIG-D_11p_v1
-    """
-    # Normalizar nome da distribuidora
-    dist_normalized = distributor.upper().replace('-', '_').replace(' ', '_')
-    
-    # Padrões a tentar (ordem de prioridade)
-    patterns = [
-        f"{dist_normalized}_{pages:02d}p",  # CEMIG_11p
-        f"{dist_normalized}_{pages}p",       # CEMIG_11p (sem zero)
-        f"{distributor}_{pages:02d}p",       # Nome original
-        f"{distributor}_{pages}p",           # Nome original sem zero
-    ]
-    
-    # Buscar mapas que correspondem
-    for pattern in patterns:
-        for map_name in maps:
-            if map_name.upper().startswith(pattern.upper()):
-                return map_name, maps[map_name], "EXATO"
-    
-    return None, None, None
-
-
-def find_fallback_map(distributor: str, pages: int, maps: dict) -> tuple:
-    """
-    Fallback: busca mapa da mesma distribuidora (qualquer páginas).
-    """
-    dist_normalized = distributor.upper().replace('-', '_').replace(' ', '_')
-    
-    candidates = []
-    for map_name, mapa in maps.items():
-        map_name_upper = map_name.upper()
-        
-        # Mapa é da mesma distribuidora?
-        if dist_normalized in map_name_upper:
-            map_pages = mapa.get("paginas_analisadas", 0)
-            # Preferir mapas com páginas próximas
-            distance = abs(map_pages - pages) if map_pages else 100
-            candidates.append((map_name, mapa, distance))
-    
-    if candidates:
-        # Ordenar por distância de páginas
-        candidates.sort(key=lambda x: x[2])
-        return candidates[0][0], candidates[0][1], "FALLBACK_DIST"
-    
-    return None, None, None
-
-
-def find_generic_map(pages: int, maps: dict) -> tuple:
-    """
-    Último fallback: mapa genérico com páginas próximas.
-    """
-    candidates = []
-    for map_name, mapa in maps.items():
-        # Evitar mapas de tipo específico (aditivo, distrato)
-        if 'aditivo' in map_name.lower() or 'distrato' in map_name.lower():
-            continue
-        
-        map_pages = mapa.get("paginas_analisadas", 0)
-        if map_pages:
-            distance = abs(map_pages - pages)
-            candidates.append((map_name, mapa, distance))
-    
-    if candidates:
-        candidates.sort(key=lambda x: x[2])
-        return candidates[0][0], candidates[0][1], "FALLBACK_GENERICO"
-    
-    return None, None, None
+def load_maps() -> MapIndex:
+    """Carrega todos os mapas e monta o índice de seleção."""
+    return MapManager(MAPS_DIR).index
 
 
-def select_map_smart(distributor: str, pages: int, maps: dict) -> tuple:
+def select_map_smart(distributor: str, pages: int, maps: MapIndex) -> tuple:
     """
     Seleção inteligente de mapa baseada na pasta.
     Retorna: (map_name, map_data, selection_type)
     """
-    # 1. Tentar mapa EXATO
-    map_name, mapa, sel_type = find_exact_map(distributor, pages, maps)
-    if mapa:
-        return map_name, mapa, sel_type
-    
-    # 2. Fallback para mesma distribuidora
-    map_name, mapa, sel_type = find_fallback_map(distributor, pages, maps)
-    if mapa:
-        return map_name, mapa, sel_type
-    
-    # 3. Fallback genérico
-    map_name, mapa, sel_type = find_generic_map(pages, maps)
-    if mapa:
-        return map_name, mapa, sel_type
-    
-    return None, None, "NENHUM"
+    selection = maps.select_by_folder(distributor, pages)
+    return selection.name, selection.mapa, selection.selection_type
 
 
-def process_pdf(pdf_path: Path, pages: int, distributor: str, maps: dict) -> dict:
+def process_pdf(pdf_path: Path, pages: int, distributor: str, maps: MapIndex) -> dict:
     """Processa um único PDF usando seleção inteligente."""
-    from src.extrator_contratos.table_extractor import open_pdf, extract_all_text_from_pdf
-    from scripts.apply_map import extract_with_map
+    from raizen_power.extraction.table_extractor import open_pdf, extract_all_text_from_pdf
+    from raizen_power.extraction.apply_map import extract_with_map
     
     result = {
         "file": pdf_path.name,
@@ -154,6 +60,10 @@ def process_pdf(pdf_path: Path, pages: int, distributor: str, maps: dict) -> dic
     }
     
     try:
+        # Extrair texto
+        with open_pdf(str(pdf_path)) as pdf:
+            text = extract_all_text_from_pdf(pdf, max_pages=15, use_ocr_fallback=False)
+        
         # Selecionar mapa usando estratégia inteligente
         map_name, mapa, sel_type = select_map_smart(distributor, pages, maps)
         
@@ -164,10 +74,6 @@ def process_pdf(pdf_path: Path, pages: int, distributor: str, maps: dict) -> dic
             result["error"] = "Nenhum mapa encontrado"
             return result
         
-        # Extrair texto
-        with open_pdf(str(pdf_path)) as pdf:
-            text = extract_all_text_from_pdf(pdf, max_pages=15, use_ocr_fallback=False)
-        
         # Aplicar mapa
         extracted = extract_with_map(text, mapa)
         
@@ -142,56 +142,56 @@ def main():
     print(f"\nMapas sem reference_pdf: {len(missing_maps)}")
     
     # Inicializar fingerprinter
-    identifier = PDFModelIdentifier()
-    
-    # Processar mapas
-    updated = 0
-    skipped = 0
-    
-    for map_info in missing_maps:
-        map_path = map_info['map_path']
-        key = map_info['key']
+    with PDFModelIdentifier() as identifier:
         
-        if not key:
-            print(f"  SKIP: {map_path.name} (sem padrão detectável)")
-            skipped += 1
-            continue
+        # Processar mapas
+        updated = 0
+        skipped = 0
         
-        # Buscar PDFs correspondentes
-        if key not in pdf_index:
-            # Tentar variações
-            alt_keys = []
-            if 'CPFL' in key or 'PAULISTA' in key:
-                alt_keys.append(key.replace('CPFL', 'CPFL PAULISTA'))
-                alt_keys.append(key.replace('CPFL PAULISTA', 'CPFL'))
+        for map_info in missing_maps:
+            map_path = map_info['map_path']
+            key = map_info['key']
             
-            found = False
-            for alt in alt_keys:
-                if alt in pdf_index:
-                    key = alt
-                    found = True
-                    break
-            
-            if not found:
-                print(f"  SKIP: {map_path.name} (chave {key} não encontrada)")
+            if not key:
+                print(f"  SKIP: {map_path.name} (sem padrão detectável)")
                 skipped += 1
                 continue
+            
+            # Buscar PDFs correspondentes
+            if key not in pdf_index:
+                # Tentar variações
+                alt_keys = []
+                if 'CPFL' in key or 'PAULISTA' in key:
+                    alt_keys.append(key.replace('CPFL', 'CPFL PAULISTA'))
+                    alt_keys.append(key.replace('CPFL PAULISTA', 'CPFL'))
+                
+                found = False
+                for alt in alt_keys:
+                    if alt in pdf_index:
+                        key = alt
+                        found = True
+                        break
+                
+                if not found:
+                    print(f"  SKIP: {map_path.name} (chave {key} não encontrada)")
+                    skipped += 1
+                    continue
+            
+            # Pegar primeiro PDF disponível
+            pdf_path = pdf_index[key][0]
+            
+            try:
+                update_map_with_reference(map_path, pdf_path, identifier)
+                print(f"  OK: {map_path.name} <- {pdf_path.name}")
+                updated += 1
+            except Exception as e:
+                print(f"  ERRO: {map_path.name}: {e}")
+                skipped += 1
         
-        # Pegar primeiro PDF disponível
-        pdf_path = pdf_index[key][0]
+        print(f"\nResultado: {updated} atualizados, {skipped} ignorados")
         
-        try:
-            update_map_with_reference(map_path, pdf_path, identifier)
-            print(f"  OK: {map_path.name} <- {pdf_path.name}")
-            updated += 1
-        except Exception as e:
-            print(f"  ERRO: {map_path.name}: {e}")
-            skipped += 1
-    
-    print(f"\nResultado: {updated} atualizados, {skipped} ignorados")
-    
-    # Salvar cache do fingerprinter
-    identifier._save_cache()
+        # Salvar cache do fingerprinter
+        identifier._save_cache()
 
 
 if __name__ == '__main__':
@@ -1,8 +1,14 @@
 import os
+import sys
 import json
 import re
 from pathlib import Path
 
+# Make raizen_power importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+from raizen_power.extraction.map_manager import MapCatalog
+
 def extract_json_from_text(text):
     """Extracts JSON object from a string, handling potential markdown blocks."""
     # Try finding the first { and last }
@@ -66,6 +72,11 @@ def main():
             except Exception as e:
                 errors.append(f"Error processing {file_path}: {e}")
 
+    # Maps rewritten in place don't change the folder mtime, so the catalog
+    # would keep their old distributor/pages/model fields
+    if registered_count:
+        MapCatalog(maps_dir).rebuild()
+
     print("\nSummary:")
     print(f"Total maps registered: {registered_count}")
     if errors:
@@ -94,36 +94,36 @@ def main():
         "data/processed",
     ]
     
-    identifier = PDFModelIdentifier()
-    
-    maps = list(maps_dir.glob("*.json"))
-    print(f"Encontrados {len(maps)} mapas")
-    print("-" * 60)
-    
-    stats = {"updated": 0, "skip": 0, "no_pdf": 0, "error": 0}
-    
-    for map_path in maps:
-        result = update_map_with_hash(map_path, identifier, pdf_dirs)
-        status = result["status"]
-        stats[status] = stats.get(status, 0) + 1
+    with PDFModelIdentifier() as identifier:
         
-        if status == "updated":
-            print(f"[OK] {map_path.name} -> {result.get('hash', '')[:8]}")
-        elif status == "skip":
-            print(f"[SKIP] {map_path.name} (ja atualizado)")
-        elif status == "no_pdf":
-            print(f"[NOPDF] {map_path.name}")
-        else:
-            print(f"[ERR] {map_path.name}: {result.get('reason', '')}")
-    
-    print("-" * 60)
-    print(f"Atualizados: {stats['updated']}")
-    print(f"Ignorados: {stats['skip']}")
-    print(f"Sem PDF: {stats['no_pdf']}")
-    print(f"Erros: {stats['error']}")
-    
-    # Salvar cache do identifier
-    identifier._save_cache()
+        maps = list(maps_dir.glob("*.json"))
+        print(f"Encontrados {len(maps)} mapas")
+        print("-" * 60)
+        
+        stats = {"updated": 0, "skip": 0, "no_pdf": 0, "error": 0}
+        
+        for map_path in maps:
+            result = update_map_with_hash(map_path, identifier, pdf_dirs)
+            status = result["status"]
+            stats[status] = stats.get(status, 0) + 1
+            
+            if status == "updated":
+                print(f"[OK] {map_path.name} -> {result.get('hash', '')[:8]}")
+            elif status == "skip":
+                print(f"[SKIP] {map_path.name} (ja atualizado)")
+            elif status == "no_pdf":
+                print(f"[NOPDF] {map_path.name}")
+            else:
+                print(f"[ERR] {map_path.name}: {result.get('reason', '')}")
+        
+        print("-" * 60)
+        print(f"Atualizados: {stats['updated']}")
+        print(f"Ignorados: {stats['skip']}")
+        print(f"Sem PDF: {stats['no_pdf']}")
+        print(f"Erros: {stats['error']}")
+        
+        # Salvar cache do identifier
+        identifier._save_cache()
 
 
 if __name__ == "__main__":
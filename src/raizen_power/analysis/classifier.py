@@ -1,17 +1,18 @@
 import re
-import unicodedata
-import pandas as pd
 import fitz  # PyMuPDF
-from pathlib import Path
 from enum import Enum, auto
 from typing import Optional, List, Dict, Tuple, Set, Any
 from dataclasses import dataclass
 
-# Caminhos para arquivos de referência
-# Ajustar conforme necessário ou mover para arquivo de configuração
-PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
-EXCEL_BI = PROJECT_ROOT / "data/reference/AreaatuadistbaseBI.xlsx"
-EXCEL_MUNICIPIO = PROJECT_ROOT / "data/reference/PAINEL DE DESEMPENHO DAS DISTRIBUIDORAS POR MUNICÍPIO.xlsx"
+# Bases de referência (planilhas + snapshot) ficam no gazetteer compartilhado
+from raizen_power.utils.gazetteer import (
+    PROJECT_ROOT,
+    EXCEL_BI,
+    EXCEL_MUNICIPIO,
+    PALAVRAS_GENERICAS,
+    fold_text,
+    get_gazetteer,
+)
 
 class ContractCategory(Enum):
     SIMPLES = auto()      # <= 7 paginas
@@ -32,75 +33,115 @@ RAIZEN_ADDRESSES = [
     "RAIZEN GD LTDA"
 ]
 
-PALAVRAS_GENERICAS = {
-    'EMPRESA', 'COOPERATIVA', 'CENTRAIS', 'COMPANHIA', 'DISTRIBUIDORA',
-    'SOCIEDADE', 'ELETRICA', 'ENERGIA', 'FORCA', 'SERVICOS', 'LTDA',
-    'NOVA', 'SISTEMA', 'GRUPO', 'REGIONAL', 'MUNICIPAL'
-}
-
 # Cache das bases de dados
 _SORTED_DISTS = None
 _CITY_TO_DIST = None
+_DIST_MATCHER = None
+
+# Nomes com até este tamanho só casam como palavra inteira (\bRGE\b)
+SHORT_NAME_MAX_LEN = 4
 
 def normalize_text(text: Any) -> str:
-    if not isinstance(text, str): return ""
-    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
-    return text.upper().strip()
+    return fold_text(text)
 
 def is_raizen_address(text: str) -> bool:
     text_norm = normalize_text(text)
     return any(addr in text_norm for addr in RAIZEN_ADDRESSES)
 
+def _trie_pattern(names: List[str]) -> str:
+    """
+    Monta uma regex em forma de trie (prefixos compartilhados).
+    
+    Os quantificadores são gulosos, então em cada posição o nome mais longo
+    é tentado primeiro e o backtracking recua para os mais curtos.
+    """
+    trie: Dict[str, Any] = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node: Dict[str, Any]) -> str:
+        is_end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if is_end else body
+    
+    return build(trie)
+
+
+class DistributorMatcher:
+    """
+    Localiza todas as menções a distribuidoras em uma única passada.
+    
+    Os nomes viram duas regex em forma de trie (uma para nomes longos, que
+    casam como substring, e outra para nomes curtos, que exigem limite de
+    palavra). A busca recomeça uma posição após o início de cada ocorrência,
+    então menções sobrepostas também são capturadas (em cada posição, o nome
+    mais longo que começa ali). Entre os candidatos vence o de maior
+    prioridade na lista ordenada por tamanho (mesma regra do laço antigo
+    sobre sorted_dists).
+    """
+    
+    def __init__(self, names: List[str]):
+        self.names = sorted(set(names), key=lambda d: (-len(d), d))
+        self._rank = {name: i for i, name in enumerate(self.names)}
+        
+        long_names = [d for d in self.names if len(d) > SHORT_NAME_MAX_LEN]
+        short_names = [d for d in self.names if len(d) <= SHORT_NAME_MAX_LEN]
+        self._long_re = re.compile(_trie_pattern(long_names)) if long_names else None
+        self._short_re = re.compile(rf'\b(?:{_trie_pattern(short_names)})\b') if short_names else None
+    
+    def find_all(self, text: str) -> Set[str]:
+        """Todos os nomes de distribuidora presentes no texto (já normalizado)."""
+        found = set()
+        for regex in (self._long_re, self._short_re):
+            if regex is None:
+                continue
+            match = regex.search(text)
+            while match:
+                found.add(match.group())
+                match = regex.search(text, match.start() + 1)
+        return found
+    
+    def best(self, text: str) -> Optional[str]:
+        """Nome de maior prioridade (mais longo) presente no texto, ou None."""
+        found = self.find_all(text)
+        return min(found, key=self._rank.__getitem__) if found else None
+
+
+def get_distributor_matcher() -> Optional[DistributorMatcher]:
+    """Matcher construído uma única vez a partir das bases carregadas."""
+    global _DIST_MATCHER
+    if _DIST_MATCHER is None:
+        sorted_dists, _ = load_databases()
+        if sorted_dists:
+            _DIST_MATCHER = DistributorMatcher(sorted_dists)
+    return _DIST_MATCHER
+
+
 def load_databases() -> Tuple[List[str], Dict[str, str]]:
+    """
+    Retorna (nomes de distribuidoras ordenados, município -> distribuidora).
+    
+    Os índices vêm do snapshot do gazetteer (reconstruído só quando as
+    planilhas mudam), sem reler os Excel a cada processo.
+    """
     global _SORTED_DISTS, _CITY_TO_DIST
     if _SORTED_DISTS is not None and _CITY_TO_DIST is not None:
         return _SORTED_DISTS, _CITY_TO_DIST
 
-    try:
-        if not EXCEL_MUNICIPIO.exists() or not EXCEL_BI.exists():
-            print(f"Bases de dados não encontradas em {PROJECT_ROOT}/data/reference/")
-            return [], {}
-
-        # 1. Base Municípios
-        df_mun = pd.read_excel(EXCEL_MUNICIPIO)
-        city_to_dist = {}
-        for _, row in df_mun.iterrows():
-            city = normalize_text(str(row['Município']))
-            dist = str(row['Distribuidora']).strip()
-            if city and len(city) >= 3:
-                city_to_dist[city] = dist
-        
-        # 2. Base Distribuidoras
-        df_bi = pd.read_excel(EXCEL_BI)
-        dist_names = set()
-        for _, row in df_bi.iterrows():
-            sigla = normalize_text(str(row['SIGLA']))
-            razao = normalize_text(str(row['Razão Social']))
-            if len(sigla) > 2: dist_names.add(sigla)
-            if len(razao) > 3: 
-                dist_names.add(razao)
-                first = razao.split()[0] if razao.split() else ""
-                if len(first) > 3 and first not in PALAVRAS_GENERICAS:
-                    dist_names.add(first)
-        
-        # Casos especiais
-        dist_names.update([
-            "CPFL PAULISTA", "CPFL PIRATININGA", "CPFL", 
-            "ENERGISA MT", "ENERGISA MS", "ENERGISA",
-            "EQUATORIAL", "ENEL SP", "ENEL RJ", "ENEL CE", "ENEL GO", "ENEL",
-            "COELBA", "COELCE", "CELESC", "CELPE", "COPEL", "CEMIG", 
-            "RGE", "EDP", "LIGHT", "ELEKTRO", "NEOENERGIA"
-        ])
-        
-        sorted_dists = sorted(list(dist_names), key=len, reverse=True)
-        
-        _SORTED_DISTS = sorted_dists
-        _CITY_TO_DIST = city_to_dist
-        return sorted_dists, city_to_dist
-    except Exception as e:
-        print(f"Erro ao carregar bases: {e}")
+    gazetteer = get_gazetteer()
+    if not gazetteer.available:
         return [], {}
 
+    _SORTED_DISTS = gazetteer.dist_names
+    _CITY_TO_DIST = gazetteer.city_to_dist
+    return _SORTED_DISTS, _CITY_TO_DIST
+
 def extract_client_city(text_norm: str) -> Optional[str]:
     if is_raizen_address(text_norm): return None
     
@@ -128,6 +169,7 @@ def identify_distributor_from_text(text: str) -> str:
     """Identifica distribuidora a partir do texto extraído (otimizado)."""
     sorted_dists, city_to_dist = load_databases()
     if not sorted_dists: return "DESCONHECIDO"
+    matcher = get_distributor_matcher()
 
     try:
         if not text: return "ERRO_OCR"
@@ -138,13 +180,9 @@ def identify_distributor_from_text(text: str) -> str:
         for i, line in enumerate(lines):
             if "DISTRIBUIDORA" in line:
                 context = line + " " + (lines[i+1] if i+1 < len(lines) else "")
-                for d in sorted_dists:
-                    if len(d) <= 4:
-                        if re.search(rf'\b{re.escape(d)}\b', context):
-                            return d.replace(" ", "_")
-                    else:
-                        if d in context:
-                            return d.replace(" ", "_")
+                d = matcher.best(context)
+                if d:
+                    return d.replace(" ", "_")
         
         # 2. Cidade do Cliente
         # Tentar bloco de endereço primeiro
@@ -164,13 +202,9 @@ def identify_distributor_from_text(text: str) -> str:
                 return normalize_text(city_to_dist[city]).replace(" ", "_")
         
         # 3. Busca Global
-        for d in sorted_dists:
-            if len(d) <= 4:
-                if re.search(rf'\b{re.escape(d)}\b', text_norm):
-                    return d.replace(" ", "_")
-            else:
-                if d in text_norm:
-                    return d.replace(" ", "_")
+        d = matcher.best(text_norm)
+        if d:
+            return d.replace(" ", "_")
                     
         return "OUTRAS_DESCONHECIDAS"
     except Exception as e:
@@ -1,13 +1,11 @@
 """
 Diagnostico de Regex - testa padroes contra texto real dos PDFs
 """
-import sys
 import re
 import json
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from src.extrator_contratos.table_extractor import open_pdf, extract_all_text_from_pdf
+from raizen_power.extraction.table_extractor import open_pdf, extract_all_text_from_pdf
 
 # Campos criticos e regex alternativas para testar
 REGEX_ALTERNATIVAS = {
@@ -0,0 +1,181 @@
+"""
+Perfil de custo dos padrões regex (embutidos e dos mapas).
+
+Mede o tempo de cada padrão sobre uma amostra do corpus e sobre textos
+adversariais montados a partir do próprio padrão (regex_guard), e lista os
+que passam do orçamento no pior caso. Complementa o diagnostico_regex (que
+verifica se os padrões encontram o valor) com o quanto custam para isso.
+
+Uso:
+    python -m raizen_power.analysis.regex_profiler --corpus contratos_por_paginas --sample 50
+    python -m raizen_power.analysis.regex_profiler --maps maps --budget-ms 100 --output output/regex_profile.json
+"""
+import argparse
+import json
+import logging
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Tuple
+
+from raizen_power.analysis.diagnostico_regex import REGEX_ALTERNATIVAS
+from raizen_power.extraction.map_manager import FIELD_FLAGS, MapManager
+from raizen_power.extraction.patterns import PATTERN_REGISTRY
+from raizen_power.utils.regex_guard import (
+    DEFAULT_ADVERSARIAL_LENGTH,
+    DEFAULT_SAVE_BUDGET_MS,
+    adversarial_inputs,
+    measure_worst_many,
+)
+
+logger = logging.getLogger(__name__)
+
+# Buscas mais longas que budget_ms * CAP_FACTOR são interrompidas (timeouts)
+CAP_FACTOR = 10
+
+
+def builtin_patterns() -> Iterator[Tuple[str, Pattern]]:
+    """Padrões do PATTERN_REGISTRY e as alternativas do diagnóstico de regex."""
+    yield from PATTERN_REGISTRY.all_patterns()
+    for campo, regex_list in REGEX_ALTERNATIVAS.items():
+        for i, regex in enumerate(regex_list):
+            yield f'DIAGNOSTICO.{campo}[{i}]', re.compile(regex, re.IGNORECASE | re.MULTILINE)
+
+
+def map_patterns(manager: MapManager) -> Iterator[Tuple[str, Pattern]]:
+    """Regex de todos os campos dos mapas aprovados (id: "mapa.campo")."""
+    for name, mapa in manager.load_all().items():
+        for campo, config in mapa.get('campos', {}).items():
+            regex = (config or {}).get('regex', '')
+            if not regex:
+                continue
+            try:
+                yield f'{name}.{campo}', re.compile(regex, FIELD_FLAGS)
+            except re.error as e:
+                logger.warning(f"Regex inválido em {name}.{campo}: {e}")
+
+
+def sample_texts(corpus_dir: Path, sample: int = 50, max_pages: int = 50, seed: int = 0) -> List[str]:
+    """
+    Texto de uma amostra aleatória dos PDFs do corpus (sem OCR).
+
+    max_pages alto de propósito: os casos patológicos são os contratos
+    guarda-chuva longos.
+    """
+    from raizen_power.extraction.table_extractor import open_pdf, extract_all_text_from_pdf
+
+    pdfs = sorted(Path(corpus_dir).rglob('*.pdf'))
+    if len(pdfs) > sample:
+        pdfs = random.Random(seed).sample(pdfs, sample)
+
+    texts = []
+    for pdf_path in pdfs:
+        try:
+            with open_pdf(str(pdf_path)) as pdf:
+                texts.append(extract_all_text_from_pdf(pdf, max_pages=max_pages, use_ocr_fallback=False))
+        except Exception as e:
+            logger.warning(f"Falha ao ler {pdf_path.name}: {e}")
+    return texts
+
+
+def profile_patterns(
+    patterns: List[Tuple[str, Pattern]],
+    texts: List[str],
+    budget_ms: float = DEFAULT_SAVE_BUDGET_MS,
+    adversarial: bool = True,
+    adversarial_length: int = DEFAULT_ADVERSARIAL_LENGTH
+) -> List[Dict[str, Any]]:
+    """
+    Custo de cada padrão no corpus e (opcionalmente) em textos adversariais.
+
+    Returns:
+        Uma linha por padrão, do pior caso mais lento para o mais rápido:
+        {'padrao', 'regex', 'corpus': {...}, 'adversarial': {...},
+         'pior_ms', 'acima_orcamento'}
+    """
+    cap_ms = budget_ms * CAP_FACTOR
+    report = []
+
+    # measure_worst_many: sem SIGALRM (Windows) mede em processo separado
+    # com prazo, então um padrão catastrófico não trava o perfil
+    measured = {}
+    if texts:
+        measured['corpus'] = measure_worst_many(
+            [(pattern_id, pattern, texts) for pattern_id, pattern in patterns], cap_ms
+        )
+    if adversarial:
+        measured['adversarial'] = measure_worst_many(
+            [
+                (pattern_id, pattern, adversarial_inputs(pattern.pattern, adversarial_length))
+                for pattern_id, pattern in patterns
+            ],
+            cap_ms
+        )
+
+    for i, (pattern_id, pattern) in enumerate(patterns):
+        costs = {name: measured[name][i] for name in measured}
+        report.append({
+            'padrao': pattern_id,
+            'regex': pattern.pattern,
+            **{
+                name: {
+                    'pior_ms': cost.worst_ms,
+                    'media_ms': cost.mean_ms,
+                    'amostras': cost.samples,
+                    'timeouts': cost.timeouts,
+                    'pior_amostra': cost.worst_sample,
+                }
+                for name, cost in costs.items()
+            },
+            'pior_ms': max((cost.worst_ms for cost in costs.values()), default=0.0),
+            'acima_orcamento': any(cost.over_budget(budget_ms) for cost in costs.values()),
+        })
+
+    report.sort(key=lambda row: -row['pior_ms'])
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Perfil de custo dos padrões regex")
+    parser.add_argument('--corpus', type=Path, default=None,
+                        help="Pasta de PDFs para a amostra (sem ela, só textos adversariais)")
+    parser.add_argument('--maps', type=Path, default=None,
+                        help="Pasta de mapas cujos regex também serão medidos")
+    parser.add_argument('--sample', type=int, default=50, help="PDFs sorteados do corpus")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_SAVE_BUDGET_MS,
+                        help="Orçamento por busca (ms)")
+    parser.add_argument('--no-adversarial', action='store_true',
+                        help="Não mede os textos adversariais")
+    parser.add_argument('--output', type=Path, default=None, help="JSON com o relatório completo")
+    args = parser.parse_args(argv)
+
+    patterns = list(builtin_patterns())
+    if args.maps:
+        patterns.extend(map_patterns(MapManager(args.maps)))
+
+    texts = sample_texts(args.corpus, args.sample) if args.corpus else []
+    print(f"Medindo {len(patterns)} padrões em {len(texts)} textos do corpus...")
+
+    report = profile_patterns(patterns, texts, args.budget_ms, adversarial=not args.no_adversarial)
+    flagged = [row for row in report if row['acima_orcamento']]
+
+    print(f"\n{len(flagged)} padrões acima de {args.budget_ms:.0f} ms no pior caso:")
+    for row in flagged:
+        timeouts = sum(row.get(name, {}).get('timeouts', 0) for name in ('corpus', 'adversarial'))
+        suffix = f" ({timeouts} timeouts)" if timeouts else ""
+        print(f"  {row['pior_ms']:>9.1f} ms  {row['padrao']}{suffix}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'orcamento_ms': args.budget_ms, 'textos_corpus': len(texts), 'padroes': report},
+                f, ensure_ascii=False, indent=2
+            )
+        print(f"\n💾 {args.output}")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""
+Benchmark de performance com corpus sintético de contratos.
+
+Gerar corpus:   from raizen_power.benchmark import generate_corpus
+Executar:       python -m raizen_power.benchmark.runner
+"""
+from .corpus import generate_corpus, generate_pdf, load_corpus
+
+__all__ = ['generate_corpus', 'generate_pdf', 'load_corpus']
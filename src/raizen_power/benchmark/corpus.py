@@ -0,0 +1,289 @@
+"""
+Gerador de corpus sintético de contratos (PyMuPDF).
+
+Contratos reais não podem ser compartilhados, então o benchmark usa PDFs
+gerados com dados fictícios que reproduzem os layouts suportados:
+
+- MODELO_1_VISUAL: termo de adesão com blocos "CONSORCIADA (VOCÊ)"
+- MODELO_2_TABULAR: qualificação da consorciada em tabela
+- ESCANEADO: páginas apenas com imagem (aciona o fallback de OCR)
+- GUARDA_CHUVA: Anexo I com 10/100/500 instalações em tabelas
+
+Uso:
+    from raizen_power.benchmark.corpus import generate_corpus
+    items = generate_corpus(Path("output/bench_corpus"))
+"""
+import json
+import random
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+CORPUS_MANIFEST = "corpus.json"
+
+# (tipo, instalações no Anexo I)
+DEFAULT_SPECS: List[Tuple[str, int]] = [
+    ('MODELO_1_VISUAL', 1),
+    ('MODELO_2_TABULAR', 1),
+    ('ESCANEADO', 1),
+    ('GUARDA_CHUVA', 10),
+    ('GUARDA_CHUVA', 100),
+    ('GUARDA_CHUVA', 500),
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = fitz.paper_size("a4")
+MARGIN = 50
+LINE_HEIGHT = 14
+FONT_SIZE = 10
+
+CIDADES = [
+    ("Campinas", "SP", "CPFL PAULISTA"),
+    ("Belo Horizonte", "MG", "CEMIG"),
+    ("Rio de Janeiro", "RJ", "LIGHT"),
+    ("Salvador", "BA", "COELBA"),
+    ("São Paulo", "SP", "ENEL SP"),
+]
+
+CLAUSULAS = (
+    "A CONSORCIADA declara ter lido e concordado com as condições gerais do consórcio, "
+    "incluindo a forma de rateio dos créditos de energia compensados na fatura da "
+    "distribuidora e o prazo mínimo de permanência previsto neste termo."
+)
+
+
+@dataclass
+class CorpusItem:
+    """PDF sintético gerado e o resultado esperado."""
+    arquivo: str
+    tipo: str
+    instalacoes: int
+    paginas: int
+    cnpj: str
+
+
+def _cnpj(rng: random.Random) -> str:
+    """CNPJ formatado com dígitos verificadores válidos."""
+    base = [rng.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for weights in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        rest = sum(d * w for d, w in zip(base, weights)) % 11
+        base.append(0 if rest < 2 else 11 - rest)
+    d = ''.join(map(str, base))
+    return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"
+
+
+def _instalacoes(rng: random.Random, count: int) -> List[str]:
+    """Números de instalação únicos de 9 dígitos."""
+    numbers = set()
+    while len(numbers) < count:
+        numbers.add(str(rng.randint(100_000_000, 999_999_999)))
+    return sorted(numbers)
+
+
+class _Writer:
+    """
+    Escreve linhas de texto paginando automaticamente.
+
+    Usa um único Shape por página (um commit por página em vez de um por
+    célula), senão gerar o guarda-chuva de 500 instalações leva segundos.
+    """
+
+    def __init__(self, doc: fitz.Document):
+        self.doc = doc
+        self.shape = None
+        self.y = 0.0
+        self.new_page()
+
+    def new_page(self) -> None:
+        self.close()
+        page = self.doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.shape = page.new_shape()
+        self.y = MARGIN
+
+    def close(self) -> None:
+        """Grava o conteúdo pendente da página atual."""
+        if self.shape is not None:
+            self.shape.commit()
+            self.shape = None
+
+    def line(self, text: str = '', size: float = FONT_SIZE) -> None:
+        if self.y + LINE_HEIGHT > PAGE_HEIGHT - MARGIN:
+            self.new_page()
+        self.shape.insert_text((MARGIN, self.y + size), text, fontname="helv", fontsize=size)
+        self.y += LINE_HEIGHT
+
+    def paragraph(self, text: str, width: int = 95) -> None:
+        words, current = text.split(), ''
+        for word in words:
+            if len(current) + len(word) + 1 > width:
+                self.line(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        if current:
+            self.line(current)
+
+    def table(self, rows: List[List[str]], col_widths: List[float]) -> None:
+        """Desenha tabela com grade (detectável por find_tables), repetindo o cabeçalho."""
+        header = rows[0]
+        self._table_row(header, col_widths)
+        for row in rows[1:]:
+            if self.y + LINE_HEIGHT > PAGE_HEIGHT - MARGIN:
+                self.new_page()
+                self._table_row(header, col_widths)
+            self._table_row(row, col_widths)
+
+    def _table_row(self, row: List[str], col_widths: List[float]) -> None:
+        x = MARGIN
+        for cell, width in zip(row, col_widths):
+            self.shape.draw_rect(fitz.Rect(x, self.y, x + width, self.y + LINE_HEIGHT))
+            self.shape.insert_text((x + 2, self.y + 10), cell, fontname="helv", fontsize=8)
+            x += width
+        self.shape.finish(color=(0, 0, 0), width=0.5)
+        self.y += LINE_HEIGHT
+
+
+def _write_modelo_1(doc: fitz.Document, rng: random.Random, cnpj: str) -> None:
+    cidade, uf, dist = rng.choice(CIDADES)
+    w = _Writer(doc)
+    w.line("TERMO DE ADESÃO AO CONSÓRCIO", size=14)
+    w.line()
+    w.line("CONSORCIADA (VOCÊ)")
+    w.line("Contratante:")
+    w.line(f"Razão Social: EMPRESA SINTETICA {rng.randint(1, 9999):04d} LTDA - CNPJ {cnpj}")
+    w.line(f"Endereço: Rua das Flores, {rng.randint(1, 2000)}, Centro, {cidade}, {uf}, CEP: 13000-000")
+    w.line(f"E-mail: contato{rng.randint(1, 999)}@exemplo.com.br")
+    w.line(f"Distribuidora: {dist}")
+    w.line(f"Nº da Instalação (Unidade Consumidora): {_instalacoes(rng, 1)[0]}")
+    w.line(f"Nº do Cliente: {rng.randint(1_000_000, 9_999_999)}")
+    w.line(f"Quantidade de Cotas: {rng.randint(1, 500)},00")
+    w.line(f"Valor da Cota: R$ {rng.randint(100, 900)},{rng.randint(10, 99)}")
+    w.line(f"Performance Alvo: {rng.randint(1000, 90000):,} kWh".replace(',', '.'))
+    w.line("Sua parceria com a Raízen")
+    for _ in range(3):
+        w.line()
+        w.paragraph(CLAUSULAS)
+    w.close()
+
+
+def _write_modelo_2(doc: fitz.Document, rng: random.Random, cnpj: str) -> None:
+    cidade, uf, dist = rng.choice(CIDADES)
+    w = _Writer(doc)
+    w.line("TERMO DE ADESÃO AO CONSÓRCIO", size=14)
+    w.line()
+    w.line("1. DA QUALIFICAÇÃO DA CONSORCIADA")
+    w.line("DADOS DA CONSORCIADA:")
+    w.table([
+        ["Campo", "Valor"],
+        ["Razão Social", f"EMPRESA TABULAR {rng.randint(1, 9999):04d} S.A."],
+        ["CNPJ", cnpj],
+        ["Endereço", f"Av. Brasil, {rng.randint(1, 2000)}, {cidade}, {uf}"],
+        ["E-mail", f"financeiro{rng.randint(1, 999)}@exemplo.com.br"],
+        ["Distribuidora", dist],
+        ["Nº da Instalação", _instalacoes(rng, 1)[0]],
+    ], [150, 340])
+    w.line()
+    w.line("DADOS DO REPRESENTANTE LEGAL:")
+    w.line(f"Nome: REPRESENTANTE SINTETICO {rng.randint(1, 99)}")
+    for _ in range(3):
+        w.line()
+        w.paragraph(CLAUSULAS)
+    w.close()
+
+
+def _write_guarda_chuva(doc: fitz.Document, rng: random.Random, cnpj: str, count: int) -> None:
+    _, _, dist = rng.choice(CIDADES)
+    w = _Writer(doc)
+    w.line("TERMO DE ADESÃO AO CONSÓRCIO - Contrato Guarda-Chuva", size=14)
+    w.line()
+    w.line("CONSORCIADA (VOCÊ)")
+    w.line(f"Razão Social: GRUPO SINTETICO {rng.randint(1, 9999):04d} S.A. - CNPJ {cnpj}")
+    w.line(f"E-mail: energia{rng.randint(1, 999)}@exemplo.com.br")
+    w.paragraph(CLAUSULAS)
+    w.new_page()
+    w.line("ANEXO I - UNIDADE(S) CONSUMIDORA(S)", size=12)
+    rows = [["Nº Instalação", "Nº Cliente", "Qtd Cotas", "Valor Cota", "Performance Alvo kWh", "Distribuidora"]]
+    for inst in _instalacoes(rng, count):
+        rows.append([
+            inst,
+            str(rng.randint(1_000_000, 9_999_999)),
+            f"{rng.randint(1, 50)},00",
+            f"{rng.randint(100, 900)},{rng.randint(10, 99)}",
+            str(rng.randint(500, 20000)),
+            dist,
+        ])
+    w.table(rows, [85, 75, 60, 65, 115, 95])
+    w.close()
+
+
+def _write_escaneado(doc: fitz.Document, rng: random.Random, cnpj: str) -> None:
+    """Renderiza um MODELO_1 como imagem: o PDF final não tem camada de texto."""
+    source = fitz.open()
+    _write_modelo_1(source, rng, cnpj)
+    for page in source:
+        pix = page.get_pixmap(dpi=100)
+        target = doc.new_page(width=page.rect.width, height=page.rect.height)
+        target.insert_image(target.rect, pixmap=pix)
+    source.close()
+
+
+def generate_pdf(path: Path, tipo: str, instalacoes: int = 1, seed: int = 0) -> CorpusItem:
+    """Gera um PDF sintético do tipo informado."""
+    rng = random.Random(f"{tipo}-{instalacoes}-{seed}")
+    cnpj = _cnpj(rng)
+    doc = fitz.open()
+
+    if tipo == 'MODELO_1_VISUAL':
+        _write_modelo_1(doc, rng, cnpj)
+    elif tipo == 'MODELO_2_TABULAR':
+        _write_modelo_2(doc, rng, cnpj)
+    elif tipo == 'ESCANEADO':
+        _write_escaneado(doc, rng, cnpj)
+    elif tipo == 'GUARDA_CHUVA':
+        _write_guarda_chuva(doc, rng, cnpj, instalacoes)
+    else:
+        raise ValueError(f"Tipo de contrato sintético desconhecido: {tipo}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc.save(str(path), garbage=3, deflate=True)
+    item = CorpusItem(arquivo=path.name, tipo=tipo, instalacoes=instalacoes,
+                      paginas=len(doc), cnpj=cnpj)
+    doc.close()
+    return item
+
+
+def generate_corpus(
+    output_dir: Path,
+    specs: List[Tuple[str, int]] = None,
+    copies: int = 1,
+    seed: int = 42
+) -> List[CorpusItem]:
+    """
+    Gera o corpus sintético e grava o manifesto corpus.json.
+
+    Args:
+        output_dir: Pasta de destino dos PDFs
+        specs: Lista de (tipo, instalações); padrão DEFAULT_SPECS
+        copies: Variações (dados diferentes) de cada especificação
+        seed: Semente para geração determinística
+    """
+    output_dir = Path(output_dir)
+    items = []
+    for tipo, instalacoes in specs or DEFAULT_SPECS:
+        for copy in range(copies):
+            name = f"{tipo.lower()}_{instalacoes:03d}_{copy:02d}.pdf"
+            items.append(generate_pdf(output_dir / name, tipo, instalacoes, seed=seed + copy))
+
+    with open(output_dir / CORPUS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump([asdict(item) for item in items], f, ensure_ascii=False, indent=2)
+    return items
+
+
+def load_corpus(corpus_dir: Path) -> List[Dict]:
+    """Lê o manifesto de um corpus já gerado (lista vazia se não existir)."""
+    manifest = Path(corpus_dir) / CORPUS_MANIFEST
+    if not manifest.exists():
+        return []
+    with open(manifest, 'r', encoding='utf-8') as f:
+        return json.load(f)
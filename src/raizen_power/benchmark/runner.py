@@ -0,0 +1,241 @@
+"""
+Benchmark dos extratores sobre o corpus sintético.
+
+Mede, para cada alvo, vazão (PDFs/s), latência por PDF (p50/p95/max),
+tempo por etapa (ContractExtractor, via ExtractionResult.timings) e pico de
+memória (RSS). Cada alvo roda em um processo próprio, então o pico de RSS
+de um não contamina o do outro.
+
+Os resultados são gravados em JSON (com o commit atual) para comparação
+entre versões:
+
+    python -m raizen_power.benchmark.runner --output output/benchmarks
+    python -m raizen_power.benchmark.runner --compare output/benchmarks/anterior.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from raizen_power.benchmark.corpus import generate_corpus, load_corpus
+from raizen_power.utils.timing import TimingCollector, percentile
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ['contract_extractor', 'uc_extractor_v5', 'uc_multi_extractor', 'pdf_model_identifier']
+
+
+def _build_target(name: str, work_dir: Path, resources: ExitStack) -> Callable[[str], Any]:
+    """
+    Instancia o alvo e retorna a função que processa um PDF.
+
+    Recursos abertos pelo alvo (bancos SQLite) são registrados em resources,
+    para serem fechados antes de apagar work_dir (no Windows um arquivo
+    aberto não pode ser removido).
+    """
+    if name == 'contract_extractor':
+        from raizen_power.extraction.extractor import ContractExtractor
+        return ContractExtractor().extract_from_pdf
+    if name == 'uc_extractor_v5':
+        from raizen_power.extraction.uc_extractor_v5 import UCExtractorV5
+        return UCExtractorV5().extract_from_pdf
+    if name == 'uc_multi_extractor':
+        from raizen_power.extraction.uc_multi_extractor import UCMultiExtractor
+        return UCMultiExtractor().extract_from_pdf
+    if name == 'pdf_model_identifier':
+        from raizen_power.utils.pdf_fingerprint import PDFModelIdentifier
+        identifier = resources.enter_context(PDFModelIdentifier(
+            db_path=str(work_dir / "pdf_models_db.json"),
+            cache_path=str(work_dir / "fingerprint_cache.json"),
+            use_cache=False
+        ))
+        return lambda path: identifier.classify_pdf(path, "BENCHMARK")
+    raise ValueError(f"Alvo de benchmark desconhecido: {name}")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo atual em MB (None se indisponível)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta em KB, macOS em bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def _run_target(name: str, pdf_paths: List[str], repeat: int) -> Dict[str, Any]:
+    """Executa um alvo sobre o corpus (dentro de um processo dedicado)."""
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as resources:
+        process = _build_target(name, Path(tmp), resources)
+        stages = TimingCollector()
+        latencies: Dict[str, List[float]] = {}
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for path in pdf_paths:
+                file_start = time.perf_counter()
+                result = process(path)
+                latencies.setdefault(Path(path).name, []).append(time.perf_counter() - file_start)
+                timings = getattr(result, 'timings', None)
+                if timings:
+                    stages.add(Path(path).name, timings)
+        elapsed = time.perf_counter() - start
+
+    values = sorted(v for per_file in latencies.values() for v in per_file)
+    summary = {
+        'pdfs': len(values),
+        'segundos': round(elapsed, 4),
+        'pdfs_por_segundo': round(len(values) / elapsed, 2) if elapsed else 0.0,
+        'latencia': {
+            'p50': round(percentile(values, 50), 4),
+            'p95': round(percentile(values, 95), 4),
+            'max': round(values[-1], 4) if values else 0.0,
+        },
+        'latencia_por_arquivo': {
+            name: round(min(per_file), 4) for name, per_file in sorted(latencies.items())
+        },
+        'pico_rss_mb': peak_rss_mb(),
+    }
+    if len(stages):
+        summary['etapas'] = stages.summary()['etapas']
+    return summary
+
+
+def _current_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except Exception:
+        return 'desconhecido'
+
+
+def run_benchmark(
+    corpus_dir: Path,
+    targets: List[str] = None,
+    repeat: int = 1,
+    copies: int = 1
+) -> Dict[str, Any]:
+    """
+    Executa o benchmark (gera o corpus se a pasta não tiver um).
+
+    Args:
+        corpus_dir: Pasta do corpus sintético
+        targets: Alvos a medir (padrão: todos de TARGETS)
+        repeat: Quantas vezes processar o corpus por alvo
+        copies: Variações por especificação ao gerar o corpus
+    """
+    corpus_dir = Path(corpus_dir)
+    corpus = load_corpus(corpus_dir)
+    if not corpus:
+        print(f"Gerando corpus sintético em {corpus_dir}...")
+        generate_corpus(corpus_dir, copies=copies)
+        corpus = load_corpus(corpus_dir)
+
+    pdf_paths = [str(corpus_dir / item['arquivo']) for item in corpus]
+
+    report = {
+        'commit': _current_commit(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'corpus': {
+            'pdfs': len(corpus),
+            'paginas': sum(item['paginas'] for item in corpus),
+            'repeticoes': repeat,
+        },
+        'resultados': {},
+    }
+
+    # Processo novo por alvo: RSS isolado e nenhum estado compartilhado
+    ctx = multiprocessing.get_context('spawn')
+    for name in targets or TARGETS:
+        print(f"▶ {name}...", flush=True)
+        with ctx.Pool(1) as pool:
+            try:
+                report['resultados'][name] = pool.apply(_run_target, (name, pdf_paths, repeat))
+            except Exception as e:
+                logger.error(f"Falha no alvo {name}: {e}")
+                report['resultados'][name] = {'erro': str(e)}
+
+    return report
+
+
+def compare_reports(current: Dict[str, Any], previous: Dict[str, Any]) -> List[str]:
+    """Linhas com a variação de vazão/latência/RSS em relação a outro resultado."""
+    lines = [f"Comparação: {previous.get('commit')} → {current.get('commit')}"]
+    for name, result in current['resultados'].items():
+        before = previous.get('resultados', {}).get(name)
+        if not before or 'erro' in result or 'erro' in before:
+            continue
+
+        def delta(new: float, old: float) -> str:
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+        lines.append(
+            f"  {name}: {result['pdfs_por_segundo']} PDFs/s ({delta(result['pdfs_por_segundo'], before['pdfs_por_segundo'])}), "
+            f"p95 {result['latencia']['p95']}s ({delta(result['latencia']['p95'], before['latencia']['p95'])}), "
+            f"RSS {result['pico_rss_mb']} MB"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos extratores sobre corpus sintético")
+    parser.add_argument('--corpus', type=Path, default=Path("output/bench_corpus"),
+                        help="Pasta do corpus sintético (gerado se não existir)")
+    parser.add_argument('--output', type=Path, default=Path("output/benchmarks"),
+                        help="Pasta onde o JSON de resultados será gravado")
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=None,
+                        help="Alvos a medir (padrão: todos)")
+    parser.add_argument('--repeat', type=int, default=1, help="Repetições do corpus por alvo")
+    parser.add_argument('--copies', type=int, default=1,
+                        help="Variações por tipo de contrato ao gerar o corpus")
+    parser.add_argument('--compare', type=Path, default=None,
+                        help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.corpus, args.targets, args.repeat, args.copies)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    output_file = args.output / f"bench_{report['commit']}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print()
+    for name, result in report['resultados'].items():
+        if 'erro' in result:
+            print(f"✗ {name}: {result['erro']}")
+        else:
+            print(f"✓ {name}: {result['pdfs_por_segundo']} PDFs/s, "
+                  f"p50 {result['latencia']['p50']}s, p95 {result['latencia']['p95']}s, "
+                  f"RSS {result['pico_rss_mb']} MB")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print("\n" + "\n".join(compare_reports(report, json.load(f))))
+
+    print(f"\n💾 {output_file}")
+
+
+if __name__ == "__main__":
+    main()
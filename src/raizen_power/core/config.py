@@ -64,6 +64,19 @@ class ParallelConfig:
     """Configurações de processamento paralelo."""
     text_max_workers: int = 8
     ocr_max_workers: int = 2
+    chunk_size: int = 8  # PDFs pequenos agrupados por tarefa
+    small_pdf_kb: int = 512  # Abaixo disso o PDF é agrupado em chunk
+    in_flight_per_worker: int = 2  # Tarefas em voo por worker (janela limitada)
+    task_timeout_s: float = 300.0  # Prazo por PDF em um worker (0 = sem prazo)
+
+
+@dataclass
+class RegexConfig:
+    """Orçamento de tempo dos padrões regex (proteção contra backtracking)."""
+    budget_ms: int = 2000  # Limite por busca durante a extração
+    save_budget_ms: int = 250  # Limite em textos adversariais ao salvar um mapa
+    adversarial_length: int = 20000  # Tamanho dos textos adversariais
+    isolated_startup_s: float = 10.0  # Subida do processo de medição (sem SIGALRM)
 
 
 @dataclass
@@ -88,6 +101,7 @@ class Settings:
     validation: ValidationConfig = field(default_factory=ValidationConfig)
     gemini: GeminiConfig = field(default_factory=GeminiConfig)
     parallel: ParallelConfig = field(default_factory=ParallelConfig)
+    regex: RegexConfig = field(default_factory=RegexConfig)
     extraction: ExtractionConfig = field(default_factory=ExtractionConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
     
@@ -141,6 +155,16 @@ class Settings:
                 parallel=ParallelConfig(
                     text_max_workers=data.get('parallel', {}).get('text_max_workers', 8),
                     ocr_max_workers=data.get('parallel', {}).get('ocr_max_workers', 2),
+                    chunk_size=data.get('parallel', {}).get('chunk_size', 8),
+                    small_pdf_kb=data.get('parallel', {}).get('small_pdf_kb', 512),
+                    in_flight_per_worker=data.get('parallel', {}).get('in_flight_per_worker', 2),
+                    task_timeout_s=data.get('parallel', {}).get('task_timeout_s', 300.0),
+                ),
+                regex=RegexConfig(
+                    budget_ms=data.get('regex', {}).get('budget_ms', 2000),
+                    save_budget_ms=data.get('regex', {}).get('save_budget_ms', 250),
+                    adversarial_length=data.get('regex', {}).get('adversarial_length', 20000),
+                    isolated_startup_s=data.get('regex', {}).get('isolated_startup_s', 10.0),
                 ),
                 extraction=ExtractionConfig(
                     max_pages=data.get('extraction', {}).get('max_pages', 10),
@@ -163,6 +187,7 @@ class Settings:
             'validation': self.validation.__dict__,
             'gemini': self.gemini.__dict__,
             'parallel': self.parallel.__dict__,
+            'regex': self.regex.__dict__,
             'extraction': self.extraction.__dict__,
             'logging': self.logging.__dict__,
         }
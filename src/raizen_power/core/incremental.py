@@ -0,0 +1,193 @@
+"""
+Suporte aos modos incremental e watch do raizen-extractor.
+
+O manifesto registra, para cada PDF da pasta de entrada, (caminho, tamanho,
+mtime, hash) da última execução. Na execução seguinte apenas PDFs novos ou
+alterados são processados; registros de PDFs alterados ou removidos são
+descartados dos CSVs existentes antes da mesclagem.
+
+Uso:
+    manifest = RunManifest.load(output_dir / MANIFEST_FILE)
+    current = manifest.scan(pdf_dir)
+    diff = manifest.diff(current)
+    # ... processar diff.changed ...
+    records = merge_records(existing, new_records, diff.stale_names)
+    manifest.update(current)
+    manifest.save()
+"""
+import json
+import os
+import time
+import logging
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+from raizen_power.utils.extraction_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+@dataclass
+class FileEntry:
+    """Estado de um PDF na pasta de entrada."""
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str = ''
+
+
+@dataclass
+class ManifestDiff:
+    """Diferenças entre a pasta atual e a execução anterior."""
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[str]:
+        """Nomes dos PDFs que precisam ser processados."""
+        return self.added + self.modified
+
+    @property
+    def stale_names(self) -> Set[str]:
+        """Nomes cujos registros antigos devem sair dos CSVs."""
+        return set(self.modified) | set(self.removed)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} novos, {len(self.modified)} alterados, "
+            f"{len(self.removed)} removidos, {len(self.unchanged)} inalterados"
+        )
+
+
+class RunManifest:
+    """Manifesto (JSON) dos PDFs processados na última execução."""
+
+    def __init__(self, path: Path, entries: Dict[str, FileEntry] = None):
+        self.path = Path(path)
+        self.entries: Dict[str, FileEntry] = entries or {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'RunManifest':
+        """Carrega o manifesto (vazio se não existir ou estiver corrompido)."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            entries = {
+                name: FileEntry(**entry)
+                for name, entry in data.get('files', {}).items()
+            }
+            return cls(path, entries)
+        except Exception as e:
+            logger.warning(f"Manifesto inválido em {path}, ignorando: {e}")
+            return cls(path)
+
+    def save(self) -> None:
+        """Salva o manifesto de forma atômica (arquivo temporário + replace)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'files': {name: asdict(entry) for name, entry in self.entries.items()}},
+                f, ensure_ascii=False
+            )
+        os.replace(tmp_path, self.path)
+
+    def scan(self, pdf_dir: Path, settle_seconds: float = 0.0) -> Dict[str, FileEntry]:
+        """
+        Lista os PDFs da pasta com tamanho, mtime e hash.
+
+        O hash só é recalculado quando tamanho ou mtime mudaram.
+
+        Args:
+            pdf_dir: Pasta de entrada
+            settle_seconds: Ignora arquivos modificados há menos que isso
+                (ex: cópia/sincronização do OneDrive em andamento); os que
+                já estavam no manifesto ficam com a entrada anterior
+        """
+        now_ns = time.time_ns()
+        current = {}
+
+        for pdf_path in sorted(Path(pdf_dir).glob("*.pdf")):
+            try:
+                stat = pdf_path.stat()
+            except OSError:
+                continue
+
+            name = pdf_path.name
+            previous = self.entries.get(name)
+
+            if settle_seconds and (now_ns - stat.st_mtime_ns) < settle_seconds * 1e9:
+                # Ainda sendo gravado: mantém o estado anterior (se houver)
+                # para não tratar o arquivo como removido
+                if previous:
+                    current[name] = previous
+                continue
+
+            if previous and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+                sha256 = previous.sha256
+            else:
+                try:
+                    sha256 = hash_file(pdf_path)
+                except OSError as e:
+                    logger.warning(f"Não foi possível ler {pdf_path}: {e}")
+                    continue
+
+            current[name] = FileEntry(
+                path=str(pdf_path.resolve()),
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                sha256=sha256
+            )
+
+        return current
+
+    def diff(self, current: Dict[str, FileEntry]) -> ManifestDiff:
+        """Compara o estado atual da pasta com o manifesto."""
+        diff = ManifestDiff()
+
+        for name, entry in current.items():
+            previous = self.entries.get(name)
+            if previous is None:
+                diff.added.append(name)
+            elif previous.sha256 != entry.sha256:
+                diff.modified.append(name)
+            else:
+                diff.unchanged.append(name)
+
+        diff.removed = [name for name in self.entries if name not in current]
+        return diff
+
+    def update(self, current: Dict[str, FileEntry]) -> None:
+        """Substitui as entradas pelo estado atual da pasta."""
+        self.entries = dict(current)
+
+
+def merge_records(
+    existing: Iterable[Dict[str, Any]],
+    new_records: Iterable[Dict[str, Any]],
+    stale_names: Set[str]
+) -> List[Dict[str, Any]]:
+    """
+    Mescla registros novos nos existentes.
+
+    Remove dos existentes os registros de PDFs alterados/removidos e
+    também os de PDFs que acabaram de ser reprocessados.
+    """
+    new_records = list(new_records)
+    drop = set(stale_names) | {r.get('arquivo_origem') for r in new_records}
+    merged = [r for r in existing if r.get('arquivo_origem') not in drop]
+    merged.extend(new_records)
+    return merged
@@ -11,6 +11,7 @@ Exemplos:
 """
 import csv
 import sys
+import time
 import logging
 import argparse
 from pathlib import Path
@@ -21,8 +22,11 @@ import warnings
 warnings.filterwarnings('ignore')
 logging.getLogger('pdfminer').setLevel(logging.ERROR)
 
-from raizen_power.extraction.extractor import ContractExtractor
+from raizen_power.extraction.extractor import ContractExtractor, create_worker_pool, get_extractor_version, pool_is_broken
+from raizen_power.utils.extraction_cache import ExtractionCache
 from raizen_power.utils.report import generate_html_report
+from raizen_power.utils.timing import TIMINGS_FILE, TimingCollector
+from raizen_power.core.incremental import RunManifest, MANIFEST_FILE, merge_records
 
 
 # Campos do CSV
@@ -95,6 +99,25 @@ def save_csv(records: list, filepath: Path) -> None:
         writer.writerows(records)
 
 
+def load_csv(filepath: Path) -> list:
+    """Carrega registros de um CSV gerado em execução anterior."""
+    if not filepath.exists():
+        return []
+    
+    with open(filepath, 'r', newline='', encoding='utf-8-sig') as f:
+        records = list(csv.DictReader(f))
+    
+    # Restaurar tipos usados no relatório e na classificação
+    for record in records:
+        try:
+            record['confianca_score'] = int(float(record.get('confianca_score') or 0))
+        except ValueError:
+            record['confianca_score'] = 0
+        record['is_guarda_chuva'] = str(record.get('is_guarda_chuva', '')).lower() == 'true'
+    
+    return records
+
+
 from .config_loader import load_config
 
 def parse_args():
@@ -153,9 +176,165 @@ Exemplos:
         help="Número de workers para processamento paralelo (padrão: núcleos CPU - 1)"
     )
     
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Pasta do cache de extrações (padrão: <saída>/.cache)"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Desativar o cache de extrações (reprocessa todos os PDFs)"
+    )
+    
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Descartar o cache existente e reconstruí-lo nesta execução"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Processar apenas PDFs novos/alterados desde a última execução e mesclar nos CSVs"
+    )
+    
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Monitorar a pasta de entrada e processar novos contratos (implica --incremental)"
+    )
+    
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=10.0,
+        help="Intervalo em segundos entre varreduras no modo --watch (padrão: 10)"
+    )
+    
     return parser.parse_args()
 
 
+def run_extraction(extractor: ContractExtractor, pdf_paths: list, args, executor=None):
+    """Executa a extração (sequencial ou paralela) e retorna (válidos, revisão)."""
+    if args.parallel or executor is not None:
+        return extractor.process_batch_parallel(
+            pdf_paths,
+            max_workers=args.workers,
+            progress_callback=progress_callback,
+            executor=executor
+        )
+    return extractor.process_batch(
+        pdf_paths,
+        progress_callback=progress_callback
+    )
+
+
+def save_outputs(valid_records: list, review_records: list, output_dir: Path,
+                 timings: TimingCollector = None) -> None:
+    """Salva CSVs, tempos por etapa (timings.json) e relatório HTML."""
+    print("\n💾 Salvando arquivos...")
+    
+    valid_csv = output_dir / "contratos_extraidos.csv"
+    review_csv = output_dir / "contratos_revisao.csv"
+    report_html = output_dir / "relatorio.html"
+    
+    save_csv(valid_records, valid_csv)
+    print(f"   ✓ {valid_csv}")
+    
+    save_csv(review_records, review_csv)
+    print(f"   ✓ {review_csv}")
+    
+    # Tempos por etapa (apenas PDFs extraídos nesta execução, sem cache)
+    timings_summary = None
+    if timings:
+        timings_json = output_dir / TIMINGS_FILE
+        timings_summary = timings.save(timings_json)
+        print(f"   ✓ {timings_json}")
+    
+    # Gerar relatório HTML
+    generate_html_report(valid_records, review_records, str(report_html), timings=timings_summary)
+    print(f"   ✓ {report_html}")
+
+
+def run_incremental(extractor: ContractExtractor, pdf_dir: Path, output_dir: Path, args,
+                    executor=None, settle_seconds: float = 0.0) -> bool:
+    """
+    Processa apenas PDFs novos/alterados e mescla nos CSVs existentes.
+    
+    Retorna True se houve alguma mudança na pasta de entrada.
+    """
+    manifest = RunManifest.load(output_dir / MANIFEST_FILE)
+    current = manifest.scan(pdf_dir, settle_seconds=settle_seconds)
+    diff = manifest.diff(current)
+    
+    if not diff.has_changes:
+        return False
+    
+    print(f"\n🔎 Incremental: {diff.summary()}")
+    
+    new_valid, new_review = [], []
+    if diff.changed:
+        pdf_paths = [current[name].path for name in diff.changed]
+        new_valid, new_review = run_extraction(extractor, pdf_paths, args, executor=executor)
+        print()
+    
+    valid_csv = output_dir / "contratos_extraidos.csv"
+    review_csv = output_dir / "contratos_revisao.csv"
+    
+    # Registros de PDFs alterados/removidos saem de AMBOS os CSVs
+    stale = diff.stale_names | set(diff.changed)
+    valid_records = merge_records(load_csv(valid_csv), new_valid, stale)
+    review_records = merge_records(load_csv(review_csv), new_review, stale)
+    
+    # Arquivos vazios precisam ser removidos (save_csv não grava lista vazia)
+    for csv_path, records in ((valid_csv, valid_records), (review_csv, review_records)):
+        if not records and csv_path.exists():
+            csv_path.unlink()
+    
+    print(f"✓ Registros válidos: {len(valid_records):,} (+{len(new_valid):,} novos)")
+    print(f"⚠ Para revisão: {len(review_records):,} (+{len(new_review):,} novos)")
+    
+    save_outputs(valid_records, review_records, output_dir, extractor.timings)
+    
+    # Manifesto só é atualizado após os CSVs estarem gravados
+    manifest.update(current)
+    manifest.save()
+    return True
+
+
+def watch(extractor: ContractExtractor, pdf_dir: Path, output_dir: Path, args) -> None:
+    """
+    Monitora a pasta de entrada e processa novos contratos.
+    
+    Mantém o pool de workers aquecido entre as varreduras.
+    """
+    import multiprocessing
+    
+    workers = args.workers or max(1, multiprocessing.cpu_count() - 1)
+    print(f"\n👀 Monitorando {pdf_dir} a cada {args.poll_interval:g}s ({workers} workers). Ctrl+C para sair.")
+    
+    executor = create_worker_pool(workers)
+    try:
+        while True:
+            # Arquivos ainda sendo copiados (mtime recente) ficam para a próxima varredura
+            if run_incremental(extractor, pdf_dir, output_dir, args,
+                               executor=executor, settle_seconds=args.poll_interval):
+                print("\n👀 Aguardando novos contratos...")
+            if pool_is_broken(executor):
+                # Um worker morreu (PDFs afetados ficaram como erro): pool novo
+                print("\n⚠ Um worker morreu; recriando o pool de workers")
+                executor.shutdown(wait=False)
+                executor = create_worker_pool(workers)
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        print("\n\n⏹ Monitoramento encerrado.")
+    finally:
+        executor.shutdown(wait=True)
+
+
 def main():
     """Função principal de execução."""
     # Parse CLI params first
@@ -198,8 +377,45 @@ def main():
     print(f"\n📂 Entrada: {pdf_dir}")
     print(f"📁 Saída: {output_dir}")
     
-    # Listar PDFs
-    pdf_files = list(pdf_dir.glob("*.pdf"))
+    # Cache de extrações: CLI > Config > Default
+    cache_config = config.get('cache', {}) or {}
+    cache = None
+    if not args.no_cache and cache_config.get('enabled', True):
+        cache_dir = args.cache_dir or cache_config.get('dir') or (output_dir / '.cache')
+        cache = ExtractionCache(
+            Path(cache_dir).resolve(),
+            version=get_extractor_version(),
+            rebuild=args.rebuild_cache
+        )
+        print(f"🗄️  Cache: {cache.db_path}")
+    
+    # Inicializar extrator
+    extractor = ContractExtractor(cache=cache)
+    
+    # Modos incremental / watch
+    if args.watch:
+        watch(extractor, pdf_dir, output_dir, args)
+        if cache is not None:
+            print(f"   Cache: {cache.summary()}")
+            cache.close()
+        return
+    
+    if args.incremental:
+        start_time = datetime.now()
+        if not run_incremental(extractor, pdf_dir, output_dir, args):
+            print("\n✅ Nenhuma alteração desde a última execução.")
+        elapsed = (datetime.now() - start_time).total_seconds()
+        print(f"\n✅ Execução incremental concluída em {elapsed:.1f} segundos")
+        if cache is not None:
+            print(f"   Cache: {cache.summary()}")
+            cache.close()
+        return
+    
+    # Listar PDFs: o manifesto registra exatamente os arquivos processados
+    # (um PDF que chegar ou mudar durante a extração fica para o --incremental)
+    manifest = RunManifest.load(output_dir / MANIFEST_FILE)
+    current = manifest.scan(pdf_dir)
+    pdf_files = [Path(entry.path) for entry in current.values()]
     total_files = len(pdf_files)
     
     if total_files == 0:
@@ -217,29 +433,21 @@ def main():
     else:
         print("\n🔄 Iniciando extração...\n")
     
-    # Inicializar extrator
-    extractor = ContractExtractor()
-    
     # Processar em lote
     start_time = datetime.now()
     
-    if args.parallel:
-        valid_records, review_records = extractor.process_batch_parallel(
-            [str(p) for p in pdf_files],
-            max_workers=args.workers,
-            progress_callback=progress_callback
-        )
-    else:
-        valid_records, review_records = extractor.process_batch(
-            [str(p) for p in pdf_files],
-            progress_callback=progress_callback
-        )
+    valid_records, review_records = run_extraction(
+        extractor, [str(p) for p in pdf_files], args
+    )
     
     elapsed = (datetime.now() - start_time).total_seconds()
     
     print(f"\n\n✅ Extração concluída em {elapsed:.1f} segundos")
     if elapsed > 0:
         print(f"   Velocidade: {total_files / elapsed:.1f} PDFs/segundo")
+    if cache is not None:
+        print(f"   Cache: {cache.summary()}")
+        cache.close()
     
     # Estatísticas
     print("\n" + "=" * 60)
@@ -254,22 +462,15 @@ def main():
         print(f"📊 Taxa de sucesso: {success_rate:.1f}%")
     
     # Salvar CSVs
-    print("\n💾 Salvando arquivos...")
+    save_outputs(valid_records, review_records, output_dir, extractor.timings)
+    
+    # Manifesto para permitir --incremental na próxima execução
+    manifest.update(current)
+    manifest.save()
     
-    valid_csv = output_dir / "contratos_extraidos.csv"
     review_csv = output_dir / "contratos_revisao.csv"
     report_html = output_dir / "relatorio.html"
     
-    save_csv(valid_records, valid_csv)
-    print(f"   ✓ {valid_csv}")
-    
-    save_csv(review_records, review_csv)
-    print(f"   ✓ {review_csv}")
-    
-    # Gerar relatório HTML
-    generate_html_report(valid_records, review_records, str(report_html))
-    print(f"   ✓ {report_html}")
-    
     print("\n" + "=" * 60)
     print("PROCESSO CONCLUÍDO!")
     print("=" * 60)
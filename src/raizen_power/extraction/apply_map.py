@@ -8,66 +8,72 @@ Uso:
 """
 import sys
 import json
-import re
 import csv
 import argparse
 from pathlib import Path
 from datetime import datetime
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+from typing import Optional, Union
+
+from .map_manager import CompiledMap, compile_map
 from .table_extractor import open_pdf, extract_all_text_from_pdf
 from raizen_power.utils.normalizers import normalize_all
+from raizen_power.utils.task_deadline import DEFAULT_TASK_TIMEOUT_S, TaskDeadlines, terminate_pool
 
 
-def extract_with_map(text: str, mapa: dict) -> dict:
-    """Extrai campos de um texto usando o mapa."""
+def extract_with_map(text: str, mapa: Union[dict, CompiledMap]) -> dict:
+    """
+    Extrai campos de um texto usando o mapa (dict ou CompiledMap).
+    
+    Sem âncoras: cada regex é buscado no texto inteiro. Os regex são
+    compilados uma vez por mapa (compile_map), não a cada documento.
+    """
     resultado = {}
-    campos = mapa.get('campos', {})
+    compiled = compile_map(mapa)
     
-    for campo, config in campos.items():
-        if not config or not config.get('encontrado', True):
-            resultado[campo] = None
+    for field in compiled.fields:
+        if not field.configured or not field.encontrado:
+            resultado[field.campo] = None
             continue
-        
-        regex = config.get('regex', '')
-        if not regex:
-            resultado[campo] = None
-            continue
-        
-        try:
-            pattern = re.compile(regex, re.IGNORECASE | re.MULTILINE)
-            match = pattern.search(text)
-            
-            if match:
-                valor = match.group(1) if match.groups() else match.group(0)
-                resultado[campo] = valor.strip()
-            else:
-                resultado[campo] = None
-                
-        except Exception:
-            resultado[campo] = None
+        resultado[field.campo] = compiled.search(field, text, use_anchor=False)
     
     return resultado
 
 
-def process_pdf_with_map(pdf_path: str, mapa: dict) -> dict:
-    """Processa um PDF usando o mapa de extração."""
+# Mapa do processo worker (recebido uma vez pelo initializer)
+_WORKER_MAP: Optional[CompiledMap] = None
+
+
+def _init_worker(mapa: dict) -> None:
+    """Initializer dos workers: compila o mapa uma única vez por processo."""
+    global _WORKER_MAP
+    _WORKER_MAP = compile_map(mapa)
+
+
+def process_pdf_with_map(pdf_path: str, mapa: Union[dict, CompiledMap] = None) -> dict:
+    """
+    Processa um PDF usando o mapa de extração.
+    
+    Sem mapa, usa o do worker (apply_map_batch envia o mapa só no initializer).
+    """
+    compiled = compile_map(mapa) if mapa is not None else _WORKER_MAP
     try:
         with open_pdf(pdf_path) as pdf:
             text = extract_all_text_from_pdf(pdf, max_pages=10, use_ocr_fallback=False)
         
-        dados = extract_with_map(text, mapa)
+        dados = extract_with_map(text, compiled)
         dados['arquivo_origem'] = Path(pdf_path).name
         dados['caminho_completo'] = str(Path(pdf_path).resolve())
         dados['data_extracao'] = datetime.now().isoformat()
-        dados['modelo_usado'] = mapa.get('modelo_identificado', 'N/A')
+        dados['modelo_usado'] = compiled.modelo
         
         # Normalizar
         dados = normalize_all(dados)
         
         # Calcular confiança
         campos_preenchidos = sum(1 for v in dados.values() if v and v not in ['N/A', None])
-        total_campos = len(mapa.get('campos', {}))
+        total_campos = len(compiled)
         confianca = int((campos_preenchidos / total_campos) * 100) if total_campos > 0 else 0
         dados['confianca_score'] = confianca
         
@@ -117,24 +123,68 @@ def apply_map_batch(map_path: Path, pdfs_folder: Path, output_folder: Path, work
     resultados = []
     erros = []
     
-    with ProcessPoolExecutor(max_workers=workers) as executor:
-        futures = {
-            executor.submit(process_pdf_with_map, str(pdf), mapa): pdf 
-            for pdf in pdf_files
-        }
+    # O mapa vai para cada worker uma vez (initializer), não em cada tarefa
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mapa,))
+    
+    executor = new_pool()
+    futures = {}
+    deadlines = TaskDeadlines(DEFAULT_TASK_TIMEOUT_S)
+    
+    def submit(pdf: Path) -> None:
+        future = executor.submit(process_pdf_with_map, str(pdf))
+        futures[future] = pdf
+        deadlines.track(future)
+    
+    processados = 0
+    try:
+        for pdf in pdf_files:
+            submit(pdf)
         
-        for i, future in enumerate(as_completed(futures), 1):
-            try:
-                resultado = future.result()
-                if resultado['status'] == 'sucesso':
-                    resultados.append(resultado['dados'])
-                else:
-                    erros.append(resultado['dados'])
-            except Exception as e:
-                erros.append({'erro': str(e)})
+        while futures:
+            done = wait(futures, timeout=deadlines.wait_timeout(), return_when=FIRST_COMPLETED)[0]
+            for future in done:
+                futures.pop(future)
+                deadlines.forget(future)
+                try:
+                    resultado = future.result()
+                    if resultado['status'] == 'sucesso':
+                        resultados.append(resultado['dados'])
+                    else:
+                        erros.append(resultado['dados'])
+                except Exception as e:
+                    erros.append({'erro': str(e)})
+                
+                processados += 1
+                if processados % 50 == 0:
+                    print(f"   Processados: {processados}/{len(pdf_files)}")
             
-            if i % 50 == 0:
-                print(f"   Processados: {i}/{len(pdf_files)}")
+            # PDF preso (ex: regex sem guarda no Windows): encerrar o pool e
+            # reenviar a um novo o que ainda não voltou
+            expired = [future for future in deadlines.expired() if future in futures]
+            if not expired:
+                continue
+            for future in expired:
+                pdf = futures.pop(future)
+                deadlines.forget(future)
+                erros.append({
+                    'arquivo_origem': pdf.name,
+                    'erro': f"Tempo limite de {DEFAULT_TASK_TIMEOUT_S:.0f}s excedido",
+                    'confianca_score': 0
+                })
+                processados += 1
+            print(f"   ⚠️ {len(expired)} PDF(s) passaram do prazo; recriando os workers")
+            # Antes de encerrar: depois, as tarefas pendentes já falham com BrokenProcessPool
+            unfinished = [future for future in futures if not future.done()]
+            terminate_pool(executor)
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = new_pool()
+            for future in unfinished:
+                pdf = futures.pop(future)
+                deadlines.forget(future)
+                submit(pdf)
+    finally:
+        executor.shutdown(wait=True)
     
     # Separar por confiança
     validos = [r for r in resultados if r.get('confianca_score', 0) >= 70]
@@ -4,19 +4,21 @@ Orquestra a extração usando regex e tabelas conforme o modelo detectado.
 
 OTIMIZADO: Abre cada PDF apenas uma vez para melhor performance.
 """
+import os
 import re
 import logging
 import traceback
 import fitz  # PyMuPDF
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from datetime import datetime
+from functools import lru_cache
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
-from .patterns import PatternsMixin, extract_field, FLAGS
+from .patterns import PatternsMixin, PATTERN_REGISTRY
 from raizen_power.utils.validators import (
     validate_record, 
     calculate_confidence_score, 
@@ -25,6 +27,7 @@ from raizen_power.utils.validators import (
 )
 from raizen_power.utils.normalizers import normalize_all
 from .table_extractor import (
+    DocumentView,
     extract_all_text,
     extract_all_text_from_pdf,
     extract_installations_from_anexo,
@@ -36,6 +39,51 @@ from .table_extractor import (
 )
 from raizen_power.analysis import classifier
 from raizen_power.utils.city_distributor_map import get_distributor_by_city
+from raizen_power.utils.extraction_cache import ExtractionCache, compute_source_version
+from raizen_power.utils.gazetteer import EXCEL_BI, EXCEL_MUNICIPIO
+from raizen_power.utils.regex_guard import DEFAULT_BUDGET_MS
+from raizen_power.utils.task_deadline import DEFAULT_TASK_TIMEOUT_S, TaskDeadlines, terminate_pool
+from raizen_power.utils.timing import StageTimer, TimingCollector
+
+
+# Módulos cujo código define o resultado da extração (versão do cache)
+_VERSIONED_MODULES = [
+    Path(__file__).parent / 'extractor.py',
+    Path(__file__).parent / 'patterns.py',
+    Path(__file__).parent / 'table_extractor.py',
+    Path(classifier.__file__),
+    Path(__file__).parent.parent / 'utils' / 'validators.py',
+    Path(__file__).parent.parent / 'utils' / 'normalizers.py',
+    Path(__file__).parent.parent / 'utils' / 'city_distributor_map.py',
+    Path(__file__).parent.parent / 'utils' / 'gazetteer.py',
+    Path(__file__).parent.parent / 'utils' / 'numeric_tokens.py',
+    Path(__file__).parent.parent / 'utils' / 'regex_guard.py',
+]
+
+# Bases de referência que também mudam o resultado (classificação,
+# distribuidora por município); entram na versão pelo conteúdo
+_VERSIONED_DATA = [EXCEL_BI, EXCEL_MUNICIPIO]
+
+# Configurações que mudam o resultado (busca que estoura o orçamento = campo vazio)
+_VERSIONED_SETTINGS = {'regex.budget_ms': DEFAULT_BUDGET_MS}
+
+
+# Escalonador paralelo (carregado do settings.yaml)
+try:
+    from raizen_power.core.config import settings
+    PARALLEL_CHUNK_SIZE = settings.parallel.chunk_size
+    PARALLEL_SMALL_PDF_KB = settings.parallel.small_pdf_kb
+    PARALLEL_IN_FLIGHT_PER_WORKER = settings.parallel.in_flight_per_worker
+except ImportError:
+    PARALLEL_CHUNK_SIZE = 8
+    PARALLEL_SMALL_PDF_KB = 512
+    PARALLEL_IN_FLIGHT_PER_WORKER = 2
+
+
+@lru_cache(maxsize=1)
+def get_extractor_version() -> str:
+    """Hash de versão do extrator/padrões/bases de referência, usado como chave do cache."""
+    return compute_source_version(_VERSIONED_MODULES + _VERSIONED_DATA, _VERSIONED_SETTINGS)
 
 
 @dataclass
@@ -51,61 +99,57 @@ class ExtractionResult:
     paginas: int = 0
     distribuidora_classificada: str = ''
     categoria: str = ''
+    timings: Dict[str, float] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário serializável (multiprocessing/cache)."""
+        return asdict(self)
+
+
+# Padrões de cidade/UF no endereço (compilados uma única vez)
+_ADDRESS_CITY_UF_RE = re.compile(r',\s*([^,]+),\s*([A-Z]{2})\s*(?:,|$)')
+_ADDRESS_CITY_DASH_UF_RE = re.compile(r',\s*([^,-]+)\s*[-–]\s*([A-Z]{2})')
 
 
 class ContractExtractor:
     """Extrator principal de contratos PDF."""
     
-    def __init__(self):
+    # Campos extraídos via regex em extract_base_data
+    BASE_FIELDS = [
+        'razao_social', 'cnpj', 'email', 'email_secundario', 'endereco', 'cep',
+        'distribuidora', 'num_instalacao', 'num_cliente',
+        'qtd_cotas', 'valor_cota', 'pagamento_mensal',
+        'vencimento', 'performance_alvo', 'duracao_meses',
+        'representante_nome', 'representante_nome_secundario', 
+        'representante_cpf', 'participacao_percentual'
+    ]
+    
+    def __init__(self, cache: Optional[ExtractionCache] = None):
+        """
+        Args:
+            cache: Cache persistente de extrações (opcional). Quando informado,
+                process_batch/process_batch_parallel pulam PDFs inalterados.
+        """
         self.patterns = PatternsMixin()
+        self.registry = PATTERN_REGISTRY
+        self.cache = cache
+        # Tempos por etapa da última execução de process_batch*
+        self.timings = TimingCollector()
     
     def detect_document_type(self, text: str) -> str:
         """Detecta o tipo de documento baseado no conteúdo."""
-        for doc_type, pattern in self.patterns.DOCUMENT_TYPE_PATTERNS.items():
-            if re.search(pattern, text, FLAGS):
-                return doc_type
-        return 'DESCONHECIDO'
+        return self.registry.detect_document_type(text)
     
     def detect_model(self, text: str) -> str:
         """Detecta o modelo/layout do documento."""
-        for model, indicators in self.patterns.MODEL_INDICATORS.items():
-            matches = sum(1 for ind in indicators if re.search(ind, text, FLAGS))
-            if matches >= 2:
-                return model
-        
-        # Fallback baseado em indicadores únicos fortes
-        # SmartFit tem "DA QUALIFICAÇÃO DA CONSORCIADA" (não "DADOS DA")
-        if re.search(r'DA\s+QUALIFICA[CÇ][ÃA]O\s+DA\s+CONSORCIADA|DADOS\s+DA\s+CONSORCIADA:', text, FLAGS):
-            return 'MODELO_2_TABULAR'
-        if re.search(r'CONSORCIADA\s*\(VOC[ÊE]\)', text, FLAGS):
-            return 'MODELO_1_VISUAL'
-        
-        return 'MODELO_1_VISUAL'  # Default
+        return self.registry.detect_model(text)
     
     def extract_base_data(self, text: str, model: str) -> Dict[str, Any]:
-        """Extrai dados básicos usando regex."""
-        fields = [
-            'razao_social', 'cnpj', 'email', 'email_secundario', 'endereco', 'cep',
-            'distribuidora', 'num_instalacao', 'num_cliente',
-            'qtd_cotas', 'valor_cota', 'pagamento_mensal',
-            'vencimento', 'performance_alvo', 'duracao_meses',
-            'representante_nome', 'representante_nome_secundario', 
-            'representante_cpf', 'participacao_percentual'
-        ]
-        
-        data = {}
-        for field_name in fields:
-            value = extract_field(text, field_name, model)
-            if value:
-                data[field_name] = value
+        """Extrai dados básicos usando regex (padrões pré-compilados)."""
+        data = self.registry.extract_fields(text, model, self.BASE_FIELDS)
         
         # Extrair dados do consórcio
-        for field_name, patterns in self.patterns.CONSORCIO_PATTERNS.items():
-            for pattern in patterns:
-                match = re.search(pattern, text, FLAGS)
-                if match:
-                    data[field_name] = match.group(1).strip()
-                    break
+        data.update(self.registry.extract_consorcio_fields(text))
         
         # Extrair cidade/UF do endereço
         if data.get('endereco'):
@@ -127,13 +171,13 @@ class ContractExtractor:
             return
         
         # Padrão: ..., Cidade, UF ou ..., Cidade - UF
-        match = re.search(r',\s*([^,]+),\s*([A-Z]{2})\s*(?:,|$)', endereco)
+        match = _ADDRESS_CITY_UF_RE.search(endereco)
         if match:
             data['cidade'] = match.group(1).strip()
             data['uf'] = match.group(2).strip()
         else:
             # Tentar outro padrão: ..., Cidade - UF
-            match = re.search(r',\s*([^,-]+)\s*[-–]\s*([A-Z]{2})', endereco)
+            match = _ADDRESS_CITY_DASH_UF_RE.search(endereco)
             if match:
                 data['cidade'] = match.group(1).strip()
                 data['uf'] = match.group(2).strip()
@@ -152,6 +196,8 @@ class ContractExtractor:
         5. Se campos vazios, busca no Anexo I
         6. Se múltiplas instalações, gera múltiplos registros
         7. Valida e calcula score de confiança
+        
+        O tempo de cada etapa é registrado em result.timings (segundos).
         """
         pdf_path = Path(pdf_path)
         result = ExtractionResult(
@@ -160,55 +206,70 @@ class ContractExtractor:
             modelo_detectado='',
             paginas=0
         )
+        timer = StageTimer()
+        result.timings = timer.timings
         
         try:
             # Abrir PDF UMA ÚNICA VEZ (usando PyMuPDF)
-            with fitz.open(str(pdf_path)) as pdf:
+            with timer.stage('abertura'):
+                pdf = fitz.open(str(pdf_path))
+            
+            with pdf:
+                # Cache por página: texto e tabelas são analisados uma única vez
+                view = DocumentView(pdf)
+                
                 # Obter número de páginas
-                result.paginas = len(pdf)
+                result.paginas = len(view)
                 
                 # Extrair texto completo (até 10 páginas)
-                text = extract_all_text_from_pdf(pdf, max_pages=10)
+                with timer.stage('texto'):
+                    text = extract_all_text_from_pdf(view, max_pages=10)
+                # OCR é medido à parte pelo DocumentView
+                timer.add('texto', -view.ocr_seconds)
+                timer.add('ocr', view.ocr_seconds)
                 
                 if not text:
                     result.alertas.append("Erro ao ler PDF: texto vazio")
                     return result
                 
-                # Classificar contrato (Dist + Categoria)
-                dist_identified = classifier.identify_distributor_from_text(text)
-                result.distribuidora_classificada = dist_identified
+                with timer.stage('classificacao'):
+                    # Classificar contrato (Dist + Categoria)
+                    dist_identified = classifier.identify_distributor_from_text(text)
+                    result.distribuidora_classificada = dist_identified
                 
-                if result.paginas <= 7:
-                    result.categoria = 'SIMPLES'
-                elif result.paginas > 16:
-                    result.categoria = 'GUARDA_CHUVA'
-                else:
-                    result.categoria = 'PADRAO'
+                    if result.paginas <= 7:
+                        result.categoria = 'SIMPLES'
+                    elif result.paginas > 16:
+                        result.categoria = 'GUARDA_CHUVA'
+                    else:
+                        result.categoria = 'PADRAO'
                 
-                # Detectar tipo e modelo
-                result.tipo_documento = self.detect_document_type(text)
-                result.modelo_detectado = self.detect_model(text)
+                    # Detectar tipo e modelo
+                    result.tipo_documento = self.detect_document_type(text)
+                    result.modelo_detectado = self.detect_model(text)
                 
-                # Verificar se é contrato guarda-chuva
-                result.is_guarda_chuva = is_umbrella_contract(text)
-                if result.is_guarda_chuva:
-                    result.alertas.append("Contrato Guarda-Chuva detectado - requer revisão manual")
+                    # Verificar se é contrato guarda-chuva
+                    result.is_guarda_chuva = is_umbrella_contract(text)
+                    if result.is_guarda_chuva:
+                        result.alertas.append("Contrato Guarda-Chuva detectado - requer revisão manual")
                 
                 # Extrair dados base
+                with timer.stage('regex'):
+                    base_data = self.extract_base_data(text, result.modelo_detectado)
+                
                 if result.modelo_detectado == 'MODELO_2_TABULAR':
                     # Para Modelo 2: regex primeiro (mais confiável para campos-chave)
-                    base_data = self.extract_base_data(text, result.modelo_detectado)
                     # Complementar com extração tabular para campos não encontrados
-                    table_data = extract_modelo_2_data_from_pdf(pdf)
+                    with timer.stage('tabelas_modelo_2'):
+                        table_data = extract_modelo_2_data_from_pdf(view)
                     for key, value in table_data.items():
                         if key not in base_data or not base_data[key]:
                             base_data[key] = value
-                else:
-                    base_data = self.extract_base_data(text, result.modelo_detectado)
                 
                 # IMPORTANTE: Verificar instalações compactadas PRIMEIRO
                 # Contratos guarda-chuva (OI S.A.) têm centenas de UCs em uma célula
-                compact_installations = extract_compact_installations_from_pdf(pdf)
+                with timer.stage('instalacoes_compactadas'):
+                    compact_installations = extract_compact_installations_from_pdf(view)
                 
                 if compact_installations and len(compact_installations) > 1:
                     # Encontrou múltiplas instalações compactadas - é contrato guarda-chuva
@@ -231,15 +292,17 @@ class ContractExtractor:
                         record['modelo_detectado'] = result.modelo_detectado
                         record['data_extracao'] = datetime.now().isoformat()
                         
-                        alerts = validate_record(record)
-                        record['alertas'] = '; '.join(alerts) if alerts else ''
-                        record['confianca_score'] = calculate_confidence_score(record, alerts)
+                        with timer.stage('validacao'):
+                            alerts = validate_record(record)
+                            record['alertas'] = '; '.join(alerts) if alerts else ''
+                            record['confianca_score'] = calculate_confidence_score(record, alerts)
                         
                         result.registros.append(record)
                 
                 # Se não encontrou compactadas, buscar no Anexo I tradicional
                 elif not base_data.get('num_instalacao'):
-                    installations = extract_installations_from_pdf(pdf)
+                    with timer.stage('anexo_i'):
+                        installations = extract_installations_from_pdf(view)
                     
                     if installations:
                         # Verificar duplicatas por número de instalação
@@ -272,17 +335,17 @@ class ContractExtractor:
                             record['data_extracao'] = datetime.now().isoformat()
                             
                             # Validar
-                            alerts = validate_record(record)
-                            record['alertas'] = '; '.join(alerts) if alerts else ''
-                            record['confianca_score'] = calculate_confidence_score(record, alerts)
+                            with timer.stage('validacao'):
+                                alerts = validate_record(record)
+                                record['alertas'] = '; '.join(alerts) if alerts else ''
+                                record['confianca_score'] = calculate_confidence_score(record, alerts)
                             
                             result.registros.append(record)
                             result.alertas.extend(alerts)
                     else:
                         # Não encontrou instalações no Anexo I tradicional
                         # Tentar formato compactado (contratos guarda-chuva como OI S.A.)
-                        compact_installations = extract_compact_installations_from_pdf(pdf)
-                        
+                        # Reaproveita a varredura compactada já feita acima
                         if compact_installations:
                             result.is_guarda_chuva = True
                             result.alertas.append(f"Contrato com {len(compact_installations)} instalações compactadas")
@@ -304,11 +367,13 @@ class ContractExtractor:
                                 record['data_extracao'] = datetime.now().isoformat()
                                 
                                 # Normalizar dados antes da validação
-                                record = normalize_all(record)
+                                with timer.stage('normalizacao'):
+                                    record = normalize_all(record)
                                 
-                                alerts = validate_record(record)
-                                record['alertas'] = '; '.join(alerts) if alerts else ''
-                                record['confianca_score'] = calculate_confidence_score(record, alerts)
+                                with timer.stage('validacao'):
+                                    alerts = validate_record(record)
+                                    record['alertas'] = '; '.join(alerts) if alerts else ''
+                                    record['confianca_score'] = calculate_confidence_score(record, alerts)
                                 
                                 result.registros.append(record)
                         else:
@@ -346,11 +411,13 @@ class ContractExtractor:
                              base_data['metodo_distribuidora'] = 'CLASSIFICADOR_AUTO'
                     
                     # Normalizar dados antes da validação
-                    base_data = normalize_all(base_data)
+                    with timer.stage('normalizacao'):
+                        base_data = normalize_all(base_data)
                     
-                    alerts = validate_record(base_data)
-                    base_data['alertas'] = '; '.join(alerts) if alerts else ''
-                    base_data['confianca_score'] = calculate_confidence_score(base_data, alerts)
+                    with timer.stage('validacao'):
+                        alerts = validate_record(base_data)
+                        base_data['alertas'] = '; '.join(alerts) if alerts else ''
+                        base_data['confianca_score'] = calculate_confidence_score(base_data, alerts)
                     
                     result.registros.append(base_data)
                     result.alertas.extend(alerts)
@@ -364,9 +431,53 @@ class ContractExtractor:
         except Exception as e:
             result.alertas.append(f"Erro ao processar PDF: {e}")
             logger.error(f"Erro ao processar {pdf_path}: {e}")
+        finally:
+            timer.finish()
         
         return result
     
+    @staticmethod
+    def _classify_result(
+        result_dict: Dict[str, Any],
+        valid_records: List[Dict[str, Any]],
+        review_records: List[Dict[str, Any]]
+    ) -> None:
+        """Distribui os registros de um resultado entre válidos e revisão."""
+        is_guarda_chuva = result_dict.get('is_guarda_chuva', False)
+        
+        for record in result_dict.get('registros', []):
+            # Adicionar flag de guarda-chuva
+            record['is_guarda_chuva'] = is_guarda_chuva
+            
+            # Classificar
+            if is_guarda_chuva or record.get('confianca_score', 0) < 70:
+                review_records.append(record)
+            else:
+                valid_records.append(record)
+    
+    def _cache_get(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """Busca o resultado no cache (se habilitado)."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(pdf_path)
+        
+        # O cache é endereçado por conteúdo: cópias com outro nome reaproveitam
+        # o resultado, mas os registros devem apontar para o arquivo atual
+        name = Path(pdf_path).name
+        if cached is not None and cached.get('arquivo') != name:
+            cached['arquivo'] = name
+            for record in cached.get('registros', []):
+                record['arquivo_origem'] = name
+        return cached
+    
+    def _cache_put(self, pdf_path: str, result_dict: Dict[str, Any]) -> None:
+        """Grava o resultado no cache, exceto falhas de leitura (podem ser transitórias)."""
+        if self.cache is None:
+            return
+        if any(str(a).startswith('Erro ao processar PDF') for a in result_dict.get('alertas', [])):
+            return
+        self.cache.put(pdf_path, result_dict)
+    
     def process_batch(
         self, 
         pdf_paths: List[str], 
@@ -375,28 +486,29 @@ class ContractExtractor:
         """
         Processa um lote de PDFs (versão sequencial).
         
+        Se o extrator tiver cache, PDFs inalterados são lidos do cache.
+        Os tempos por etapa dos PDFs extraídos ficam em self.timings.
+        
         Retorna:
             - Lista de registros válidos (confiança >= 70)
             - Lista de registros para revisão (confiança < 70 ou guarda-chuva)
         """
         valid_records = []
         review_records = []
+        self.timings = TimingCollector()
         
         total = len(pdf_paths)
         
         for i, pdf_path in enumerate(pdf_paths):
             try:
-                result = self.extract_from_pdf(pdf_path)
+                result_dict = self._cache_get(pdf_path)
                 
-                for record in result.registros:
-                    # Adicionar flag de guarda-chuva
-                    record['is_guarda_chuva'] = result.is_guarda_chuva
-                    
-                    # Classificar
-                    if result.is_guarda_chuva or record.get('confianca_score', 0) < 70:
-                        review_records.append(record)
-                    else:
-                        valid_records.append(record)
+                if result_dict is None:
+                    result_dict = self.extract_from_pdf(pdf_path).to_dict()
+                    self._cache_put(pdf_path, result_dict)
+                    self.timings.add(result_dict['arquivo'], result_dict['timings'])
+                
+                self._classify_result(result_dict, valid_records, review_records)
                 
             except (FileNotFoundError, PermissionError) as e:
                 # Erros de arquivo conhecidos
@@ -428,75 +540,320 @@ class ContractExtractor:
         self, 
         pdf_paths: List[str], 
         max_workers: int = None,
-        progress_callback: callable = None
+        progress_callback: callable = None,
+        executor: 'ProcessPoolExecutor' = None
     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Processa um lote de PDFs em PARALELO usando múltiplos núcleos da CPU.
         
         PERFORMANCE: 4-8x mais rápido que sequencial em CPUs multi-core.
+        Se o extrator tiver cache, apenas PDFs novos/alterados vão para os workers.
+        Os tempos por etapa dos PDFs extraídos ficam em self.timings.
         
         Args:
             pdf_paths: Lista de caminhos para PDFs
             max_workers: Número de workers (padrão: núcleos da CPU)
             progress_callback: Função de callback para progresso
+            executor: Pool já aberto (mantido vivo pelo chamador, ex: modo watch).
+                Se None, um pool é criado e encerrado nesta chamada.
         
         Retorna:
             - Lista de registros válidos (confiança >= 70)
             - Lista de registros para revisão (confiança < 70 ou guarda-chuva)
         """
-        from concurrent.futures import ProcessPoolExecutor, as_completed
-        import multiprocessing
-        
         valid_records = []
         review_records = []
+        self.timings = TimingCollector()
         
         total = len(pdf_paths)
+        completed = 0
         
-        # Determinar número de workers (padrão: núcleos - 1, mínimo 1)
-        if max_workers is None:
-            max_workers = max(1, multiprocessing.cpu_count() - 1)
+        # Resultados em cache não precisam ir para os workers
+        pending_paths = []
+        for pdf_path in pdf_paths:
+            cached = self._cache_get(pdf_path)
+            if cached is None:
+                pending_paths.append(pdf_path)
+                continue
+            
+            self._classify_result(cached, valid_records, review_records)
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
         
-        logger.info(f"Processamento paralelo: {max_workers} workers para {total} PDFs")
+        if not pending_paths:
+            return valid_records, review_records
         
-        # Processar em paralelo
-        completed = 0
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
-            # Submeter todos os jobs
-            future_to_path = {
-                executor.submit(_extract_single_pdf, pdf_path): pdf_path 
-                for pdf_path in pdf_paths
-            }
+        # Resultados chegam em streaming (janela limitada de tarefas em voo)
+        for pdf_path, result_dict in iter_extract_parallel(
+            pending_paths, max_workers=max_workers, executor=executor
+        ):
+            completed += 1
             
-            # Coletar resultados conforme completam
-            for future in as_completed(future_to_path):
-                pdf_path = future_to_path[future]
-                completed += 1
-                
+            if result_dict.get('erro_worker'):
+                logger.error(f"Erro ao processar {pdf_path}: {result_dict['erro_worker']}")
+                review_records.append({
+                    'arquivo_origem': Path(pdf_path).name,
+                    'alertas': f"Erro: {result_dict['erro_worker']}",
+                    'confianca_score': 0,
+                    'data_extracao': datetime.now().isoformat()
+                })
+            else:
+                self._cache_put(pdf_path, result_dict)
+                self.timings.add(result_dict.get('arquivo', Path(pdf_path).name), result_dict.get('timings', {}))
+                self._classify_result(result_dict, valid_records, review_records)
+            
+            # Callback de progresso
+            if progress_callback:
+                progress_callback(completed, total)
+        
+        return valid_records, review_records
+
+
+# =============================================================================
+# ESCALONADOR PARALELO (workers aquecidos, janela limitada, chunks)
+# =============================================================================
+
+# Extrator do processo worker (criado uma vez pelo initializer)
+_WORKER_EXTRACTOR: Optional[ContractExtractor] = None
+
+
+def _init_worker() -> None:
+    """
+    Initializer dos workers: cria o extrator uma única vez e pré-carrega
+    as bases de referência (Excel) e os padrões compilados.
+    """
+    global _WORKER_EXTRACTOR
+    _WORKER_EXTRACTOR = ContractExtractor()
+    
+    # Bases de referência: carregadas agora, não no primeiro PDF de cada worker
+    classifier.load_databases()
+    from raizen_power.utils.city_distributor_map import load_mapping
+    load_mapping()
+    # Padrões: PATTERN_REGISTRY já é compilado no import de patterns.py
+
+
+def create_worker_pool(max_workers: int = None) -> 'ProcessPoolExecutor':
+    """Cria um ProcessPoolExecutor com workers aquecidos (_init_worker)."""
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    
+    if max_workers is None:
+        max_workers = max(1, multiprocessing.cpu_count() - 1)
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+
+
+def _extract_chunk(pdf_paths: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Extrai um grupo de PDFs no worker, reutilizando o extrator aquecido."""
+    if _WORKER_EXTRACTOR is None:
+        # Pool criado sem initializer (ex: executor externo)
+        _init_worker()
+    
+    results = []
+    for pdf_path in pdf_paths:
+        try:
+            results.append((pdf_path, _WORKER_EXTRACTOR.extract_from_pdf(pdf_path).to_dict()))
+        except Exception as e:
+            results.append((pdf_path, _error_result(pdf_path, e)))
+    return results
+
+
+def _error_result(pdf_path: str, error: Exception) -> Dict[str, Any]:
+    """Resultado serializável para falha de extração."""
+    return {
+        'arquivo': Path(pdf_path).name,
+        'registros': [],
+        'alertas': [f"Erro ao processar PDF: {error}"],
+        'confianca_score': 0,
+        'is_guarda_chuva': False,
+    }
+
+
+def _build_chunks(
+    pdf_paths: List[str],
+    chunk_size: int,
+    small_pdf_bytes: int
+) -> Iterator[List[str]]:
+    """
+    Agrupa PDFs pequenos em chunks para reduzir o overhead de IPC.
+    PDFs grandes (ex: guarda-chuva) seguem sozinhos para balancear a carga.
+    """
+    chunk = []
+    for pdf_path in pdf_paths:
+        try:
+            size = os.path.getsize(pdf_path)
+        except OSError:
+            size = 0
+        
+        if size >= small_pdf_bytes:
+            yield [pdf_path]
+            continue
+        
+        chunk.append(pdf_path)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    
+    if chunk:
+        yield chunk
+
+
+def iter_extract_parallel(
+    pdf_paths: List[str],
+    max_workers: int = None,
+    executor: 'ProcessPoolExecutor' = None,
+    chunk_size: int = None,
+    small_pdf_kb: int = None,
+    in_flight_per_worker: int = None,
+    task_timeout_s: float = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Extrai PDFs em paralelo e entrega (caminho, resultado) conforme completam.
+    
+    - Workers aquecidos: o extrator e as bases são criados uma vez por processo
+    - Janela limitada: no máximo max_workers * in_flight_per_worker chunks em voo
+    - Chunks: PDFs pequenos são agrupados para reduzir IPC
+    
+    Falhas do worker (ex: processo morto) são entregues com a chave 'erro_worker'.
+    Se um worker morre, as tarefas em voo no pool falham; um pool próprio é
+    recriado para o restante, e com um pool externo o restante também vira
+    'erro_worker' (o chamador decide se recria, ver pool_is_broken).
+    
+    Uma tarefa que passa do prazo (task_timeout_s por PDF, ex: regex sem
+    guarda no Windows) vira 'erro_worker' e os processos do pool são
+    encerrados: um pool próprio é recriado e recebe de novo as outras
+    tarefas em voo; um pool externo fica quebrado, como acima.
+    
+    Args:
+        pdf_paths: Caminhos dos PDFs
+        max_workers: Número de workers (padrão: núcleos - 1)
+        executor: Pool já aberto (mantido vivo pelo chamador, ex: modo watch)
+        chunk_size: Máximo de PDFs pequenos por tarefa
+        small_pdf_kb: Tamanho abaixo do qual o PDF é agrupado
+        in_flight_per_worker: Chunks em voo por worker
+        task_timeout_s: Prazo por PDF de uma tarefa (0 = sem prazo)
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+    from concurrent.futures.process import BrokenProcessPool
+    import multiprocessing
+    
+    chunk_size = chunk_size or PARALLEL_CHUNK_SIZE
+    small_pdf_bytes = (small_pdf_kb or PARALLEL_SMALL_PDF_KB) * 1024
+    in_flight_per_worker = in_flight_per_worker or PARALLEL_IN_FLIGHT_PER_WORKER
+    if task_timeout_s is None:
+        task_timeout_s = DEFAULT_TASK_TIMEOUT_S
+    
+    if max_workers is None:
+        max_workers = getattr(executor, '_max_workers', None) or max(1, multiprocessing.cpu_count() - 1)
+    max_in_flight = max(1, max_workers * in_flight_per_worker)
+    
+    logger.info(
+        f"Processamento paralelo: {max_workers} workers para {len(pdf_paths)} PDFs "
+        f"(até {max_in_flight} tarefas em voo, {chunk_size} PDFs pequenos por tarefa)"
+    )
+    
+    chunks = _build_chunks(pdf_paths, chunk_size, small_pdf_bytes)
+    own_pool = executor is None
+    if own_pool:
+        executor = create_worker_pool(max_workers)
+    
+    # future -> (chunk, pool em que foi enviado)
+    in_flight = {}
+    deadlines = TaskDeadlines(task_timeout_s)
+    # Pool externo quebrado: o restante vira erro (o chamador recria o pool)
+    broken: Optional[BaseException] = None
+    failed: List[Tuple[str, Dict[str, Any]]] = []
+    
+    def submit(chunk: List[str]) -> None:
+        future = executor.submit(_extract_chunk, chunk)
+        in_flight[future] = (chunk, executor)
+        deadlines.track(future, len(chunk))
+    
+    def submit_next() -> bool:
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        if broken is not None:
+            failed.extend(_worker_errors(chunk, broken))
+            return True
+        try:
+            submit(chunk)
+        except BrokenProcessPool as e:
+            failed.extend(_worker_errors(chunk, e))
+        return True
+    
+    try:
+        # Encher a janela inicial
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+        
+        while in_flight or failed:
+            results, failed = failed, []
+            done = wait(in_flight, timeout=deadlines.wait_timeout(), return_when=FIRST_COMPLETED)[0] if in_flight else ()
+            for future in done:
+                chunk, pool = in_flight.pop(future)
+                deadlines.forget(future)
                 try:
-                    result_dict = future.result()
-                    
-                    for record in result_dict.get('registros', []):
-                        record['is_guarda_chuva'] = result_dict.get('is_guarda_chuva', False)
-                        
-                        if result_dict.get('is_guarda_chuva') or record.get('confianca_score', 0) < 70:
-                            review_records.append(record)
+                    results.extend(future.result())
+                except BrokenProcessPool as e:
+                    # Worker morto (OOM, segfault): todas as tarefas em voo
+                    # nesse pool falham; só o primeiro erro troca o pool
+                    results.extend(_worker_errors(chunk, e))
+                    if pool is executor and broken is None:
+                        if own_pool:
+                            logger.warning("Pool de workers quebrado; recriando para os PDFs restantes")
+                            executor.shutdown(wait=False)
+                            executor = create_worker_pool(max_workers)
                         else:
-                            valid_records.append(record)
-                            
+                            broken = e
                 except Exception as e:
-                    logger.error(f"Erro ao processar {pdf_path}: {e}")
-                    review_records.append({
-                        'arquivo_origem': Path(pdf_path).name,
-                        'alertas': f"Erro: {str(e)}",
-                        'confianca_score': 0,
-                        'data_extracao': datetime.now().isoformat()
-                    })
-                
-                # Callback de progresso
-                if progress_callback:
-                    progress_callback(completed, total)
-        
-        return valid_records, review_records
+                    results.extend(_worker_errors(chunk, e))
+            
+            # Tarefa presa: o único jeito de liberar o worker é encerrar o pool
+            for future in deadlines.expired():
+                if future not in in_flight:
+                    continue
+                chunk, pool = in_flight.pop(future)
+                deadlines.forget(future)
+                timeout = TimeoutError(f"tarefa passou do prazo de {task_timeout_s:.0f}s por PDF")
+                results.extend(_worker_errors(chunk, timeout))
+                if pool is not executor or broken is not None:
+                    continue
+                logger.warning(f"Tarefa com {Path(chunk[0]).name} passou do prazo; encerrando o pool de workers")
+                # Antes de encerrar: depois, as tarefas em voo já falham com BrokenProcessPool
+                unfinished = [other for other, (_, other_pool) in in_flight.items() if other_pool is pool and not other.done()]
+                terminate_pool(executor)
+                if own_pool:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = create_worker_pool(max_workers)
+                    # O que não voltou do pool encerrado vai de novo para o novo
+                    for other in unfinished:
+                        other_chunk, _ = in_flight.pop(other)
+                        deadlines.forget(other)
+                        submit(other_chunk)
+                else:
+                    broken = timeout
+            
+            # Repor a janela antes de entregar resultados ao consumidor
+            while len(in_flight) < max_in_flight and not failed and submit_next():
+                pass
+            
+            for pdf_path, result_dict in results:
+                yield pdf_path, result_dict
+    finally:
+        if own_pool:
+            executor.shutdown(wait=True)
+
+
+def _worker_errors(chunk: List[str], error: BaseException) -> List[Tuple[str, Dict[str, Any]]]:
+    """Resultados 'erro_worker' para os PDFs de um chunk que não voltou do worker."""
+    message = str(error) or type(error).__name__
+    return [(pdf_path, {'erro_worker': message}) for pdf_path in chunk]
+
+
+def pool_is_broken(executor: 'ProcessPoolExecutor') -> bool:
+    """True se algum worker do pool morreu (o pool não aceita mais tarefas)."""
+    return bool(getattr(executor, '_broken', False))
 
 
 def _extract_single_pdf(pdf_path: str) -> Dict[str, Any]:
@@ -505,28 +862,4 @@ def _extract_single_pdf(pdf_path: str) -> Dict[str, Any]:
     
     Retorna dicionário serializável (não dataclass) para multiprocessing.
     """
-    try:
-        extractor = ContractExtractor()
-        result = extractor.extract_from_pdf(pdf_path)
-        
-        # Converter para dict serializável
-        return {
-            'arquivo': result.arquivo,
-            'tipo_documento': result.tipo_documento,
-            'modelo_detectado': result.modelo_detectado,
-            'registros': result.registros,
-            'alertas': result.alertas,
-            'confianca_score': result.confianca_score,
-            'is_guarda_chuva': result.is_guarda_chuva,
-            'paginas': result.paginas,
-            'distribuidora_classificada': result.distribuidora_classificada,
-            'categoria': result.categoria,
-        }
-    except Exception as e:
-        return {
-            'arquivo': Path(pdf_path).name,
-            'registros': [],
-            'alertas': [str(e)],
-            'confianca_score': 0,
-            'is_guarda_chuva': False,
-        }
+    return _extract_chunk([pdf_path])[0][1]
@@ -3,7 +3,9 @@ Gerenciador de Mapas de Extração (Gemini AI Integration)
 Versão: 1.0
 
 Este módulo gerencia os mapas de extração gerados pelo Gemini AI.
-Inclui versionamento, validação de regex e cache de mapas.
+Inclui versionamento, validação de regex e cache de mapas. Grupos, versões
+e status ficam em um catálogo (maps/.catalog/catalog.json) atualizado pelo
+save_map; consultas e listagens não varrem a pasta.
 
 Estrutura de um mapa:
 {
@@ -20,14 +22,36 @@ Estrutura de um mapa:
         }
     }
 }
+
+Para extração em lote, compile_map(mapa) devolve um CompiledMap (regex e
+âncoras compilados uma vez por versão do mapa).
+
+Regex gerados pela IA podem ter backtracking catastrófico: save_map rejeita
+padrões que passam do orçamento em textos adversariais (validate_regex_cost)
+e cada busca da extração roda com orçamento de tempo (regex_guard).
 """
 import re
+import os
 import json
+import time
 import hashlib
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Any, NamedTuple, Optional, List, Pattern, Tuple, Union
+
+from raizen_power.utils.regex_guard import (
+    DEFAULT_ADVERSARIAL_LENGTH,
+    DEFAULT_BUDGET_MS,
+    DEFAULT_SAVE_BUDGET_MS,
+    RegexTimeout,
+    adversarial_inputs,
+    guarded_search,
+    measure_worst_many,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +64,246 @@ class MapValidationError(Exception):
     pass
 
 
+# Catálogo dos mapas: subpasta própria, para que gravá-lo não altere o mtime
+# de maps/ (usado para detectar mapas adicionados/removidos por fora)
+CATALOG_DIR = ".catalog"
+CATALOG_FILE = "catalog.json"
+CATALOG_FORMAT = 1
+
+# Trava entre processos para gravar o catálogo e escolher a versão de um mapa
+# (arquivo criado com O_EXCL; uma trava mais velha que isso é abandonada)
+CATALOG_LOCK_FILE = "catalog.lock"
+CATALOG_LOCK_STALE = 30.0
+CATALOG_LOCK_POLL = 0.02
+
+# Atributos do corpo do mapa copiados para o catálogo (seleção sem ler o JSON)
+CATALOG_MAP_KEYS = ('distribuidora_principal', 'paginas_analisadas', 'modelo_identificado')
+
+_MAP_FILE_RE = re.compile(r'(.+)_v(\d+)(_REJECTED)?\.json$')
+
+
+class MapCatalog:
+    """
+    Catálogo dos mapas de uma pasta: grupo, versão, hash, status e arquivo.
+    
+    Consultas e listagens do MapManager leem só o catálogo (um JSON
+    pequeno), sem glob/stat/parse dos arquivos de mapa. O save_map atualiza
+    o catálogo com gravação atômica (arquivo temporário + os.replace).
+    
+    Mapas adicionados ou removidos por fora do MapManager mudam o mtime da
+    pasta; nesse caso o catálogo é reconstruído na próxima leitura ou
+    gravação. Edições in-place de um mapa existente exigem rebuild()
+    explícito.
+    
+    Vários MapManager (ou processos) podem usar a mesma pasta: refresh()
+    relê o catálogo quando o arquivo muda, e as gravações são feitas sob
+    lock(), relendo o catálogo antes de alterá-lo.
+    """
+    
+    def __init__(self, maps_dir: Path):
+        self.maps_dir = Path(maps_dir)
+        self.path = self.maps_dir / CATALOG_DIR / CATALOG_FILE
+        self.lock_path = self.path.with_name(CATALOG_LOCK_FILE)
+        self.entries: Dict[str, dict] = {}
+        self._stamp: Optional[tuple] = None
+        self._dir_seen: Optional[int] = None  # mtime da pasta refletido em entries
+        self._lock_depth = 0
+        self._load()
+    
+    def _dir_mtime(self) -> int:
+        return self.maps_dir.stat().st_mtime_ns
+    
+    def _current_stamp(self) -> Optional[tuple]:
+        """(mtime, tamanho) do catálogo e mtime da pasta, ou None sem catálogo."""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, self._dir_mtime())
+    
+    def _load(self) -> None:
+        try:
+            stamp = self._current_stamp()
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('formato') == CATALOG_FORMAT and data.get('mtime_pasta') == self._dir_mtime():
+                self.entries = data.get('mapas', {})
+                self._stamp = stamp
+                self._dir_seen = data['mtime_pasta']
+                return
+        except (OSError, json.JSONDecodeError):
+            pass
+        self.rebuild()
+    
+    def refresh(self) -> bool:
+        """
+        Relê o catálogo se ele (ou a pasta) mudou desde a última leitura,
+        por exemplo por um save_map de outro MapManager.
+        
+        Returns:
+            True se o catálogo foi relido
+        """
+        if self._stamp is not None and self._current_stamp() == self._stamp:
+            return False
+        self._load()
+        return True
+    
+    @contextmanager
+    def lock(self):
+        """
+        Trava exclusiva do catálogo entre processos (reentrante na instância).
+        
+        Criada com O_EXCL, funciona igual no Windows e no Linux; uma trava
+        mais velha que CATALOG_LOCK_STALE (processo morto) é removida.
+        """
+        if self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - self.lock_path.stat().st_mtime > CATALOG_LOCK_STALE:
+                        logger.warning(f"Catálogo: trava abandonada removida ({self.lock_path})")
+                        self.lock_path.unlink()
+                        continue
+                except OSError:
+                    continue  # liberada entre o open e o stat
+                time.sleep(CATALOG_LOCK_POLL)
+        os.close(fd)
+        
+        self._lock_depth = 1
+        try:
+            yield
+        finally:
+            self._lock_depth = 0
+            try:
+                self.lock_path.unlink()
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _entry(filepath: Path, mapa: dict) -> dict:
+        match = _MAP_FILE_RE.search(filepath.name)
+        entry = {
+            'arquivo': filepath.name,
+            'grupo': match.group(1) if match else None,
+            'versao_num': int(match.group(2)) if match else 0,
+            'rejeitado': 'REJECTED' in filepath.name,
+            'versao': mapa.get('versao', 'unknown'),
+            'data': mapa.get('data_geracao', 'unknown'),
+            'status': mapa.get('status', 'unknown'),
+            'hash': mapa.get('hash', 'unknown'),
+            'mtime_ns': filepath.stat().st_mtime_ns,
+        }
+        for key in CATALOG_MAP_KEYS:
+            if key in mapa:
+                entry[key] = mapa[key]
+        return entry
+    
+    def rebuild(self) -> None:
+        """Relê todos os mapas da pasta e regrava o catálogo."""
+        with self.lock():
+            entries = {}
+            for filepath in sorted(self.maps_dir.glob("*.json")):
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        mapa = json.load(f)
+                except Exception as e:
+                    logger.error(f"Catálogo: erro ao ler mapa {filepath}: {e}")
+                    continue
+                entries[filepath.stem] = self._entry(filepath, mapa)
+            self.entries = entries
+            self._write()
+        logger.info(f"Catálogo de mapas reconstruído: {len(entries)} mapas")
+    
+    def update(self, filepath: Path, mapa: dict) -> bool:
+        """
+        Registra (ou substitui) um mapa recém-gravado.
+        
+        Returns:
+            True se o catálogo foi reconstruído (a pasta mudou por fora)
+        """
+        with self.lock():
+            # Outro MapManager pode ter gravado desde a última leitura
+            stamp = self._current_stamp()
+            if stamp is not None and stamp[:2] != (self._stamp or ())[:2]:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if data.get('formato') == CATALOG_FORMAT:
+                        self.entries = data.get('mapas', {})
+                        self._dir_seen = data.get('mtime_pasta')
+                except (OSError, json.JSONDecodeError):
+                    pass
+            
+            # A pasta mudou desde então: o próprio mapa recém-gravado a altera,
+            # mas um mapa copiado por fora (ex: durante a validação do
+            # save_map) também; nesse caso só a lista de arquivos diz qual
+            if self._dir_mtime() != self._dir_seen:
+                known = {entry['arquivo'] for entry in self.entries.values()} | {filepath.name}
+                if {path.name for path in self.maps_dir.glob("*.json")} != known:
+                    self.rebuild()
+                    return True
+            
+            self.entries[filepath.stem] = self._entry(filepath, mapa)
+            self._write()
+            return False
+    
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'formato': CATALOG_FORMAT,
+            'mtime_pasta': self._dir_mtime(),
+            'mapas': self.entries,
+        }
+        self._dir_seen = data['mtime_pasta']
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._current_stamp()
+    
+    def of_group(self, grupo: str) -> Dict[str, dict]:
+        """Entradas (inclusive rejeitadas) de um grupo, por nome."""
+        return {name: entry for name, entry in self.entries.items() if entry['grupo'] == grupo}
+
+
+class LazyMaps(Mapping):
+    """
+    Corpos dos mapas lidos sob demanda (e guardados) a partir do catálogo.
+    
+    Picklable: enviado aos workers, cada um só lê os mapas que usar.
+    """
+    
+    def __init__(self, maps_dir: Path, files: Dict[str, str]):
+        self.maps_dir = Path(maps_dir)
+        self.files = files  # {nome: arquivo}
+        self._loaded: Dict[str, dict] = {}
+    
+    def __getitem__(self, name: str) -> dict:
+        mapa = self._loaded.get(name)
+        if mapa is None:
+            with open(self.maps_dir / self.files[name], 'r', encoding='utf-8') as f:
+                mapa = json.load(f)
+            self._loaded[name] = mapa
+        return mapa
+    
+    def __iter__(self):
+        return iter(self.files)
+    
+    def __len__(self) -> int:
+        return len(self.files)
+
+
 class MapManager:
     """
     Gerenciador de Mapas de Extração.
@@ -55,6 +319,21 @@ class MapManager:
         self.maps_dir = Path(maps_dir)
         self.maps_dir.mkdir(parents=True, exist_ok=True)
         self._cache: Dict[str, dict] = {}
+        self._index: Optional['MapIndex'] = None
+        self._catalog: Optional[MapCatalog] = None
+    
+    @property
+    def catalog(self) -> MapCatalog:
+        """
+        Catálogo dos mapas (lido na primeira consulta e relido quando outro
+        MapManager o altera; nesse caso o cache e o índice são descartados).
+        """
+        if self._catalog is None:
+            self._catalog = MapCatalog(self.maps_dir)
+        elif self._catalog.refresh():
+            self._cache.clear()
+            self._index = None
+        return self._catalog
     
     def _generate_hash(self, content: str) -> str:
         """Gera hash curto do conteúdo para identificação."""
@@ -62,16 +341,10 @@ class MapManager:
     
     def _get_next_version(self, grupo: str) -> int:
         """Retorna a próxima versão disponível para um grupo."""
-        existing = list(self.maps_dir.glob(f"{grupo}_v*.json"))
-        if not existing:
-            return 1
-        
-        versions = []
-        for f in existing:
-            match = re.search(r'_v(\d+)\.json$', f.name)
-            if match:
-                versions.append(int(match.group(1)))
-        
+        versions = [
+            entry['versao_num'] for entry in self.catalog.of_group(grupo).values()
+            if not entry['rejeitado']
+        ]
         return max(versions) + 1 if versions else 1
     
     def validate_regex(
@@ -96,7 +369,7 @@ class MapManager:
             pattern = re.compile(regex_pattern, re.IGNORECASE | re.MULTILINE)
             
             # Buscar no texto
-            match = pattern.search(sample_text)
+            match = guarded_search(pattern, sample_text)
             
             if not match:
                 logger.warning(f"Regex não encontrou match: {regex_pattern[:50]}...")
@@ -122,32 +395,83 @@ class MapManager:
         except re.error as e:
             logger.error(f"Regex inválido: {e}")
             return False, None
+        except RegexTimeout:
+            logger.warning(f"Regex excedeu o orçamento de tempo: {regex_pattern[:50]}...")
+            return False, None
+    
+    def validate_regex_cost(
+        self,
+        mapa: dict,
+        budget_ms: float = DEFAULT_SAVE_BUDGET_MS,
+        length: int = DEFAULT_ADVERSARIAL_LENGTH
+    ) -> Dict[str, str]:
+        """
+        Mede o pior caso de cada regex do mapa em textos adversariais.
+        
+        Args:
+            mapa: Mapa de extração
+            budget_ms: Tempo máximo aceito por busca
+            length: Tamanho dos textos adversariais
+            
+        Returns:
+            {campo: erro} dos campos que passam do orçamento
+        """
+        jobs = []
+        for campo, config in mapa.get('campos', {}).items():
+            regex = (config or {}).get('regex', '')
+            if not regex:
+                continue
+            try:
+                pattern = re.compile(regex, FIELD_FLAGS)
+            except re.error:
+                continue  # regex inválido é reportado pela validação da amostra
+            jobs.append((campo, pattern, adversarial_inputs(regex, length)))
+        
+        # Sem SIGALRM (Windows) a medição roda em processo separado com prazo
+        errors = {}
+        for cost in measure_worst_many(jobs, cap_ms=budget_ms * 2):
+            if cost.over_budget(budget_ms):
+                campo = cost.pattern_id
+                worst = f"> {budget_ms * 2:.0f}" if cost.timeouts else f"{cost.worst_ms:.0f}"
+                errors[campo] = (
+                    f"REGEX_COST: Campo '{campo}' - pior caso {worst} ms em texto "
+                    f"adversarial (orçamento {budget_ms:.0f} ms)"
+                )
+        return errors
     
     def validate_map(
         self, 
         mapa: dict, 
-        sample_text: str,
-        strict: bool = True
+        sample_text: Optional[str],
+        strict: bool = True,
+        budget_ms: float = DEFAULT_SAVE_BUDGET_MS
     ) -> Tuple[bool, List[str]]:
         """
-        Valida todos os campos de um mapa contra texto de amostra.
+        Valida todos os campos de um mapa: custo do regex em textos
+        adversariais e valor extraído do texto de amostra.
         
         Args:
             mapa: Mapa de extração
-            sample_text: Texto do PDF de amostra
+            sample_text: Texto do PDF de amostra (None = só o custo)
             strict: Se True, falha se QUALQUER regex falhar
+            budget_ms: Orçamento de tempo por busca (None = não mede o custo)
             
         Returns:
             (all_valid, list_of_errors)
         """
-        errors = []
         campos = mapa.get('campos', {})
+        cost_errors = self.validate_regex_cost(mapa, budget_ms) if budget_ms else {}
+        errors = list(cost_errors.values())
         
         for campo, config in campos.items():
+            if campo in cost_errors:
+                config['regex_validado'] = False
+                continue
+            
             regex = config.get('regex', '')
             expected = config.get('valor_amostra', '')
             
-            if not regex or not expected:
+            if not sample_text or not regex or not expected:
                 continue
             
             is_valid, extracted = self.validate_regex(regex, sample_text, expected)
@@ -182,7 +506,8 @@ class MapManager:
         Args:
             grupo: Nome do grupo (ex: "CPFL_PAULISTA_09p")
             campos: Dicionário de campos com regex
-            sample_text: Texto para validação (opcional)
+            sample_text: Texto para validação (opcional; sem ele só o
+                custo dos regex é validado)
             validate: Se True, valida regex antes de salvar
             metadata: Metadados adicionais
             
@@ -207,7 +532,7 @@ class MapManager:
         }
         
         # Validar se solicitado
-        if validate and sample_text:
+        if validate:
             is_valid, errors = self.validate_map(mapa, sample_text)
             
             if not is_valid:
@@ -221,21 +546,36 @@ class MapManager:
                 
                 with open(rejected_path, 'w', encoding='utf-8') as f:
                     json.dump(mapa, f, ensure_ascii=False, indent=2)
+                if self.catalog.update(rejected_path, mapa):
+                    self._cache.clear()
+                    self._index = None
                 
                 raise MapValidationError(error_msg)
         
-        # Salvar mapa aprovado
+        # Salvar mapa aprovado: a versão é escolhida de novo sob a trava do
+        # catálogo (outro MapManager pode ter salvo durante a validação) e o
+        # arquivo é criado em modo 'x', nunca sobrescrevendo uma versão
         mapa['status'] = 'VALIDATED' if validate else 'NOT_VALIDATED'
-        filename = f"{grupo}_v{version}.json"
-        filepath = self.maps_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(mapa, f, ensure_ascii=False, indent=2)
+        catalog = self.catalog
+        with catalog.lock():
+            version = self._get_next_version(grupo)
+            while True:
+                mapa['versao'] = f"v{version}"
+                filepath = self.maps_dir / f"{grupo}_v{version}.json"
+                try:
+                    with open(filepath, 'x', encoding='utf-8') as f:
+                        json.dump(mapa, f, ensure_ascii=False, indent=2)
+                    break
+                except FileExistsError:
+                    version += 1
+            if catalog.update(filepath, mapa):
+                self._cache.clear()
         
         logger.info(f"Mapa salvo: {filepath}")
         
         # Atualizar cache
         self._cache[grupo] = mapa
+        self._index = None
         
         return filepath
     
@@ -250,30 +590,21 @@ class MapManager:
         Returns:
             Mapa ou None se não encontrado
         """
-        # Verificar cache
+        # Verificar cache (descartado se outro MapManager alterou o catálogo)
+        catalog = self.catalog
         if grupo in self._cache and version is None:
             return self._cache[grupo]
         
-        # Buscar arquivos
-        if version:
-            filepath = self.maps_dir / f"{grupo}_v{version}.json"
-            if not filepath.exists():
-                return None
-        else:
-            # Buscar versão mais recente
-            files = sorted(
-                self.maps_dir.glob(f"{grupo}_v*.json"),
-                key=lambda x: x.stat().st_mtime,
-                reverse=True
-            )
-            
-            # Filtrar rejeitados
-            files = [f for f in files if 'REJECTED' not in f.name]
-            
-            if not files:
-                return None
-            
-            filepath = files[0]
+        # Buscar no catálogo
+        entries = [
+            entry for entry in catalog.of_group(grupo).values()
+            if not entry['rejeitado'] and (not version or entry['versao_num'] == version)
+        ]
+        if not entries:
+            return None
+        
+        # Versão pedida, ou a mais recente
+        filepath = self.maps_dir / max(entries, key=lambda entry: entry['mtime_ns'])['arquivo']
         
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
@@ -289,85 +620,457 @@ class MapManager:
             logger.error(f"Erro ao carregar mapa {filepath}: {e}")
             return None
     
+    def load_compiled(
+        self,
+        grupo: str,
+        version: int = None,
+        anchor_window: Optional[int] = None
+    ) -> Optional['CompiledMap']:
+        """Mapa do grupo já compilado (ver compile_map), ou None se não encontrado."""
+        mapa = self.load_map(grupo, version)
+        return compile_map(mapa, anchor_window) if mapa else None
+    
+    def load_all(self) -> 'LazyMaps':
+        """Todos os mapas não rejeitados, por nome (corpos lidos sob demanda)."""
+        return LazyMaps(self.maps_dir, {
+            name: entry['arquivo']
+            for name, entry in sorted(self.catalog.entries.items())
+            if not entry['rejeitado']
+        })
+    
+    @property
+    def index(self) -> 'MapIndex':
+        """MapIndex de todos os mapas (construído no primeiro acesso)."""
+        catalog = self.catalog  # descarta o índice se o catálogo mudou
+        if self._index is None:
+            # Atributos de seleção vêm do catálogo: nenhum mapa é lido aqui
+            maps = self.load_all()
+            self._index = MapIndex(maps, {name: catalog.entries[name] for name in maps})
+        return self._index
+    
+    def select_map(self, distributor: str, pages: int, text: str = None) -> 'MapSelection':
+        """Melhor mapa para um documento (tipo detectado no texto, se informado)."""
+        doc_type = document_type(text) if text else 'adesao'
+        return self.index.select(distributor, pages, doc_type)
+    
     def list_versions(self, grupo: str) -> List[dict]:
         """Lista todas as versões disponíveis para um grupo."""
-        files = sorted(self.maps_dir.glob(f"{grupo}_v*.json"))
-        
-        versions = []
-        for f in files:
-            try:
-                with open(f, 'r', encoding='utf-8') as fp:
-                    mapa = json.load(fp)
-                    versions.append({
-                        'arquivo': f.name,
-                        'versao': mapa.get('versao', 'unknown'),
-                        'data': mapa.get('data_geracao', 'unknown'),
-                        'status': mapa.get('status', 'unknown'),
-                        'hash': mapa.get('hash', 'unknown')
-                    })
-            except Exception:
-                pass
-        
-        return versions
+        entries = sorted(self.catalog.of_group(grupo).values(), key=lambda entry: entry['arquivo'])
+        return [
+            {
+                'arquivo': entry['arquivo'],
+                'versao': entry['versao'],
+                'data': entry['data'],
+                'status': entry['status'],
+                'hash': entry['hash']
+            }
+            for entry in entries
+        ]
     
     def list_all_groups(self) -> List[str]:
         """Lista todos os grupos com mapas disponíveis."""
-        files = self.maps_dir.glob("*_v*.json")
-        groups = set()
+        return sorted({
+            entry['grupo'] for entry in self.catalog.entries.values()
+            if entry['grupo'] and not entry['rejeitado']
+        })
+
+
+# Flags de todos os regex de campo dos mapas
+FIELD_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Mapas compilados mantidos em memória (por conteúdo dos campos)
+COMPILED_CACHE_SIZE = 128
+
+# Fora do Latin-1, str.lower() não equivale ao IGNORECASE do re (ex: ſ, K, ı)
+_NON_LATIN1_RE = re.compile('[^\x00-\xff]')
+
+
+def fold_latin1(text: str) -> Optional[str]:
+    """
+    text.lower() se o texto for Latin-1 (onde lower() e IGNORECASE
+    coincidem caractere a caractere, preservando offsets); senão None.
+    """
+    if _NON_LATIN1_RE.search(text):
+        return None
+    return text.lower()
+
+
+class CompiledField(NamedTuple):
+    """Campo de um mapa com regex e âncora já compilados."""
+    campo: str
+    pattern: Optional[Pattern]  # None: sem regex ou regex inválido
+    anchor: Optional[Pattern]   # None: sem âncora
+    anchor_folded: Optional[str]  # âncora em minúsculas (busca por str.find)
+    configured: bool            # config do campo não vazia
+    encontrado: bool            # flag 'encontrado' do mapa (padrão True)
+    error: Optional[str]        # erro de compilação do regex
+
+
+def _field_spec(campo: str, config: Optional[dict]) -> tuple:
+    """Parte do mapa que define a compilação de um campo."""
+    config = config or {}
+    return (campo, bool(config), config.get('regex', ''), config.get('ancora', ''), config.get('encontrado', True))
+
+
+def _compile_field(campo: str, configured: bool, regex: str, ancora: str, encontrado: bool) -> CompiledField:
+    pattern = None
+    error = None
+    if regex:
+        try:
+            pattern = re.compile(regex, FIELD_FLAGS)
+        except re.error as e:
+            error = str(e)
+            logger.warning(f"Regex inválido no campo '{campo}': {e}")
+    anchor = re.compile(re.escape(ancora), re.IGNORECASE) if ancora else None
+    anchor_folded = fold_latin1(ancora) if ancora else None
+    return CompiledField(campo, pattern, anchor, anchor_folded, configured, bool(encontrado), error)
+
+
+class CompiledMap:
+    """
+    Mapa de extração com todos os regex pré-compilados.
+    
+    Os campos compilados são compartilhados por todos os mapas com os mesmos
+    campos (compile_map mantém um cache); o CompiledMap em si é leve e guarda
+    os metadados (grupo, modelo, versão, hash) do próprio mapa.
+    
+    Args:
+        mapa: Mapa de extração (dict carregado do JSON)
+        anchor_window: Se definido, o regex de um campo com âncora só é
+            buscado nos anchor_window caracteres após a âncora
+        fields: Campos já compilados (ver _compile_fields); se None, compila
+    
+    Cada busca roda com orçamento de budget_ms; um campo que estoura o
+    orçamento fica como não encontrado (None).
+    """
+    
+    budget_ms: Optional[float] = DEFAULT_BUDGET_MS
+    
+    def __init__(
+        self,
+        mapa: dict,
+        anchor_window: Optional[int] = None,
+        fields: Optional[Tuple[CompiledField, ...]] = None
+    ):
+        self.grupo = mapa.get('grupo')
+        self.modelo = mapa.get('modelo_identificado', 'N/A')
+        self.versao = mapa.get('versao')
+        self.hash = mapa.get('hash')
+        self.anchor_window = anchor_window
+        if fields is None:
+            fields = tuple(_compile_field(*spec) for spec in _field_specs(mapa))
+        self.fields: Tuple[CompiledField, ...] = fields
+    
+    def __len__(self) -> int:
+        return len(self.fields)
+    
+    def search(
+        self,
+        field: CompiledField,
+        text: str,
+        use_anchor: bool = True,
+        folded: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Valor do campo no texto (grupo 1 se existir, senão o match), sem espaços
+        nas pontas. Com âncora encontrada, busca no texto após ela.
         
-        for f in files:
-            if 'REJECTED' not in f.name:
-                match = re.match(r'(.+)_v\d+\.json', f.name)
-                if match:
-                    groups.add(match.group(1))
+        Args:
+            folded: fold_latin1(text), se já calculado. A âncora é então
+                localizada com str.find (o IGNORECASE do re é bem mais lento)
+        """
+        if field.pattern is None:
+            return None
         
-        return sorted(list(groups))
+        search_text = text
+        if use_anchor and field.anchor is not None:
+            if folded is not None and field.anchor_folded is not None:
+                position = folded.find(field.anchor_folded)
+                end = position + len(field.anchor_folded) if position >= 0 else None
+            else:
+                anchor_match = field.anchor.search(text)
+                end = anchor_match.end() if anchor_match else None
+            if end is not None:
+                search_text = text[end:end + self.anchor_window] if self.anchor_window else text[end:]
+        
+        try:
+            match = guarded_search(field.pattern, search_text, self.budget_ms)
+        except RegexTimeout:
+            logger.warning(
+                f"Regex do campo '{field.campo}' (mapa {self.grupo} {self.versao}) "
+                f"excedeu {self.budget_ms} ms; campo ignorado"
+            )
+            return None
+        if not match:
+            return None
+        value = match.group(1) if match.groups() else match.group(0)
+        return value.strip() if value is not None else None
+    
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Campos extraídos (campos sem regex ficam de fora, como em extract_with_map)."""
+        result = {}
+        folded = fold_latin1(text) if any(field.anchor_folded for field in self.fields) else None
+        for field in self.fields:
+            if field.pattern is None and not field.error:
+                continue
+            result[field.campo] = self.search(field, text, folded=folded)
+        return result
+
+
+def _field_specs(mapa: dict) -> Tuple[tuple, ...]:
+    """Especificação (campo, regex, âncora, flags) de cada campo do mapa."""
+    return tuple(_field_spec(campo, config) for campo, config in mapa.get('campos', {}).items())
+
+
+_compiled_cache: 'OrderedDict[tuple, Tuple[CompiledField, ...]]' = OrderedDict()
+
+
+def _compile_fields(mapa: dict) -> Tuple[CompiledField, ...]:
+    """
+    Campos compilados do mapa, reaproveitados entre chamadas.
+    
+    O cache é indexado só pelo conteúdo dos campos (regex, âncora, flags):
+    os campos compilados não dependem dos metadados do mapa.
+    """
+    key = _field_specs(mapa)
+    fields = _compiled_cache.get(key)
+    if fields is None:
+        fields = tuple(_compile_field(*spec) for spec in key)
+        _compiled_cache[key] = fields
+        if len(_compiled_cache) > COMPILED_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    else:
+        _compiled_cache.move_to_end(key)
+    return fields
+
+
+def compile_map(mapa: Union[dict, CompiledMap], anchor_window: Optional[int] = None) -> CompiledMap:
+    """
+    CompiledMap de um mapa, com os campos compilados reaproveitados entre chamadas.
+    
+    Uma nova versão do mapa (campos diferentes) é compilada de novo e chamadas
+    repetidas com o mesmo dict (um por documento) não recompilam nada. O
+    CompiledMap devolvido é novo a cada chamada e leva os metadados do
+    próprio mapa, mesmo quando os campos vêm do cache.
+    """
+    if isinstance(mapa, CompiledMap):
+        return mapa
+    return CompiledMap(mapa, anchor_window, fields=_compile_fields(mapa))
 
 
-def extract_with_map(text: str, mapa: dict) -> Dict[str, Any]:
+def extract_with_map(
+    text: str,
+    mapa: Union[dict, CompiledMap],
+    anchor_window: Optional[int] = None
+) -> Dict[str, Any]:
     """
     Extrai campos de um texto usando um mapa de extração.
     
     Args:
         text: Texto do PDF
-        mapa: Mapa de extração
+        mapa: Mapa de extração (dict ou CompiledMap)
+        anchor_window: Janela de busca após a âncora (None = até o fim)
         
     Returns:
         Dicionário com campos extraídos
     """
-    result = {}
-    campos = mapa.get('campos', {})
+    return compile_map(mapa, anchor_window).extract(text)
+
+
+# =============================================================================
+# SELEÇÃO DE MAPA POR DOCUMENTO
+# =============================================================================
+
+# Tipos de documento considerados na seleção
+DOC_TYPES = ('distrato', 'aditivo', 'adesao')
+
+
+def document_type(text: str) -> str:
+    """Tipo do documento pelo texto: 'distrato', 'aditivo' ou 'adesao'."""
+    text_lower = text.lower()
+    if "distrato" in text_lower:
+        return 'distrato'
+    if "aditivo" in text_lower:
+        return 'aditivo'
+    return 'adesao'
+
+
+class MapSelection(NamedTuple):
+    """Mapa escolhido para um documento."""
+    name: Optional[str]
+    mapa: Optional[dict]
+    selection_type: str  # EXATO, FALLBACK_DIST, FALLBACK_GENERICO ou NENHUM
+    score: int
+
+
+class _MapProfile(NamedTuple):
+    """Atributos de um mapa usados na pontuação (calculados uma vez)."""
+    name: str
+    name_lower: str
+    distributor: str
+    pages: int
+    model: str
+    version: int
+
+
+def _version_number(name: str) -> int:
+    match = re.search(r'_v(\d+)$', name)
+    return int(match.group(1)) if match else 0
+
+
+class MapIndex:
+    """
+    Seleção de mapa por (distribuidora, páginas, tipo de documento).
+    
+    A pontuação é a dos runners (distribuidora +10, páginas exatas +15 ou
+    ±1 +3, "_NNp" no nome +10, tipo do documento +20/-5, adesão vs
+    aditivo/distrato -30/+5; só mapas com pontuação positiva). Os atributos
+    de cada mapa são calculados na construção e o ranking de cada chave é
+    calculado uma única vez: selecionar o mapa de um documento é uma
+    consulta a dicionário, não uma passada por todos os mapas.
+    
+    Empates vão para a versão mais recente e depois para o nome.
     
-    for campo, config in campos.items():
-        regex = config.get('regex', '')
-        ancora = config.get('ancora', '')
+    select_by_folder() é a seleção por pasta do extract_smart (prefixo do
+    nome, sem pontuação mínima), com o mesmo cache por chave.
+    """
+    
+    def __init__(self, maps: Mapping[str, dict], attributes: Mapping[str, dict] = None):
+        """
+        Args:
+            maps: {nome do mapa (stem do arquivo): mapa}
+            attributes: {nome: atributos de seleção}, se diferentes de maps
+                (ex: entradas do catálogo; o corpo do mapa só é lido ao ser escolhido)
+        """
+        self.maps = maps
+        self._profiles = [
+            _MapProfile(
+                name=name,
+                name_lower=name.lower(),
+                distributor=(mapa.get("distribuidora_principal") or "").upper(),
+                pages=mapa.get("paginas_analisadas") or 0,
+                model=(mapa.get("modelo_identificado") or "").lower(),
+                version=_version_number(name),
+            )
+            for name, mapa in (attributes if attributes is not None else maps).items()
+        ]
+        self._ranked: Dict[Tuple[str, int, str], List[Tuple[int, _MapProfile]]] = {}
+        self._by_folder: Dict[Tuple[str, int], Tuple[Optional[str], str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.maps)
+    
+    @staticmethod
+    def _score(profile: _MapProfile, distributor: str, pages: int, doc_type: str) -> int:
+        score = 0
         
-        if not regex:
-            continue
+        if profile.distributor and profile.distributor in distributor:
+            score += 10
         
-        try:
-            # Se tem âncora, buscar após ela
-            search_text = text
-            if ancora:
-                ancora_match = re.search(re.escape(ancora), text, re.IGNORECASE)
-                if ancora_match:
-                    search_text = text[ancora_match.end():]
-            
-            # Executar regex
-            pattern = re.compile(regex, re.IGNORECASE | re.MULTILINE)
-            match = pattern.search(search_text)
-            
-            if match:
-                value = match.group(1) if match.groups() else match.group(0)
-                result[campo] = value.strip()
+        if profile.pages == pages:
+            score += 15
+        elif abs(profile.pages - pages) <= 1:
+            score += 3
+        
+        if f"_{pages}p" in profile.name_lower or f"_{pages:02d}p" in profile.name_lower:
+            score += 10
+        
+        if doc_type == 'distrato' or doc_type == 'aditivo':
+            if doc_type in profile.model or doc_type in profile.name_lower:
+                score += 20
             else:
-                result[campo] = None
-                
-        except Exception as e:
-            logger.warning(f"Erro ao extrair '{campo}': {e}")
-            result[campo] = None
+                score -= 5
+        else:
+            if "aditivo" in profile.name_lower or "distrato" in profile.name_lower:
+                score -= 30
+            if "adesão" in profile.model or "adesao" in profile.model:
+                score += 5
+        
+        return score
+    
+    def _ranked_profiles(self, distributor: str, pages: int, doc_type: str) -> List[Tuple[int, _MapProfile]]:
+        """Ranking da chave, calculado na primeira consulta e reaproveitado."""
+        key = (distributor.upper(), pages, doc_type or 'adesao')
+        ranked = self._ranked.get(key)
+        if ranked is None:
+            scored = [(self._score(profile, *key), profile) for profile in self._profiles]
+            ranked = sorted(
+                ((score, profile) for score, profile in scored if score > 0),
+                key=lambda item: (-item[0], -item[1].version, item[1].name)
+            )
+            self._ranked[key] = ranked
+        return ranked
     
-    return result
+    def ranked(self, distributor: str, pages: int, doc_type: str = 'adesao') -> List[Tuple[int, str]]:
+        """Candidatos (pontuação, nome) do melhor para o pior."""
+        return [(score, profile.name) for score, profile in self._ranked_profiles(distributor, pages, doc_type)]
+    
+    def select(self, distributor: str, pages: int, doc_type: str = 'adesao') -> MapSelection:
+        """Melhor mapa para o documento (NENHUM se nenhum pontuar)."""
+        ranked = self._ranked_profiles(distributor, pages, doc_type)
+        if not ranked:
+            return MapSelection(None, None, "NENHUM", 0)
+        
+        score, profile = ranked[0]
+        if profile.distributor and profile.distributor in distributor.upper():
+            selection_type = "EXATO" if profile.pages == pages else "FALLBACK_DIST"
+        else:
+            selection_type = "FALLBACK_GENERICO"
+        return MapSelection(profile.name, self.maps[profile.name], selection_type, score)
+    
+    def select_for_text(self, text: str, pages: int, distributor: str) -> MapSelection:
+        """select() com o tipo de documento detectado no texto."""
+        return self.select(distributor, pages, document_type(text))
+    
+    def _select_by_folder(self, distributor: str, pages: int) -> Tuple[Optional[str], str]:
+        dist_normalized = distributor.upper().replace('-', '_').replace(' ', '_')
+        newest = lambda profile: (-profile.version, profile.name)
+        
+        prefixes = (
+            f"{dist_normalized}_{pages:02d}p",
+            f"{dist_normalized}_{pages}p",
+            f"{distributor}_{pages:02d}p",
+            f"{distributor}_{pages}p",
+        )
+        for prefix in prefixes:
+            exact = [profile for profile in self._profiles if profile.name_lower.startswith(prefix.lower())]
+            if exact:
+                return min(exact, key=newest).name, "EXATO"
+        
+        # Páginas mais próximas (mapa sem páginas analisadas fica no fim)
+        by_distance = lambda profile: (abs(profile.pages - pages) if profile.pages else 100, *newest(profile))
+        
+        same_distributor = [profile for profile in self._profiles if dist_normalized.lower() in profile.name_lower]
+        if same_distributor:
+            return min(same_distributor, key=by_distance).name, "FALLBACK_DIST"
+        
+        generic = [
+            profile for profile in self._profiles
+            if profile.pages and 'aditivo' not in profile.name_lower and 'distrato' not in profile.name_lower
+        ]
+        if generic:
+            return min(generic, key=by_distance).name, "FALLBACK_GENERICO"
+        
+        return None, "NENHUM"
+    
+    def select_by_folder(self, distributor: str, pages: int) -> MapSelection:
+        """
+        Seleção pela pasta XX_paginas/DISTRIBUIDORA, sem pontuação.
+        
+        1. EXATO: nome do mapa começa com DISTRIBUIDORA_NNp
+        2. FALLBACK_DIST: distribuidora no nome do mapa, páginas mais próximas
+        3. FALLBACK_GENERICO: qualquer mapa com páginas analisadas (exceto
+           aditivo/distrato), páginas mais próximas
+        
+        Diferente de select(), não há pontuação mínima: havendo um mapa com
+        páginas analisadas, algum é escolhido.
+        """
+        key = (distributor, pages)
+        selected = self._by_folder.get(key)
+        if selected is None:
+            selected = self._by_folder[key] = self._select_by_folder(distributor, pages)
+        name, selection_type = selected
+        return MapSelection(name, self.maps[name] if name else None, selection_type, 0)
 
 
 # Instância global para uso simplificado
@@ -1,8 +1,20 @@
 """
 Padrões regex para extração de dados dos contratos.
 Inclui âncoras fortes para evitar captura de dados incorretos.
+
+PERFORMANCE: Os padrões são compilados uma única vez no import, no registro
+PATTERN_REGISTRY. O hot path (extract_fields, detect_document_type,
+detect_model) nunca compila regex nem depende do cache interno do módulo re.
+
+Cada busca do registro roda com orçamento de tempo (regex_guard): um padrão
+que passa do orçamento em um documento conta como falha (e em timeouts) em
+vez de travar o worker.
 """
 import re
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from raizen_power.utils.regex_guard import DEFAULT_BUDGET_MS, RegexTimeout, guarded_search
 
 # Flags padrão para regex multilinha
 FLAGS = re.IGNORECASE | re.DOTALL | re.MULTILINE
@@ -345,43 +357,264 @@ class PatternsMixin:
     }
 
 
-def get_pattern_for_field(field_name: str, model: str = 'MODELO_1') -> list:
-    """Retorna lista de padrões regex para um campo específico."""
-    mixin = PatternsMixin()
+# Campos numéricos que precisam de normalização BR -> US
+NUMERIC_FIELDS = frozenset({
+    'performance_alvo', 'qtd_cotas', 'valor_cota', 'pagamento_mensal', 'participacao_percentual'
+})
+
+# Indicadores únicos fortes usados como fallback em detect_model
+MODEL_FALLBACK_INDICATORS = [
+    # SmartFit tem "DA QUALIFICAÇÃO DA CONSORCIADA" (não "DADOS DA")
+    ('MODELO_2_TABULAR', r'DA\s+QUALIFICA[CÇ][ÃA]O\s+DA\s+CONSORCIADA|DADOS\s+DA\s+CONSORCIADA:'),
+    ('MODELO_1_VISUAL', r'CONSORCIADA\s*\(VOC[ÊE]\)'),
+]
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Um padrão compilado com seu identificador (ex: "MODELO_1.cnpj[0]")
+CompiledPattern = Tuple[str, 're.Pattern']
+
+
+def _resolve_model_key(model: str) -> str:
+    """Mapeia o nome do modelo para o conjunto de padrões de campo usado."""
+    return 'MODELO_2' if model == 'MODELO_2' else 'MODELO_1'
+
+
+class PatternRegistry:
+    """
+    Registro de padrões pré-compilados, construído uma vez no import.
+    
+    Mantém objetos re.Pattern para MODELO_1, MODELO_2, CONSORCIO e para a
+    detecção de tipo de documento/modelo, além de contadores de acerto
+    (hit), falha (miss) e estouro de orçamento (timeouts) por padrão.
+    """
+    
+    def __init__(self, flags: int = FLAGS, budget_ms: Optional[float] = DEFAULT_BUDGET_MS):
+        self.flags = flags
+        self.budget_ms = budget_ms
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.timeouts: Counter = Counter()
+        
+        self.document_types: List[CompiledPattern] = [
+            (doc_type, self._compile(f'DOCUMENT_TYPE.{doc_type}', pattern))
+            for doc_type, pattern in PatternsMixin.DOCUMENT_TYPE_PATTERNS.items()
+        ]
+        self.model_indicators: Dict[str, List[CompiledPattern]] = {
+            model: self._compile_list(f'MODEL_INDICATORS.{model}', indicators)
+            for model, indicators in PatternsMixin.MODEL_INDICATORS.items()
+        }
+        self.model_fallbacks: List[Tuple[str, CompiledPattern]] = [
+            (model, self._compile(f'MODEL_FALLBACK[{i}]', pattern))
+            for i, (model, pattern) in enumerate(MODEL_FALLBACK_INDICATORS)
+        ]
+        
+        modelo_1 = {
+            name: self._compile_list(f'MODELO_1.{name}', patterns)
+            for name, patterns in PatternsMixin.MODELO_1_PATTERNS.items()
+        }
+        modelo_2 = {
+            name: self._compile_list(f'MODELO_2.{name}', patterns)
+            for name, patterns in PatternsMixin.MODELO_2_PATTERNS.items()
+        }
+        # MODELO_2 herda do MODELO_1 os campos que não define
+        self.fields: Dict[str, Dict[str, List[CompiledPattern]]] = {
+            'MODELO_1': modelo_1,
+            'MODELO_2': {**modelo_1, **modelo_2},
+        }
+        self.consorcio: Dict[str, List[CompiledPattern]] = {
+            name: self._compile_list(f'CONSORCIO.{name}', patterns)
+            for name, patterns in PatternsMixin.CONSORCIO_PATTERNS.items()
+        }
+    
+    def _compile(self, pattern_id: str, pattern: str) -> CompiledPattern:
+        return pattern_id, re.compile(pattern, self.flags)
+    
+    def _compile_list(self, prefix: str, patterns: List[str]) -> List[CompiledPattern]:
+        return [self._compile(f'{prefix}[{i}]', p) for i, p in enumerate(patterns)]
+    
+    def all_patterns(self) -> Iterator[CompiledPattern]:
+        """Todos os padrões do registro, sem repetição (MODELO_2 herda do MODELO_1)."""
+        seen = set()
+        groups = [
+            [compiled for _, compiled in self.document_types],
+            [compiled for _, compiled in self.model_fallbacks],
+            *self.model_indicators.values(),
+            *(patterns for model in self.fields.values() for patterns in model.values()),
+            *self.consorcio.values(),
+        ]
+        for group in groups:
+            for compiled in group:
+                if compiled[0] not in seen:
+                    seen.add(compiled[0])
+                    yield compiled
+    
+    def search(self, compiled: CompiledPattern, text: str) -> Optional['re.Match']:
+        """
+        Executa re.search com um padrão do registro, contabilizando hit/miss.
+        
+        Uma busca que estoura o orçamento conta como miss (e em timeouts).
+        """
+        pattern_id, regex = compiled
+        try:
+            match = guarded_search(regex, text, self.budget_ms)
+        except RegexTimeout:
+            self.timeouts[pattern_id] += 1
+            self.misses[pattern_id] += 1
+            return None
+        if match:
+            self.hits[pattern_id] += 1
+        else:
+            self.misses[pattern_id] += 1
+        return match
+    
+    # -------------------------------------------------------------------------
+    # Detecção
+    # -------------------------------------------------------------------------
+    
+    def detect_document_type(self, text: str) -> str:
+        """Detecta o tipo de documento baseado no conteúdo."""
+        for doc_type, compiled in self.document_types:
+            if self.search(compiled, text):
+                return doc_type
+        return 'DESCONHECIDO'
+    
+    def detect_model(self, text: str) -> str:
+        """Detecta o modelo/layout do documento."""
+        for model, indicators in self.model_indicators.items():
+            matches = sum(1 for compiled in indicators if self.search(compiled, text))
+            if matches >= 2:
+                return model
+        
+        # Fallback baseado em indicadores únicos fortes
+        for model, compiled in self.model_fallbacks:
+            if self.search(compiled, text):
+                return model
+        
+        return 'MODELO_1_VISUAL'  # Default
     
-    if model == 'MODELO_1':
-        patterns = mixin.MODELO_1_PATTERNS.get(field_name, [])
-    elif model == 'MODELO_2':
-        patterns = mixin.MODELO_2_PATTERNS.get(field_name, [])
+    # -------------------------------------------------------------------------
+    # Extração de campos
+    # -------------------------------------------------------------------------
+    
+    def patterns_for_field(self, field_name: str, model: str = 'MODELO_1') -> List[CompiledPattern]:
+        """Retorna os padrões compilados de um campo para o modelo."""
+        return self.fields[_resolve_model_key(model)].get(field_name, [])
+    
+    def extract_field(self, text: str, field_name: str, model: str = 'MODELO_1') -> str:
+        """Extrai um campo do texto usando os padrões compilados."""
+        for compiled in self.patterns_for_field(field_name, model):
+            match = self.search(compiled, text)
+            if match:
+                return _clean_value(match.group(1), field_name)
+        return ''
+    
+    def extract_fields(
+        self,
+        text: str,
+        model: str = 'MODELO_1',
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, str]:
+        """
+        Extrai vários campos de uma vez.
+        
+        Args:
+            text: Texto do documento
+            model: Modelo detectado ('MODELO_1', 'MODELO_2', ...)
+            fields: Campos a extrair (padrão: todos os campos do modelo)
+        
+        Returns:
+            Dicionário apenas com os campos encontrados
+        """
+        field_patterns = self.fields[_resolve_model_key(model)]
+        if fields is None:
+            fields = list(field_patterns)
+        
+        data = {}
+        for field_name in fields:
+            for compiled in field_patterns.get(field_name, []):
+                match = self.search(compiled, text)
+                if match:
+                    value = _clean_value(match.group(1), field_name)
+                    if value:
+                        data[field_name] = value
+                    break
+        return data
+    
+    def extract_consorcio_fields(self, text: str) -> Dict[str, str]:
+        """Extrai dados do consórcio (Raízen)."""
+        data = {}
+        for field_name, patterns in self.consorcio.items():
+            for compiled in patterns:
+                match = self.search(compiled, text)
+                if match:
+                    data[field_name] = match.group(1).strip()
+                    break
+        return data
+    
+    # -------------------------------------------------------------------------
+    # Estatísticas
+    # -------------------------------------------------------------------------
+    
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Retorna hits/misses por padrão (apenas padrões já executados).
+        
+        Padrões que estouraram o orçamento trazem também 'timeouts'.
+        """
+        stats = {
+            pattern_id: {'hits': self.hits[pattern_id], 'misses': self.misses[pattern_id]}
+            for pattern_id in sorted(set(self.hits) | set(self.misses))
+        }
+        for pattern_id, count in self.timeouts.items():
+            stats[pattern_id]['timeouts'] = count
+        return stats
+    
+    def reset_stats(self) -> None:
+        """Zera os contadores de hit/miss/timeouts."""
+        self.hits.clear()
+        self.misses.clear()
+        self.timeouts.clear()
+
+
+def _clean_value(value: str, field_name: str) -> str:
+    """Limpa o valor capturado e normaliza campos numéricos."""
+    value = value.strip()
+    # Limpar caracteres especiais e quebras de linha
+    value = _WHITESPACE_RE.sub(' ', value)
+    # Remover vírgula final
+    value = value.rstrip(',')
+    
+    # Normalizar valores numéricos para formato americano
+    if field_name in NUMERIC_FIELDS:
+        # Formato BR: 7.653,00 -> 7653.00
+        if '.' in value and ',' in value and value.rfind('.') < value.rfind(','):
+            value = value.replace('.', '').replace(',', '.')
+    
+    return value
+
+
+# Registro global: compilado uma única vez no import do módulo
+PATTERN_REGISTRY = PatternRegistry()
+
+
+def get_pattern_for_field(field_name: str, model: str = 'MODELO_1') -> list:
+    """Retorna lista de padrões regex (strings) para um campo específico."""
+    if model == 'MODELO_2':
+        patterns = PatternsMixin.MODELO_2_PATTERNS.get(field_name, [])
         if not patterns:
-            patterns = mixin.MODELO_1_PATTERNS.get(field_name, [])
+            patterns = PatternsMixin.MODELO_1_PATTERNS.get(field_name, [])
     else:
-        patterns = mixin.MODELO_1_PATTERNS.get(field_name, [])
+        patterns = PatternsMixin.MODELO_1_PATTERNS.get(field_name, [])
     
     return patterns
 
 
 def extract_field(text: str, field_name: str, model: str = 'MODELO_1') -> str:
     """Extrai um campo do texto usando os padrões definidos."""
-    patterns = get_pattern_for_field(field_name, model)
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, FLAGS)
-        if match:
-            value = match.group(1).strip()
-            # Limpar caracteres especiais e quebras de linha
-            value = re.sub(r'\s+', ' ', value)
-            # Remover vírgula final
-            value = value.rstrip(',')
-            
-            # Normalizar valores numéricos para formato americano
-            # Campos que precisam de normalização BR -> US
-            numeric_fields = ['performance_alvo', 'qtd_cotas', 'valor_cota', 'pagamento_mensal', 'participacao_percentual']
-            if field_name in numeric_fields:
-                # Formato BR: 7.653,00 -> 7653.00
-                if '.' in value and ',' in value and value.rfind('.') < value.rfind(','):
-                    value = value.replace('.', '').replace(',', '.')
-            
-            return value
-    
-    return ''
+    return PATTERN_REGISTRY.extract_field(text, field_name, model)
+
+
+def extract_fields(text: str, model: str = 'MODELO_1', fields: Optional[List[str]] = None) -> Dict[str, str]:
+    """Extrai vários campos do texto usando o registro pré-compilado."""
+    return PATTERN_REGISTRY.extract_fields(text, model, fields)
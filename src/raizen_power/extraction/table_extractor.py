@@ -3,6 +3,8 @@ Extrator de tabelas de PDFs usando PyMuPDF (fitz).
 Especializado em extrair dados do Anexo I e tabelas de instalações.
 
 OTIMIZADO: Usa context manager único para evitar múltiplas aberturas do PDF.
+CACHE POR PÁGINA: DocumentView memoiza texto, tabelas e TextPage de cada página,
+garantindo que find_tables() rode no máximo uma vez por página por documento.
 FALLBACK OCR: Se o PDF for baseado em imagem, usa EasyOCR automaticamente.
 
 CONFIGURAÇÃO DE WORKERS (Previne OOM):
@@ -12,12 +14,15 @@ CONFIGURAÇÃO DE WORKERS (Previne OOM):
 """
 import fitz  # PyMuPDF
 import re
+import time
 import logging
 import io
 from typing import List, Dict, Any, Optional, Union, Iterator
 from pathlib import Path
 from contextlib import contextmanager
 
+from raizen_power.utils.numeric_tokens import NumericTokenIndex
+
 # Logger para o módulo
 logger = logging.getLogger(__name__)
 
@@ -129,7 +134,96 @@ def open_pdf(pdf_path: str) -> Iterator[fitz.Document]:
             doc.close()
 
 
-def extract_all_text_from_pdf(pdf: fitz.Document, max_pages: int = 10, use_ocr_fallback: bool = True) -> str:
+class DocumentView:
+    """
+    Visão de um PDF já aberto com cache por página.
+    
+    Memoiza, no primeiro acesso, o objeto Page, o TextPage reutilizável, o texto
+    e as tabelas (find_tables) de cada página. Todas as funções *_from_pdf
+    compartilham a mesma instância, então nenhuma página é analisada duas vezes.
+    
+    Uso:
+        with open_document_view(pdf_path) as view:
+            text = extract_all_text_from_pdf(view)
+            installations = extract_installations_from_pdf(view)
+    """
+    
+    def __init__(self, pdf: fitz.Document):
+        self.pdf = pdf
+        self._pages: Dict[int, fitz.Page] = {}
+        self._textpages: Dict[int, Any] = {}
+        self._texts: Dict[int, str] = {}
+        self._tables: Dict[int, List[List[List[str]]]] = {}
+        # Tempo gasto em OCR neste documento (instrumentação por etapa)
+        self.ocr_seconds = 0.0
+    
+    def __len__(self) -> int:
+        return len(self.pdf)
+    
+    def __getitem__(self, page_num: int) -> fitz.Page:
+        return self.page(page_num)
+    
+    def page(self, page_num: int) -> fitz.Page:
+        """Retorna o objeto Page (carregado uma única vez)."""
+        page = self._pages.get(page_num)
+        if page is None:
+            page = self.pdf[page_num]
+            self._pages[page_num] = page
+        return page
+    
+    def textpage(self, page_num: int):
+        """
+        Retorna o TextPage da página, reutilizado por todas as extrações de texto.
+        
+        Usa as mesmas flags de page.get_text() (TEXTFLAGS_TEXT): as flags
+        padrão de get_textpage() expandem ligaduras e trocam tabs.
+        """
+        tp = self._textpages.get(page_num)
+        if tp is None:
+            tp = self.page(page_num).get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+            self._textpages[page_num] = tp
+        return tp
+    
+    def get_text(self, page_num: int) -> str:
+        """Retorna o texto nativo da página (sem OCR)."""
+        text = self._texts.get(page_num)
+        if text is None:
+            text = self.page(page_num).get_text(textpage=self.textpage(page_num)) or ""
+            self._texts[page_num] = text
+        return text
+    
+    def get_tables(self, page_num: int) -> List[List[List[str]]]:
+        """
+        Retorna as tabelas da página (find_tables executado no máximo uma vez).
+        
+        As listas retornadas são compartilhadas entre chamadas: não modifique.
+        """
+        tables = self._tables.get(page_num)
+        if tables is None:
+            tables = _extract_tables_pymupdf(self.page(page_num))
+            self._tables[page_num] = tables
+        return tables
+
+
+def as_document_view(pdf: Union[DocumentView, fitz.Document]) -> DocumentView:
+    """Garante um DocumentView (aceita fitz.Document por compatibilidade)."""
+    if isinstance(pdf, DocumentView):
+        return pdf
+    return DocumentView(pdf)
+
+
+@contextmanager
+def open_document_view(pdf_path: str) -> Iterator[DocumentView]:
+    """Context manager que abre o PDF uma única vez e entrega um DocumentView."""
+    with open_pdf(pdf_path) as pdf:
+        yield DocumentView(pdf)
+
+
+def extract_all_text_from_pdf(
+    pdf: Union[DocumentView, fitz.Document],
+    max_pages: int = 10,
+    use_ocr_fallback: bool = True
+) -> str:
     """
     Extrai todo o texto de um PDF já aberto.
     
@@ -137,14 +231,15 @@ def extract_all_text_from_pdf(pdf: fitz.Document, max_pages: int = 10, use_ocr_f
     assume que o PDF é baseado em imagem e tenta OCR automaticamente.
     
     Args:
-        pdf: Objeto fitz.Document já aberto
+        pdf: DocumentView (ou fitz.Document já aberto)
         max_pages: Número máximo de páginas a processar
         use_ocr_fallback: Se True, tenta OCR quando texto normal falha
     
     Returns:
         Texto extraído concatenado com marcadores de página
     """
-    total_pages = len(pdf)
+    view = as_document_view(pdf)
+    total_pages = len(view)
     pages_to_process = min(max_pages, total_pages)
     
     if total_pages > max_pages:
@@ -154,13 +249,14 @@ def extract_all_text_from_pdf(pdf: fitz.Document, max_pages: int = 10, use_ocr_f
     ocr_used = False
     
     for i in range(pages_to_process):
-        page = pdf[i]
-        page_text = page.get_text() or ""
+        page_text = view.get_text(i)
         
         # Verificar se precisa de OCR (texto muito curto nas primeiras 2 páginas)
         if use_ocr_fallback and i < 2 and len(page_text.strip()) < 100:
             logger.info(f"Página {i+1} com pouco texto ({len(page_text)} chars), tentando OCR...")
-            ocr_text = _extract_text_with_ocr(page)
+            ocr_start = time.perf_counter()
+            ocr_text = _extract_text_with_ocr(view.page(i))
+            view.ocr_seconds += time.perf_counter() - ocr_start
             if len(ocr_text) > len(page_text):
                 page_text = ocr_text
                 ocr_used = True
@@ -176,7 +272,7 @@ def extract_all_text_from_pdf(pdf: fitz.Document, max_pages: int = 10, use_ocr_f
 def extract_all_text(pdf_path: str, max_pages: int = 10) -> str:
     """
     Extrai todo o texto de um PDF (até max_pages páginas).
-    NOTA: Para melhor performance, use open_pdf() + extract_all_text_from_pdf().
+    NOTA: Para melhor performance, use open_document_view() + extract_all_text_from_pdf().
     
     Args:
         pdf_path: Caminho para o PDF
@@ -192,12 +288,14 @@ def extract_all_text(pdf_path: str, max_pages: int = 10) -> str:
         return f"ERRO: {e}"
 
 
-def find_anexo_i_page_from_pdf(pdf: fitz.Document) -> Optional[int]:
+ANEXO_I_RE = re.compile(r'ANEXO\s+I|UNIDADE\(S\)\s+CONSUMIDORA\(S\)', re.IGNORECASE)
+
+
+def find_anexo_i_page_from_pdf(pdf: Union[DocumentView, fitz.Document]) -> Optional[int]:
     """Encontra a página que contém o Anexo I em um PDF já aberto."""
-    for i in range(len(pdf)):
-        page = pdf[i]
-        text = page.get_text() or ""
-        if re.search(r'ANEXO\s+I|UNIDADE\(S\)\s+CONSUMIDORA\(S\)', text, re.IGNORECASE):
+    view = as_document_view(pdf)
+    for i in range(len(view)):
+        if ANEXO_I_RE.search(view.get_text(i)):
             return i
     return None
 
@@ -245,13 +343,16 @@ def _extract_tables_pymupdf(page: fitz.Page) -> List[List[List[str]]]:
     return tables
 
 
-def extract_tables_from_page_pdf(pdf: fitz.Document, page_num: int) -> List[List[List[str]]]:
+def extract_tables_from_page_pdf(
+    pdf: Union[DocumentView, fitz.Document],
+    page_num: int
+) -> List[List[List[str]]]:
     """Extrai todas as tabelas de uma página específica de um PDF já aberto."""
     tables = []
     try:
-        if page_num < len(pdf):
-            page = pdf[page_num]
-            tables = _extract_tables_pymupdf(page)
+        view = as_document_view(pdf)
+        if page_num < len(view):
+            tables = view.get_tables(page_num)
     except Exception as e:
         logger.warning(f"Erro ao extrair tabelas da página {page_num}: {e}")
     
@@ -334,7 +435,7 @@ def parse_installation_table(table: List[List[str]]) -> List[Dict[str, Any]]:
     return installations
 
 
-def extract_installations_from_pdf(pdf: fitz.Document) -> List[Dict[str, Any]]:
+def extract_installations_from_pdf(pdf: Union[DocumentView, fitz.Document]) -> List[Dict[str, Any]]:
     """
     Extrai lista de instalações do Anexo I de um PDF já aberto.
     Retorna lista de dicionários com dados de cada instalação.
@@ -342,7 +443,8 @@ def extract_installations_from_pdf(pdf: fitz.Document) -> List[Dict[str, Any]]:
     OTIMIZADO: Loop dinâmico que continua até não encontrar mais dados,
     suportando contratos guarda-chuva com centenas de instalações.
     """
-    anexo_page = find_anexo_i_page_from_pdf(pdf)
+    view = as_document_view(pdf)
+    anexo_page = find_anexo_i_page_from_pdf(view)
     
     if anexo_page is None:
         return []
@@ -351,9 +453,9 @@ def extract_installations_from_pdf(pdf: fitz.Document) -> List[Dict[str, Any]]:
     current_page = anexo_page
     
     # Continua enquanto houver páginas no PDF
-    while current_page < len(pdf):
+    while current_page < len(view):
         # Tenta extrair tabelas da página atual
-        tables = extract_tables_from_page_pdf(pdf, current_page)
+        tables = extract_tables_from_page_pdf(view, current_page)
         
         page_has_data = False
         for table in tables:
@@ -376,7 +478,7 @@ def extract_installations_from_pdf(pdf: fitz.Document) -> List[Dict[str, Any]]:
 def extract_installations_from_anexo(pdf_path: str) -> List[Dict[str, Any]]:
     """
     Extrai lista de instalações do Anexo I de um PDF.
-    NOTA: Para melhor performance, use open_pdf() + extract_installations_from_pdf().
+    NOTA: Para melhor performance, use open_document_view() + extract_installations_from_pdf().
     """
     try:
         with open_pdf(pdf_path) as pdf:
@@ -386,7 +488,7 @@ def extract_installations_from_anexo(pdf_path: str) -> List[Dict[str, Any]]:
         return []
 
 
-def extract_modelo_2_data_from_pdf(pdf: fitz.Document) -> Dict[str, Any]:
+def extract_modelo_2_data_from_pdf(pdf: Union[DocumentView, fitz.Document]) -> Dict[str, Any]:
     """
     Extrai dados estruturados do Modelo 2 (tabular/Docusign) de um PDF já aberto.
     Usa extração de tabelas para campos que estão em formato tabular.
@@ -394,10 +496,10 @@ def extract_modelo_2_data_from_pdf(pdf: fitz.Document) -> Dict[str, Any]:
     data = {}
     
     try:
+        view = as_document_view(pdf)
         # Primeira página geralmente tem os dados principais
-        if len(pdf) > 0:
-            page = pdf[0]
-            tables = _extract_tables_pymupdf(page)
+        if len(view) > 0:
+            tables = view.get_tables(0)
             
             for table in tables:
                 for row in table:
@@ -446,7 +548,7 @@ def extract_modelo_2_data_from_pdf(pdf: fitz.Document) -> Dict[str, Any]:
 def extract_modelo_2_data(pdf_path: str) -> Dict[str, Any]:
     """
     Extrai dados estruturados do Modelo 2 (tabular/Docusign).
-    NOTA: Para melhor performance, use open_pdf() + extract_modelo_2_data_from_pdf().
+    NOTA: Para melhor performance, use open_document_view() + extract_modelo_2_data_from_pdf().
     """
     try:
         with open_pdf(pdf_path) as pdf:
@@ -476,26 +578,15 @@ def extract_compact_installations(text: str) -> List[str]:
     
     Usado em contratos guarda-chuva como OI S.A.
     """
-    installations = []
-    
-    # Padrão: números de instalação (6-12 dígitos)
+    # Padrão: números de instalação isolados (\b\d{6,12}\b)
     # Separados por \n, vírgula, espaço ou ponto-e-vírgula
-    pattern = r'\b(\d{6,12})\b'
+    index = NumericTokenIndex(text)
     
-    matches = re.findall(pattern, text)
-    
-    for match in matches:
-        # Filtrar números que são claramente não-instalações
-        # (CNPJs têm 14 dígitos, CPFs têm 11, telefones têm 10-11)
-        if len(match) >= 6 and len(match) <= 12:
-            # Evitar duplicatas
-            if match not in installations:
-                installations.append(match)
-    
-    return installations
+    # Evitar duplicatas mantendo a ordem
+    return list(dict.fromkeys(token.digits for token in index.runs(6, 12, isolated=True)))
 
 
-def extract_compact_installations_from_pdf(pdf: fitz.Document) -> List[Dict[str, Any]]:
+def extract_compact_installations_from_pdf(pdf: Union[DocumentView, fitz.Document]) -> List[Dict[str, Any]]:
     """
     Extrai instalações compactadas de TODAS as páginas do PDF.
     
@@ -508,13 +599,13 @@ def extract_compact_installations_from_pdf(pdf: fitz.Document) -> List[Dict[str,
     seen_installations = set()
     
     try:
-        if len(pdf) == 0:
+        view = as_document_view(pdf)
+        if len(view) == 0:
             return []
         
-        # Varrer TODAS as páginas
-        for page_num in range(len(pdf)):
-            page = pdf[page_num]
-            tables = _extract_tables_pymupdf(page)
+        # Varrer TODAS as páginas (tabelas vêm do cache do DocumentView)
+        for page_num in range(len(view)):
+            tables = view.get_tables(page_num)
             
             if not tables:
                 continue
@@ -549,7 +640,7 @@ def extract_compact_installations_from_pdf(pdf: fitz.Document) -> List[Dict[str,
                                 })
         
         if installations_data:
-            logger.info(f"Encontradas {len(installations_data)} instalações compactadas em {len(pdf)} páginas")
+            logger.info(f"Encontradas {len(installations_data)} instalações compactadas em {len(view)} páginas")
     
     except Exception as e:
         logger.warning(f"Erro ao extrair instalações compactadas: {e}")
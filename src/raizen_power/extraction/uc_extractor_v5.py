@@ -13,19 +13,29 @@ import re
 import json
 import time
 from pathlib import Path
-from typing import List, Dict, Set
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Set, Tuple
+from dataclasses import dataclass, replace
 
 import fitz  # PyMuPDF
 
 # Importar classes refatoradas
 from raizen_power.utils.distributor_rules import CPFLRules, get_rules
 from raizen_power.utils.text_sanitizer import TextSanitizer, NoiseFilter
-from raizen_power.utils.blacklist import DynamicBlacklist
+from raizen_power.utils.blacklist import BlacklistCollector, DynamicBlacklist
+from raizen_power.utils.numeric_tokens import NumericTokenIndex
 
 # Alias para compatibilidade
 CPFLBusinessRules = CPFLRules
 
+# Tamanho das tarefas do modo paralelo (carregado do settings.yaml)
+try:
+    from raizen_power.core.config import settings
+    PARALLEL_CHUNK_SIZE = settings.parallel.chunk_size
+    PARALLEL_IN_FLIGHT_PER_WORKER = settings.parallel.in_flight_per_worker
+except ImportError:
+    PARALLEL_CHUNK_SIZE = 8
+    PARALLEL_IN_FLIGHT_PER_WORKER = 2
+
 
 # ============================================================================
 # EXTRATOR DUAL (CLIENTE + INSTALAÇÃO)
@@ -37,7 +47,8 @@ class DualExtractor:
     Suporta múltiplas distribuidoras via injeção de regras.
     """
     
-    # Padrões para Instalação (ordem de prioridade)
+    # Padrões para Instalação (ordem de prioridade).
+    # Referência: a busca usa o NumericTokenIndex (INSTALACAO_QUERIES)
     INSTALACAO_PATTERNS = [
         # Label explícito "Instalação" - ACEITA 5-12 DÍGITOS (alta confiança)
         (r'(?:N[ºo°]\s*(?:da\s+)?)?(?:Instalação|Instalacao)\s*(?:da\s+)?(?:Unidade\s+)?(?:Consumidora)?[:\s]+(\d{5,12})', 'label_instalacao', True),
@@ -55,6 +66,23 @@ class DualExtractor:
         (r'\b((?:70|71)\d{7})\b', 'formato_70_71'),
     ]
     
+    # Os mesmos padrões como consultas ao índice:
+    # (rótulo à esquerda, prefixos exigidos, mín, máx, dígitos capturados, fonte, pula filtro)
+    # rótulo=None exige número isolado (\b) com tamanho entre mín e máx
+    INSTALACAO_QUERIES = [
+        ('instalacao', (), 5, None, 12, 'label_instalacao', True),
+        ('conta_contrato', (), 5, None, 12, 'conta_contrato', True),
+        ('uc', (), 5, None, 12, 'label_uc', True),
+        (None, ('40',), 10, 10, 10, 'formato_40', False),
+    ]
+    CLIENTE_QUERIES = [
+        ('cliente', (), 9, None, 9, 'label_cliente'),
+        (None, ('70', '71'), 9, 9, 9, 'formato_70_71'),
+    ]
+    
+    # Lista após "Instalação" (a partir do fim do rótulo)
+    LIST_BLOCK_RE = re.compile(r'\s*(?:\(Unidade\s+Consumidora\))?[:\s]+([^:\n]{5,500})', re.IGNORECASE)
+    
     def __init__(self, rules_class=None):
         """
         Args:
@@ -62,20 +90,24 @@ class DualExtractor:
         """
         self.rules = rules_class or CPFLRules
     
-    def _extract_list_after_label(self, text: str) -> List[str]:
+    def _extract_list_after_label(self, index: NumericTokenIndex) -> List[str]:
         """
         Extrai LISTA de UCs após label "Instalação" (separadas por ; , ou espaço)
         Ex: "Nº da Instalação: 22661549; 20572891; 37231995"
         """
         results = []
+        block_end = 0
         
-        pattern = r'(?:N[ºo°]\s*(?:da\s+)?)?(?:Instalação|Instalacao)\s*(?:\(Unidade\s+Consumidora\))?[:\s]+([^:\n]{5,500})'
-        
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            block = match.group(1)
-            numbers = re.findall(r'\b(\d{5,12})\b', block)
+        for label in index.labels_of('instalacao'):
+            # Rótulos dentro do bloco anterior não iniciam nova lista
+            if label.start < block_end:
+                continue
+            match = self.LIST_BLOCK_RE.match(index.text, label.end)
+            if not match:
+                continue
+            block_end = match.end()
             
-            for num in numbers:
+            for num in index.isolated_in(match.start(1), match.end(1), 5, 12):
                 if len(num) == 14:  # CNPJ
                     continue
                 if NoiseFilter.is_date(num):
@@ -85,8 +117,25 @@ class DualExtractor:
         
         return results
     
-    def extract(self, text: str) -> Dict[str, List[Dict]]:
-        """Extrai ambos os tipos separadamente."""
+    @staticmethod
+    def _query(index: NumericTokenIndex, label: Optional[str], prefixes, min_len, max_len, capture):
+        """Números capturados por uma consulta (ordem de texto)."""
+        for token in index.runs(min_len, max_len, isolated=label is None, label=label):
+            if prefixes and not token.digits.startswith(prefixes):
+                continue
+            yield token.digits[:capture]
+    
+    def extract(self, text: str, index: Optional[NumericTokenIndex] = None) -> Dict[str, List[Dict]]:
+        """
+        Extrai ambos os tipos separadamente.
+        
+        Args:
+            text: Texto (já sanitizado) do documento
+            index: Índice numérico de text, se já construído (evita retokenizar)
+        """
+        if index is None:
+            index = NumericTokenIndex(text)
+        
         results = {
             'instalacao': [],
             'cliente': [],
@@ -96,7 +145,7 @@ class DualExtractor:
         seen = set()
         
         # PRIMEIRO: Extrair listas de UCs
-        list_ucs = self._extract_list_after_label(text)
+        list_ucs = self._extract_list_after_label(index)
         for number in list_ucs:
             if number not in seen:
                 results['instalacao'].append({
@@ -107,11 +156,8 @@ class DualExtractor:
                 seen.add(number)
         
         # DEPOIS: Buscar Instalação individual (padrões simples)
-        for pattern, source, skip_noise_filter in self.INSTALACAO_PATTERNS:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                number = match.group(1)
-                number = re.sub(r'\D', '', number)
-                
+        for label, prefixes, min_len, max_len, capture, source, skip_noise_filter in self.INSTALACAO_QUERIES:
+            for number in self._query(index, label, prefixes, min_len, max_len, capture):
                 if number in seen:
                     continue
                 
@@ -128,11 +174,8 @@ class DualExtractor:
                 seen.add(number)
         
         # Buscar Cliente (para classificar/descartar)
-        for pattern, source in self.CLIENTE_PATTERNS:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                number = match.group(1)
-                number = re.sub(r'\D', '', number)
-                
+        for label, prefixes, min_len, max_len, capture, source in self.CLIENTE_QUERIES:
+            for number in self._query(index, label, prefixes, min_len, max_len, capture):
                 if number in seen:
                     continue
                     
@@ -157,19 +200,27 @@ class FallbackExtractor:
     def __init__(self, rules_class=None):
         self.rules = rules_class or CPFLRules
     
-    def extract(self, text: str, already_found: Set[str]) -> List[Dict]:
-        """Busca números genéricos que possam ser UCs."""
+    def extract(
+        self,
+        text: str,
+        already_found: Set[str],
+        index: Optional[NumericTokenIndex] = None
+    ) -> List[Dict]:
+        """Busca números genéricos (\\b\\d{5,10}\\b) que possam ser UCs."""
+        if index is None:
+            index = NumericTokenIndex(text)
+        
         results = []
         
-        pattern = r'\b(\d{5,10})\b'
+        candidates = [
+            token.digits for token in index.runs(5, 10, isolated=True)
+            if token.digits not in already_found
+        ]
         
-        for match in re.finditer(pattern, text):
-            number = match.group(1)
-            
-            if number in already_found:
-                continue
-            
-            is_noise, reason = NoiseFilter.is_noise(number, rules_class=self.rules)
+        # Filtro de ruído em lote (contratos guarda-chuva têm centenas de candidatos)
+        verdicts = NoiseFilter.is_noise_batch(candidates, rules_class=self.rules)
+        
+        for number, (is_noise, reason) in zip(candidates, verdicts):
             if is_noise:
                 continue
             
@@ -215,6 +266,7 @@ class UCExtractorV5:
             use_dynamic_blacklist: Se True, usa blacklist dinâmica
             distributor: Nome da distribuidora (ex: 'CPFL', 'CEMIG')
         """
+        self.distributor = distributor
         self.rules = get_rules(distributor)
         self.sanitizer = TextSanitizer()
         self.dual_extractor = DualExtractor(rules_class=self.rules)
@@ -226,28 +278,51 @@ class UCExtractorV5:
             self.dynamic_blacklist = None
     
     def extract_from_pdf(self, pdf_path: str) -> ExtractionResult:
-        """Pipeline completo de extração."""
+        """
+        Pipeline completo de extração (modo sequencial).
+        
+        A blacklist dinâmica é atualizada e aplicada documento a documento,
+        então o resultado depende da ordem dos PDFs. Para lotes em paralelo
+        use extract_batch_two_phase.
+        """
+        result = self.extract_candidates(pdf_path)
+        
+        # PASSO 4: Filtrar pela blacklist dinâmica
+        if self.dynamic_blacklist and not result.errors:
+            self.dynamic_blacklist.update_frequency(result.ucs)
+            result = apply_blacklist(result, self.dynamic_blacklist)
+        
+        return result
+    
+    def extract_candidates(self, pdf_path: str) -> ExtractionResult:
+        """
+        Passos 1-3 do pipeline (sem blacklist dinâmica).
+        
+        Não lê nem altera estado compartilhado: pode rodar em workers
+        paralelos. O resultado traz as UCs candidatas, que a fase 2
+        filtra com apply_blacklist.
+        """
         start_time = time.time()
         errors = []
         ucs_final = []
         clientes = []
         method = "v5_dual_fallback"
-        ruido_count = 0
         
         try:
-            doc = fitz.open(pdf_path)
+            with fitz.open(pdf_path) as doc:
+                # Extrair texto de todas as páginas
+                pages = [page.get_text() for page in doc]
             
-            # Extrair texto de todas as páginas
-            full_text = ""
-            for page in doc:
-                full_text += page.get_text() + "\n"
-            doc.close()
+            # PASSO 1: Sanitizar (mascarar CNPJ/CPF). Por página: as máscaras
+            # não atravessam quebras de linha, então equivale ao texto inteiro
+            clean_pages = [self.sanitizer.sanitize(page_text)[0] for page_text in pages]
             
-            # PASSO 1: Sanitizar (mascarar CNPJ/CPF)
-            clean_text, cnpjs_found = self.sanitizer.sanitize(full_text)
+            # Uma tokenização numérica por documento, compartilhada pelos extratores
+            index = NumericTokenIndex.from_pages(clean_pages)
+            clean_text = index.text
             
             # PASSO 2: Extração dual (Cliente + Instalação)
-            dual_result = self.dual_extractor.extract(clean_text)
+            dual_result = self.dual_extractor.extract(clean_text, index)
             
             # Coletar instalações com alta confiança
             for item in dual_result['instalacao']:
@@ -260,7 +335,7 @@ class UCExtractorV5:
             # PASSO 3: Fallback (se não encontrou instalações)
             if not ucs_final:
                 already_found = set([c['number'] for c in dual_result['cliente']])
-                fallback_ucs = self.fallback_extractor.extract(clean_text, already_found)
+                fallback_ucs = self.fallback_extractor.extract(clean_text, already_found, index)
                 for item in fallback_ucs:
                     ucs_final.append(item['number'])
                 if fallback_ucs:
@@ -269,13 +344,6 @@ class UCExtractorV5:
             # Deduplicar
             ucs_final = list(dict.fromkeys(ucs_final))
             
-            # PASSO 4: Filtrar pela blacklist dinâmica
-            if self.dynamic_blacklist:
-                self.dynamic_blacklist.update_frequency(ucs_final)
-                ucs_pre_filter = len(ucs_final)
-                ucs_final = [uc for uc in ucs_final if not self.dynamic_blacklist.is_blacklisted(uc)]
-                ruido_count = ucs_pre_filter - len(ucs_final)
-            
             # Calcular confiança média
             avg_conf = 0.98 if method == "v5_dual_fallback" else 0.60
             
@@ -294,7 +362,7 @@ class UCExtractorV5:
             confidence=avg_conf,
             method=method,
             clientes_descartados=clientes,
-            ruido_filtrado=ruido_count,
+            ruido_filtrado=0,
             duration=duration,
             errors=errors
         )
@@ -312,6 +380,172 @@ class UCExtractorV5:
                 print(f"   Códigos: {stats['blacklist']}")
 
 
+def apply_blacklist(result: ExtractionResult, blacklist: DynamicBlacklist) -> ExtractionResult:
+    """Remove do resultado as UCs da blacklist (contabilizadas em ruido_filtrado)."""
+    ucs = [uc for uc in result.ucs if not blacklist.is_blacklisted(uc)]
+    return replace(
+        result,
+        ucs=ucs,
+        uc_count=len(ucs),
+        ruido_filtrado=result.ruido_filtrado + len(result.ucs) - len(ucs)
+    )
+
+
+# ============================================================================
+# EXECUÇÃO PARALELA EM DUAS FASES
+# ============================================================================
+
+# Extrator do processo worker (criado uma vez pelo initializer)
+_WORKER_EXTRACTOR: Optional[UCExtractorV5] = None
+
+
+def _init_worker(distributor: str = "CPFL") -> None:
+    """Initializer dos workers: extrator sem blacklist (nenhum I/O de estado)."""
+    global _WORKER_EXTRACTOR
+    _WORKER_EXTRACTOR = UCExtractorV5(use_dynamic_blacklist=False, distributor=distributor)
+
+
+def _extract_chunk(pdf_paths: List[str], distributor: str = "CPFL") -> Tuple[List[ExtractionResult], Dict]:
+    """
+    Fase 1 no worker: candidatas de um grupo de PDFs e as frequências
+    do grupo (BlacklistCollector.get_data()).
+    """
+    if _WORKER_EXTRACTOR is None or _WORKER_EXTRACTOR.distributor != distributor:
+        # Pool criado sem initializer (ex: executor externo) ou para outra distribuidora
+        _init_worker(distributor)
+    
+    collector = BlacklistCollector()
+    results = []
+    for pdf_path in pdf_paths:
+        result = _WORKER_EXTRACTOR.extract_candidates(pdf_path)
+        if not result.errors:
+            collector.add_document(result.ucs)
+        results.append(result)
+    return results, collector.get_data()
+
+
+def _failed_chunk(pdf_paths: List[str], error: BaseException) -> Tuple[List[ExtractionResult], Dict]:
+    """Saída de uma tarefa que não voltou do worker: um erro por PDF, sem frequências."""
+    message = f"Worker error: {(str(error) or type(error).__name__)[:50]}"
+    results = [
+        ExtractionResult(
+            file=Path(pdf_path).name,
+            path=str(pdf_path),
+            ucs=[],
+            uc_count=0,
+            confidence=0,
+            method="v5_dual_fallback",
+            clientes_descartados=[],
+            ruido_filtrado=0,
+            duration=0.0,
+            errors=[message]
+        )
+        for pdf_path in pdf_paths
+    ]
+    return results, BlacklistCollector().get_data()
+
+
+def extract_batch_two_phase(
+    pdf_paths: List[str],
+    max_workers: int = None,
+    distributor: str = "CPFL",
+    blacklist: DynamicBlacklist = None,
+    chunk_size: int = None,
+    executor: 'ProcessPoolExecutor' = None
+) -> List[ExtractionResult]:
+    """
+    Extrai um lote em paralelo com a blacklist dinâmica em duas fases.
+    
+    Fase 1 (workers): passos 1-3 de cada PDF; cada tarefa devolve as UCs
+    candidatas e um BlacklistCollector do seu grupo de PDFs.
+    Fase 2 (processo principal): agrega as frequências, recalcula a
+    blacklist e a aplica às candidatas já em memória (sem reler PDFs).
+    
+    Diferente de extract_from_pdf em sequência, todos os PDFs do lote são
+    filtrados pela mesma blacklist final: o resultado não depende da ordem
+    nem do número de workers.
+    
+    No máximo max_workers * in_flight_per_worker tarefas ficam em voo. Uma
+    tarefa que falha no worker (ex: processo morto) vira um resultado com
+    erro para cada PDF dela; um pool próprio quebrado é recriado.
+    
+    Args:
+        pdf_paths: Caminhos dos PDFs
+        max_workers: Número de workers (padrão: núcleos - 1)
+        distributor: Distribuidora das regras (ex: 'CPFL')
+        blacklist: Blacklist a atualizar (padrão: DynamicBlacklist() do disco).
+            É salva ao final.
+        chunk_size: PDFs por tarefa
+        executor: Pool já aberto (mantido vivo pelo chamador); os workers
+            usam a distribuidora informada aqui
+    
+    Retorna:
+        Resultados na ordem de pdf_paths
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+    import multiprocessing
+    
+    pdf_paths = [str(p) for p in pdf_paths]
+    chunk_size = chunk_size or PARALLEL_CHUNK_SIZE
+    if max_workers is None:
+        max_workers = getattr(executor, '_max_workers', None) or max(1, multiprocessing.cpu_count() - 1)
+    if blacklist is None:
+        blacklist = DynamicBlacklist()
+    
+    chunks = [pdf_paths[i:i + chunk_size] for i in range(0, len(pdf_paths), chunk_size)]
+    max_in_flight = max(1, max_workers * PARALLEL_IN_FLIGHT_PER_WORKER)
+    
+    def create_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(distributor,))
+    
+    # FASE 1: candidatas + frequências por tarefa (janela limitada)
+    own_pool = executor is None
+    active = create_pool() if own_pool else executor
+    chunk_outputs: List[Optional[Tuple[List[ExtractionResult], Dict]]] = [None] * len(chunks)
+    pending = iter(range(len(chunks)))
+    in_flight = {}  # future -> (índice do chunk, pool em que foi enviado)
+    try:
+        while True:
+            while len(in_flight) < max_in_flight:
+                index = next(pending, None)
+                if index is None:
+                    break
+                try:
+                    in_flight[active.submit(_extract_chunk, chunks[index], distributor)] = (index, active)
+                except BrokenProcessPool as e:
+                    chunk_outputs[index] = _failed_chunk(chunks[index], e)
+            
+            if not in_flight:
+                break
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, pool = in_flight.pop(future)
+                try:
+                    chunk_outputs[index] = future.result()
+                except Exception as e:
+                    chunk_outputs[index] = _failed_chunk(chunks[index], e)
+                    if isinstance(e, BrokenProcessPool) and own_pool and pool is active:
+                        # Worker morto: tarefas em voo nesse pool falham, o resto segue num pool novo
+                        active.shutdown(wait=False)
+                        active = create_pool()
+    finally:
+        if own_pool:
+            active.shutdown(wait=True)
+    
+    candidates = [result for results, _ in chunk_outputs for result in results]
+    
+    # FASE 2: blacklist final do lote, aplicada às candidatas em memória
+    blacklist.merge_from_collectors([data for _, data in chunk_outputs])
+    blacklist.analyze_and_update_blacklist()
+    
+    return [
+        result if result.errors else apply_blacklist(result, blacklist)
+        for result in candidates
+    ]
+
+
 # ============================================================================
 # TESTE NOS CASOS PROBLEMÁTICOS
 # ============================================================================
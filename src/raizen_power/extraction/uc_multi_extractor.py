@@ -13,13 +13,53 @@ import json
 import time
 import os
 from pathlib import Path
-from typing import List, Set, Dict, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Deque, List, NamedTuple, Set, Dict, Optional, Tuple
+from dataclasses import dataclass, asdict, field
 from concurrent.futures import ProcessPoolExecutor, as_completed
-from collections import Counter
+from collections import Counter, deque
 
 import fitz  # PyMuPDF
 
+from raizen_power.utils.numeric_tokens import NumericToken, NumericTokenIndex
+
+# Rótulo terminando imediatamente antes do separador (equivalente a 'label_uc')
+_LABEL_BEFORE_RE = re.compile(
+    r'(?:UC|U\.C|Unidade\s+Consumidora|UNIDADE\s+CONSUMIDORA|Instalação|INSTALAÇÃO)\Z',
+    re.IGNORECASE
+)
+_LABEL_WINDOW = 60
+
+_TABLE_CELL_RE = re.compile(r'\d{8,10}')
+
+
+def _skip_spaces_back(text: str, index: int) -> int:
+    """Recua a posição sobre espaços em branco (equivalente a \\s* antes dela)."""
+    while index > 0 and text[index - 1].isspace():
+        index -= 1
+    return index
+
+
+# Identificadores compactos dos padrões (UCProvenance.pattern_id)
+PATTERN_IDS = ('padrao', 'label_uc', 'lista', 'formatado', 'anexo', 'table_cell')
+_PATTERN_ID = {name: i for i, name in enumerate(PATTERN_IDS)}
+
+
+class UCProvenance(NamedTuple):
+    """
+    Origem de uma UC encontrada (um registro por match).
+    
+    offset é a posição no texto da página; para 'table_cell', a posição
+    dentro do texto da célula.
+    """
+    uc: str
+    page: int
+    pattern_id: int
+    offset: int
+    
+    @property
+    def pattern(self) -> str:
+        return PATTERN_IDS[self.pattern_id]
+
 
 @dataclass
 class UCExtractionResult:
@@ -33,6 +73,7 @@ class UCExtractionResult:
     pages_with_ucs: List[int]
     duration: float
     errors: List[str]
+    provenance: List[UCProvenance] = field(default_factory=list)
 
 
 class UCMultiExtractor:
@@ -62,50 +103,89 @@ class UCMultiExtractor:
     # Palavras-chave que indicam página relevante para UCs
     KEYWORDS = ['unidade', 'instalação', 'código', 'anexo', 'tabela', 'rol', 'lista', 'uc']
     
-    def __init__(self, min_digits: int = 8, max_digits: int = 10):
+    def __init__(self, min_digits: int = 8, max_digits: int = 10, debug_context: int = 0):
+        """
+        Args:
+            min_digits: Tamanho mínimo de uma UC
+            max_digits: Tamanho máximo de uma UC
+            debug_context: Se > 0, guarda o contexto textual dos últimos N
+                matches em self.metadata (buffer circular, para depuração)
+        """
         self.min_digits = min_digits
         self.max_digits = max_digits
-        self.metadata: List[Dict] = []
+        self.debug_context = debug_context
+        self.metadata: Deque[Dict] = deque(maxlen=debug_context)
     
     def extract_from_pdf(self, pdf_path: str) -> UCExtractionResult:
         """
         Pipeline principal de extração.
-        Tenta múltiplos métodos em ordem de velocidade/precisão.
+        
+        Passada única: o PDF é aberto uma vez e cada página é lida uma vez.
+        Regex (páginas com keywords) e tabelas (páginas com sequências de
+        dígitos do tamanho de uma UC) compartilham a mesma tokenização.
         """
         start_time = time.time()
         errors = []
-        all_ucs: Set[str] = set()
-        pages_with_ucs: Set[int] = set()
+        text_ucs: Set[str] = set()
+        text_pages: Set[int] = set()
+        table_ucs: Set[str] = set()
+        table_pages: Set[int] = set()
+        text_provenance: List[UCProvenance] = []
+        table_provenance: List[UCProvenance] = []
         method_used = "none"
+        table_min_run = max(8, self.min_digits)
         
         try:
-            # Fase 1: PyMuPDF + Regex (mais rápido)
-            pymupdf_ucs, pymupdf_pages = self._extract_with_pymupdf(pdf_path)
-            all_ucs.update(pymupdf_ucs)
-            pages_with_ucs.update(pymupdf_pages)
-            
-            if pymupdf_ucs:
-                method_used = "pymupdf"
-            
-            # Fase 2: Extração de tabelas usando PyMuPDF find_tables()
-            try:
-                table_ucs, table_pages = self._extract_from_tables(pdf_path)
-                all_ucs.update(table_ucs)
-                pages_with_ucs.update(table_pages)
+            with fitz.open(pdf_path) as doc:
+                tables_enabled = True
                 
-                if table_ucs and not pymupdf_ucs:
-                    method_used = "pymupdf_tables"
-                elif table_ucs:
-                    method_used = "pymupdf+tables"
+                for page_num, page in enumerate(doc):
+                    text = page.get_text()
+                    runs = NumericTokenIndex(text, first_page=page_num).tokens
                     
-            except Exception as e:
-                errors.append(f"table error: {str(e)[:50]}")
+                    # Fase 1: Regex (só em páginas relevantes, com keywords)
+                    text_lower = text.lower()
+                    if any(kw in text_lower for kw in self.KEYWORDS):
+                        page_matches = self._match_text_patterns(text, runs, page_num)
+                        if page_matches:
+                            text_provenance.extend(page_matches)
+                            text_ucs.update(match.uc for match in page_matches)
+                            text_pages.add(page_num)
+                    
+                    # Fase 2: find_tables() só se a página tem uma sequência de
+                    # dígitos com tamanho de UC (células são recortes desse texto)
+                    if not tables_enabled or not any(token.length >= table_min_run for token in runs):
+                        continue
+                    
+                    try:
+                        page_matches = self._extract_page_tables(page, page_num)
+                    except Exception as e:
+                        # Erro de tabela descarta a fase 2 inteira (regex mantida)
+                        errors.append(f"table error: {str(e)[:50]}")
+                        tables_enabled = False
+                        table_ucs.clear()
+                        table_pages.clear()
+                        table_provenance.clear()
+                        continue
+                    
+                    if page_matches:
+                        table_provenance.extend(page_matches)
+                        table_ucs.update(match.uc for match in page_matches)
+                        table_pages.add(page_num)
+            
+            if text_ucs:
+                method_used = "pymupdf"
+            if table_ucs and not text_ucs:
+                method_used = "pymupdf_tables"
+            elif table_ucs:
+                method_used = "pymupdf+tables"
             
         except Exception as e:
             errors.append(f"Extraction error: {str(e)[:100]}")
         
         # Validar e deduplicar UCs
-        validated_ucs = self._validate_ucs(list(all_ucs))
+        validated_ucs = self._validate_ucs(list(text_ucs | table_ucs))
+        pages_with_ucs = text_pages | table_pages
         
         # Calcular confiança
         confidence = self._calculate_confidence(validated_ucs, len(pages_with_ucs))
@@ -121,90 +201,116 @@ class UCMultiExtractor:
             method=method_used,
             pages_with_ucs=sorted(pages_with_ucs),
             duration=duration,
-            errors=errors
+            errors=errors,
+            provenance=text_provenance + table_provenance
         )
     
-    def _extract_with_pymupdf(self, pdf_path: str) -> Tuple[Set[str], Set[int]]:
-        """Extração rápida usando PyMuPDF + Regex multi-pattern"""
-        ucs: Set[str] = set()
-        pages: Set[int] = set()
+    def _match_text_patterns(
+        self,
+        text: str,
+        runs: List[NumericToken],
+        page_num: int
+    ) -> List[UCProvenance]:
+        """
+        Aplica os padrões de PATTERNS sobre as sequências de dígitos da página.
         
-        doc = fitz.open(pdf_path)
+        Em vez de uma varredura do texto por padrão, cada sequência é testada
+        pelo contexto imediato (rótulo antes, "-DV" depois), reproduzindo o
+        que cada regex capturaria.
+        """
+        found = []
+        formatted_until = 0  # fim do último match de 'formatado' (não sobrepõe)
         
-        for page_num, page in enumerate(doc):
-            text = page.get_text()
+        for token in runs:
+            start, end = token.start, token.end
+            length = end - start
+            
+            # 'formatado': XXXXXX-XX -> últimos 6-8 dígitos antes do hífen
+            if end + 1 < len(text) and text[end] == '-' and text[end + 1].isdecimal():
+                fmt_start = max(start, formatted_until, end - 8)
+                if end - fmt_start >= 6:
+                    dv_end = end + 1
+                    while dv_end < len(text) and dv_end - end <= 2 and text[dv_end].isdecimal():
+                        dv_end += 1
+                    formatted_until = dv_end
+                    self._accept(found, text[fmt_start:end], page_num, 'formatado', text, fmt_start, dv_end)
             
-            # Verificar se página é relevante (tem keywords)
-            text_lower = text.lower()
-            if not any(kw in text_lower for kw in self.KEYWORDS):
+            if length < 8:
                 continue
             
-            # Aplicar todos os padrões
-            for pattern_name, pattern in self.PATTERNS.items():
-                matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-                
-                for match in matches:
-                    # Pegar o grupo de captura correto
-                    uc = match.group(1) if match.lastindex and match.lastindex >= 1 else match.group(0)
-                    
-                    # Limpar (só dígitos)
-                    uc_clean = re.sub(r'\D', '', uc)
-                    
-                    # Validar tamanho
-                    if self.min_digits <= len(uc_clean) <= self.max_digits:
-                        ucs.add(uc_clean)
-                        pages.add(page_num)
-                        
-                        self.metadata.append({
-                            'uc': uc_clean,
-                            'page': page_num,
-                            'pattern': pattern_name,
-                            'context': match.group(0)[:80]
-                        })
+            # 'padrao': sequência isolada de 8-10 dígitos
+            if length <= 10 and token.isolated:
+                self._accept(found, text[start:end], page_num, 'padrao', text, start, end)
+            
+            # 'label_uc', 'anexo' e 'lista' capturam os 10 primeiros dígitos
+            prefix = text[start:min(end, start + 10)]
+            before = _skip_spaces_back(text, start)
+            
+            if before < start and before > 0 and text[before - 1] in '-•':
+                self._accept(found, prefix, page_num, 'lista', text, before - 1, start + 10, offset=start)
+            
+            label_end = before
+            if label_end > 0 and text[label_end - 1] in ':-':
+                label_end = _skip_spaces_back(text, label_end - 1)
+            label = _LABEL_BEFORE_RE.search(text, max(0, label_end - _LABEL_WINDOW), label_end)
+            if label:
+                self._accept(found, prefix, page_num, 'label_uc', text, label.start(), start + 10, offset=start)
+                line_start = text.rfind('\n', 0, label.start()) + 1
+                if 'anexo' in text[line_start:label.start()].lower():
+                    self._accept(found, prefix, page_num, 'anexo', text, line_start, start + 10, offset=start)
         
-        doc.close()
-        return ucs, pages
+        return found
     
-    def _extract_from_tables(self, pdf_path: str) -> Tuple[Set[str], Set[int]]:
-        """Extração de tabelas usando PyMuPDF find_tables()"""
-        ucs: Set[str] = set()
-        pages: Set[int] = set()
-        
-        doc = fitz.open(pdf_path)
+    def _accept(
+        self,
+        found: List[UCProvenance],
+        uc: str,
+        page_num: int,
+        pattern_name: str,
+        text: str,
+        ctx_start: int,
+        ctx_end: int,
+        offset: Optional[int] = None
+    ) -> None:
+        """Registra a UC (e sua origem) se o tamanho for válido."""
+        if not self.min_digits <= len(uc) <= self.max_digits:
+            return
+        found.append(UCProvenance(
+            uc, page_num, _PATTERN_ID[pattern_name], ctx_start if offset is None else offset
+        ))
+        if self.debug_context:
+            self.metadata.append({
+                'uc': uc,
+                'page': page_num,
+                'pattern': pattern_name,
+                'context': text[max(0, ctx_start):ctx_end][:80]
+            })
+    
+    def _extract_page_tables(self, page: fitz.Page, page_num: int) -> List[UCProvenance]:
+        """Extração de tabelas de uma página usando PyMuPDF find_tables()"""
+        found: List[UCProvenance] = []
         
+        # Usar find_tables() do PyMuPDF (disponível a partir de 1.24.0)
         try:
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Usar find_tables() do PyMuPDF (disponível a partir de 1.24.0)
-                try:
-                    table_finder = page.find_tables()
-                    tables = [t.extract() for t in table_finder.tables]
-                except AttributeError:
-                    # find_tables() não disponível em versões antigas
-                    continue
-                
-                for table in tables:
-                    for row in table:
-                        for cell in row:
-                            if cell:
-                                # Procurar UCs em cada célula
-                                matches = re.findall(r'\d{8,10}', str(cell))
-                                for uc in matches:
-                                    if self.min_digits <= len(uc) <= self.max_digits:
-                                        ucs.add(uc)
-                                        pages.add(page_num)
-                                        
-                                        self.metadata.append({
-                                            'uc': uc,
-                                            'page': page_num,
-                                            'pattern': 'table_cell',
-                                            'context': str(cell)[:50]
-                                        })
-        finally:
-            doc.close()
+            table_finder = page.find_tables()
+        except AttributeError:
+            # find_tables() não disponível em versões antigas
+            return found
+        
+        for table in table_finder.tables:
+            for row in table.extract():
+                for cell in row:
+                    if not cell:
+                        continue
+                    # Procurar UCs em cada célula
+                    cell_text = str(cell)
+                    for match in _TABLE_CELL_RE.finditer(cell_text):
+                        self._accept(
+                            found, match.group(), page_num, 'table_cell',
+                            cell_text, 0, 50, offset=match.start()
+                        )
         
-        return ucs, pages
+        return found
     
     def _validate_ucs(self, ucs: List[str]) -> List[str]:
         """Validar e filtrar UCs com desambiguação de falsos positivos"""
@@ -7,10 +7,14 @@ tipicamente códigos de sistema (usina, formulário, protocolo).
 IMPORTANTE: Thread-safe para uso com ProcessPoolExecutor.
 - Workers usam BlacklistCollector (apenas coleta, sem I/O)
 - Processo principal usa DynamicBlacklist para agregar e salvar
+
+Runner pronto para o UCExtractorV5: extract_batch_two_phase
+(raizen_power.extraction.uc_extractor_v5).
 """
 import json
+import sqlite3
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 
 
@@ -25,6 +29,12 @@ except ImportError:
     _DEFAULT_MIN_DOCS = 10
     _DEFAULT_BLACKLIST_FILE = Path("output/blacklist_codigos.json")
 
+# Números distintos acumulados por update_frequency antes de ir para o SQLite
+_PENDING_FLUSH_SIZE = 50_000
+
+# Marca (tabela meta) da migração das frequências do JSON antigo
+_LEGACY_MIGRATION_KEY = 'migrated_legacy_json'
+
 
 @dataclass
 class BlacklistCollector:
@@ -57,6 +67,112 @@ class BlacklistCollector:
         }
 
 
+class FrequencyStore:
+    """
+    Contagem de documentos por número, em SQLite.
+    
+    Substitui o dict {número: contagem} serializado inteiro em JSON: o
+    corpus completo tem centenas de milhares de números, e só os poucos
+    acima do limiar interessam. Contagens são somadas com upsert e só o
+    lote novo é gravado a cada commit; carregar não lê as contagens. Memória
+    e tempo de gravação não crescem com o corpus.
+    
+    As alterações só vão para o disco em commit(); fechar sem commit
+    descarta tudo desde o último commit (mesma semântica do antigo save()).
+    """
+    
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frequency (
+                number TEXT PRIMARY KEY,
+                count INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+    
+    def add(self, docs: int, counts: Iterable[Tuple[str, int]]):
+        """Soma docs ao total e as contagens de cada número."""
+        self._conn.executemany(
+            "INSERT INTO frequency (number, count) VALUES (?, ?) "
+            "ON CONFLICT (number) DO UPDATE SET count = count + excluded.count",
+            counts
+        )
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('total_docs', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            (docs,)
+        )
+    
+    def add_once(self, key: str, docs: int, counts: Iterable[Tuple[str, int]]) -> bool:
+        """
+        add() uma única vez por key, mesmo com vários processos.
+        
+        A marca fica na tabela meta e é gravada na mesma transação que as
+        contagens (BEGIN IMMEDIATE: um processo por vez). Faz commit, então
+        não deve haver alterações pendentes.
+        
+        Returns:
+            True se as contagens foram somadas agora
+        """
+        self._conn.commit()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = self._conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone() is not None
+            if not done:
+                self.add(docs, counts)
+                self._conn.execute("INSERT INTO meta (key, value) VALUES (?, 1)", (key,))
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+        return not done
+    
+    @property
+    def total_docs(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'total_docs'").fetchone()
+        return row[0] if row else 0
+    
+    def get(self, number: str) -> int:
+        row = self._conn.execute("SELECT count FROM frequency WHERE number = ?", (number,)).fetchone()
+        return row[0] if row else 0
+    
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM frequency").fetchone()[0]
+    
+    def at_least(self, threshold: float) -> Set[str]:
+        """Números com contagem >= threshold."""
+        rows = self._conn.execute("SELECT number FROM frequency WHERE count >= ?", (threshold,))
+        return {row[0] for row in rows}
+    
+    def top(self, n: int) -> Dict[str, int]:
+        """As n maiores contagens."""
+        rows = self._conn.execute(
+            "SELECT number, count FROM frequency ORDER BY count DESC, number LIMIT ?", (n,)
+        )
+        return dict(rows.fetchall())
+    
+    def clear(self):
+        self._conn.execute("DELETE FROM frequency")
+        self._conn.execute("DELETE FROM meta")
+    
+    def commit(self):
+        self._conn.commit()
+    
+    def close(self):
+        """Fecha a conexão (alterações sem commit são descartadas)."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
 class DynamicBlacklist:
     """
     Blacklist dinâmica thread-safe.
@@ -66,6 +182,10 @@ class DynamicBlacklist:
     2. Processo principal agrega resultados com merge_from_collectors()
     3. Processo principal salva com save_blacklist()
     
+    As frequências ficam em um FrequencyStore (SQLite, ao lado do
+    blacklist_file, com extensão .sqlite). O blacklist_file JSON guarda
+    apenas a blacklist e o total de documentos.
+    
     Exemplo:
         # No processo principal (após processamento paralelo):
         blacklist = DynamicBlacklist()
@@ -86,17 +206,33 @@ class DynamicBlacklist:
             threshold_percent: % de docs para considerar código de sistema
             auto_load: Se True, carrega blacklist existente do disco
         """
-        self.blacklist_file = blacklist_file or _DEFAULT_BLACKLIST_FILE
+        self.blacklist_file = Path(blacklist_file or _DEFAULT_BLACKLIST_FILE)
+        self.frequency_file = self.blacklist_file.with_suffix('.sqlite')
         self.threshold_percent = threshold_percent or _DEFAULT_THRESHOLD
         self.min_docs = _DEFAULT_MIN_DOCS
+        self.auto_load = auto_load
         
         self.blacklist: Set[str] = set()
-        self.frequency: Dict[str, int] = {}
-        self.total_docs: int = 0
+        
+        # Contagens ainda não enviadas ao store (uso sequencial)
+        self._pending: Dict[str, int] = {}
+        self._pending_docs = 0
+        # Aberto só quando necessário: instanciar não cria arquivos
+        self._store: Optional[FrequencyStore] = None
         
         if auto_load:
             self._load()
     
+    @property
+    def store(self) -> FrequencyStore:
+        """Store de frequências (aberto na primeira consulta/gravação)."""
+        if self._store is None:
+            self._store = FrequencyStore(self.frequency_file)
+            if not self.auto_load:
+                # Começa do zero; o disco só muda no próximo save()
+                self._store.clear()
+        return self._store
+    
     def _load(self):
         """Carrega blacklist do disco (apenas no processo principal)."""
         if self.blacklist_file.exists():
@@ -104,24 +240,50 @@ class DynamicBlacklist:
                 with open(self.blacklist_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     self.blacklist = set(data.get('blacklist', []))
-                    self.frequency = data.get('frequency', {})
-                    self.total_docs = data.get('total_docs', 0)
+                    legacy_frequency = data.get('frequency')
             except (json.JSONDecodeError, IOError):
-                pass
+                return
+            
+            # Formato antigo (frequências no JSON): migra uma vez para o store.
+            # Store já existente = migrado antes; dois processos que abrem o
+            # store novo ao mesmo tempo são separados pela marca no SQLite
+            if legacy_frequency and not self.frequency_file.exists():
+                self.store.add_once(_LEGACY_MIGRATION_KEY, data.get('total_docs', 0), legacy_frequency.items())
+    
+    def _flush(self):
+        """Envia as contagens pendentes ao store."""
+        if self._pending_docs:
+            self.store.add(self._pending_docs, self._pending.items())
+            self._pending = {}
+            self._pending_docs = 0
     
     def save(self):
         """Salva blacklist no disco (apenas no processo principal)."""
+        self._flush()
+        self.store.commit()
         self.blacklist_file.parent.mkdir(parents=True, exist_ok=True)
         with open(self.blacklist_file, 'w', encoding='utf-8') as f:
             json.dump({
-                'blacklist': list(self.blacklist),
-                'frequency': self.frequency,
+                'blacklist': sorted(self.blacklist),
                 'total_docs': self.total_docs
             }, f, indent=2, ensure_ascii=False)
     
     # Aliases para compatibilidade
     save_blacklist = save
     
+    def close(self):
+        """Fecha o store (o que não foi salvo é descartado)."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+    
+    @property
+    def total_docs(self) -> int:
+        """Documentos contabilizados (persistidos + pendentes)."""
+        if self._store is None and not self.frequency_file.exists():
+            return self._pending_docs
+        return self.store.total_docs + self._pending_docs
+    
     def merge_from_collectors(self, collector_data_list: List[Dict]):
         """
         Agrega dados de múltiplos BlacklistCollectors.
@@ -132,13 +294,7 @@ class DynamicBlacklist:
             collector_data_list: Lista de dicts retornados por collector.get_data()
         """
         for data in collector_data_list:
-            freq = data.get("frequency", {})
-            docs = data.get("total_docs", 0)
-            
-            self.total_docs += docs
-            
-            for num, count in freq.items():
-                self.frequency[num] = self.frequency.get(num, 0) + count
+            self.store.add(data.get("total_docs", 0), data.get("frequency", {}).items())
     
     def update_frequency(self, numbers: List[str]):
         """
@@ -146,24 +302,27 @@ class DynamicBlacklist:
         
         AVISO: Não usar em workers paralelos! Use BlacklistCollector.
         """
-        self.total_docs += 1
-        seen = set(numbers)
-        for num in seen:
-            self.frequency[num] = self.frequency.get(num, 0) + 1
+        self._pending_docs += 1
+        for num in set(numbers):
+            self._pending[num] = self._pending.get(num, 0) + 1
+        
+        if len(self._pending) >= _PENDING_FLUSH_SIZE:
+            self._flush()
+    
+    def get_frequency(self, number: str) -> int:
+        """Em quantos documentos o número apareceu."""
+        self._flush()
+        return self.store.get(number)
     
     def analyze_and_update(self):
         """Analisa frequências e atualiza blacklist (sem salvar)."""
-        if self.total_docs < self.min_docs:
+        self._flush()
+        total_docs = self.total_docs
+        if total_docs < self.min_docs:
             return
         
-        threshold = self.total_docs * (self.threshold_percent / 100)
-        
-        new_blacklist = set()
-        for num, count in self.frequency.items():
-            if count >= threshold:
-                new_blacklist.add(num)
-        
-        self.blacklist = new_blacklist
+        threshold = total_docs * (self.threshold_percent / 100)
+        self.blacklist = self.store.at_least(threshold)
     
     def analyze_and_update_blacklist(self):
         """Alias com save automático (compatibilidade)."""
@@ -176,20 +335,20 @@ class DynamicBlacklist:
     
     def get_stats(self) -> Dict:
         """Retorna estatísticas."""
+        self._flush()
         return {
             'total_docs': self.total_docs,
             'blacklist_size': len(self.blacklist),
-            'blacklist': list(self.blacklist)[:10],
-            'top_frequencies': dict(
-                sorted(self.frequency.items(), key=lambda x: -x[1])[:10]
-            )
+            'blacklist': sorted(self.blacklist)[:10],
+            'top_frequencies': self.store.top(10)
         }
     
     def reset(self):
         """Reseta blacklist e frequências."""
         self.blacklist = set()
-        self.frequency = {}
-        self.total_docs = 0
+        self._pending = {}
+        self._pending_docs = 0
+        self.store.clear()
 
 
 # ============================================================================
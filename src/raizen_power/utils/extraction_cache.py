@@ -0,0 +1,217 @@
+"""
+Cache persistente de extrações, endereçado por conteúdo.
+
+Armazena o ExtractionResult serializado de cada PDF em um banco SQLite,
+indexado por (hash SHA-256 do conteúdo do PDF, versão do extrator).
+Re-execuções pulam PDFs inalterados; qualquer mudança no código dos
+extratores/padrões gera nova versão e invalida as entradas antigas.
+
+Para evitar reler PDFs grandes a cada execução, o hash de cada arquivo é
+memoizado por (caminho, tamanho, mtime).
+
+Uso:
+    from raizen_power.utils.extraction_cache import ExtractionCache
+
+    with ExtractionCache(Path("output/.cache"), version="abc123") as cache:
+        cached = cache.get(pdf_path)
+        if cached is None:
+            result = extract(pdf_path)
+            cache.put(pdf_path, result)
+        print(cache.summary())
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_NAME = "extraction_cache.sqlite"
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(path: Path) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo (leitura em blocos)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_source_version(paths: Iterable[Path], settings: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Calcula um hash de versão a partir do código-fonte dos módulos informados.
+
+    Qualquer alteração nos extratores ou padrões muda a versão, assim como
+    nas configurações informadas em settings (ex: orçamento dos regex).
+    """
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        digest.update(path.name.encode())
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b'<missing>')
+    if settings:
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+class ExtractionCache:
+    """
+    Cache de resultados de extração em SQLite.
+
+    Apenas o processo principal deve escrever no cache (os workers
+    paralelos retornam dicts e o processo principal grava).
+    """
+
+    def __init__(self, cache_dir: Path, version: str, rebuild: bool = False):
+        """
+        Args:
+            cache_dir: Pasta onde o banco SQLite será criado
+            version: Hash de versão do extrator/padrões
+            rebuild: Se True, descarta todas as entradas existentes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / CACHE_DB_NAME
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._hashes: Dict[str, str] = {}
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                content_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (content_hash, version)
+            );
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+        """)
+
+        if rebuild:
+            self.clear()
+
+        logger.info(f"Cache de extração: {self.db_path} (versão {self.version})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        """Grava pendências e fecha a conexão."""
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def clear(self) -> None:
+        """Remove todas as entradas (resultados e hashes de arquivos)."""
+        self._conn.execute("DELETE FROM results")
+        self._conn.execute("DELETE FROM file_hashes")
+        self._conn.commit()
+        self._hashes.clear()
+        logger.info("Cache de extração reconstruído (entradas anteriores removidas)")
+
+    def content_hash(self, pdf_path: str) -> str:
+        """
+        Retorna o hash do conteúdo do PDF.
+
+        Reaproveita o hash gravado se tamanho e mtime não mudaram.
+        """
+        key = str(Path(pdf_path).resolve())
+        cached = self._hashes.get(key)
+        if cached:
+            return cached
+
+        stat = os.stat(key)
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, content_hash FROM file_hashes WHERE path = ?", (key,)
+        ).fetchone()
+
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            content_hash = row[2]
+        else:
+            content_hash = hash_file(Path(key))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, content_hash) "
+                "VALUES (?, ?, ?, ?)",
+                (key, stat.st_size, stat.st_mtime_ns, content_hash)
+            )
+
+        self._hashes[key] = content_hash
+        return content_hash
+
+    def get(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """Retorna o resultado serializado do PDF, ou None se não estiver no cache."""
+        try:
+            content_hash = self.content_hash(pdf_path)
+        except OSError as e:
+            logger.warning(f"Cache: não foi possível ler {pdf_path}: {e}")
+            self.misses += 1
+            return None
+
+        row = self._conn.execute(
+            "SELECT result FROM results WHERE content_hash = ? AND version = ?",
+            (content_hash, self.version)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, pdf_path: str, result: Dict[str, Any]) -> None:
+        """Grava o resultado serializado do PDF."""
+        try:
+            content_hash = self.content_hash(pdf_path)
+        except OSError as e:
+            logger.warning(f"Cache: não foi possível gravar {pdf_path}: {e}")
+            return
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (content_hash, version, result) VALUES (?, ?, ?)",
+            (content_hash, self.version, json.dumps(result, ensure_ascii=False, default=str))
+        )
+        self.writes += 1
+
+        # Commit periódico para não perder progresso em execuções longas
+        if self.writes % 100 == 0:
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do cache nesta execução."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+        }
+
+    def summary(self) -> str:
+        """Resumo legível das estatísticas do cache."""
+        stats = self.get_stats()
+        return (
+            f"{stats['hits']:,} hits, {stats['misses']:,} misses "
+            f"({stats['hit_rate']:.1f}% reaproveitado), {stats['writes']:,} gravados"
+        )
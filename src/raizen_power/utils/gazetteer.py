@@ -0,0 +1,316 @@
+"""
+Gazetteer de referência: municípios, UFs e distribuidoras.
+
+Lê uma única vez as planilhas de referência (data/reference) e grava um
+snapshot binário (pickle) com todos os índices já normalizados. Nas
+execuções seguintes, e em cada worker paralelo, o snapshot é carregado em
+milissegundos sem pandas. O snapshot é reconstruído automaticamente quando
+tamanho ou mtime de alguma planilha mudam. Se só uma das planilhas existe,
+só os índices dela são montados (o mapa de municípios não depende da base BI).
+
+Índices (chaves sem acento e em maiúsculas):
+- city_to_dist: município -> distribuidora (texto original da planilha)
+- city_candidates: município -> distribuidoras normalizadas (padrão do projeto)
+- city_uf_candidates: (município, UF) -> distribuidoras normalizadas
+- dist_names: nomes/siglas/aliases de distribuidoras (mais longos primeiro)
+
+Uso:
+    from raizen_power.utils.gazetteer import get_gazetteer
+    gz = get_gazetteer()
+    gz.candidates_for_city("São Paulo", "SP")
+"""
+import logging
+import os
+import pickle
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+REFERENCE_DIR = PROJECT_ROOT / "data/reference"
+EXCEL_BI = REFERENCE_DIR / "AreaatuadistbaseBI.xlsx"
+EXCEL_MUNICIPIO = REFERENCE_DIR / "PAINEL DE DESEMPENHO DAS DISTRIBUIDORAS POR MUNICÍPIO.xlsx"
+SNAPSHOT_PATH = REFERENCE_DIR / "gazetteer.pkl"
+
+# Incrementar quando a estrutura ou a normalização dos índices mudar
+SNAPSHOT_VERSION = 2
+
+PALAVRAS_GENERICAS = {
+    'EMPRESA', 'COOPERATIVA', 'CENTRAIS', 'COMPANHIA', 'DISTRIBUIDORA',
+    'SOCIEDADE', 'ELETRICA', 'ENERGIA', 'FORCA', 'SERVICOS', 'LTDA',
+    'NOVA', 'SISTEMA', 'GRUPO', 'REGIONAL', 'MUNICIPAL'
+}
+
+# Nomes usados nos contratos que nem sempre aparecem na base BI
+EXTRA_DISTRIBUTOR_NAMES = [
+    "CPFL PAULISTA", "CPFL PIRATININGA", "CPFL",
+    "ENERGISA MT", "ENERGISA MS", "ENERGISA",
+    "EQUATORIAL", "ENEL SP", "ENEL RJ", "ENEL CE", "ENEL GO", "ENEL",
+    "COELBA", "COELCE", "CELESC", "CELPE", "COPEL", "CEMIG",
+    "RGE", "EDP", "LIGHT", "ELEKTRO", "NEOENERGIA"
+]
+
+# Mapeamento auxiliar de Distribuidora -> UFs de atuação
+# Baseado nas principais concessionárias do Brasil
+DISTRIBUTOR_STATES = {
+    # CPFL
+    "CPFL PAULISTA": ["SP"],
+    "CPFL PIRATININGA": ["SP"],
+    "CPFL SANTA CRUZ": ["SP", "PR", "MG"],
+    "RGE": ["RS"],
+    # NEOENERGIA
+    "NEOENERGIA ELEKTRO": ["SP", "MS"],
+    "NEOENERGIA COELBA": ["BA"],
+    "NEOENERGIA PERNAMBUCO": ["PE"],
+    "NEOENERGIA COSERN": ["RN"],
+    "NEOENERGIA BRASILIA": ["DF"],
+    # ENEL
+    "ENEL SP": ["SP"],
+    "ENEL RJ": ["RJ"],
+    "ENEL CE": ["CE"],
+    "ENEL GO": ["GO"],
+    # CEMIG
+    "CEMIG D": ["MG"],
+    "CEMIG": ["MG"],
+    # EQUATORIAL
+    "EQUATORIAL MA": ["MA"],
+    "EQUATORIAL PA": ["PA"],
+    "EQUATORIAL PI": ["PI"],
+    "EQUATORIAL AL": ["AL"],
+    "EQUATORIAL GO": ["GO"],
+    "EQUATORIAL RS": ["RS"],
+    # OUTRAS
+    "LIGHT": ["RJ"],
+    "COPEL": ["PR"],
+    "CELESC": ["SC"],
+    "EDP SP": ["SP"],
+    "EDP ES": ["ES"],
+    "ENERGISA": ["MT", "MS", "TO", "PB", "SE", "AC", "RO", "RJ", "SP", "MG", "PR"],
+}
+
+# Colunas opcionais de UF na planilha de municípios
+UF_COLUMNS = ("UF", "Estado", "SigUF")
+
+
+def fold_text(text: Any) -> str:
+    """Remove acentos e converte para maiúsculas (chave de busca)."""
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+    return text.upper().strip()
+
+
+def normalize_dist_name(raw_name: str) -> str:
+    """Converte nomes de distribuidora da planilha para o padrão do projeto."""
+    name = raw_name.upper()
+
+    # Mapeamentos diretos
+    if "CEMIG" in name: return "CEMIG"  # O Excel tem "Cemig-D"
+    if "CPFL-PAULISTA" in name or "CPFL PAULISTA" in name: return "CPFL PAULISTA"
+    if "PIRATININGA" in name: return "CPFL PIRATININGA"
+    if "SANTA CRUZ" in name: return "CPFL SANTA CRUZ"
+    if "ELEKTRO" in name: return "NEOENERGIA ELEKTRO"
+    if "COELBA" in name: return "NEOENERGIA COELBA"
+    if "CELPE" in name or "PERNAMBUCO" in name: return "NEOENERGIA PERNAMBUCO"
+    if "COSERN" in name: return "NEOENERGIA COSERN"
+    if "RGE" in name: return "RGE"
+    if "ENEL" in name and "CEARA" in name: return "ENEL CE"
+    if "ENEL" in name and "RIO" in name: return "ENEL RJ"
+    if "ENEL" in name and "GOIAS" in name: return "ENEL GO"
+    if "ENEL" in name and "SAO PAULO" in name: return "ENEL SP"
+    if "LIGHT" in name: return "LIGHT"
+    if "COPEL" in name: return "COPEL"
+    if "CELESC" in name: return "CELESC"
+
+    return name
+
+
+def _source_signature(paths: List[Path]) -> List[Tuple[str, int, int]]:
+    """(nome, tamanho, mtime) de cada planilha; muda quando a fonte muda."""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((path.name, stat.st_size, stat.st_mtime_ns))
+    return signature
+
+
+def _cell(value: Any) -> str:
+    """Valor de célula como texto ('' para células vazias/NaN)."""
+    if value is None or value != value:  # NaN
+        return ""
+    return str(value).strip()
+
+
+@dataclass
+class Gazetteer:
+    """Índices de referência já normalizados (ver docstring do módulo)."""
+    city_to_dist: Dict[str, str] = field(default_factory=dict)
+    city_candidates: Dict[str, List[str]] = field(default_factory=dict)
+    city_uf_candidates: Dict[Tuple[str, str], List[str]] = field(default_factory=dict)
+    dist_names: List[str] = field(default_factory=list)
+    signature: List[Tuple[str, int, int]] = field(default_factory=list)
+    version: int = SNAPSHOT_VERSION
+
+    @property
+    def available(self) -> bool:
+        """True se as duas planilhas foram carregadas (o classificador exige ambas)."""
+        return bool(self.dist_names and self.city_candidates)
+
+    @classmethod
+    def build(cls, excel_bi: Optional[Path] = EXCEL_BI, excel_municipio: Optional[Path] = EXCEL_MUNICIPIO) -> 'Gazetteer':
+        """Constrói os índices a partir das planilhas informadas (requer pandas)."""
+        gz = cls(signature=_source_signature([Path(p) for p in (excel_bi, excel_municipio) if p is not None]))
+        if excel_municipio is not None:
+            gz._build_municipios(Path(excel_municipio))
+        if excel_bi is not None:
+            gz._build_distributors(Path(excel_bi))
+        return gz
+
+    def _build_municipios(self, excel_municipio: Path) -> None:
+        """Índices por município (planilha de desempenho por município)."""
+        import pandas as pd
+
+        df_mun = pd.read_excel(excel_municipio)
+        uf_column = next((c for c in UF_COLUMNS if c in df_mun.columns), None)
+        ufs = df_mun[uf_column] if uf_column else [None] * len(df_mun)
+
+        for raw_city, raw_dist, raw_uf in zip(df_mun['Município'], df_mun['Distribuidora'], ufs):
+            city = fold_text(_cell(raw_city))
+            dist = _cell(raw_dist)
+            if not city or not dist:
+                continue
+
+            if len(city) >= 3:
+                self.city_to_dist[city] = dist
+
+            dist_norm = normalize_dist_name(dist)
+            candidates = self.city_candidates.setdefault(city, [])
+            if dist_norm not in candidates:
+                candidates.append(dist_norm)
+
+            uf = fold_text(_cell(raw_uf))
+            if uf:
+                by_uf = self.city_uf_candidates.setdefault((city, uf), [])
+                if dist_norm not in by_uf:
+                    by_uf.append(dist_norm)
+
+    def _build_distributors(self, excel_bi: Path) -> None:
+        """Nomes de distribuidoras: siglas, razões sociais e primeiro nome (base BI)."""
+        import pandas as pd
+
+        df_bi = pd.read_excel(excel_bi)
+        dist_names = set()
+        for raw_sigla, raw_razao in zip(df_bi['SIGLA'], df_bi['Razão Social']):
+            sigla = fold_text(_cell(raw_sigla))
+            razao = fold_text(_cell(raw_razao))
+            if len(sigla) > 2:
+                dist_names.add(sigla)
+            if len(razao) > 3:
+                dist_names.add(razao)
+                first = razao.split()[0] if razao.split() else ""
+                if len(first) > 3 and first not in PALAVRAS_GENERICAS:
+                    dist_names.add(first)
+
+        dist_names.update(EXTRA_DISTRIBUTOR_NAMES)
+
+        # Mais longos primeiro; empate em ordem alfabética (determinístico)
+        self.dist_names = sorted(dist_names, key=lambda d: (-len(d), d))
+
+    def candidates_for_city(self, city: str, uf: Optional[str] = None) -> List[str]:
+        """
+        Distribuidoras normalizadas que atendem o município.
+
+        Com UF (e planilha com coluna de UF), restringe ao par (município, UF);
+        homônimos em outros estados ficam de fora.
+        """
+        city_key = fold_text(city)
+        if uf and self.city_uf_candidates:
+            by_uf = self.city_uf_candidates.get((city_key, fold_text(uf)))
+            if by_uf:
+                return by_uf
+        return self.city_candidates.get(city_key, [])
+
+
+def _read_snapshot(path: Path) -> Optional[Gazetteer]:
+    try:
+        with open(path, 'rb') as f:
+            gz = pickle.load(f)
+        return gz if isinstance(gz, Gazetteer) and gz.version == SNAPSHOT_VERSION else None
+    except Exception as e:
+        logger.warning(f"Snapshot do gazetteer inválido ({path}), reconstruindo: {e}")
+        return None
+
+
+def _write_snapshot(gz: Gazetteer, path: Path) -> None:
+    """Grava o snapshot de forma atômica; falha de escrita não é fatal."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(gz, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar o snapshot do gazetteer em {path}: {e}")
+
+
+# Planilhas ausentes já avisadas neste processo
+_WARNED_MISSING: Set[Path] = set()
+
+
+def load_gazetteer(
+    excel_bi: Path = EXCEL_BI,
+    excel_municipio: Path = EXCEL_MUNICIPIO,
+    snapshot_path: Path = SNAPSHOT_PATH,
+    rebuild: bool = False
+) -> Gazetteer:
+    """
+    Carrega o gazetteer do snapshot, reconstruindo-o se as planilhas mudaram.
+
+    Planilhas ausentes são avisadas uma vez por processo e ficam de fora
+    (só os índices da outra); sem nenhuma, retorna um Gazetteer vazio.
+    """
+    excel_bi, excel_municipio, snapshot_path = Path(excel_bi), Path(excel_municipio), Path(snapshot_path)
+
+    for path in (excel_bi, excel_municipio):
+        if not path.exists() and path not in _WARNED_MISSING:
+            _WARNED_MISSING.add(path)
+            logger.warning(f"Arquivo de referência não encontrado: {path}")
+
+    sources = [path if path.exists() else None for path in (excel_bi, excel_municipio)]
+    if not any(sources):
+        return Gazetteer()
+
+    signature = _source_signature([path for path in sources if path is not None])
+
+    if not rebuild and snapshot_path.exists():
+        gz = _read_snapshot(snapshot_path)
+        if gz is not None and gz.signature == signature:
+            return gz
+
+    try:
+        gz = Gazetteer.build(*sources)
+    except Exception as e:
+        logger.error(f"Erro ao carregar bases de referência: {e}")
+        return Gazetteer()
+
+    _write_snapshot(gz, snapshot_path)
+    logger.info(
+        f"Gazetteer reconstruído: {len(gz.city_candidates)} municípios, "
+        f"{len(gz.dist_names)} nomes de distribuidoras"
+    )
+    return gz
+
+
+# Instância do processo (carregada sob demanda)
+_GAZETTEER: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Gazetteer padrão do processo, carregado uma única vez."""
+    global _GAZETTEER
+    if _GAZETTEER is None:
+        _GAZETTEER = load_gazetteer()
+    return _GAZETTEER
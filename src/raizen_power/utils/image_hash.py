@@ -0,0 +1,142 @@
+"""
+dHash direto de pixmaps do PyMuPDF, em NumPy (sem Pillow/imagehash).
+
+O caminho antigo copiava cada página renderizada para uma imagem PIL,
+empilhava as páginas em outra imagem e deixava o imagehash reduzir o
+resultado a 9x8. Aqui a página é lida do pixmap como um array (sem cópia)
+e a redução reproduz o resample do Pillow (LANCZOS para o hash, BICUBIC
+para igualar larguras ao empilhar), com os mesmos coeficientes em ponto
+fixo e o mesmo arredondamento entre as passadas horizontal e vertical.
+Com as mesmas páginas de entrada o hash é idêntico ao do imagehash.
+
+Uso:
+    pixmaps = [page.get_pixmap(matrix=m, colorspace=fitz.csGRAY) for page in pages]
+    grids = [pixmap_gray(pix) for pix in pixmaps]  # manter pixmaps vivos
+    visual_hash = dhash(stack_pages(grids))
+"""
+import math
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Ponto fixo do resample de 8 bits do Pillow (Resample.c: 32 - 8 - 2)
+PRECISION_BITS = 22
+
+
+def _sinc(x: np.ndarray) -> np.ndarray:
+    result = np.ones_like(x)
+    nonzero = x != 0.0
+    scaled = x[nonzero] * math.pi
+    result[nonzero] = np.sin(scaled) / scaled
+    return result
+
+
+def _lanczos(x: np.ndarray) -> np.ndarray:
+    return np.where((x >= -3.0) & (x < 3.0), _sinc(x) * _sinc(x / 3), 0.0)
+
+
+def _bicubic(x: np.ndarray) -> np.ndarray:
+    a = -0.5
+    x = np.abs(x)
+    return np.where(
+        x < 1.0, ((a + 2.0) * x - (a + 3.0)) * x * x + 1,
+        np.where(x < 2.0, (((x - 5) * x + 8) * x - 4) * a, 0.0)
+    )
+
+
+# Filtro -> (função, suporte), como no Pillow
+FILTERS: Dict[str, Tuple[Callable[[np.ndarray], np.ndarray], float]] = {
+    'lanczos': (_lanczos, 3.0),
+    'bicubic': (_bicubic, 2.0),
+}
+
+
+@lru_cache(maxsize=64)
+def _coefficients(in_size: int, out_size: int, resample: str) -> np.ndarray:
+    """
+    Matriz out_size x in_size com os coeficientes inteiros do Pillow
+    (precompute_coeffs + normalize_coeffs_8bpc).
+    """
+    filter_fn, filter_support = FILTERS[resample]
+    scale = in_size / out_size
+    filterscale = max(scale, 1.0)
+    support = filter_support * filterscale
+    matrix = np.zeros((out_size, in_size), dtype=np.float64)
+
+    for out in range(out_size):
+        center = (out + 0.5) * scale
+        xmin = max(int(center - support + 0.5), 0)
+        xmax = min(int(center + support + 0.5), in_size)
+        weights = filter_fn((np.arange(xmin, xmax) - center + 0.5) * (1.0 / filterscale))
+        total = weights.sum()
+        if total != 0.0:
+            weights = weights / total
+        # (int)(±0.5 + w * 2^22): truncamento em direção a zero
+        matrix[out, xmin:xmax] = np.trunc(weights * (1 << PRECISION_BITS) + np.where(weights < 0, -0.5, 0.5))
+
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _clip8(sums: np.ndarray) -> np.ndarray:
+    # Somas inteiras exatas em float64 (|soma| < 2^40); arredonda e satura
+    return np.clip(np.floor((sums + (1 << (PRECISION_BITS - 1))) / (1 << PRECISION_BITS)), 0, 255)
+
+
+def resize(gray: np.ndarray, width: int, height: int, resample: str = 'lanczos') -> np.ndarray:
+    """Equivalente a Image.resize((width, height), resample) em modo "L" (uint8)."""
+    in_height, in_width = gray.shape
+    if (in_width, in_height) == (width, height):
+        return gray
+    result = gray.astype(np.float64)
+    if width != in_width:
+        result = _clip8(result @ _coefficients(in_width, width, resample).T)
+    if height != in_height:
+        result = _clip8(_coefficients(in_height, height, resample) @ result)
+    return result.astype(np.uint8)
+
+
+def pixmap_gray(pix) -> np.ndarray:
+    """
+    Pixmap em tons de cinza (csGRAY, sem alpha) como array altura x largura.
+
+    É uma view sobre a memória do pixmap: o pixmap precisa continuar vivo
+    enquanto o array for usado.
+    """
+    samples = getattr(pix, 'samples_mv', None) or pix.samples
+    rows = np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return rows[:, :pix.width]
+
+
+def stack_pages(grids: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Empilha páginas verticalmente; páginas mais estreitas são ampliadas
+    para a maior largura (BICUBIC), como o _stack_images com PIL.
+    """
+    if len(grids) == 1:
+        return grids[0]
+    width = max(grid.shape[1] for grid in grids)
+    return np.vstack([
+        grid if grid.shape[1] == width
+        else resize(grid, width, int(grid.shape[0] * (width / grid.shape[1])), 'bicubic')
+        for grid in grids
+    ])
+
+
+def bits_to_hex(bits: np.ndarray) -> str:
+    """Bits (linha a linha) no formato hex do ImageHash (str(hash))."""
+    flat = np.asarray(bits, dtype=bool).reshape(-1)
+    value = int.from_bytes(np.packbits(flat).tobytes(), 'big') >> (-len(flat) % 8)
+    return format(value, f'0{math.ceil(len(flat) / 4)}x')
+
+
+def dhash(gray: np.ndarray, hash_size: int = 8) -> str:
+    """dHash horizontal (mesmo resultado de str(imagehash.dhash(img, hash_size)))."""
+    small = resize(gray, hash_size + 1, hash_size, 'lanczos')
+    return bits_to_hex(small[:, 1:] > small[:, :-1])
+
+
+def dhash_pages(grids: List[np.ndarray], hash_size: int = 8) -> str:
+    """dHash das páginas empilhadas."""
+    return dhash(stack_pages(grids), hash_size)
@@ -0,0 +1,215 @@
+"""
+Índice de sequências numéricas de um documento (tokenização única).
+
+Os extratores de UC (DualExtractor, FallbackExtractor, UCMultiExtractor,
+instalações compactadas) procuravam números com varreduras próprias do
+texto inteiro, uma por padrão. O NumericTokenIndex faz uma única passada
+que encontra as sequências de dígitos (5+) e os rótulos conhecidos
+(Instalação, Conta Contrato, UC, Cliente, CNPJ/CPF); cada sequência
+guarda offset, tamanho, página e a classe do rótulo imediatamente à
+esquerda. Os extratores consultam o índice em vez de varrer o texto.
+
+Uso:
+    index = NumericTokenIndex.from_pages(page_texts)
+    for token in index.runs(5, 10, isolated=True):
+        ...
+    for token in index.runs(5, label='instalacao'):
+        numero = token.digits[:12]
+"""
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+
+# Nenhuma regra de UC aceita menos de 5 dígitos: sequências menores não são
+# indexadas (nem chegam ao Python; o regex as pula)
+MIN_TOKEN_LEN = 5
+
+# Rótulos com as mesmas grafias dos padrões dos extratores (sem \b, como
+# neles). "UC" consome só o "U", para que o "C" ainda possa iniciar outro
+# rótulo ("UCliente").
+_LABELS_PATTERN = (
+    r'|(?P<instalacao>Instala(?:ção|cao))'
+    r'|(?P<conta_contrato>Conta\s+Contrato)'
+    r'|(?P<cliente>Cliente)'
+    r'|(?P<cnpj>CNPJ|CPF)'
+    r'|(?P<uc>U\.?(?=C))'
+)
+
+
+@lru_cache(maxsize=None)
+def _token_re(min_len: int) -> 're.Pattern':
+    """Uma passada: sequências de dígitos (isoladas ou não) ou rótulos."""
+    return re.compile(
+        rf'(?P<isolated>(?<!\w)\d{{{min_len},}}(?!\w))'
+        rf'|(?P<digits>\d{{{min_len},}})'
+        + _LABELS_PATTERN,
+        re.IGNORECASE
+    )
+
+# O que pode separar cada rótulo do número. Nenhum separador aceita dígitos,
+# então o número tem de começar exatamente onde o separador (guloso) termina
+LABEL_SEPARATORS = {
+    'instalacao': re.compile(r'\s*(?:da\s+)?(?:Unidade\s+)?(?:Consumidora)?[:\s]+', re.IGNORECASE),
+    'conta_contrato': re.compile(r'\s*(?:\(UC\))?[:\s]+', re.IGNORECASE),
+    'uc': re.compile(r'[:\s]+'),
+    'cliente': re.compile(r'[:\s]+'),
+    'cnpj': re.compile(r'(?:/MF)?\s*(?:n[ºo°.]\s*)?[:\s]+', re.IGNORECASE),
+}
+
+LABEL_CLASSES = tuple(LABEL_SEPARATORS)
+
+
+class NumericToken(NamedTuple):
+    """Sequência máxima de dígitos do documento."""
+    digits: str
+    start: int
+    end: int
+    page: int
+    label: Optional[str]  # classe do rótulo imediatamente à esquerda
+    isolated: bool        # delimitada por \b dos dois lados
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+
+class LabelToken(NamedTuple):
+    """Ocorrência de um rótulo conhecido no texto."""
+    label: str
+    start: int
+    end: int
+
+
+def is_word_char(text: str, index: int) -> bool:
+    """Equivalente a \\w na posição (False fora do texto)."""
+    if index < 0 or index >= len(text):
+        return False
+    char = text[index]
+    return char.isalnum() or char == '_'
+
+
+class NumericTokenIndex:
+    """
+    Todas as sequências de dígitos de um documento, com contexto.
+
+    Construído uma vez por documento; as consultas não varrem o texto.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        page_offsets: Sequence[int] = (0,),
+        first_page: int = 0,
+        min_len: int = MIN_TOKEN_LEN
+    ):
+        """
+        Args:
+            text: Texto do documento
+            page_offsets: Offset de início de cada página em text
+            first_page: Número da página que começa em page_offsets[0]
+            min_len: Tamanho mínimo das sequências indexadas
+        """
+        self.text = text
+        self.tokens: List[NumericToken] = []
+        self.labels: List[LabelToken] = []
+        self._starts: List[int] = []
+
+        next_pages = list(page_offsets)[1:]
+        page = first_page
+        # Posição onde termina o separador de cada rótulo -> classe do rótulo
+        # (o mais recente prevalece: "Conta Contrato (UC): 123")
+        label_reach: Dict[int, str] = {}
+
+        for match in _token_re(min_len).finditer(text):
+            kind = match.lastgroup
+            start, end = match.span()
+
+            if kind != 'isolated' and kind != 'digits':
+                label = LabelToken(kind, start, end + 1 if kind == 'uc' else end)
+                self.labels.append(label)
+                separator = LABEL_SEPARATORS[kind].match(text, label.end)
+                if separator:
+                    label_reach[separator.end()] = kind
+                continue
+
+            while next_pages and next_pages[0] <= start:
+                next_pages.pop(0)
+                page += 1
+
+            self.tokens.append(NumericToken(
+                match.group(), start, end, page, label_reach.get(start), kind == 'isolated'
+            ))
+            self._starts.append(start)
+
+    @classmethod
+    def from_pages(
+        cls,
+        pages: Sequence[str],
+        first_page: int = 0,
+        min_len: int = MIN_TOKEN_LEN
+    ) -> 'NumericTokenIndex':
+        """Índice do texto das páginas unidas como "página\\n" (formato dos extratores)."""
+        offsets = []
+        position = 0
+        for page_text in pages:
+            offsets.append(position)
+            position += len(page_text) + 1
+        return cls("".join(page_text + "\n" for page_text in pages), offsets or [0], first_page, min_len)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __iter__(self) -> Iterator[NumericToken]:
+        return iter(self.tokens)
+
+    def runs(
+        self,
+        min_len: int = 1,
+        max_len: Optional[int] = None,
+        isolated: bool = False,
+        label: Optional[str] = None
+    ) -> Iterator[NumericToken]:
+        """
+        Sequências em ordem de texto, filtradas.
+
+        Args:
+            min_len: Tamanho mínimo da sequência
+            max_len: Tamanho máximo (None = sem limite)
+            isolated: Só sequências delimitadas por \\b (equivale a \\b\\d{m,n}\\b)
+            label: Só sequências com esse rótulo à esquerda
+        """
+        for token in self.tokens:
+            length = token.end - token.start
+            if length < min_len or (max_len is not None and length > max_len):
+                continue
+            if isolated and not token.isolated:
+                continue
+            if label is not None and token.label != label:
+                continue
+            yield token
+
+    def labels_of(self, label: str) -> List[LabelToken]:
+        """Ocorrências de um rótulo, em ordem de texto."""
+        return [token for token in self.labels if token.label == label]
+
+    def isolated_in(self, start: int, end: int, min_len: int, max_len: int) -> List[str]:
+        """
+        Números de min_len..max_len dígitos delimitados por \\b dentro do
+        recorte text[start:end] (as bordas do recorte contam como limite).
+        """
+        found = []
+        text = self.text
+        first = max(0, bisect_right(self._starts, start) - 1)
+        for token in self.tokens[first:bisect_left(self._starts, end)]:
+            run_start = max(token.start, start)
+            run_end = min(token.end, end)
+            if run_end - run_start < min_len or run_end - run_start > max_len:
+                continue
+            if run_start > start and is_word_char(text, run_start - 1):
+                continue
+            if run_end < end and is_word_char(text, run_end):
+                continue
+            found.append(text[run_start:run_end])
+        return found
@@ -8,28 +8,68 @@ Uso principal: Agrupar contratos por layout para otimizar envio ao Gemini.
 Em vez de enviar 6000 PDFs, enviamos apenas 1 representante de cada layout.
 
 Dependências:
-    pip install imagehash Pillow  # Para hash visual
     pymupdf já instalado          # Para renderização
+    numpy                         # Para hash visual (dHash direto do pixmap)
+    pip install imagehash Pillow  # Só como fallback do hash visual sem numpy
 
 Uso:
     from raizen_power.utils.pdf_fingerprint import PDFModelIdentifier
     
-    identifier = PDFModelIdentifier()
-    result = identifier.classify_pdf("contrato.pdf", "CPFL")
+    with PDFModelIdentifier() as identifier:
+        result = identifier.classify_pdf("contrato.pdf", "CPFL")
     print(result["model_id"])  # "CPFL_5p_a1b2c3d4"
 """
 import hashlib
 import json
 import logging
+import sqlite3
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from string import hexdigits
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Sequence, Tuple, Optional, Any
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
 import fitz  # PyMuPDF
 
+try:
+    import numpy as np
+    from raizen_power.utils.image_hash import dhash_pages, pixmap_gray
+except ImportError:
+    np = None  # cluster_hashes e o dHash direto do pixmap exigem numpy
+
 logger = logging.getLogger(__name__)
 
+# Heurística de tabela: tolerância (pt) para duas réguas se cruzarem
+TABLE_RULE_TOLERANCE = 2.0
+
+# Tamanho (hex) do dHash 8x8 e distância máxima entre dois deles
+VISUAL_HASH_LENGTH = 16
+MAX_HASH_DISTANCE = 64
+
+# Faixas de distância de Hamming -> similaridade visual
+VISUAL_SIMILARITY_BANDS = ((5, 1.0), (10, 0.7), (15, 0.4))
+
+_HEX_DIGITS = frozenset(hexdigits)
+
+# Hash visual: 'exact' (padrão) renderiza no zoom antigo e reproduz bit a bit
+# o hash do imagehash, compatível com os modelos já gravados; 'fast' (opcional)
+# renderiza cada página já na largura de HASH_RENDER_WIDTH pixels e pode
+# diferir em até 4 bits, o bastante para mudar a faixa de similaridade
+VISUAL_HASH_MODES = ('exact', 'fast')
+HASH_RENDER_WIDTH = 288
+HASH_RENDER_ZOOM = 1.5  # 108 DPI
+
+# Stores SQLite (modelos e cache): compactação a cada N gravações e espera
+# máxima pelo lock de escrita de outro processo
+STORE_COMPACT_EVERY = 1000
+STORE_BUSY_TIMEOUT = 30.0  # segundos
+
+try:
+    _popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def _popcount(value: int) -> int:
+        return bin(value).count('1')
+
 # Tentar importar imagehash
 try:
     import imagehash
@@ -38,7 +78,210 @@ try:
     IMAGEHASH_AVAILABLE = True
 except ImportError:
     IMAGEHASH_AVAILABLE = False
-    logger.warning("imagehash não instalado. Usando fallback textual. pip install imagehash Pillow")
+    if np is None:
+        logger.warning("numpy/imagehash não instalados. Usando fallback textual. pip install numpy")
+
+VISUAL_HASH_AVAILABLE = np is not None or IMAGEHASH_AVAILABLE
+
+
+class BKTree:
+    """
+    BK-tree: busca de vizinhos dentro de um raio em um espaço métrico.
+    
+    Cada nó guarda os filhos pela distância até ele; pela desigualdade
+    triangular, uma busca de raio r a distância d do nó só desce nos filhos
+    com chave em [d - r, d + r]. Com hashes de 64 bits e raios pequenos a
+    busca visita uma fração pequena dos itens.
+    """
+    
+    def __init__(self, distance: Callable[[Hashable, Hashable], int]):
+        self.distance = distance
+        self._root: Optional[list] = None  # [chave, itens, {distância: nó}]
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self) -> Iterator[Any]:
+        """Todos os itens (ordem da árvore)."""
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            _, items, children = stack.pop()
+            yield from items
+            stack.extend(children.values())
+    
+    def add(self, key: Hashable, item: Any) -> None:
+        """Insere um item (itens com a mesma chave dividem o nó)."""
+        self._size += 1
+        if self._root is None:
+            self._root = [key, [item], {}]
+            return
+        node = self._root
+        while True:
+            d = self.distance(key, node[0])
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, [item], {}]
+                return
+            node = child
+    
+    def search(self, key: Hashable, radius: int) -> Iterator[Tuple[int, Any]]:
+        """(distância, item) de todos os itens a no máximo radius de key."""
+        if self._root is None:
+            return
+        stack = [self._root]
+        while stack:
+            node_key, items, children = stack.pop()
+            d = self.distance(key, node_key)
+            if d <= radius:
+                for item in items:
+                    yield d, item
+            for child_d, child in children.items():
+                if d - radius <= child_d <= d + radius:
+                    stack.append(child)
+
+
+def _bit_distance(hash1: int, hash2: int) -> int:
+    return _popcount(hash1 ^ hash2)
+
+
+def _char_distance(hash1: str, hash2: str) -> int:
+    return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+
+
+def _is_visual_hash(visual_hash: str) -> bool:
+    """True se o hash está no formato do dHash 8x8 (16 hex)."""
+    return len(visual_hash) == VISUAL_HASH_LENGTH and _HEX_DIGITS.issuperset(visual_hash)
+
+
+class _ModelIndex:
+    """
+    Modelos de uma distribuidora indexados pelo hash visual.
+    
+    Hashes fora do formato (16 hex) ficam em uma lista à parte, comparada
+    com a distância exata do identificador.
+    """
+    
+    def __init__(self, bits: bool):
+        self.bits = bits
+        self.tree = BKTree(_bit_distance if bits else _char_distance)
+        self.others: List[Tuple[str, Tuple[int, str, dict]]] = []
+    
+    def key(self, visual_hash: str) -> Optional[Hashable]:
+        """Chave do hash no BK-tree (None se fora do formato)."""
+        if len(visual_hash) != VISUAL_HASH_LENGTH:
+            return None
+        if not self.bits:
+            return visual_hash
+        if not _HEX_DIGITS.issuperset(visual_hash):
+            return None
+        return int(visual_hash, 16)
+    
+    def __len__(self) -> int:
+        return len(self.tree) + len(self.others)
+    
+    def __iter__(self) -> Iterator[Tuple[int, str, dict]]:
+        yield from self.tree
+        yield from (item for _, item in self.others)
+    
+    def add(self, visual_hash: str, item: Tuple[int, str, dict]) -> None:
+        key = self.key(visual_hash)
+        if key is None:
+            self.others.append((visual_hash, item))
+        else:
+            self.tree.add(key, item)
+
+
+class EntryStore:
+    """
+    Entradas JSON por chave, em SQLite (DB de modelos e cache de fingerprints).
+    
+    Substitui o dict inteiro reescrito em JSON a cada gravação: cada put()
+    é um upsert de uma entrada, com commit próprio (atômico). Em WAL, vários
+    processos leem enquanto um grava; gravações concorrentes esperam o lock
+    (STORE_BUSY_TIMEOUT). Um upsert mantém a posição da entrada, então
+    items() segue a ordem de inserção (como o dict antigo).
+    
+    A cada compact_every gravações o WAL é descarregado no banco e o
+    espaço livre é devolvido (VACUUM), se nenhum outro processo impedir.
+    """
+    
+    def __init__(self, db_path: Path, compact_every: int = STORE_COMPACT_EVERY):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.compact_every = compact_every
+        self._writes = 0
+        self._conn = sqlite3.connect(str(self.db_path), timeout=STORE_BUSY_TIMEOUT)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT NOT NULL UNIQUE,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Grava uma entrada (upsert + commit)."""
+        self.put_many([(key, value)])
+    
+    def put_many(self, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Grava várias entradas em uma única transação."""
+        rows = [(key, json.dumps(value, ensure_ascii=False)) for key, value in entries]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO entries (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                rows
+            )
+        self._writes += len(rows)
+        if self.compact_every and self._writes >= self.compact_every:
+            self.compact()
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Todas as entradas, na ordem de inserção."""
+        for key, value in self._conn.execute("SELECT key, value FROM entries ORDER BY rowid"):
+            yield key, json.loads(value)
+    
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    
+    def get_meta(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM meta")}
+    
+    def set_meta(self, key: str, value: Any) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value, ensure_ascii=False))
+            )
+    
+    def compact(self) -> None:
+        """Descarrega o WAL e devolve o espaço livre (ignora se outro processo segura o banco)."""
+        self._writes = 0
+        try:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if self._conn.execute("PRAGMA freelist_count").fetchone()[0]:
+                self._conn.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            logger.debug(f"Compactação de {self.db_path.name} adiada: {e}")
+    
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
 
 
 @dataclass
@@ -68,6 +311,16 @@ class PDFModelIdentifier:
     
     CACHE: Fingerprints são cacheados por arquivo (mtime + size).
     Se o arquivo não mudou, usa cache em vez de recalcular o hash visual.
+    
+    PERSISTÊNCIA: Modelos e cache ficam em SQLite (EntryStore), ao lado de
+    db_path/cache_path com extensão .sqlite; cada modelo ou fingerprint novo
+    é gravado sozinho, sem reescrever o resto. Os JSON do formato antigo são
+    migrados uma vez. Cada processo carrega os modelos ao iniciar; o cache é
+    consultado no banco, então fingerprints de outros workers são reusados.
+    
+    Hash visual, hash textual e features estruturais saem do mesmo documento
+    aberto uma única vez. Tabelas são detectadas pelos desenhos da página
+    (linhas/retângulos); find_tables() só com exact_tables=True.
     """
     
     def __init__(
@@ -77,7 +330,9 @@ class PDFModelIdentifier:
         pages_to_hash: int = 2,
         visual_threshold: int = 8,  # Hamming distance
         similarity_threshold: float = 0.85,
-        use_cache: bool = True
+        use_cache: bool = True,
+        exact_tables: bool = False,
+        visual_hash_mode: str = 'exact'
     ):
         """
         Args:
@@ -87,85 +342,141 @@ class PDFModelIdentifier:
             visual_threshold: Max hamming distance para considerar similar
             similarity_threshold: Min similarity score (0-1)
             use_cache: Se True, usa cache de fingerprints (default: True)
+            exact_tables: Se True, detecta tabelas com find_tables() (lento)
+                em vez da heurística de desenhos
+            visual_hash_mode: 'exact' (idêntico ao hash do imagehash) ou
+                'fast' (render pequeno, hash aproximado); ver VISUAL_HASH_MODES
         """
+        if visual_hash_mode not in VISUAL_HASH_MODES:
+            raise ValueError(f"visual_hash_mode inválido: {visual_hash_mode!r} (use {VISUAL_HASH_MODES})")
         self.db_path = Path(db_path)
         self.cache_path = Path(cache_path)
+        self.db_store_path = self.db_path.with_suffix('.sqlite')
+        self.cache_store_path = self.cache_path.with_suffix('.sqlite')
         self.pages_to_hash = pages_to_hash
         self.visual_threshold = visual_threshold
         self.similarity_threshold = similarity_threshold
         self.use_cache = use_cache
+        self.exact_tables = exact_tables
+        self.visual_hash_mode = visual_hash_mode
         
+        self._db_store = EntryStore(self.db_store_path)
         self.models_db = self._load_db()
-        self._fingerprint_cache = self._load_cache() if use_cache else {}
+        self._model_index: Optional[Dict[str, _ModelIndex]] = None  # lazy
+        self._model_index_bits = VISUAL_HASH_AVAILABLE
+        self._cache_store = self._load_cache() if use_cache else None
         self._cache_hits = 0
         self._cache_misses = 0
     
+    @staticmethod
+    def _read_legacy_json(path: Path) -> Optional[Dict]:
+        """Lê um JSON do formato antigo (None se não existe ou é inválido)."""
+        if not path.exists() or path.suffix != '.json':
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Ignorando {path.name}: {e}")
+            return None
+    
     def _load_db(self) -> Dict:
-        """Carrega banco de dados de modelos."""
-        if self.db_path.exists():
-            try:
-                with open(self.db_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {"models": {}, "metadata": {"created": datetime.now().isoformat()}}
+        """Carrega banco de dados de modelos (migra o JSON antigo na primeira vez)."""
+        store = self._db_store
+        metadata = store.get_meta()
+        if "created" not in metadata:
+            legacy = self._read_legacy_json(self.db_path) or {}
+            store.put_many(legacy.get("models", {}).items())
+            metadata = {"created": datetime.now().isoformat(), **legacy.get("metadata", {})}
+            for key, value in metadata.items():
+                store.set_meta(key, value)
+        return {"models": dict(store.items()), "metadata": metadata}
     
     def _save_db(self):
-        """Persiste banco de dados."""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.db_path, 'w', encoding='utf-8') as f:
-            json.dump(self.models_db, f, indent=2, ensure_ascii=False)
+        """Persiste todos os modelos (após alterações diretas em models_db)."""
+        self._db_store.put_many(self.models_db["models"].items())
+        for key, value in self.models_db.get("metadata", {}).items():
+            self._db_store.set_meta(key, value)
     
-    def _load_cache(self) -> Dict:
-        """Carrega cache de fingerprints."""
-        if self.cache_path.exists():
-            try:
-                with open(self.cache_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {}
+    def _load_cache(self) -> EntryStore:
+        """Abre o cache de fingerprints (migra o JSON antigo na primeira vez)."""
+        is_new = not self.cache_store_path.exists()
+        store = EntryStore(self.cache_store_path)
+        legacy = self._read_legacy_json(self.cache_path) if is_new else None
+        if legacy:
+            # O formato antigo sempre usava imagehash (= 'exact') e find_tables()
+            options = {**self._cache_options(), "visual_hash_mode": "exact", "exact_tables": True}
+            entries = []
+            for key, fingerprint in legacy.items():
+                # Chave antiga: "path|mtime|size" (só o path se o stat falhou)
+                parts = key.rsplit("|", 2)
+                path, stamp = (parts[0], "|".join(parts[1:])) if len(parts) == 3 else (key, "")
+                entries.append((path, {"stamp": stamp, "options": options, "fingerprint": fingerprint}))
+            store.put_many(entries)
+        return store
     
     def _save_cache(self):
-        """Persiste cache de fingerprints."""
-        if not self.use_cache:
-            return
-        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.cache_path, 'w', encoding='utf-8') as f:
-            json.dump(self._fingerprint_cache, f, ensure_ascii=False)
+        """Compacta o cache de fingerprints (cada entrada já é gravada em _cache_fingerprint)."""
+        if self._cache_store is not None:
+            self._cache_store.compact()
+    
+    def close(self):
+        """Fecha os bancos de modelos e de cache."""
+        self._db_store.close()
+        if self._cache_store is not None:
+            self._cache_store.close()
+            self._cache_store = None
     
-    def _get_file_key(self, pdf_path: str) -> str:
-        """Gera chave de cache baseada em path + mtime + size."""
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+    
+    def _cache_options(self) -> Dict:
+        """Opções que mudam o fingerprint; uma entrada de cache só vale com as mesmas."""
+        return {
+            "visual_hash_mode": self.visual_hash_mode,
+            "exact_tables": self.exact_tables,
+            "pages_to_hash": self.pages_to_hash,
+        }
+    
+    def _get_file_key(self, pdf_path: str) -> Tuple[str, str]:
+        """Gera chave de cache: (path canônico, "mtime|size")."""
         try:
             p = Path(pdf_path)
             stat = p.stat()
-            # Chave: path canônico + mtime + size
-            return f"{p.resolve()}|{stat.st_mtime}|{stat.st_size}"
-        except:
-            return pdf_path
+            return str(p.resolve()), f"{stat.st_mtime}|{stat.st_size}"
+        except OSError:
+            return pdf_path, ""
     
     def _get_cached_fingerprint(self, pdf_path: str) -> Optional[PDFFingerprint]:
-        """Busca fingerprint no cache se arquivo não mudou."""
-        if not self.use_cache:
+        """Busca fingerprint no cache se arquivo e opções não mudaram."""
+        if self._cache_store is None:
             return None
         
-        key = self._get_file_key(pdf_path)
+        path, stamp = self._get_file_key(pdf_path)
+        cached = self._cache_store.get(path)
         
-        if key in self._fingerprint_cache:
+        if cached is not None and cached["stamp"] == stamp and cached.get("options") == self._cache_options():
             self._cache_hits += 1
-            cached = self._fingerprint_cache[key]
-            return PDFFingerprint(**cached)
+            return PDFFingerprint(**cached["fingerprint"])
         
         self._cache_misses += 1
         return None
     
     def _cache_fingerprint(self, pdf_path: str, fingerprint: PDFFingerprint):
-        """Adiciona fingerprint ao cache."""
-        if not self.use_cache:
+        """Grava fingerprint no cache (substitui a versão anterior do arquivo)."""
+        if self._cache_store is None:
             return
         
-        key = self._get_file_key(pdf_path)
-        self._fingerprint_cache[key] = fingerprint.to_dict()
+        path, stamp = self._get_file_key(pdf_path)
+        self._cache_store.put(path, {
+            "stamp": stamp,
+            "options": self._cache_options(),
+            "fingerprint": fingerprint.to_dict(),
+        })
     
     def get_cache_stats(self) -> Dict:
         """Retorna estatísticas de cache."""
@@ -176,7 +487,7 @@ class PDFModelIdentifier:
             "misses": self._cache_misses,
             "total": total,
             "hit_rate_percent": round(hit_rate, 1),
-            "cache_size": len(self._fingerprint_cache),
+            "cache_size": len(self._cache_store) if self._cache_store is not None else 0,
         }
     
     # =========================================================================
@@ -201,17 +512,57 @@ class PDFModelIdentifier:
             logger.warning(f"Erro ao renderizar página: {e}")
             return None
     
-    def _extract_visual_hash(self, pdf_path: str) -> str:
+    def _render_page_gray(self, page: fitz.Page) -> Optional[fitz.Pixmap]:
+        """
+        Renderiza página em tons de cinza para o hash visual.
+        
+        No modo 'fast' a página sai já com HASH_RENDER_WIDTH pixels de
+        largura; no 'exact', no zoom do caminho antigo (PIL).
+        """
+        try:
+            if self.visual_hash_mode == 'exact':
+                zoom = HASH_RENDER_ZOOM
+            else:
+                zoom = HASH_RENDER_WIDTH / page.rect.width
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        except Exception as e:
+            logger.warning(f"Erro ao renderizar página: {e}")
+            return None
+    
+    def _extract_visual_hash(self, doc: fitz.Document) -> str:
         """
         Extrai dHash das primeiras páginas.
         
-        dHash é mais robusto para layouts estruturados (PDFs).
+        dHash é mais robusto para layouts estruturados (PDFs). Com numpy o
+        hash sai direto dos pixmaps (image_hash), sem passar por PIL; o
+        formato é o mesmo do imagehash.
         """
+        if np is None:
+            return self._extract_visual_hash_pil(doc)
+        
+        try:
+            # Os arrays são views sobre os pixmaps: manter a lista viva
+            pixmaps = []
+            for i in range(min(self.pages_to_hash, len(doc))):
+                pix = self._render_page_gray(doc[i])
+                if pix is not None:
+                    pixmaps.append(pix)
+            
+            if not pixmaps:
+                return "0" * 16
+            
+            return dhash_pages([pixmap_gray(pix) for pix in pixmaps])
+            
+        except Exception as e:
+            logger.warning(f"Erro ao extrair visual hash: {e}")
+            return "0" * 16
+    
+    def _extract_visual_hash_pil(self, doc: fitz.Document) -> str:
+        """dHash via PIL + imagehash (fallback sem numpy)."""
         if not IMAGEHASH_AVAILABLE:
-            return self._extract_text_hash(pdf_path)[:16]
+            return self._extract_text_hash(doc)[:16]
         
         try:
-            doc = fitz.open(pdf_path)
             images = []
             
             for i in range(min(self.pages_to_hash, len(doc))):
@@ -220,8 +571,6 @@ class PDFModelIdentifier:
                 if img:
                     images.append(img)
             
-            doc.close()
-            
             if not images:
                 return "0" * 16
             
@@ -266,10 +615,9 @@ class PDFModelIdentifier:
         
         return combined
     
-    def _extract_text_hash(self, pdf_path: str) -> str:
+    def _extract_text_hash(self, doc: fitz.Document) -> str:
         """Fallback: hash baseado em texto estrutural."""
         try:
-            doc = fitz.open(pdf_path)
             structural_text = []
             
             for i in range(min(self.pages_to_hash, len(doc))):
@@ -282,8 +630,6 @@ class PDFModelIdentifier:
                     if line.endswith(':') or (len(line) < 30 and line.isupper() and len(line) > 3):
                         structural_text.append(line[:20])
             
-            doc.close()
-            
             combined = "|".join(structural_text[:30])
             return hashlib.md5(combined.encode()).hexdigest()
             
@@ -295,10 +641,9 @@ class PDFModelIdentifier:
     # STEP 2: Extract Structural Features
     # =========================================================================
     
-    def _extract_structural_features(self, pdf_path: str) -> Dict[str, Any]:
+    def _extract_structural_features(self, doc: fitz.Document) -> Dict[str, Any]:
         """Analisa características estruturais do PDF."""
         try:
-            doc = fitz.open(pdf_path)
             page = doc[0]
             
             # Extrair blocos de texto
@@ -312,12 +657,11 @@ class PDFModelIdentifier:
                 "height": int(page.rect.height),
                 "aspect_ratio": round(page.rect.width / page.rect.height, 2),
                 "text_block_count": len(text_blocks),
-                "has_tables": self._detect_tables(page),
+                "has_tables": self._detect_tables(page, exact=self.exact_tables),
                 "text_density": self._calculate_text_density(text_blocks, page),
                 "columns": self._estimate_columns(text_blocks),
             }
             
-            doc.close()
             return features
             
         except Exception as e:
@@ -325,19 +669,106 @@ class PDFModelIdentifier:
             return {"page_count": 0, "error": str(e)}
     
     @staticmethod
-    def _detect_tables(page: fitz.Page) -> bool:
-        """Detecta presença de tabelas."""
-        try:
-            tables = page.find_tables()
-            return len(tables.tables) > 0
-        except:
-            # Fallback: detectar por linhas
+    def _detect_tables(page: fitz.Page, exact: bool = False) -> bool:
+        """
+        Detecta presença de tabelas.
+        
+        Args:
+            exact: Se True, usa find_tables() (análise completa da página,
+                dezenas de ms); senão, a heurística de desenhos
+        """
+        if exact:
             try:
-                paths = page.get_drawings()
-                lines = [p for p in paths if p.get("type") == "l"]
-                return len(lines) > 5
+                tables = page.find_tables()
+                return len(tables.tables) > 0
             except:
-                return False
+                pass
+        return PDFModelIdentifier._has_ruled_grid(page)
+    
+    @staticmethod
+    def _has_ruled_grid(page: fitz.Page, tolerance: float = TABLE_RULE_TOLERANCE) -> bool:
+        """
+        Heurística de tabela: duas células vizinhas na mesma linha, fechadas
+        pelas réguas da página (segmentos e bordas de retângulos, como as
+        que o find_tables procura).
+        
+        Um retângulo sozinho (borda da página, faixa sombreada, caixa de
+        texto) é uma célula só, e células sem borda em comum não formam
+        grade; o find_tables também não vê tabela nesses casos, nem em uma
+        coluna única.
+        """
+        try:
+            # get_cdrawings: mesma lista do get_drawings, sem criar objetos Point/Rect
+            get_drawings = getattr(page, 'get_cdrawings', page.get_drawings)
+            horizontal, vertical = [], []  # (posição, início, fim)
+            for path in get_drawings():
+                for item in path['items']:
+                    if item[0] == 'l':
+                        (x0, y0), (x1, y1) = item[1][:2], item[2][:2]
+                        if abs(y0 - y1) < 1:
+                            horizontal.append((y0, min(x0, x1), max(x0, x1)))
+                        elif abs(x0 - x1) < 1:
+                            vertical.append((x0, min(y0, y1), max(y0, y1)))
+                    elif item[0] == 're':
+                        x0, y0, x1, y1 = item[1][:4]
+                        x0, x1 = min(x0, x1), max(x0, x1)
+                        y0, y1 = min(y0, y1), max(y0, y1)
+                        thin_h = y1 - y0 < 2
+                        thin_v = x1 - x0 < 2
+                        # Retângulo fino = uma régua; retângulo cheio = 4 bordas
+                        if thin_h and not thin_v:
+                            horizontal.append(((y0 + y1) / 2, x0, x1))
+                        elif thin_v and not thin_h:
+                            vertical.append(((x0 + x1) / 2, y0, y1))
+                        elif not thin_h and not thin_v:
+                            horizontal += [(y0, x0, x1), (y1, x0, x1)]
+                            vertical += [(x0, y0, y1), (x1, y0, y1)]
+            return PDFModelIdentifier._has_adjacent_cells(horizontal, vertical, tolerance)
+        except:
+            return False
+    
+    @staticmethod
+    def _has_adjacent_cells(
+        horizontal: List[Tuple[float, float, float]],
+        vertical: List[Tuple[float, float, float]],
+        tolerance: float
+    ) -> bool:
+        """
+        True se as réguas fecham duas células lado a lado.
+        
+        Cada régua horizontal é cortada pelas verticais que cruza; dois
+        cortes seguidos (xa, xb) são a largura de uma coluna. Uma célula é
+        (xa, xb) entre duas réguas seguidas dessa coluna, com verticais em xa
+        e xb cobrindo a altura; duas células com a mesma altura e borda
+        vertical em comum formam a grade.
+        """
+        if len(horizontal) < 2 or len(vertical) < 3:
+            return False
+        
+        columns: Dict[Tuple[int, int], set] = {}
+        for y, hx0, hx1 in horizontal:
+            xs = sorted({
+                round(x) for x, vy0, vy1 in vertical
+                if hx0 - tolerance <= x <= hx1 + tolerance and vy0 - tolerance <= y <= vy1 + tolerance
+            })
+            for xa, xb in zip(xs, xs[1:]):
+                columns.setdefault((xa, xb), set()).add(round(y))
+        
+        def covered(x: int, ya: int, yb: int) -> bool:
+            return any(
+                round(vx) == x and vy0 - tolerance <= ya and vy1 + tolerance >= yb
+                for vx, vy0, vy1 in vertical
+            )
+        
+        cells = set()
+        for (xa, xb), ys in columns.items():
+            ys = sorted(ys)
+            for ya, yb in zip(ys, ys[1:]):
+                if covered(xa, ya, yb) and covered(xb, ya, yb):
+                    cells.add((xa, xb, ya, yb))
+        
+        left_edges = {(xa, ya, yb) for xa, _, ya, yb in cells}
+        return any((xb, ya, yb) in left_edges for _, xb, ya, yb in cells)
     
     @staticmethod
     def _calculate_text_density(text_blocks: List, page: fitz.Page) -> float:
@@ -384,9 +815,15 @@ class PDFModelIdentifier:
             logger.debug(f"Cache hit para {Path(pdf_path).name}")
             return cached
         
-        # Cache miss - calcular fingerprint
-        visual_hash = self._extract_visual_hash(pdf_path)
-        structure = self._extract_structural_features(pdf_path)
+        # Cache miss - calcular fingerprint (documento aberto uma única vez)
+        try:
+            with fitz.open(pdf_path) as doc:
+                visual_hash = self._extract_visual_hash(doc)
+                structure = self._extract_structural_features(doc)
+        except Exception as e:
+            logger.warning(f"Erro ao abrir PDF: {e}")
+            visual_hash = "0" * 16
+            structure = {"page_count": 0, "error": str(e)}
         
         # Hash estrutural
         structure_str = json.dumps(structure, sort_keys=True)
@@ -403,7 +840,7 @@ class PDFModelIdentifier:
             structure_hash=structure_hash,
             composite_id=composite_id,
             structure=structure,
-            confidence=0.95 if IMAGEHASH_AVAILABLE else 0.70,
+            confidence=0.95 if VISUAL_HASH_AVAILABLE else 0.70,
             created_at=datetime.now().isoformat()
         )
         
@@ -418,10 +855,16 @@ class PDFModelIdentifier:
     
     def _hamming_distance(self, hash1: str, hash2: str) -> int:
         """Calcula distância de Hamming entre dois hashes."""
-        if not IMAGEHASH_AVAILABLE:
+        if not VISUAL_HASH_AVAILABLE:
             # Fallback: comparar strings
             return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
         
+        if _is_visual_hash(hash1) and _is_visual_hash(hash2):
+            return _popcount(int(hash1, 16) ^ int(hash2, 16))
+        
+        if not IMAGEHASH_AVAILABLE:
+            return 64  # Max distance
+        
         try:
             h1 = imagehash.hex_to_hash(hash1)
             h2 = imagehash.hex_to_hash(hash2)
@@ -431,16 +874,15 @@ class PDFModelIdentifier:
     
     def _calculate_visual_similarity(self, hash1: str, hash2: str) -> float:
         """Similaridade visual (0-1)."""
-        distance = self._hamming_distance(hash1, hash2)
-        
-        if distance <= 5:
-            return 1.0
-        elif distance <= 10:
-            return 0.7
-        elif distance <= 15:
-            return 0.4
-        else:
-            return 0.0
+        return self._similarity_for_distance(self._hamming_distance(hash1, hash2))
+    
+    @staticmethod
+    def _similarity_for_distance(distance: int) -> float:
+        """Similaridade visual de uma distância de Hamming (faixas fixas)."""
+        for limit, similarity in VISUAL_SIMILARITY_BANDS:
+            if distance <= limit:
+                return similarity
+        return 0.0
     
     def _calculate_structural_similarity(self, s1: Dict, s2: Dict) -> float:
         """Compara features estruturais."""
@@ -519,22 +961,90 @@ class PDFModelIdentifier:
                 "similar_models": [],
             }
     
+    # -------------------------------------------------------------------------
+    # Índice de vizinhos (BK-tree por distribuidora)
+    # -------------------------------------------------------------------------
+    
+    def _candidate_radius(self) -> Optional[int]:
+        """
+        Maior distância visual com que um modelo ainda pode passar do
+        similarity_threshold (supondo similaridade estrutural máxima).
+        
+        Returns:
+            Raio da busca; None se qualquer distância passa (sem poda);
+            -1 se nenhuma passa
+        """
+        if 0.30 >= self.similarity_threshold:
+            return None
+        radius = -1
+        for limit, similarity in VISUAL_SIMILARITY_BANDS:
+            if (similarity * 0.70) + (1.0 * 0.30) >= self.similarity_threshold:
+                radius = limit
+        return radius
+    
+    def _build_model_index(self) -> Dict[str, _ModelIndex]:
+        """Indexa os modelos do DB (na ordem do DB) por distribuidora."""
+        self._model_index = {}
+        self._model_index_bits = VISUAL_HASH_AVAILABLE
+        for model_id, model_data in self.models_db.get("models", {}).items():
+            self._index_model(model_id, model_data)
+        return self._model_index
+    
+    def _index_model(self, model_id: str, model_data: dict) -> None:
+        if self._model_index is None or "fingerprint" not in model_data:
+            return
+        distributor = model_data.get("distributor")
+        index = self._model_index.get(distributor)
+        if index is None:
+            index = self._model_index[distributor] = _ModelIndex(self._model_index_bits)
+        fingerprint = model_data["fingerprint"]
+        # Posição no DB: desempate na mesma ordem da varredura completa
+        position = len(index)
+        index.add(fingerprint["visual_hash"], (position, model_id, fingerprint))
+    
+    def _model_candidates(self, visual_hash: str, distributor: str) -> List[Tuple[int, str, dict, int]]:
+        """
+        Modelos da distribuidora que podem passar do limiar, na ordem do DB.
+        
+        Returns:
+            [(posição, model_id, fingerprint, distância visual)]
+        """
+        if self._model_index is None or self._model_index_bits != VISUAL_HASH_AVAILABLE:
+            self._build_model_index()
+        index = self._model_index.get(distributor)
+        radius = self._candidate_radius()
+        if index is None or radius == -1:
+            return []
+        
+        key = index.key(visual_hash)
+        if radius is None or key is None:
+            # Sem poda possível: todos os modelos, com a distância exata
+            entries = [(item, self._hamming_distance(visual_hash, item[2]["visual_hash"]))
+                       for item in index]
+        else:
+            entries = [(item, d) for d, item in index.tree.search(key, radius)]
+            for stored, item in index.others:
+                d = self._hamming_distance(visual_hash, stored)
+                if d <= radius:
+                    entries.append((item, d))
+        
+        entries.sort(key=lambda entry: entry[0][0])
+        return [(*item, d) for item, d in entries]
+    
     def _find_similar_models(self, fingerprint: PDFFingerprint, distributor: str) -> List[Dict]:
-        """Encontra modelos similares no DB."""
+        """
+        Encontra modelos similares no DB.
+        
+        O BK-tree da distribuidora devolve só os modelos a uma distância
+        visual que ainda permite passar do limiar; a similaridade estrutural
+        é calculada apenas para eles.
+        """
         similar = []
         
-        for model_id, model_data in self.models_db.get("models", {}).items():
-            if model_data.get("distributor") != distributor:
-                continue
-            
-            if "fingerprint" not in model_data:
-                continue
-            
-            # Reconstruir fingerprint
-            stored_fp = PDFFingerprint(**model_data["fingerprint"])
-            
-            # Calcular similaridade
-            similarity = self._calculate_composite_similarity(fingerprint, stored_fp)
+        for _, model_id, stored, distance in self._model_candidates(fingerprint.visual_hash, distributor):
+            visual_sim = self._similarity_for_distance(distance)
+            struct_sim = self._calculate_structural_similarity(fingerprint.structure, stored.get("structure"))
+            similarity = (visual_sim * 0.70) + (struct_sim * 0.30)
             
             if similarity >= self.similarity_threshold:
                 similar.append({
@@ -547,6 +1057,8 @@ class PDFModelIdentifier:
     
     def _save_model(self, model_id: str, fingerprint: PDFFingerprint, distributor: str):
         """Salva novo modelo no DB."""
+        if model_id in self.models_db["models"]:
+            self._model_index = None  # substituição: reindexar na próxima busca
         self.models_db["models"][model_id] = {
             "model_id": model_id,
             "distributor": distributor,
@@ -554,7 +1066,8 @@ class PDFModelIdentifier:
             "created_at": datetime.now().isoformat(),
             "usage_count": 0,
         }
-        self._save_db()
+        self._index_model(model_id, self.models_db["models"][model_id])
+        self._db_store.put(model_id, self.models_db["models"][model_id])
     
     def get_model_stats(self) -> Dict:
         """Estatísticas do DB."""
@@ -576,6 +1089,38 @@ class PDFModelIdentifier:
             "by_page_count": by_pages,
         }
     
+    def cluster_pdfs(
+        self,
+        pdf_paths: List[str],
+        threshold: Optional[int] = None,
+        method: str = 'components'
+    ) -> Dict[str, List[str]]:
+        """
+        Agrupa um corpus inteiro pelo hash visual (todos os pares de uma vez).
+        
+        Diferente de group_pdfs, não consulta nem altera o DB de modelos:
+        serve para descobrir layouts (ver cluster_hashes).
+        
+        Args:
+            threshold: Distância máxima de Hamming (padrão: visual_threshold)
+            method: 'components' ou 'leader'
+        
+        Returns:
+            {pdf representativo (medoide): [pdf_paths, ...]}, maiores primeiro
+        """
+        fingerprints = [self._create_fingerprint(path, "") for path in pdf_paths]
+        self._save_cache()
+        
+        clusters = cluster_hashes(
+            [fp.visual_hash for fp in fingerprints],
+            self.visual_threshold if threshold is None else threshold,
+            method
+        )
+        return {
+            pdf_paths[cluster.medoid]: [pdf_paths[i] for i in cluster.members]
+            for cluster in clusters
+        }
+    
     def group_pdfs(self, pdf_paths: List[str], distributor: str) -> Dict[str, List[str]]:
         """
         Agrupa lista de PDFs por modelo.
@@ -600,14 +1145,228 @@ class PDFModelIdentifier:
         return groups
 
 
+# =============================================================================
+# Agrupamento em lote (NumPy): todos os pares do corpus de uma vez
+# =============================================================================
+
+# Linhas da matriz de distâncias calculadas por vez (HAMMING_BLOCK_SIZE x n uint8)
+HAMMING_BLOCK_SIZE = 1024
+
+CLUSTER_METHODS = ('components', 'leader')
+
+
+class HashCluster(NamedTuple):
+    """Grupo de hashes visuais (índices na lista de entrada)."""
+    members: List[int]
+    medoid: int   # membro com a menor soma de distâncias aos demais
+    radius: int   # maior distância de um membro ao medoide
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy é necessário para o agrupamento em lote (pip install numpy)")
+
+
+def _popcount64(values: 'np.ndarray') -> 'np.ndarray':
+    """Bits ligados de cada uint64 (uint8)."""
+    if hasattr(np, 'bitwise_count'):  # numpy 2.0+
+        return np.bitwise_count(values)
+    bytes_view = values.view(np.uint8).reshape(values.shape + (8,))
+    return _POPCOUNT_TABLE[bytes_view].sum(axis=-1, dtype=np.uint8)
+
+
+_POPCOUNT_TABLE = (
+    np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8) if np is not None else None
+)
+
+
+def pack_hashes(hashes: Sequence[str]) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    dHashes hex (formato de visual_hash) como um array uint64.
+    
+    Returns:
+        (packed, valid): valid marca os hashes no formato de 16 hex; os
+        demais ficam como 0 em packed
+    """
+    _require_numpy()
+    packed = np.zeros(len(hashes), dtype=np.uint64)
+    valid = np.zeros(len(hashes), dtype=bool)
+    for i, visual_hash in enumerate(hashes):
+        if _is_visual_hash(visual_hash):
+            packed[i] = int(visual_hash, 16)
+            valid[i] = True
+    return packed, valid
+
+
+def iter_hamming_blocks(
+    rows: 'np.ndarray',
+    columns: Optional['np.ndarray'] = None,
+    block_size: int = HAMMING_BLOCK_SIZE
+) -> Iterator[Tuple[int, 'np.ndarray']]:
+    """
+    Distâncias de Hamming de rows contra columns (padrão: rows), em blocos
+    de linhas: (início, matriz uint8 block_size x len(columns)).
+    
+    XOR + popcount vetorizados; a matriz completa nunca fica em memória.
+    """
+    _require_numpy()
+    columns = rows if columns is None else columns
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size, None] ^ columns[None, :]
+        yield start, _popcount64(block)
+
+
+def _compress(parent: 'np.ndarray') -> None:
+    """Pointer jumping no lugar: cada posição passa a apontar para a raiz."""
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return
+        parent[:] = grandparent
+
+
+def _union_edges(parent: 'np.ndarray', sources: 'np.ndarray', targets: 'np.ndarray') -> None:
+    """Une as arestas (sources[i], targets[i]) no union-find parent."""
+    # A raiz maior de cada aresta aponta para a menor (a raiz é o menor
+    # índice do componente); repete até as arestas ficarem resolvidas
+    while len(sources):
+        _compress(parent)
+        source_roots, target_roots = parent[sources], parent[targets]
+        pending = source_roots != target_roots
+        sources, targets = sources[pending], targets[pending]
+        source_roots, target_roots = source_roots[pending], target_roots[pending]
+        np.minimum.at(
+            parent,
+            np.maximum(source_roots, target_roots),
+            np.minimum(source_roots, target_roots)
+        )
+
+
+def _component_labels(unique: 'np.ndarray', threshold: int, block_size: int) -> 'np.ndarray':
+    """
+    Rótulo (menor índice) do componente conexo de cada hash (arestas: distância <= threshold).
+    
+    Union-find incremental: as arestas são unidas e descartadas aos poucos,
+    em fatias de 1/8 das linhas do bloco (dois int64 por aresta ocupam no
+    máximo 2x a matriz do bloco), então a memória não cresce com o total de
+    arestas, mesmo quando quase todos os hashes são vizinhos.
+    """
+    parent = np.arange(len(unique))
+    slice_rows = max(1, block_size // 8)
+    for start in range(0, len(unique), block_size):
+        # Só o triângulo superior: colunas a partir do início do bloco
+        adjacent = _popcount64(unique[start:start + block_size, None] ^ unique[None, start:]) <= threshold
+        for offset in range(0, len(adjacent), slice_rows):
+            rows, cols = np.nonzero(adjacent[offset:offset + slice_rows])
+            rows += offset
+            upper = cols > rows
+            _union_edges(parent, rows[upper] + start, cols[upper] + start)
+    _compress(parent)
+    return parent
+
+
+def _leader_labels(unique: 'np.ndarray', order: 'np.ndarray', threshold: int) -> 'np.ndarray':
+    """
+    Leader clustering na ordem dada: cada hash vai para o líder mais
+    próximo dentro de threshold ou vira um novo líder.
+    """
+    labels = np.empty(len(unique), dtype=np.int64)
+    leaders = np.empty(len(unique), dtype=np.uint64)
+    leader_ids = np.empty(len(unique), dtype=np.int64)
+    n_leaders = 0
+    for index in order:
+        if n_leaders:
+            distances = _popcount64(leaders[:n_leaders] ^ unique[index])
+            nearest = int(np.argmin(distances))
+            if distances[nearest] <= threshold:
+                labels[index] = leader_ids[nearest]
+                continue
+        leaders[n_leaders] = unique[index]
+        leader_ids[n_leaders] = index
+        n_leaders += 1
+        labels[index] = index
+    return labels
+
+
+def _medoid(unique: 'np.ndarray', weights: 'np.ndarray', block_size: int) -> Tuple[int, int]:
+    """(posição do medoide em unique, maior distância a ele), pesando hashes repetidos."""
+    best, best_cost = 0, None
+    for start, block in iter_hamming_blocks(unique, block_size=block_size):
+        costs = block.astype(np.int64) @ weights
+        row = int(np.argmin(costs))
+        if best_cost is None or costs[row] < best_cost:
+            best, best_cost = start + row, costs[row]
+    radius = int(_popcount64(unique ^ unique[best]).max())
+    return best, radius
+
+
+def cluster_hashes(
+    hashes: Sequence[str],
+    threshold: int = VISUAL_SIMILARITY_BANDS[0][0],
+    method: str = 'components',
+    block_size: int = HAMMING_BLOCK_SIZE
+) -> List[HashCluster]:
+    """
+    Agrupa dHashes por distância de Hamming.
+    
+    Args:
+        hashes: visual_hash de cada documento (16 hex)
+        threshold: Distância máxima entre vizinhos
+        method: 'components' (componentes conexos do grafo distância <=
+            threshold; grupos podem encadear) ou 'leader' (cada hash vai
+            para o líder mais próximo, na ordem de entrada; raio <= threshold)
+        block_size: Linhas da matriz de distâncias por bloco
+    
+    Hashes repetidos são deduplicados antes de comparar. Hashes fora do
+    formato viram grupos unitários.
+    
+    Returns:
+        Grupos do maior para o menor (empate: ordem do primeiro membro)
+    """
+    _require_numpy()
+    if method not in CLUSTER_METHODS:
+        raise ValueError(f"Método de agrupamento desconhecido: {method}")
+    
+    packed, valid = pack_hashes(hashes)
+    valid_idx = np.flatnonzero(valid)
+    unique, first, inverse = np.unique(packed[valid_idx], return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    
+    if method == 'components':
+        labels = _component_labels(unique, threshold, block_size)
+    else:
+        labels = _leader_labels(unique, np.argsort(first, kind='stable'), threshold)
+    
+    counts = np.bincount(inverse, minlength=len(unique))
+    
+    # Membros de cada rótulo (hashes únicos e documentos) por ordenação estável
+    unique_order = np.argsort(labels, kind='stable')
+    unique_groups = np.split(unique_order, np.flatnonzero(np.diff(labels[unique_order])) + 1)
+    doc_labels = labels[inverse]
+    doc_order = np.argsort(doc_labels, kind='stable')
+    doc_groups = np.split(valid_idx[doc_order], np.flatnonzero(np.diff(doc_labels[doc_order])) + 1)
+    
+    clusters = []
+    for members_unique, members in zip(unique_groups, doc_groups):
+        if not len(members):
+            continue
+        position, radius = _medoid(unique[members_unique], counts[members_unique], block_size)
+        medoid = int(valid_idx[first[members_unique[position]]])
+        clusters.append(HashCluster(members.tolist(), medoid, radius))
+    
+    clusters.extend(HashCluster([int(i)], int(i), 0) for i in np.flatnonzero(~valid))
+    clusters.sort(key=lambda cluster: (-len(cluster.members), cluster.members[0]))
+    return clusters
+
+
 # Funções de conveniência
 def classify_pdf(pdf_path: str, distributor: str = "UNKNOWN") -> Dict:
     """Classifica um PDF rapidamente."""
-    identifier = PDFModelIdentifier()
-    return identifier.classify_pdf(pdf_path, distributor)
+    with PDFModelIdentifier() as identifier:
+        return identifier.classify_pdf(pdf_path, distributor)
 
 
 def group_pdfs_by_model(pdf_paths: List[str], distributor: str = "UNKNOWN") -> Dict[str, List[str]]:
     """Agrupa PDFs por modelo."""
-    identifier = PDFModelIdentifier()
-    return identifier.group_pdfs(pdf_paths, distributor)
+    with PDFModelIdentifier() as identifier:
+        return identifier.group_pdfs(pdf_paths, distributor)
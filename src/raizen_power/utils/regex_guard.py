@@ -0,0 +1,283 @@
+"""
+Orçamento de tempo para regex (proteção contra backtracking catastrófico).
+
+Padrões gerados pelo Gemini (e alguns dos nossos, como
+"(?:CONSORCIADA|Contratante).*?CNPJ..." com DOTALL) podem levar tempo
+quadrático ou exponencial em contratos guarda-chuva longos, travando um
+worker inteiro. Este módulo oferece:
+
+- time_budget / guarded_search: interrompe uma busca que passa do
+  orçamento (SIGALRM; o motor do re verifica sinais durante a busca)
+- adversarial_inputs: textos montados a partir do próprio padrão para
+  provocar o pior caso (repetições das palavras do padrão sem o final
+  esperado, sequências longas de um mesmo tipo de caractere)
+- measure_worst: pior tempo de um padrão sobre um conjunto de textos
+- measure_worst_many: idem para vários padrões; sem guarda disponível
+  mede em um processo separado, encerrado quando passa do prazo
+
+Sem SIGALRM (Windows) ou fora da thread principal guarded_search roda sem
+guarda (com um aviso no log, uma vez por processo); por isso a validação do
+save_map e o regex_profiler usam measure_worst_many, que não depende do
+sinal, e os workers da extração têm prazo por tarefa (task_deadline).
+
+Uso:
+    try:
+        match = guarded_search(pattern, text, budget_ms=2000)
+    except RegexTimeout:
+        ...
+"""
+import logging
+import multiprocessing
+import queue
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+# Carregar configurações centralizadas
+try:
+    from raizen_power.core.config import settings
+    DEFAULT_BUDGET_MS = settings.regex.budget_ms
+    DEFAULT_SAVE_BUDGET_MS = settings.regex.save_budget_ms
+    DEFAULT_ADVERSARIAL_LENGTH = settings.regex.adversarial_length
+    ISOLATED_STARTUP_S = settings.regex.isolated_startup_s
+except (ImportError, AttributeError):
+    DEFAULT_BUDGET_MS = 2000
+    DEFAULT_SAVE_BUDGET_MS = 250
+    DEFAULT_ADVERSARIAL_LENGTH = 20_000
+    ISOLATED_STARTUP_S = 10.0
+
+logger = logging.getLogger(__name__)
+
+# Palavras literais do padrão usadas para montar textos adversariais
+_WORD_RE = re.compile(r'(?<!\\)\b[A-Za-zÀ-ÿ]{3,}')
+
+# Sequências genéricas: cada uma termina em um caractere que costuma
+# impedir o match e forçar o backtracking. Curtas o bastante para que um
+# padrão só quadrático na sequência (ex: \d+\s+UCS) não seja punido por
+# algo que não ocorre em contratos; o backtracking exponencial explode
+# muito antes desse tamanho
+_GENERIC_RUNS = ('a', '1', ' ', '\n', 'a ', '1.', 'A1', '-')
+_GENERIC_RUN_LENGTH = 2_000
+
+
+class RegexTimeout(Exception):
+    """Busca regex excedeu o orçamento de tempo."""
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise RegexTimeout()
+
+
+# Aviso de busca sem guarda já emitido neste processo
+_unguarded_warned = False
+
+
+def _warn_unguarded() -> None:
+    """Avisa uma vez por processo que as buscas rodam sem orçamento."""
+    global _unguarded_warned
+    if _unguarded_warned:
+        return
+    if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+        # Só há um timer já armado: a guarda de fora cobre a busca
+        return
+    _unguarded_warned = True
+    logger.warning(
+        "Orçamento de regex indisponível (sem SIGALRM ou fora da thread principal): "
+        "buscas rodam sem limite de tempo; só o prazo por tarefa dos workers protege"
+    )
+
+
+def guard_available() -> bool:
+    """True se a busca pode ser interrompida (SIGALRM, thread principal, timer livre)."""
+    return (
+        hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+        and signal.getitimer(signal.ITIMER_REAL)[0] == 0
+    )
+
+
+@contextmanager
+def time_budget(budget_ms: Optional[float]) -> Iterator[None]:
+    """
+    Levanta RegexTimeout se o bloco passar de budget_ms.
+
+    Sem orçamento ou sem guarda disponível (ver guard_available), o bloco
+    roda normalmente. Não sobrescreve um timer já armado (guardas aninhadas).
+    """
+    if not budget_ms:
+        yield
+        return
+    if not guard_available():
+        _warn_unguarded()
+        yield
+        return
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, budget_ms / 1000)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def guarded_search(pattern: Pattern, text: str, budget_ms: Optional[float] = DEFAULT_BUDGET_MS) -> Optional['re.Match']:
+    """
+    pattern.search(text) com orçamento de tempo (levanta RegexTimeout).
+
+    Mesmo efeito de time_budget, sem o contextmanager: roda para cada
+    padrão de cada documento, então o custo fixo importa.
+    """
+    if not budget_ms:
+        return pattern.search(text)
+    if not guard_available():
+        _warn_unguarded()
+        return pattern.search(text)
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, budget_ms / 1000)
+    try:
+        return pattern.search(text)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def adversarial_inputs(pattern: str, length: int = DEFAULT_ADVERSARIAL_LENGTH) -> List[str]:
+    """
+    Textos de ~length caracteres que provocam o pior caso do padrão.
+
+    - Palavras literais do padrão repetidas (sem o valor esperado depois):
+      cada âncora inicia um ".*?" que varre o resto do texto
+    - Sequências de letras/dígitos/espaços seguidas de "!": quantificadores
+      aninhados testam todas as partições antes de falhar
+    """
+    inputs = []
+
+    words = list(dict.fromkeys(_WORD_RE.findall(pattern)))
+    if words:
+        for block in (" ".join(words) + " ", " ".join(f"{word}:" for word in words) + "\n"):
+            inputs.append((block * (length // len(block) + 1))[:length])
+
+    run_length = min(length, _GENERIC_RUN_LENGTH)
+    for run in _GENERIC_RUNS:
+        inputs.append(run * (run_length // len(run)) + "!")
+
+    return inputs
+
+
+class PatternCost(NamedTuple):
+    """Custo de um padrão sobre um conjunto de textos."""
+    pattern_id: str
+    worst_ms: float
+    mean_ms: float
+    samples: int
+    timeouts: int
+    worst_sample: int  # índice do texto mais lento
+
+    def over_budget(self, budget_ms: float) -> bool:
+        return self.timeouts > 0 or self.worst_ms > budget_ms
+
+
+def measure_worst(
+    pattern_id: str,
+    pattern: Pattern,
+    texts: Iterable[str],
+    cap_ms: Optional[float] = None
+) -> PatternCost:
+    """
+    Tempo de pattern.search em cada texto.
+
+    Args:
+        cap_ms: Interrompe buscas mais longas que isso (contadas em timeouts,
+            com cap_ms como tempo)
+    """
+    worst = 0.0
+    worst_sample = -1
+    total = 0.0
+    timeouts = 0
+    samples = 0
+
+    for i, text in enumerate(texts):
+        start = time.perf_counter()
+        try:
+            guarded_search(pattern, text, cap_ms)
+            elapsed = (time.perf_counter() - start) * 1000
+        except RegexTimeout:
+            timeouts += 1
+            elapsed = cap_ms
+        samples += 1
+        total += elapsed
+        if elapsed > worst:
+            worst, worst_sample = elapsed, i
+
+    return PatternCost(
+        pattern_id,
+        round(worst, 3),
+        round(total / samples, 3) if samples else 0.0,
+        samples,
+        timeouts,
+        worst_sample
+    )
+
+
+def _measure_worker(jobs: Sequence[Tuple[str, Pattern, List[str]]], cap_ms: Optional[float], results) -> None:
+    """Processo de medição: envia o custo de cada padrão assim que termina."""
+    for pattern_id, pattern, texts in jobs:
+        results.put(measure_worst(pattern_id, pattern, texts, cap_ms))
+
+
+def _measure_isolated(
+    jobs: Sequence[Tuple[str, Pattern, List[str]]],
+    cap_ms: float
+) -> List[PatternCost]:
+    """
+    measure_worst de cada padrão em um processo separado.
+
+    Cada padrão tem prazo de cap_ms por texto (mais ISOLATED_STARTUP_S para
+    o primeiro, que inclui a subida do processo). Um padrão que passa do
+    prazo tem ao menos uma busca acima de cap_ms: o processo é encerrado, o
+    padrão conta como timeout e os restantes seguem em um processo novo.
+    """
+    costs = []
+    context = multiprocessing.get_context('spawn')
+    while len(costs) < len(jobs):
+        pending = jobs[len(costs):]
+        results = context.Queue()
+        process = context.Process(target=_measure_worker, args=(pending, cap_ms, results), daemon=True)
+        process.start()
+        try:
+            startup = ISOLATED_STARTUP_S
+            for pattern_id, _, texts in pending:
+                try:
+                    costs.append(results.get(timeout=startup + cap_ms * len(texts) / 1000))
+                except queue.Empty:
+                    costs.append(PatternCost(pattern_id, cap_ms, cap_ms, len(texts), 1, -1))
+                    break
+                startup = 0.0
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            results.close()
+    return costs
+
+
+def measure_worst_many(
+    jobs: Sequence[Tuple[str, Pattern, List[str]]],
+    cap_ms: float
+) -> List[PatternCost]:
+    """
+    measure_worst de cada (pattern_id, pattern, texts), sempre com limite.
+
+    Com guarda disponível mede no próprio processo. Sem ela (Windows, fora
+    da thread principal) mede em um processo separado com prazo, para que
+    um padrão catastrófico não trave quem chamou.
+    """
+    if guard_available():
+        return [measure_worst(pattern_id, pattern, texts, cap_ms) for pattern_id, pattern, texts in jobs]
+    return _measure_isolated(list(jobs), cap_ms) if jobs else []
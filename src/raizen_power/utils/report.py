@@ -2,7 +2,7 @@
 Gerador de relatórios HTML para revisão de dados extraídos.
 """
 import html
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 from datetime import datetime
 
@@ -10,9 +10,15 @@ from datetime import datetime
 def generate_html_report(
     valid_records: List[Dict[str, Any]],
     review_records: List[Dict[str, Any]],
-    output_path: str
+    output_path: str,
+    timings: Optional[Dict[str, Any]] = None
 ) -> None:
-    """Gera relatório HTML com resumo da extração e lista de revisão."""
+    """
+    Gera relatório HTML com resumo da extração e lista de revisão.
+    
+    Se informado, timings (resumo do TimingCollector) gera a seção de
+    tempos por etapa.
+    """
     
     # Estatísticas
     total = len(valid_records) + len(review_records)
@@ -244,6 +250,8 @@ def generate_html_report(
             </table>
         </div>
         
+        {_timings_section(timings) if timings else ''}
+        
         <footer>
             <p>Extrator de Contratos Raízen - Desenvolvido com ❤️</p>
         </footer>
@@ -252,3 +260,47 @@ def generate_html_report(
 </html>"""
     
     Path(output_path).write_text(html_content, encoding='utf-8')
+
+
+def _timings_section(timings: Dict[str, Any]) -> str:
+    """Seção HTML com p50/p95/max por etapa e os PDFs mais lentos."""
+    return f"""
+        <div class="section">
+            <h2>⏱️ Tempo por Etapa ({timings.get('arquivos', 0):,} PDFs extraídos)</h2>
+            <table>
+                <tr>
+                    <th>Etapa</th>
+                    <th>p50 (s)</th>
+                    <th>p95 (s)</th>
+                    <th>Máx (s)</th>
+                    <th>Total (s)</th>
+                </tr>
+                {''.join(f'''
+                <tr>
+                    <td>{html.escape(stage)}</td>
+                    <td>{s['p50']:.3f}</td>
+                    <td>{s['p95']:.3f}</td>
+                    <td>{s['max']:.3f}</td>
+                    <td>{s['total']:.2f}</td>
+                </tr>
+                ''' for stage, s in timings.get('etapas', {}).items())}
+            </table>
+        </div>
+        
+        <div class="section">
+            <h2>🐢 PDFs Mais Lentos</h2>
+            <table>
+                <tr>
+                    <th>Arquivo</th>
+                    <th>Total (s)</th>
+                    <th>Etapa Dominante</th>
+                </tr>
+                {''.join(f'''
+                <tr>
+                    <td>{html.escape(str(f['arquivo']))}</td>
+                    <td>{f['total']:.3f}</td>
+                    <td>{html.escape(str(f['etapa_dominante']))}</td>
+                </tr>
+                ''' for f in timings.get('mais_lentos', []))}
+            </table>
+        </div>"""
@@ -0,0 +1,101 @@
+"""
+Prazo por tarefa em um ProcessPoolExecutor.
+
+O orçamento de regex (regex_guard) depende de SIGALRM: no Windows, ou fora
+da thread principal, uma busca catastrófica trava o worker para sempre, e
+o mesmo vale para um PDF que prende o parser. O executor não tem timeout
+por tarefa; este módulo oferece:
+
+- TaskDeadlines: acompanha o prazo de cada future e diz quais estouraram
+- terminate_pool: encerra os processos do pool (o único jeito de liberar
+  um worker preso); o pool fica quebrado e deve ser recriado
+
+Uso:
+    deadlines = TaskDeadlines(timeout_s=300)
+    deadlines.track(future, units=len(chunk))
+    done = wait(futures, timeout=deadlines.wait_timeout(), return_when=FIRST_COMPLETED)[0]
+    for future in deadlines.expired():
+        ...
+"""
+import time
+from typing import Dict, List, Optional
+
+# Carregar configurações centralizadas
+try:
+    from raizen_power.core.config import settings
+    DEFAULT_TASK_TIMEOUT_S = settings.parallel.task_timeout_s
+except (ImportError, AttributeError):
+    DEFAULT_TASK_TIMEOUT_S = 300.0
+
+# Intervalo para notar tarefas que começaram a rodar
+DEADLINE_POLL_S = 1.0
+
+
+class TaskDeadlines:
+    """
+    Prazo de cada future enviado a um pool.
+
+    O relógio de uma tarefa começa quando ela é vista rodando (o executor a
+    marca assim ao entregá-la à fila dos workers), não no envio: esperar na
+    janela não gasta o prazo. A fila dos workers guarda uma tarefa a mais
+    que o número de processos, então o prazo deve ter folga para esperar
+    uma tarefa. Sem prazo (timeout_s 0 ou None) nada expira.
+    """
+
+    def __init__(self, timeout_s: Optional[float] = DEFAULT_TASK_TIMEOUT_S, poll_s: float = DEADLINE_POLL_S):
+        self.timeout_s = timeout_s
+        self.poll_s = poll_s
+        self._budget: Dict = {}    # future -> segundos
+        self._deadline: Dict = {}  # future -> time.monotonic() limite
+
+    def track(self, future, units: int = 1) -> None:
+        """Acompanha um future com prazo de timeout_s por unidade (ex: PDFs do chunk)."""
+        if self.timeout_s:
+            self._budget[future] = self.timeout_s * max(1, units)
+
+    def forget(self, future) -> None:
+        """Para de acompanhar um future (já entregue ou descartado)."""
+        self._budget.pop(future, None)
+        self._deadline.pop(future, None)
+
+    def _start_clocks(self, now: float) -> None:
+        for future, budget in self._budget.items():
+            if future not in self._deadline and future.running():
+                self._deadline[future] = now + budget
+
+    def wait_timeout(self) -> Optional[float]:
+        """Timeout para concurrent.futures.wait até o próximo prazo (None = sem prazo)."""
+        if not self._budget:
+            return None
+        now = time.monotonic()
+        self._start_clocks(now)
+
+        # Tarefas ainda na fila: acordar de tempos em tempos para ligar o relógio
+        timeout = self.poll_s if len(self._deadline) < len(self._budget) else None
+        if self._deadline:
+            remaining = max(0.0, min(self._deadline.values()) - now)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def expired(self) -> List:
+        """Futures que passaram do prazo sem terminar."""
+        if not self._budget:
+            return []
+        now = time.monotonic()
+        self._start_clocks(now)
+        return [
+            future for future, deadline in self._deadline.items()
+            if deadline <= now and not future.done()
+        ]
+
+
+def terminate_pool(executor) -> None:
+    """
+    Encerra os processos de um ProcessPoolExecutor (ex: worker preso).
+
+    As tarefas em voo falham com BrokenProcessPool e o pool não aceita
+    novas; quem o criou deve recriá-lo.
+    """
+    for process in list((getattr(executor, '_processes', None) or {}).values()):
+        if process.is_alive():
+            process.terminate()
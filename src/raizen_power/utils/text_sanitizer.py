@@ -2,8 +2,45 @@
 Utilitários para sanitização de texto e filtragem de ruído em extração de PDFs.
 """
 import re
+from bisect import bisect_right
 from datetime import datetime
-from typing import Tuple, Set
+from typing import List, Optional, Sequence, Tuple, Set
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # is_noise_batch cai no caminho escalar
+
+
+# Máscaras de CNPJ/CPF em uma única alternação (ordem = prioridade)
+_MASK_RE = re.compile(
+    r'(?P<cnpj>\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})'  # CNPJ formatado: 12.345.678/0001-90
+    r'|(?P<cnpj_raw>\b\d{14}\b)'                      # CNPJ contínuo: 14 dígitos
+    r'|(?P<cpf>\d{3}\.\d{3}\.\d{3}-\d{2})'           # CPF formatado: 123.456.789-01
+)
+_MASKS = {'cnpj': '<CNPJ>', 'cnpj_raw': '<CNPJ>', 'cpf': '<CPF>'}
+
+
+class OffsetMap:
+    """
+    Converte posições do texto mascarado para o texto original.
+    
+    Guarda só as âncoras (início e fim de cada máscara); entre âncoras o
+    deslocamento é constante. Posições dentro de uma máscara apontam para
+    o trecho original correspondente.
+    """
+    
+    def __init__(self):
+        self._masked: List[int] = [0]
+        self._original: List[int] = [0]
+    
+    def add(self, masked_pos: int, original_pos: int) -> None:
+        self._masked.append(masked_pos)
+        self._original.append(original_pos)
+    
+    def to_original(self, position: int) -> int:
+        i = bisect_right(self._masked, position) - 1
+        return self._original[i] + (position - self._masked[i])
 
 
 class TextSanitizer:
@@ -19,26 +56,38 @@ class TextSanitizer:
         
         Returns: (texto_limpo, cnpjs_encontrados)
         """
-        cnpjs_found = set()
-        
-        # CNPJ formatado: 12.345.678/0001-90
-        cnpj_pattern = r'\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}'
-        for match in re.finditer(cnpj_pattern, text):
-            cnpj = re.sub(r'\D', '', match.group())
-            cnpjs_found.add(cnpj)
-        text = re.sub(cnpj_pattern, '<CNPJ>', text)
+        clean_text, cnpjs_found, _ = TextSanitizer._mask(text, None)
+        return clean_text, cnpjs_found
+    
+    @staticmethod
+    def sanitize_with_offsets(text: str) -> Tuple[str, Set[str], OffsetMap]:
+        """
+        Como sanitize, com o mapa de posições texto_limpo -> texto original.
         
-        # CNPJ contínuo: 14 dígitos
-        cnpj_raw = r'\b\d{14}\b'
-        for match in re.finditer(cnpj_raw, text):
-            cnpjs_found.add(match.group())
-        text = re.sub(cnpj_raw, '<CNPJ>', text)
+        Returns: (texto_limpo, cnpjs_encontrados, offset_map)
+        """
+        return TextSanitizer._mask(text, OffsetMap())
+    
+    @staticmethod
+    def _mask(text: str, offsets: Optional[OffsetMap]) -> Tuple[str, Set[str], Optional[OffsetMap]]:
+        """Uma passada: coleta CNPJs e mascara CNPJ/CPF."""
+        cnpjs_found = set()
+        shift = 0  # quanto o texto mascarado encurtou até aqui
         
-        # CPF formatado: 123.456.789-01
-        cpf_pattern = r'\d{3}\.\d{3}\.\d{3}-\d{2}'
-        text = re.sub(cpf_pattern, '<CPF>', text)
+        def replace(match) -> str:
+            nonlocal shift
+            kind = match.lastgroup
+            value = match.group()
+            if kind != 'cpf':
+                cnpjs_found.add(value.replace('.', '').replace('/', '').replace('-', ''))
+            mask = _MASKS[kind]
+            if offsets is not None:
+                offsets.add(match.start() - shift, match.start())
+                shift += len(value) - len(mask)
+                offsets.add(match.end() - shift, match.end())
+            return mask
         
-        return text, cnpjs_found
+        return _MASK_RE.sub(replace, text), cnpjs_found, offsets
 
     @staticmethod
     def repair_id_zeros(value: str, id_type: str = 'CNPJ') -> str:
@@ -219,3 +268,139 @@ class NoiseFilter:
                 return True, "endereco_sede"
         
         return False, "valido"
+    
+    # Dias por mês (índice = mês) para a validação vetorizada de datas
+    _DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+    _CPF_WEIGHTS_1 = tuple(range(10, 1, -1))
+    _CPF_WEIGHTS_2 = tuple(range(11, 1, -1))
+    
+    @staticmethod
+    def _date_mask(day, month, year):
+        """Datas válidas entre 2000 e 2035 (arrays de inteiros)."""
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_ok = (month >= 1) & (month <= 12)
+        days = np.asarray(NoiseFilter._DAYS_IN_MONTH)[np.where(month_ok, month, 0)]
+        days = days + ((month == 2) & leap)
+        return month_ok & (day >= 1) & (day <= days) & (year >= 2000) & (year <= 2035)
+    
+    @staticmethod
+    def _cpf_mask(digits):
+        """CPFs válidos (Módulo 11) em uma matriz N x 11 de dígitos."""
+        d1 = (digits[:, :9] @ np.asarray(NoiseFilter._CPF_WEIGHTS_1)) % 11
+        d1 = np.where(d1 < 2, 0, 11 - d1)
+        d2 = (digits[:, :10] @ np.asarray(NoiseFilter._CPF_WEIGHTS_2)) % 11
+        d2 = np.where(d2 < 2, 0, 11 - d2)
+        repeated = (digits == digits[:, :1]).all(axis=1)
+        return ~repeated & (digits[:, 9] == d1) & (digits[:, 10] == d2)
+    
+    @staticmethod
+    def is_noise_batch(
+        numbers: Sequence[str],
+        contexts: Optional[Sequence[str]] = None,
+        rules_class=None
+    ) -> List[Tuple[bool, str]]:
+        """
+        is_noise para todos os candidatos de um documento (ou corpus) de uma vez.
+        
+        Tamanho, cliente, data, CPF, código de sistema e zero inicial são
+        calculados com aritmética NumPy; regras que dependem de contexto e
+        números fora do padrão (não ASCII) usam o caminho escalar, que
+        continua sendo a referência. Retorna os mesmos (é_ruído, motivo).
+        
+        Args:
+            numbers: Números candidatos
+            contexts: Texto ao redor de cada número (opcional, mesmo tamanho)
+            rules_class: Classe de regras de distribuidora (opcional)
+        """
+        if np is None:
+            return [
+                NoiseFilter.is_noise(number, contexts[i] if contexts else "", rules_class)
+                for i, number in enumerate(numbers)
+            ]
+        
+        count = len(numbers)
+        if count == 0:
+            return []
+        
+        numbers = list(numbers)
+        lengths = np.fromiter(map(len, numbers), dtype=np.int64, count=count)
+        joined = "".join(numbers)
+        if joined.isascii() and joined.isdigit():
+            plain = np.ones(count, dtype=bool)
+        else:
+            plain = np.fromiter(
+                (number.isascii() and number.isdigit() for number in numbers), dtype=bool, count=count
+            )
+        
+        # Só números ASCII de 5 a 12 dígitos seguem no caminho vetorizado;
+        # os demais (e os que têm contexto) usam o caminho escalar
+        scalar = (lengths < 5) | (lengths > 12) | ~plain
+        if contexts:
+            scalar |= np.fromiter(map(bool, contexts), dtype=bool, count=count)
+        
+        if scalar.any():
+            reasons = np.full(count, "valido", dtype=object)
+            for i in np.flatnonzero(scalar).tolist():
+                reasons[i] = NoiseFilter.is_noise(numbers[i], contexts[i] if contexts else "", rules_class)[1]
+            selected = np.flatnonzero(~scalar)
+            if selected.size:
+                reasons[selected] = NoiseFilter._batch_reasons(
+                    [numbers[i] for i in selected.tolist()], lengths[selected], rules_class
+                )
+        else:
+            reasons = NoiseFilter._batch_reasons(numbers, lengths, rules_class)
+        
+        return [(reason != "valido", reason) for reason in reasons.tolist()]
+    
+    @staticmethod
+    def _batch_reasons(numbers: List[str], length, rules_class) -> "np.ndarray":
+        """Motivos (sem contexto) para números ASCII de 5 a 12 dígitos."""
+        count = len(numbers)
+        width = 12
+        rows = np.arange(count)
+        
+        # Dígitos alinhados à direita em uma matriz N x 12 (zeros à esquerda)
+        flat = np.frombuffer("".join(numbers).encode("ascii"), dtype=np.uint8).astype(np.int64) - 48
+        offsets = np.repeat(np.cumsum(length) - length - (width - length), length)
+        digits = np.zeros((count, width), dtype=np.int64)
+        digits[np.repeat(rows, length), np.arange(flat.size) - offsets] = flat
+        
+        first = digits[rows, width - length]
+        second = digits[rows, width - length + 1]
+        
+        # Cliente
+        if rules_class is not None:
+            cliente = np.fromiter(map(rules_class.is_numero_cliente, numbers), dtype=bool, count=count)
+            cliente_reason = "numero_cliente"
+        else:
+            cliente = (length == 9) & (first == 7) & (second <= 1)
+            cliente_reason = "numero_cliente_70_71"
+        
+        # Data (8 dígitos): DDMMAAAA ou AAAAMMDD
+        pairs = digits[:, width - 8::2] * 10 + digits[:, width - 7::2]
+        ddmm_year = pairs[:, 2] * 100 + pairs[:, 3]
+        yyyy = pairs[:, 0] * 100 + pairs[:, 1]
+        date = (length == 8) & (
+            NoiseFilter._date_mask(pairs[:, 0], pairs[:, 1], ddmm_year)
+            | NoiseFilter._date_mask(pairs[:, 3], pairs[:, 2], yyyy)
+        )
+        
+        # CPF (11 dígitos)
+        cpf = (length == 11) & NoiseFilter._cpf_mask(digits[:, width - 11:])
+        
+        # Código de sistema: (valor, tamanho) na tabela de códigos
+        values = digits @ (10 ** np.arange(width - 1, -1, -1, dtype=np.int64))
+        system_keys = [int(code) * 16 + len(code) for code in NoiseFilter.SYSTEM_CODES]
+        system = np.isin(values * 16 + length, system_keys)
+        
+        zero = first == 0
+        
+        # Mesma ordem de prioridade de is_noise (aplicada da menor para a maior)
+        codes = np.zeros(count, dtype=np.int8)
+        for code, mask in ((5, zero), (4, system), (3, cpf), (2, date), (1, cliente)):
+            codes[mask] = code
+        reasons = np.array(
+            ["valido", cliente_reason, "data_ddmmaaaa", "cpf_valido", "codigo_sistema", "comeca_com_zero"],
+            dtype=object
+        )
+        return reasons[codes]
@@ -0,0 +1,143 @@
+"""
+Instrumentação de tempo por etapa da extração.
+
+Cada ExtractionResult carrega um mapa {etapa: segundos} medido com
+time.perf_counter em extract_from_pdf. O TimingCollector agrega esses mapas
+ao longo de uma execução (p50/p95/max por etapa e os PDFs mais lentos) e
+grava o resumo em timings.json.
+
+Uso:
+    timer = StageTimer()
+    with timer.stage('regex'):
+        data = extract_base_data(text)
+    result.timings = timer.timings
+
+    collector = TimingCollector()
+    collector.add('contrato.pdf', result.timings)
+    collector.save(output_dir / TIMINGS_FILE)
+"""
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+TIMINGS_FILE = "timings.json"
+
+# Etapas instrumentadas, na ordem em que ocorrem em extract_from_pdf
+STAGES = [
+    'abertura',
+    'texto',
+    'ocr',
+    'classificacao',
+    'regex',
+    'tabelas_modelo_2',
+    'instalacoes_compactadas',
+    'anexo_i',
+    'validacao',
+    'normalizacao',
+]
+
+
+class StageTimer:
+    """Acumula o tempo (segundos) gasto em cada etapa de um PDF."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mede o bloco e soma ao total da etapa (etapas podem repetir)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def finish(self) -> Dict[str, float]:
+        """Registra o tempo total do PDF e retorna o mapa de etapas."""
+        self.timings['total'] = time.perf_counter() - self._start
+        return self.timings
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class TimingCollector:
+    """Agrega os tempos por etapa de todos os PDFs de uma execução."""
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.files: List[Tuple[str, Dict[str, float]]] = []
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def add(self, arquivo: str, timings: Dict[str, float]) -> None:
+        """Registra os tempos de um PDF (ignorado se vazio, ex: erro do worker)."""
+        if timings:
+            self.files.append((arquivo, timings))
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resumo da execução.
+
+        Retorna:
+            {'arquivos': N,
+             'etapas': {etapa: {'p50', 'p95', 'max', 'total'}},
+             'mais_lentos': [{'arquivo', 'total', <etapa dominante>}]}
+        """
+        stages: Dict[str, List[float]] = {}
+        for _, timings in self.files:
+            for name, seconds in timings.items():
+                stages.setdefault(name, []).append(seconds)
+
+        order = STAGES + ['total']
+        names = sorted(stages, key=lambda n: order.index(n) if n in order else len(order))
+
+        stage_summary = {}
+        for name in names:
+            values = sorted(stages[name])
+            stage_summary[name] = {
+                'p50': round(percentile(values, 50), 4),
+                'p95': round(percentile(values, 95), 4),
+                'max': round(values[-1], 4),
+                'total': round(sum(values), 4),
+            }
+
+        slowest = sorted(self.files, key=lambda f: -f[1].get('total', 0.0))[:self.top_n]
+
+        return {
+            'arquivos': len(self.files),
+            'etapas': stage_summary,
+            'mais_lentos': [
+                {
+                    'arquivo': arquivo,
+                    'total': round(timings.get('total', 0.0), 4),
+                    'etapa_dominante': max(
+                        (n for n in timings if n != 'total'),
+                        key=lambda n: timings[n],
+                        default=''
+                    ),
+                }
+                for arquivo, timings in slowest
+            ],
+        }
+
+    def save(self, path: Path) -> Dict[str, Any]:
+        """Grava o resumo em JSON e o retorna."""
+        summary = self.summary()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
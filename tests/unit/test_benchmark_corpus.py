@@ -0,0 +1,82 @@
+"""
+Testes unitários para o gerador de corpus sintético (benchmark/corpus.py)
+"""
+import logging
+
+import fitz
+import pytest
+
+from raizen_power.benchmark.corpus import generate_corpus, load_corpus
+from raizen_power.benchmark.runner import _run_target
+from raizen_power.extraction.extractor import ContractExtractor
+
+
+@pytest.fixture(scope="module")
+def corpus_dir(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("corpus")
+    generate_corpus(folder, specs=[
+        ('MODELO_1_VISUAL', 1),
+        ('MODELO_2_TABULAR', 1),
+        ('ESCANEADO', 1),
+        ('GUARDA_CHUVA', 10),
+    ])
+    return folder
+
+
+class TestSyntheticCorpus:
+    """Testes para o corpus sintético"""
+
+    def test_manifest_lists_generated_pdfs(self, corpus_dir):
+        """Testa que o manifesto descreve os PDFs gerados"""
+        corpus = load_corpus(corpus_dir)
+        assert [item['tipo'] for item in corpus] == [
+            'MODELO_1_VISUAL', 'MODELO_2_TABULAR', 'ESCANEADO', 'GUARDA_CHUVA'
+        ]
+        for item in corpus:
+            assert (corpus_dir / item['arquivo']).exists()
+
+    def test_scanned_pdf_has_no_text_layer(self, corpus_dir):
+        """Testa que o PDF escaneado não tem camada de texto"""
+        with fitz.open(corpus_dir / "escaneado_001_00.pdf") as pdf:
+            assert pdf[0].get_text().strip() == ''
+            assert pdf[0].get_images()
+
+    @pytest.mark.parametrize("arquivo,modelo", [
+        ("modelo_1_visual_001_00.pdf", "MODELO_1_VISUAL"),
+        ("modelo_2_tabular_001_00.pdf", "MODELO_2_TABULAR"),
+    ])
+    def test_extractor_reads_synthetic_contracts(self, corpus_dir, arquivo, modelo):
+        """Testa que o extrator detecta o modelo e o CNPJ dos contratos sintéticos"""
+        expected = {item['arquivo']: item for item in load_corpus(corpus_dir)}[arquivo]
+        result = ContractExtractor().extract_from_pdf(str(corpus_dir / arquivo))
+        assert result.modelo_detectado == modelo
+        assert result.registros[0]['cnpj'] == expected['cnpj']
+
+    def test_umbrella_installations_are_found(self, corpus_dir):
+        """Testa que as instalações do Anexo I do guarda-chuva são encontradas"""
+        result = ContractExtractor().extract_from_pdf(str(corpus_dir / "guarda_chuva_010_00.pdf"))
+        assert result.is_guarda_chuva
+        assert len(result.registros) >= 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
+
+
+class TestRunner:
+    """Testes para a execução de um alvo do benchmark"""
+
+    def test_identifier_closed_before_cleanup(self, corpus_dir, monkeypatch):
+        """Testa que o PDFModelIdentifier é fechado antes de apagar a pasta temporária"""
+        from raizen_power.utils.pdf_fingerprint import PDFModelIdentifier
+        closed = []
+        original_close = PDFModelIdentifier.close
+        monkeypatch.setattr(PDFModelIdentifier, 'close', lambda self: closed.append(original_close(self)))
+
+        paths = [str(corpus_dir / item['arquivo']) for item in load_corpus(corpus_dir)[:2]]
+        try:
+            summary = _run_target('pdf_model_identifier', paths, repeat=1)
+        finally:
+            logging.disable(logging.NOTSET)  # _run_target silencia o log do processo
+        assert summary['pdfs'] == 2
+        assert len(closed) == 1
@@ -0,0 +1,94 @@
+"""
+Testes unitários para a blacklist dinâmica (utils/blacklist.py)
+"""
+import json
+from pathlib import Path
+
+from raizen_power.utils.blacklist import BlacklistCollector, DynamicBlacklist
+
+
+def _collector(documents):
+    collector = BlacklistCollector()
+    for numbers in documents:
+        collector.add_document(numbers)
+    return collector.get_data()
+
+
+class TestDynamicBlacklist:
+    """Testes para agregação, limiar e persistência em SQLite"""
+
+    def test_merge_and_threshold(self, tmp_path):
+        """Testa soma das frequências dos workers e corte em 80% dos documentos"""
+        blacklist = DynamicBlacklist(tmp_path / "bl.json", threshold_percent=80, auto_load=False)
+        blacklist.merge_from_collectors([
+            _collector([["111", "222"]] * 6),
+            _collector([["111"]] * 3 + [["333", "333"]]),
+        ])
+        blacklist.analyze_and_update()
+
+        assert blacklist.total_docs == 10
+        assert blacklist.get_frequency("111") == 9
+        assert blacklist.get_frequency("333") == 1
+        assert blacklist.blacklist == {"111"}
+        assert blacklist.get_stats()['top_frequencies'] == {"111": 9, "222": 6, "333": 1}
+
+    def test_sequential_updates_match_collectors(self, tmp_path):
+        """Testa que update_frequency (buffer) e merge_from_collectors contam igual"""
+        documents = [["1", "2"], ["1"], ["1", "3"]] * 5
+        sequential = DynamicBlacklist(tmp_path / "a.json", auto_load=False)
+        for numbers in documents:
+            sequential.update_frequency(numbers)
+        merged = DynamicBlacklist(tmp_path / "b.json", auto_load=False)
+        merged.merge_from_collectors([_collector(documents)])
+
+        sequential.analyze_and_update()
+        merged.analyze_and_update()
+        assert sequential.get_stats() == merged.get_stats()
+
+    def test_save_load_and_unsaved_changes(self, tmp_path):
+        """Testa que só o save() persiste e que o JSON não carrega as frequências"""
+        path = tmp_path / "bl.json"
+        blacklist = DynamicBlacklist(path, auto_load=False)
+        blacklist.merge_from_collectors([_collector([["111"]] * 10)])
+        blacklist.analyze_and_update_blacklist()
+        blacklist.merge_from_collectors([_collector([["999"]] * 50)])
+        blacklist.close()
+
+        assert json.loads(path.read_text(encoding='utf-8')) == {'blacklist': ["111"], 'total_docs': 10}
+
+        reloaded = DynamicBlacklist(path)
+        assert reloaded.is_blacklisted("111")
+        assert reloaded.total_docs == 10
+        assert reloaded.get_frequency("999") == 0
+
+    def test_legacy_json_migrated(self, tmp_path):
+        """Testa migração do formato antigo (frequências dentro do JSON)"""
+        path = tmp_path / "bl.json"
+        path.write_text(json.dumps({
+            'blacklist': ["111"], 'frequency': {"111": 12, "222": 1}, 'total_docs': 12
+        }), encoding='utf-8')
+
+        blacklist = DynamicBlacklist(path)
+        assert blacklist.total_docs == 12
+        assert blacklist.get_frequency("111") == 12
+        blacklist.save()
+        assert 'frequency' not in json.loads(path.read_text(encoding='utf-8'))
+
+    def test_concurrent_legacy_migration_counted_once(self, tmp_path, monkeypatch):
+        """Testa que dois processos migrando o JSON antigo ao mesmo tempo não somam duas vezes"""
+        path = tmp_path / "bl.json"
+        path.write_text(json.dumps({
+            'blacklist': ["111"], 'frequency': {"111": 12, "222": 1}, 'total_docs': 12
+        }), encoding='utf-8')
+
+        # Os dois veem o store inexistente antes de o outro criá-lo
+        sqlite_path = path.with_suffix('.sqlite')
+        exists = Path.exists
+        monkeypatch.setattr(Path, 'exists', lambda self: self != sqlite_path and exists(self))
+        first, second = DynamicBlacklist(path), DynamicBlacklist(path)
+        monkeypatch.undo()
+
+        for blacklist in (first, second, DynamicBlacklist(path)):
+            assert blacklist.total_docs == 12
+            assert blacklist.get_frequency("111") == 12
+            blacklist.close()
@@ -0,0 +1,41 @@
+"""
+Testes unitários para o DistributorMatcher (analysis/classifier.py)
+"""
+import pytest
+
+from raizen_power.analysis.classifier import DistributorMatcher
+
+NOMES = ["CPFL PAULISTA", "CPFL", "ENEL SP", "ENEL", "RGE", "RGE SUL", "EDP", "NEOENERGIA", "ENERGISA"]
+
+
+@pytest.fixture
+def matcher():
+    return DistributorMatcher(NOMES)
+
+
+class TestDistributorMatcher:
+    """Testes para DistributorMatcher"""
+
+    def test_longest_name_wins(self, matcher):
+        """Testa prioridade do nome mais longo entre os candidatos"""
+        assert matcher.best("DISTRIBUIDORA: CPFL PAULISTA") == "CPFL PAULISTA"
+        assert matcher.best("CPFL ... NEOENERGIA") == "NEOENERGIA"
+
+    def test_short_names_require_word_boundary(self, matcher):
+        """Testa que nomes curtos só casam como palavra inteira"""
+        assert matcher.best("CREDPX") is None
+        assert matcher.best("ATENDIMENTO (EDP)") == "EDP"
+        assert matcher.best("RGE SUL") == "RGE SUL"
+
+    def test_long_names_match_as_substring(self, matcher):
+        """Testa que nomes longos casam dentro de outras palavras (como antes)"""
+        assert matcher.best("GRUPOENERGISAS") == "ENERGISA"
+
+    def test_overlapping_mentions(self, matcher):
+        """Testa que menções sobrepostas são todas encontradas"""
+        assert matcher.find_all("NEOENERGISA") == {"ENERGISA"}
+        assert matcher.find_all("NEOENERGIA ENEL SP") == {"NEOENERGIA", "ENEL SP", "ENEL"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+"""
+Testes unitários para o cache por página (DocumentView) em table_extractor.py
+"""
+import fitz
+import pytest
+
+from raizen_power.extraction import table_extractor
+from raizen_power.extraction.table_extractor import (
+    DocumentView,
+    as_document_view,
+    extract_all_text_from_pdf,
+    extract_compact_installations_from_pdf,
+    extract_installations_from_pdf,
+    find_anexo_i_page_from_pdf,
+)
+
+
+def _make_pdf(num_pages: int = 3) -> fitz.Document:
+    """Cria PDF em memória: página 0 com texto, demais com tabela de instalações."""
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        if i == 0:
+            page.insert_text((50, 60), "TERMO DE ADESAO\nRazao Social: ACME LTDA")
+            continue
+        page.insert_text((50, 60), "ANEXO I")
+        for r in range(3):
+            for c in range(2):
+                rect = fitz.Rect(50 + c * 150, 100 + r * 20, 200 + c * 150, 120 + r * 20)
+                page.draw_rect(rect)
+                value = ["Instalação", "Cliente"][c] if r == 0 else str(61052400 + i * 100 + r * 10 + c)
+                page.insert_text((rect.x0 + 3, rect.y1 - 5), value)
+    return doc
+
+
+@pytest.fixture
+def count_find_tables(monkeypatch):
+    """Conta quantas vezes find_tables() é executado."""
+    calls = []
+    original = table_extractor._extract_tables_pymupdf
+
+    def wrapper(page):
+        calls.append(page.number)
+        return original(page)
+
+    monkeypatch.setattr(table_extractor, "_extract_tables_pymupdf", wrapper)
+    return calls
+
+
+class TestDocumentView:
+    """Testes para DocumentView"""
+
+    def test_tables_detected_once_per_page(self, count_find_tables):
+        """Testa que várias extrações no mesmo documento rodam find_tables uma vez por página"""
+        view = DocumentView(_make_pdf())
+        extract_compact_installations_from_pdf(view)
+        extract_installations_from_pdf(view)
+        extract_compact_installations_from_pdf(view)
+        assert sorted(count_find_tables) == [0, 1, 2]
+
+    def test_text_is_memoized(self):
+        """Testa que o texto da página é reaproveitado entre chamadas"""
+        view = DocumentView(_make_pdf())
+        assert view.get_text(1) is view.get_text(1)
+        assert find_anexo_i_page_from_pdf(view) == 1
+
+    def test_text_matches_plain_get_text(self):
+        """Testa que o texto via TextPage reaproveitado é igual ao de page.get_text()"""
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((50, 60), "efetivação\tTAB   espaços")
+        page.insert_htmlbox(fitz.Rect(50, 100, 400, 200), "<p>\ufb01nal o\ufb03cer \ufb02uxo</p>")
+        view = DocumentView(doc)
+        assert view.get_text(0) == page.get_text()
+
+    def test_accepts_raw_document(self):
+        """Testa compatibilidade com fitz.Document"""
+        doc = _make_pdf()
+        view = as_document_view(doc)
+        assert isinstance(view, DocumentView)
+        assert as_document_view(view) is view
+        assert extract_all_text_from_pdf(doc, use_ocr_fallback=False) == \
+            extract_all_text_from_pdf(view, use_ocr_fallback=False)
+
+    def test_installations_from_anexo(self):
+        """Testa extração do Anexo I usando o cache"""
+        installations = extract_installations_from_pdf(_make_pdf())
+        assert [i["instalacao"] for i in installations][:2] == ["61052510", "61052520"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
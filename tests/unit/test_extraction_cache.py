@@ -0,0 +1,101 @@
+"""
+Testes unitários para o cache persistente de extrações (extraction_cache.py)
+"""
+from pathlib import Path
+
+import pytest
+
+from raizen_power.utils.extraction_cache import ExtractionCache, compute_source_version
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "contrato.pdf"
+    path.write_bytes(b"%PDF-1.4 conteudo original")
+    return path
+
+
+class TestExtractionCache:
+    """Testes para ExtractionCache"""
+
+    def test_miss_then_hit(self, tmp_path, pdf_file):
+        """Testa gravação e leitura de um resultado"""
+        with ExtractionCache(tmp_path / "cache", version="v1") as cache:
+            assert cache.get(str(pdf_file)) is None
+            cache.put(str(pdf_file), {"arquivo": "contrato.pdf", "registros": [{"cnpj": "1"}]})
+            assert cache.get(str(pdf_file))["registros"] == [{"cnpj": "1"}]
+            assert cache.get_stats()["hits"] == 1
+            assert cache.get_stats()["misses"] == 1
+
+    def test_persists_between_runs(self, tmp_path, pdf_file):
+        """Testa que o cache sobrevive entre execuções"""
+        with ExtractionCache(tmp_path / "cache", version="v1") as cache:
+            cache.put(str(pdf_file), {"registros": []})
+        with ExtractionCache(tmp_path / "cache", version="v1") as cache:
+            assert cache.get(str(pdf_file)) == {"registros": []}
+
+    def test_version_and_content_invalidate(self, tmp_path, pdf_file):
+        """Testa invalidação por nova versão do extrator e por conteúdo alterado"""
+        with ExtractionCache(tmp_path / "cache", version="v1") as cache:
+            cache.put(str(pdf_file), {"registros": []})
+        with ExtractionCache(tmp_path / "cache", version="v2") as cache:
+            assert cache.get(str(pdf_file)) is None
+
+        pdf_file.write_bytes(b"%PDF-1.4 conteudo alterado com outro tamanho")
+        with ExtractionCache(tmp_path / "cache", version="v1") as cache:
+            assert cache.get(str(pdf_file)) is None
+
+    def test_rebuild_clears_entries(self, tmp_path, pdf_file):
+        """Testa que rebuild descarta entradas existentes"""
+        with ExtractionCache(tmp_path / "cache", version="v1") as cache:
+            cache.put(str(pdf_file), {"registros": []})
+        with ExtractionCache(tmp_path / "cache", version="v1", rebuild=True) as cache:
+            assert cache.get(str(pdf_file)) is None
+
+
+def test_identical_copy_gets_own_file_name(tmp_path, pdf_file):
+    """Testa que um hit de outro arquivo com o mesmo conteúdo traz o nome do arquivo atual"""
+    from raizen_power.extraction.extractor import ContractExtractor
+
+    copy = tmp_path / "copia.pdf"
+    copy.write_bytes(pdf_file.read_bytes())
+    with ExtractionCache(tmp_path / "cache", version="v1") as cache:
+        cache.put(str(pdf_file), {"arquivo": "contrato.pdf", "registros": [{"arquivo_origem": "contrato.pdf"}]})
+        cached = ContractExtractor(cache=cache)._cache_get(str(copy))
+    assert cached == {"arquivo": "copia.pdf", "registros": [{"arquivo_origem": "copia.pdf"}]}
+
+
+def test_source_version_changes_with_code(tmp_path):
+    """Testa que a versão muda quando o código-fonte muda"""
+    module = tmp_path / "mod.py"
+    module.write_text("A = 1")
+    v1 = compute_source_version([module])
+    module.write_text("A = 2")
+    assert compute_source_version([module]) != v1
+
+
+def test_source_version_changes_with_settings(tmp_path):
+    """Testa que a versão muda quando uma configuração versionada muda"""
+    module = tmp_path / "mod.py"
+    module.write_text("A = 1")
+    assert compute_source_version([module], {'regex.budget_ms': 2000}) == compute_source_version(
+        [module], {'regex.budget_ms': 2000}
+    )
+    assert compute_source_version([module], {'regex.budget_ms': 2000}) != compute_source_version(
+        [module], {'regex.budget_ms': 500}
+    )
+
+
+
+def test_extractor_version_covers_dependencies():
+    """Testa que módulos e bases de referência usados na extração entram na versão"""
+    from raizen_power.extraction import extractor
+    from raizen_power.utils.gazetteer import EXCEL_BI, EXCEL_MUNICIPIO
+
+    versioned = {Path(p).name for p in extractor._VERSIONED_MODULES + extractor._VERSIONED_DATA}
+    assert {'numeric_tokens.py', 'gazetteer.py', 'regex_guard.py', EXCEL_BI.name, EXCEL_MUNICIPIO.name} <= versioned
+    assert 'regex.budget_ms' in extractor._VERSIONED_SETTINGS
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,85 @@
+"""
+Testes unitários para o gazetteer de referência (utils/gazetteer.py)
+"""
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("openpyxl")
+
+from raizen_power.utils import gazetteer
+from raizen_power.utils.gazetteer import load_gazetteer
+
+
+@pytest.fixture
+def planilhas(tmp_path):
+    municipios = tmp_path / "municipios.xlsx"
+    bi = tmp_path / "bi.xlsx"
+    pd.DataFrame({
+        'Município': ['São Paulo', 'Campinas', 'Campinas', 'Bom Jesus', 'Bom Jesus', None],
+        'Distribuidora': ['Enel SP', 'CPFL-Paulista', 'CPFL Santa Cruz', 'RGE Sul', 'Equatorial PI', 'X'],
+        'UF': ['SP', 'SP', 'SP', 'RS', 'PI', 'SP'],
+    }).to_excel(municipios, index=False)
+    pd.DataFrame({
+        'SIGLA': ['CPFL-PAULISTA', None],
+        'Razão Social': ['Companhia Paulista de Força e Luz', None],
+    }).to_excel(bi, index=False)
+    return bi, municipios, tmp_path / "gazetteer.pkl"
+
+
+class TestGazetteer:
+    """Testes para load_gazetteer"""
+
+    def test_lookups_are_accent_folded_and_uf_aware(self, planilhas):
+        """Testa busca sem acento e desambiguação de homônimos por UF"""
+        gz = load_gazetteer(*planilhas)
+        assert gz.candidates_for_city("sao paulo") == ["ENEL SP"]
+        assert gz.candidates_for_city("Campinas") == ["CPFL PAULISTA", "CPFL SANTA CRUZ"]
+        assert gz.candidates_for_city("Bom Jesus", "PI") == ["EQUATORIAL PI"]
+        assert gz.candidates_for_city("Bom Jesus", "RS") == ["RGE"]
+        assert gz.city_to_dist["SAO PAULO"] == "Enel SP"
+        assert "COMPANHIA PAULISTA DE FORCA E LUZ" in gz.dist_names
+        assert "NAN" not in gz.dist_names
+
+    def test_snapshot_reused_until_source_changes(self, planilhas, monkeypatch):
+        """Testa que o snapshot é reaproveitado e invalidado pelo mtime da planilha"""
+        bi, municipios, snapshot = planilhas
+        load_gazetteer(bi, municipios, snapshot)
+        assert snapshot.exists()
+
+        def fail_build(*args, **kwargs):
+            raise AssertionError("não deveria reler as planilhas")
+
+        with monkeypatch.context() as m:
+            m.setattr(gazetteer.Gazetteer, "build", classmethod(fail_build))
+            assert load_gazetteer(bi, municipios, snapshot).available
+
+        os.utime(municipios, ns=(0, 10**18))
+        calls = []
+        original = gazetteer.Gazetteer.build.__func__
+        monkeypatch.setattr(gazetteer.Gazetteer, "build",
+                            classmethod(lambda cls, *a: calls.append(1) or original(cls, *a)))
+        load_gazetteer(bi, municipios, snapshot)
+        assert calls == [1]
+
+    def test_missing_sources_return_empty(self, tmp_path):
+        """Testa gazetteer vazio quando as planilhas não existem"""
+        gz = load_gazetteer(tmp_path / "a.xlsx", tmp_path / "b.xlsx", tmp_path / "g.pkl")
+        assert not gz.available
+        assert gz.candidates_for_city("Campinas", "SP") == []
+
+
+    def test_missing_bi_keeps_city_mapping(self, planilhas, caplog):
+        """Testa que sem a base BI o mapa de municípios continua disponível e o aviso sai uma vez"""
+        bi, municipios, snapshot = planilhas
+        bi.unlink()
+        for _ in range(2):
+            gz = load_gazetteer(bi, municipios, snapshot)
+        assert gz.candidates_for_city("Campinas") == ["CPFL PAULISTA", "CPFL SANTA CRUZ"]
+        assert not gz.dist_names and not gz.available
+        assert sum(str(bi) in record.message for record in caplog.records) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,89 @@
+"""
+Testes unitários para o manifesto do modo incremental (core/incremental.py)
+"""
+import os
+
+import pytest
+
+from raizen_power.core.incremental import RunManifest, merge_records
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (folder / name).write_bytes(f"%PDF {name}".encode())
+    return folder
+
+
+class TestRunManifest:
+    """Testes para RunManifest"""
+
+    def test_first_run_marks_all_as_added(self, tmp_path, pdf_dir):
+        """Testa que sem manifesto todos os PDFs são novos"""
+        manifest = RunManifest.load(tmp_path / "manifest.json")
+        diff = manifest.diff(manifest.scan(pdf_dir))
+        assert sorted(diff.added) == ["a.pdf", "b.pdf", "c.pdf"]
+        assert not diff.modified and not diff.removed
+
+    def test_detects_added_modified_removed(self, tmp_path, pdf_dir):
+        """Testa detecção de PDFs novos, alterados e removidos entre execuções"""
+        manifest = RunManifest.load(tmp_path / "manifest.json")
+        manifest.update(manifest.scan(pdf_dir))
+        manifest.save()
+
+        (pdf_dir / "a.pdf").write_bytes(b"%PDF conteudo novo")
+        (pdf_dir / "b.pdf").unlink()
+        (pdf_dir / "d.pdf").write_bytes(b"%PDF d")
+
+        manifest = RunManifest.load(tmp_path / "manifest.json")
+        diff = manifest.diff(manifest.scan(pdf_dir))
+        assert diff.added == ["d.pdf"]
+        assert diff.modified == ["a.pdf"]
+        assert diff.removed == ["b.pdf"]
+        assert diff.unchanged == ["c.pdf"]
+        assert diff.stale_names == {"a.pdf", "b.pdf"}
+
+    def test_touch_without_content_change_is_unchanged(self, tmp_path, pdf_dir):
+        """Testa que alterar apenas o mtime não reprocessa o PDF"""
+        manifest = RunManifest.load(tmp_path / "manifest.json")
+        manifest.update(manifest.scan(pdf_dir))
+        os.utime(pdf_dir / "a.pdf", ns=(0, 10**18))
+        diff = manifest.diff(manifest.scan(pdf_dir))
+        assert not diff.has_changes
+
+
+    def test_unsettled_file_keeps_previous_entry(self, tmp_path, pdf_dir):
+        """Testa que arquivo em gravação não é tratado como removido nem como novo"""
+        manifest = RunManifest.load(tmp_path / "manifest.json")
+        for name in ("a.pdf", "b.pdf", "c.pdf"):
+            os.utime(pdf_dir / name, ns=(0, 10**18))
+        manifest.update(manifest.scan(pdf_dir, settle_seconds=60))
+        previous = manifest.entries["a.pdf"]
+
+        (pdf_dir / "a.pdf").write_bytes(b"%PDF gravando")
+        (pdf_dir / "d.pdf").write_bytes(b"%PDF d")
+        current = manifest.scan(pdf_dir, settle_seconds=60)
+        diff = manifest.diff(current)
+        assert not diff.has_changes
+        assert current["a.pdf"] == previous and "d.pdf" not in current
+
+
+def test_merge_records_replaces_stale_rows():
+    """Testa mesclagem de registros novos nos CSVs existentes"""
+    existing = [
+        {"arquivo_origem": "a.pdf", "cnpj": "antigo"},
+        {"arquivo_origem": "b.pdf", "cnpj": "removido"},
+        {"arquivo_origem": "c.pdf", "cnpj": "mantido"},
+    ]
+    new = [{"arquivo_origem": "a.pdf", "cnpj": "novo"}]
+    merged = merge_records(existing, new, stale_names={"b.pdf"})
+    assert merged == [
+        {"arquivo_origem": "c.pdf", "cnpj": "mantido"},
+        {"arquivo_origem": "a.pdf", "cnpj": "novo"},
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,239 @@
+"""
+Testes unitários para os mapas compilados (extraction/map_manager.py, extraction/apply_map.py)
+"""
+import fitz
+
+from raizen_power.extraction import apply_map
+from raizen_power.extraction.map_manager import (
+    CompiledMap, MapIndex, MapManager, MapValidationError, compile_map, document_type, extract_with_map
+)
+
+
+def _mapa(**campos):
+    return {'grupo': 'CPFL_09p', 'versao': 'v1', 'modelo_identificado': 'CPFL_09p', 'campos': campos}
+
+
+class TestCompiledMap:
+    """Testes para compilação única e busca após âncora"""
+
+    def test_compiled_once_per_map_content(self):
+        """Testa que o mesmo conteúdo reaproveita a compilação e outro conteúdo não"""
+        mapa = _mapa(cnpj={'regex': r'CNPJ:\s*(\S+)'})
+        copia = _mapa(cnpj={'regex': r'CNPJ:\s*(\S+)'})
+        nova_versao = _mapa(cnpj={'regex': r'CNPJ\s*(\S+)'})
+
+        assert compile_map(mapa).fields is compile_map(copia).fields
+        assert compile_map(mapa).fields is not compile_map(nova_versao).fields
+        compiled = compile_map(mapa)
+        assert compile_map(compiled) is compiled
+
+    def test_shared_fields_keep_own_metadata(self):
+        """Testa que mapas com os mesmos campos dividem a compilação, mas não os metadados"""
+        campos = {'cnpj': {'regex': r'CNPJ:\s*(\S+)'}}
+        cpfl = {'grupo': 'CPFL_09p', 'versao': 'v1', 'modelo_identificado': 'CPFL_09p',
+                'hash': 'aaa', 'campos': campos}
+        cemig = {'grupo': 'CEMIG_05p', 'versao': 'v3', 'modelo_identificado': 'CEMIG_05p',
+                 'hash': 'bbb', 'campos': dict(campos)}
+
+        first, second = compile_map(cpfl), compile_map(cemig)
+
+        assert first.fields is second.fields
+        assert (first.grupo, first.versao, first.modelo, first.hash) == ('CPFL_09p', 'v1', 'CPFL_09p', 'aaa')
+        assert (second.grupo, second.versao, second.modelo, second.hash) == ('CEMIG_05p', 'v3', 'CEMIG_05p', 'bbb')
+
+    def test_anchor_and_window(self):
+        """Testa busca após a âncora (sem diferenciar maiúsculas) e janela limitada"""
+        mapa = _mapa(
+            potencia={'ancora': 'SEÇÃO 2', 'regex': r'Valor:\s*(\d+)'},
+            sem_regex={'ancora': 'x'},
+            invalido={'regex': '['},
+        )
+        text = "Valor: 1\nseção 2\n" + "." * 50 + "Valor: 2"
+
+        assert extract_with_map(text, mapa) == {'potencia': '2', 'invalido': None}
+        assert extract_with_map(text, mapa, anchor_window=20) == {'potencia': None, 'invalido': None}
+
+    def test_anchor_outside_latin1(self):
+        """Testa âncora em texto fora do Latin-1 (equivalência do IGNORECASE do re)"""
+        mapa = _mapa(campo={'ancora': 'sk', 'regex': r'(\d+)'})
+        assert extract_with_map("1 ſK 2", mapa) == {'campo': '2'}
+        assert extract_with_map("1 SK 2", mapa) == {'campo': '2'}
+
+
+class TestApplyMap:
+    """Testes para o aplicador em lote (sem âncoras)"""
+
+    def test_extract_without_anchors(self):
+        """Testa campos não encontrados/vazios como None e regex no texto inteiro"""
+        mapa = _mapa(
+            cnpj={'ancora': 'Contratada', 'regex': r'CNPJ:\s*(\S+)'},
+            uc={'regex': r'UC\s*(\d+)', 'encontrado': False},
+            vazio={},
+        )
+        text = "CNPJ: 111\nContratada\nCNPJ: 222\nUC 5"
+        assert apply_map.extract_with_map(text, mapa) == {'cnpj': '111', 'uc': None, 'vazio': None}
+
+    def test_worker_map_from_initializer(self, tmp_path):
+        """Testa process_pdf_with_map usando o mapa recebido pelo initializer"""
+        path = tmp_path / "contrato.pdf"
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "Contrato de energia\nCNPJ: 12345")
+        doc.save(str(path))
+        doc.close()
+
+        apply_map._init_worker(_mapa(cnpj={'regex': r'CNPJ:\s*(\d+)'}))
+        resultado = apply_map.process_pdf_with_map(str(path))
+
+        assert resultado['status'] == 'sucesso'
+        assert isinstance(apply_map._WORKER_MAP, CompiledMap)
+        assert resultado['dados']['modelo_usado'] == 'CPFL_09p'
+
+
+class TestMapIndex:
+    """Testes para a seleção de mapa por (distribuidora, páginas, tipo)"""
+
+    MAPS = {
+        'CPFL_09p_v1': {'distribuidora_principal': 'CPFL', 'paginas_analisadas': 9,
+                        'modelo_identificado': 'Termo de Adesão'},
+        'CPFL_09p_v2': {'distribuidora_principal': 'CPFL', 'paginas_analisadas': 9,
+                        'modelo_identificado': 'Termo de Adesão'},
+        'CPFL_DISTRATO_02p_v1': {'distribuidora_principal': 'CPFL', 'paginas_analisadas': 2,
+                                 'modelo_identificado': 'Distrato'},
+        'CEMIG_05p_v1': {'distribuidora_principal': 'CEMIG', 'paginas_analisadas': 5},
+    }
+
+    def test_ranked_fallbacks(self):
+        """Testa exato (versão mais recente), mesma distribuidora e genérico"""
+        index = MapIndex(self.MAPS)
+
+        assert index.select('CPFL_PAULISTA', 9).name == 'CPFL_09p_v2'
+        assert index.select('CPFL_PAULISTA', 9).selection_type == 'EXATO'
+        assert index.select('cpfl', 8).selection_type == 'FALLBACK_DIST'
+        assert index.select('ENEL', 5)[:3:2] == ('CEMIG_05p_v1', 'FALLBACK_GENERICO')
+        assert index.select('ENEL', 12).name == 'CPFL_09p_v2'  # só o bônus de adesão
+        assert index.select('ENEL', 12, 'aditivo').selection_type == 'NENHUM'
+
+    def test_select_by_folder(self):
+        """Testa a seleção por pasta: prefixo do nome, mesma distribuidora e genérico sem pontuação mínima"""
+        index = MapIndex(self.MAPS)
+
+        assert index.select_by_folder('CPFL', 9)[:3:2] == ('CPFL_09p_v2', 'EXATO')
+        assert index.select_by_folder('CPFL', 2)[:3:2] == ('CPFL_DISTRATO_02p_v1', 'FALLBACK_DIST')
+        assert index.select_by_folder('cemig', 5).selection_type == 'EXATO'
+        # select() não escolhe nada aqui (nenhum mapa pontua); a pasta sim
+        assert index.select('ENEL', 12, 'aditivo').selection_type == 'NENHUM'
+        assert index.select_by_folder('ENEL', 12)[:3:2] == ('CPFL_09p_v2', 'FALLBACK_GENERICO')
+        assert MapIndex({}).select_by_folder('CPFL', 9).selection_type == 'NENHUM'
+
+    def test_document_type(self):
+        """Testa distrato priorizado e mapas de distrato penalizados em adesões"""
+        index = MapIndex(self.MAPS)
+
+        assert document_type("Termo de DISTRATO e aditivo") == 'distrato'
+        assert index.select_for_text("Instrumento de distrato", 2, 'CPFL').name == 'CPFL_DISTRATO_02p_v1'
+        assert index.select_for_text("Termo de adesão", 2, 'CPFL').name != 'CPFL_DISTRATO_02p_v1'
+
+    def test_manager_index_refreshed_on_save(self, tmp_path):
+        """Testa que o índice do MapManager ignora rejeitados e é refeito ao salvar"""
+        manager = MapManager(tmp_path)
+        (tmp_path / "CEMIG_05p_v1_REJECTED.json").write_text('{"paginas_analisadas": 5}', encoding='utf-8')
+        assert manager.select_map('CEMIG', 5).selection_type == 'NENHUM'
+
+        manager.save_map('CEMIG_05p', {}, validate=False, metadata={
+            'distribuidora_principal': 'CEMIG', 'paginas_analisadas': 5
+        })
+        assert manager.select_map('CEMIG', 5).name == 'CEMIG_05p_v1'
+
+
+class TestMapCatalog:
+    """Testes para o catálogo de mapas (consultas sem ler os arquivos)"""
+
+    def test_save_updates_catalog(self, tmp_path):
+        """Testa versões, listagens e carga lendo só o catálogo"""
+        manager = MapManager(tmp_path)
+        manager.save_map('CEMIG_05p', {'a': {'regex': 'x'}}, validate=False)
+        manager.save_map('CEMIG_05p', {'a': {'regex': 'y'}}, validate=False)
+        try:
+            manager.save_map('CEMIG_05p', {'a': {'regex': 'z', 'valor_amostra': '1'}}, sample_text="sem valor")
+        except MapValidationError:
+            pass
+
+        fresh = MapManager(tmp_path)
+        assert fresh.list_all_groups() == ['CEMIG_05p']
+        assert [v['arquivo'] for v in fresh.list_versions('CEMIG_05p')] == [
+            'CEMIG_05p_v1.json', 'CEMIG_05p_v2.json', 'CEMIG_05p_v3_REJECTED.json'
+        ]
+        assert fresh.load_map('CEMIG_05p')['versao'] == 'v2'
+        assert fresh.load_map('CEMIG_05p', version=1)['campos'] == {'a': {'regex': 'x'}}
+        assert fresh._get_next_version('CEMIG_05p') == 3
+
+    def test_external_changes_rebuild_catalog(self, tmp_path):
+        """Testa que mapas copiados para a pasta por fora entram no catálogo"""
+        MapManager(tmp_path).save_map('CPFL_09p', {}, validate=False)
+        (tmp_path / "ELEKTRO_03p_v1.json").write_text('{"versao": "v1", "campos": {}}', encoding='utf-8')
+
+        assert MapManager(tmp_path).list_all_groups() == ['CPFL_09p', 'ELEKTRO_03p']
+
+    def test_map_copied_during_save_stays_visible(self, tmp_path, monkeypatch):
+        """Testa que um mapa copiado por fora enquanto o save_map grava entra no catálogo"""
+        manager = MapManager(tmp_path)
+        manager.save_map('CPFL_09p', {}, validate=False)
+
+        calls = []
+
+        def copy_while_saving(grupo):
+            # Segunda chamada: já sob a trava, depois da releitura do catálogo
+            calls.append(grupo)
+            if len(calls) == 2:
+                (tmp_path / "ELEKTRO_03p_v1.json").write_text('{"versao": "v1", "campos": {}}', encoding='utf-8')
+            return 1
+
+        monkeypatch.setattr(manager, '_get_next_version', copy_while_saving)
+        manager.save_map('CEMIG_05p', {}, validate=False)
+
+        for other in (manager, MapManager(tmp_path)):
+            assert other.list_all_groups() == ['CEMIG_05p', 'CPFL_09p', 'ELEKTRO_03p']
+
+    def test_two_managers_share_folder(self, tmp_path):
+        """Testa que um save de outro MapManager não some nem é sobrescrito"""
+        first, second = MapManager(tmp_path), MapManager(tmp_path)
+        assert first.list_all_groups() == second.list_all_groups() == []
+        assert len(first.index.maps) == 0
+
+        first.save_map('CPFL_09p', {'a': {'regex': 'x'}}, validate=False)
+        second.save_map('CEMIG_05p', {}, validate=False)
+        path = second.save_map('CPFL_09p', {'a': {'regex': 'y'}}, validate=False)
+        assert path.name == 'CPFL_09p_v2.json'
+
+        assert first.load_map('CPFL_09p')['campos'] == {'a': {'regex': 'y'}}
+        assert 'CEMIG_05p_v1' in first.index.maps
+        assert first.save_map('CPFL_09p', {'a': {'regex': 'z'}}, validate=False).name == 'CPFL_09p_v3.json'
+        for manager in (first, second, MapManager(tmp_path)):
+            assert manager.list_all_groups() == ['CEMIG_05p', 'CPFL_09p']
+            assert len(manager.list_versions('CPFL_09p')) == 3
+
+    def test_save_never_overwrites_version(self, tmp_path, monkeypatch):
+        """Testa que uma versão gravada por fora do catálogo não é sobrescrita"""
+        manager = MapManager(tmp_path)
+        manager.save_map('CPFL_09p', {}, validate=False)
+        (tmp_path / "CPFL_09p_v2.json").write_text('{"versao": "v2", "campos": {}}', encoding='utf-8')
+        monkeypatch.setattr(manager, '_get_next_version', lambda grupo: 2)
+
+        path = manager.save_map('CPFL_09p', {'a': {'regex': 'x'}}, validate=False)
+        assert path.name == 'CPFL_09p_v3.json'
+        assert manager.load_map('CPFL_09p', version=2)['campos'] == {}
+        assert not (tmp_path / ".catalog" / "catalog.lock").exists()
+
+    def test_index_reads_map_bodies_lazily(self, tmp_path):
+        """Testa que o índice só lê o corpo do mapa escolhido"""
+        manager = MapManager(tmp_path)
+        for pages in (3, 9):
+            manager.save_map(f'CPFL_{pages:02d}p', {}, validate=False, metadata={
+                'distribuidora_principal': 'CPFL', 'paginas_analisadas': pages
+            })
+
+        fresh = MapManager(tmp_path)
+        selection = fresh.select_map('CPFL', 9)
+        assert selection.name == 'CPFL_09p_v1'
+        assert selection.mapa['paginas_analisadas'] == 9
+        assert list(fresh.index.maps._loaded) == ['CPFL_09p_v1']
@@ -0,0 +1,47 @@
+"""
+Testes unitários para o filtro de ruído em lote (utils/text_sanitizer.py)
+"""
+import pytest
+
+from raizen_power.utils.distributor_rules import CEMIGRules, CPFLRules
+from raizen_power.utils.text_sanitizer import NoiseFilter
+
+
+CANDIDATES = [
+    '1234',          # tamanho inválido
+    '701234567',     # cliente CPFL
+    '15032024',      # data DDMMAAAA
+    '20240315',      # data AAAAMMDD
+    '29022023',      # 29/02 em ano não bissexto: não é data
+    '52998224725',   # CPF válido
+    '11111111111',   # dígitos repetidos
+    '13414',         # código de sistema (CEP da sede)
+    '0123456',       # começa com zero
+    '4012345678',    # válido
+    '１２３４５６',   # dígitos não ASCII (caminho escalar)
+]
+
+
+class TestNoiseFilterBatch:
+    """Testes para NoiseFilter.is_noise_batch"""
+
+    @pytest.mark.parametrize("rules_class", [None, CPFLRules, CEMIGRules])
+    def test_matches_scalar_path(self, rules_class):
+        """Testa os mesmos motivos do caminho escalar (referência)"""
+        expected = [NoiseFilter.is_noise(n, rules_class=rules_class) for n in CANDIDATES]
+        assert NoiseFilter.is_noise_batch(CANDIDATES, rules_class=rules_class) == expected
+
+    def test_contexts(self):
+        """Testa que regras de contexto continuam valendo no lote"""
+        numbers = ['12345678', '4012345678', '13456']
+        contexts = ['R$ 12345678', '', 'CEP 13456-000']
+        assert NoiseFilter.is_noise_batch(numbers, contexts) == [
+            (True, 'valor_monetario'), (False, 'valido'), (True, 'parte_de_cep')
+        ]
+
+    def test_empty(self):
+        assert NoiseFilter.is_noise_batch([]) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
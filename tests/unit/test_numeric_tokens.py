@@ -0,0 +1,66 @@
+"""
+Testes unitários para o índice de sequências numéricas (utils/numeric_tokens.py)
+"""
+import pytest
+
+from raizen_power.extraction.uc_extractor_v5 import DualExtractor, FallbackExtractor
+from raizen_power.utils.numeric_tokens import NumericTokenIndex
+
+
+class TestNumericTokenIndex:
+    """Testes para NumericTokenIndex"""
+
+    def test_labels_and_pages(self):
+        """Testa rótulo à esquerda, isolamento e página de cada sequência"""
+        index = NumericTokenIndex.from_pages([
+            "Nº da Instalação: 22661549",
+            "Conta Contrato (UC): 30012345 x99999 Cliente 701234567",
+        ])
+        tokens = {token.digits: token for token in index}
+        assert tokens['22661549'].label == 'instalacao'
+        assert tokens['22661549'].page == 0
+        assert tokens['30012345'].label == 'conta_contrato'
+        assert tokens['30012345'].page == 1
+        assert tokens['701234567'].label == 'cliente'
+        assert tokens['99999'].label is None
+        assert not tokens['99999'].isolated
+
+    def test_uc_label_does_not_hide_next_label(self):
+        """Testa que "UC" colado não impede o rótulo seguinte ("UCliente")"""
+        index = NumericTokenIndex("UCliente: 701234567 U.C: 12345")
+        assert [(t.digits, t.label) for t in index] == [('701234567', 'cliente'), ('12345', 'uc')]
+
+    def test_runs_filters(self):
+        """Testa a consulta equivalente a \\b\\d{m,n}\\b"""
+        index = NumericTokenIndex("12345 123456789012 abc123456 1234567")
+        assert [t.digits for t in index.runs(5, 10, isolated=True)] == ['12345', '1234567']
+
+    def test_isolated_in_slice(self):
+        """Testa que as bordas do recorte contam como limite de palavra"""
+        text = "Instalação: 22661549; 20572891; x1234567"
+        index = NumericTokenIndex(text)
+        start = text.index("22661549")
+        assert index.isolated_in(start, text.index("x") + 4, 5, 12) == ['22661549', '20572891']
+
+
+class TestExtractorsOnIndex:
+    """Testes dos extratores V5 consultando o índice"""
+
+    def test_dual_extractor(self):
+        """Testa lista após rótulo, rótulos simples e clientes"""
+        text = "Nº da Instalação: 22661549; 20572891\nUC: 4012345678\nCliente: 701234567"
+        result = DualExtractor().extract(text)
+        assert [i['number'] for i in result['instalacao']] == ['22661549', '20572891', '4012345678']
+        assert result['instalacao'][0]['source'] == 'lista_instalacao'
+        assert [c['number'] for c in result['cliente']] == ['701234567']
+
+    def test_shared_index(self):
+        """Testa que dual e fallback aceitam o mesmo índice"""
+        text = "Documento 7654321 de 01012020"
+        index = NumericTokenIndex(text)
+        assert DualExtractor().extract(text, index)['instalacao'] == []
+        assert [r['number'] for r in FallbackExtractor().extract(text, set(), index)] == ['7654321']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
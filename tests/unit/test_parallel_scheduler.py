@@ -0,0 +1,85 @@
+"""
+Testes unitários para o escalonador paralelo (iter_extract_parallel)
+"""
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from raizen_power.extraction import extractor
+from raizen_power.extraction.extractor import create_worker_pool, iter_extract_parallel, pool_is_broken
+
+# O extrator falso chega aos workers pelo fork (monkeypatch no processo pai)
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork', reason="requer workers criados por fork"
+)
+
+
+def _fake_chunk(pdf_paths):
+    """Extração falsa: o PDF "crash" derruba o processo do worker."""
+    results = []
+    for pdf_path in pdf_paths:
+        if 'crash' in pdf_path:
+            os._exit(1)
+        results.append((pdf_path, {'arquivo': pdf_path}))
+    return results
+
+
+@pytest.fixture
+def fake_worker(monkeypatch):
+    monkeypatch.setattr(extractor, '_extract_chunk', _fake_chunk)
+    monkeypatch.setattr(extractor, '_init_worker', lambda: None)
+
+
+PDFS = [f"{i:03d}.pdf" for i in range(80)]
+PDFS[10] = "010_crash.pdf"
+
+
+def test_crashing_worker_does_not_abort_batch(fake_worker):
+    """Testa que um worker morto vira erro por PDF e o restante é extraído"""
+    results = dict(iter_extract_parallel(PDFS, max_workers=2, chunk_size=4))
+    assert sorted(results) == sorted(PDFS)
+    assert 'erro_worker' in results["010_crash.pdf"]
+    # Só os chunks em voo no momento da queda falham; o pool é recriado. A
+    # queda pode ser notada tarde (o outro worker segue consumindo a fila),
+    # então o que falha depende do momento: não fixar qual PDF é extraído
+    errors = [path for path, result in results.items() if 'erro_worker' in result]
+    assert len(errors) <= 2 * 2 * 4
+    assert all(result == {'arquivo': path} for path, result in results.items() if path not in errors)
+
+
+def test_broken_external_pool_reports_remaining(fake_worker):
+    """Testa que com pool externo quebrado todos os PDFs têm resultado (sem exceção)"""
+    executor = create_worker_pool(2)
+    try:
+        results = dict(iter_extract_parallel(PDFS, executor=executor, chunk_size=4))
+        assert sorted(results) == sorted(PDFS)
+        assert 'erro_worker' in results["010_crash.pdf"]
+        assert pool_is_broken(executor)
+    finally:
+        executor.shutdown()
+
+
+def _hanging_chunk(pdf_paths):
+    """Extração falsa: o PDF "hang" prende o worker (como regex sem guarda)."""
+    for pdf_path in pdf_paths:
+        if 'hang' in pdf_path:
+            time.sleep(3600)
+    return [(pdf_path, {'arquivo': pdf_path}) for pdf_path in pdf_paths]
+
+
+def test_stuck_task_is_timed_out_and_pool_recycled(monkeypatch):
+    """Testa que uma tarefa presa vira erro e as demais são extraídas em um pool novo"""
+    monkeypatch.setattr(extractor, '_extract_chunk', _hanging_chunk)
+    monkeypatch.setattr(extractor, '_init_worker', lambda: None)
+    pdfs = [f"{i:03d}.pdf" for i in range(20)]
+    pdfs[3] = "003_hang.pdf"
+
+    start = time.monotonic()
+    results = dict(iter_extract_parallel(pdfs, max_workers=2, chunk_size=1, task_timeout_s=0.5))
+    assert time.monotonic() - start < 30
+    assert sorted(results) == sorted(pdfs)
+    assert 'prazo' in results["003_hang.pdf"]['erro_worker']
+    # Só o PDF preso falha: as outras tarefas em voo vão para o pool novo
+    assert [path for path, result in results.items() if 'erro_worker' in result] == ["003_hang.pdf"]
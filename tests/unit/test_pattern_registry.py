@@ -0,0 +1,64 @@
+"""
+Testes unitários para o registro de padrões pré-compilados em patterns.py
+"""
+import re
+
+import pytest
+
+from raizen_power.extraction.patterns import (
+    PATTERN_REGISTRY,
+    PatternRegistry,
+    extract_field,
+    extract_fields,
+)
+
+TEXTO_MODELO_1 = """TERMO DE ADESÃO AO CONSÓRCIO
+CONSORCIADA (VOCÊ)
+Contratante:
+Razão Social: ACME COMERCIO LTDA - CNPJ 12.345.678/0001-90
+E-mail: contato@acme.com.br
+Quantidade de Cotas: 1.234,50
+Performance Alvo: 7.653,00 kWh
+"""
+
+
+class TestPatternRegistry:
+    """Testes para PatternRegistry"""
+
+    def test_patterns_are_compiled(self):
+        """Testa que todos os padrões de campo já estão compilados"""
+        for model_fields in PATTERN_REGISTRY.fields.values():
+            for patterns in model_fields.values():
+                assert all(isinstance(regex, re.Pattern) for _, regex in patterns)
+
+    def test_extract_fields_matches_extract_field(self):
+        """Testa que a API em lote retorna o mesmo que a API por campo"""
+        data = extract_fields(TEXTO_MODELO_1, 'MODELO_1')
+        assert data['cnpj'] == '12.345.678/0001-90'
+        assert data['qtd_cotas'] == '1234.50'
+        for field_name, value in data.items():
+            assert extract_field(TEXTO_MODELO_1, field_name, 'MODELO_1') == value
+
+    def test_modelo_2_falls_back_to_modelo_1(self):
+        """Testa que MODELO_2 usa padrões do MODELO_1 para campos não definidos"""
+        texto = "CEP: 13000-000"
+        assert extract_field(texto, 'cep', 'MODELO_2') == '13000-000'
+
+    def test_detection(self):
+        """Testa detecção de tipo de documento e modelo"""
+        assert PATTERN_REGISTRY.detect_document_type(TEXTO_MODELO_1) == 'TERMO_ADESAO'
+        assert PATTERN_REGISTRY.detect_model(TEXTO_MODELO_1) == 'MODELO_1_VISUAL'
+        assert PATTERN_REGISTRY.detect_document_type("texto qualquer") == 'DESCONHECIDO'
+
+    def test_hit_miss_stats(self):
+        """Testa contadores de hit/miss por padrão"""
+        registry = PatternRegistry()
+        registry.extract_field("CEP: 13000-000", 'cep')
+        registry.extract_field("sem cep", 'cep')
+        assert registry.get_stats()['MODELO_1.cep[0]'] == {'hits': 1, 'misses': 1}
+        registry.reset_stats()
+        assert registry.get_stats() == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
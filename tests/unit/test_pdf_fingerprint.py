@@ -0,0 +1,267 @@
+"""
+Testes unitários para o PDFModelIdentifier (fingerprint de modelos de PDF)
+"""
+import json
+
+import fitz
+import numpy as np
+import pytest
+
+from raizen_power.utils import image_hash, pdf_fingerprint
+from raizen_power.utils.pdf_fingerprint import BKTree, EntryStore, PDFFingerprint, PDFModelIdentifier, cluster_hashes
+
+
+def _make_pdf(path, grid: bool = False, signature_line: bool = False, boxes: str = None) -> str:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "TERMO DE ADESÃO AO CONSÓRCIO\nCONTRATANTE:\nCNPJ:")
+    if boxes == 'border':
+        page.draw_rect(fitz.Rect(20, 20, page.rect.width - 20, page.rect.height - 20))
+    elif boxes == 'band':
+        page.draw_rect(fitz.Rect(36, 100, page.rect.width - 36, 130), color=None, fill=(0.8, 0.8, 0.8))
+    elif boxes == 'separate':
+        page.draw_rect(fitz.Rect(72, 300, 200, 350))
+        page.draw_rect(fitz.Rect(250, 300, 400, 350))
+    if boxes:
+        for y in range(40, 780, 12):
+            for x in (40, 150, 260, 370, 480):
+                page.insert_text((x + 4, y + 9), "UC 123")
+    if grid:
+        for i in range(4):
+            page.draw_line((72, 200 + i * 20), (400, 200 + i * 20))
+            page.draw_line((72 + i * 100, 200), (72 + i * 100, 260))
+        for row in range(3):
+            for col in range(3):
+                page.insert_text((80 + col * 100, 214 + row * 20), f"UC {row}{col}")
+    if signature_line:
+        page.draw_line((72, 700), (300, 700))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def identifier(tmp_path):
+    return PDFModelIdentifier(
+        db_path=str(tmp_path / "db.json"),
+        cache_path=str(tmp_path / "cache.json"),
+        use_cache=False
+    )
+
+
+class TestPDFFingerprint:
+    """Testes para a extração do fingerprint"""
+
+    def test_opens_document_once(self, tmp_path, identifier, monkeypatch):
+        """Testa que hash visual e features saem de uma única abertura"""
+        pdf = _make_pdf(tmp_path / "a.pdf")
+        opened = []
+        real_open = fitz.open
+        monkeypatch.setattr(pdf_fingerprint.fitz, 'open', lambda *a, **k: opened.append(a) or real_open(*a, **k))
+
+        fingerprint = identifier._create_fingerprint(pdf, "CPFL")
+        assert len(opened) == 1
+        assert fingerprint.page_count == 1
+
+    @pytest.mark.parametrize("grid, signature_line, boxes, expected", [
+        (True, False, None, True),
+        (False, True, None, False),
+        (False, False, None, False),
+        (False, False, 'border', False),
+        (False, False, 'band', False),
+        (False, False, 'separate', False),
+    ])
+    def test_table_heuristic_matches_find_tables(self, tmp_path, grid, signature_line, boxes, expected):
+        """Testa a heurística de desenhos contra o find_tables (borda, faixa e caixas não são tabela)"""
+        with fitz.open(_make_pdf(tmp_path / "t.pdf", grid, signature_line, boxes)) as doc:
+            assert PDFModelIdentifier._detect_tables(doc[0]) is expected
+            assert PDFModelIdentifier._detect_tables(doc[0], exact=True) is expected
+
+    def test_unreadable_pdf(self, tmp_path, identifier):
+        """Testa fingerprint de arquivo inválido (hash zerado e erro nas features)"""
+        fingerprint = identifier._create_fingerprint(str(tmp_path / "nao_existe.pdf"), "CPFL")
+        assert fingerprint.visual_hash == "0" * 16
+        assert fingerprint.page_count == 0 and 'error' in fingerprint.structure
+
+
+class TestVisualHash:
+    """Testes para o dHash direto do pixmap (image_hash)"""
+
+    @pytest.mark.parametrize("size, resample", [((9, 8), 'lanczos'), ((317, 40), 'bicubic'), ((50, 700), 'lanczos')])
+    def test_resize_matches_pillow(self, size, resample):
+        """Testa que o resample em numpy é idêntico ao do Pillow"""
+        Image = pytest.importorskip("PIL.Image")
+        gray = np.random.default_rng(0).integers(0, 256, (211, 173), dtype=np.uint8)
+        filters = {'lanczos': Image.LANCZOS, 'bicubic': Image.BICUBIC}
+        expected = np.asarray(Image.fromarray(gray).resize(size, filters[resample]))
+        assert np.array_equal(image_hash.resize(gray, *size, resample), expected)
+
+    def test_exact_mode_matches_imagehash(self, tmp_path):
+        """Testa o modo exact contra o caminho antigo (PIL + imagehash)"""
+        pytest.importorskip("imagehash")
+        doc = fitz.open(_make_pdf(tmp_path / "a.pdf", grid=True))
+        doc.insert_page(-1, text="ANEXO I\nUNIDADES CONSUMIDORAS", width=400, height=600)
+        identifier = PDFModelIdentifier(
+            db_path=str(tmp_path / "db.json"), use_cache=False, visual_hash_mode='exact'
+        )
+        with doc:
+            visual_hash = identifier._extract_visual_hash(doc)
+            assert visual_hash == identifier._extract_visual_hash_pil(doc)
+
+            identifier.visual_hash_mode = 'fast'
+            assert identifier._hamming_distance(visual_hash, identifier._extract_visual_hash(doc)) <= 4
+
+    def test_invalid_mode(self, tmp_path):
+        """Testa que modo desconhecido é rejeitado"""
+        with pytest.raises(ValueError):
+            PDFModelIdentifier(db_path=str(tmp_path / "db.json"), use_cache=False, visual_hash_mode='phash')
+
+
+class TestModelIndex:
+    """Testes para a busca de modelos similares via BK-tree"""
+
+    @staticmethod
+    def _fingerprint(visual_hash: str, page_count: int = 2) -> dict:
+        structure = {"page_count": page_count, "columns": 1, "text_density": 0.3, "has_tables": False}
+        return {
+            "pdf_path": "x.pdf", "page_count": page_count, "visual_hash": visual_hash,
+            "structure_hash": "s", "composite_id": "c", "structure": structure,
+            "confidence": 0.95, "created_at": "2026-01-01T00:00:00",
+        }
+
+    def test_bktree_radius_search(self):
+        """Testa que o BK-tree devolve exatamente os itens dentro do raio"""
+        tree = BKTree(lambda a, b: bin(a ^ b).count('1'))
+        values = [0, 0b1, 0b11, 0b111111, 0xFF00, 0]
+        for i, value in enumerate(values):
+            tree.add(value, i)
+        assert sorted(tree.search(0, 2)) == [(0, 0), (0, 5), (1, 1), (2, 2)]
+        assert sorted(tree) == list(range(len(values)))
+
+    def test_find_similar_models_uses_candidates_only(self, identifier, monkeypatch):
+        """Testa similares na ordem do DB e estrutura calculada só para candidatos"""
+        near, far = "0" * 16, "f" * 16
+        for model_id, visual_hash in (("CPFL_a", near), ("CPFL_b", "0" * 15 + "1"), ("CPFL_c", far)):
+            identifier._save_model(model_id, PDFFingerprint(**self._fingerprint(visual_hash)), "CPFL")
+        identifier._save_model("ENEL_a", PDFFingerprint(**self._fingerprint(near)), "ENEL")
+
+        compared = []
+        original = identifier._calculate_structural_similarity
+        monkeypatch.setattr(identifier, '_calculate_structural_similarity',
+                            lambda s1, s2: compared.append(s2) or original(s1, s2))
+
+        similar = identifier._find_similar_models(PDFFingerprint(**self._fingerprint(near)), "CPFL")
+        assert [model["model_id"] for model in similar] == ["CPFL_a", "CPFL_b"]
+        assert len(compared) == 2
+
+
+class TestClusterHashes:
+    """Testes para o agrupamento em lote dos hashes visuais"""
+
+    HASHES = [
+        "0000000000000000",
+        "0000000000000003",  # 2 bits de distância do primeiro
+        "000000000000000f",  # 2 do segundo, 4 do primeiro
+        "ffffffffffffffff",
+        "fffffffffffffffc",
+        "invalido",
+    ]
+
+    def test_connected_components_with_medoid(self):
+        """Testa componentes conexos, medoide e hash fora do formato isolado"""
+        clusters = cluster_hashes(self.HASHES, threshold=2)
+        assert [cluster.members for cluster in clusters] == [[0, 1, 2], [3, 4], [5]]
+        assert clusters[0].medoid == 1 and clusters[0].radius == 2
+
+    def test_leader_clustering_bounds_radius(self):
+        """Testa que leader clustering não encadeia além do limiar"""
+        clusters = cluster_hashes(self.HASHES[:3], threshold=2, method='leader')
+        assert [cluster.members for cluster in clusters] == [[0, 1], [2]]
+
+    def test_blocks_do_not_change_result(self):
+        """Testa que o tamanho do bloco não altera os grupos"""
+        assert cluster_hashes(self.HASHES, 2, block_size=1) == cluster_hashes(self.HASHES, 2)
+
+    def test_chains_across_blocks(self):
+        """Testa que cadeias ligadas só por blocos diferentes viram um componente"""
+        # Cadeia 0 -> 1 -> 3 -> 7 ... (1 bit por passo), embaralhada, mais um par isolado
+        chain = [f"{(1 << bits) - 1:016x}" for bits in range(20)]
+        hashes = chain[::2] + ["f0f0f0f0f0f0f0f0", "f0f0f0f0f0f0f0f1"] + chain[1::2]
+        for block_size in (1, 3, 16, 1024):
+            clusters = cluster_hashes(hashes, threshold=1, block_size=block_size)
+            assert [len(cluster.members) for cluster in clusters] == [20, 2]
+
+
+class TestPersistence:
+    """Testes para os stores SQLite de modelos e de cache"""
+
+    def test_entry_store_upsert_keeps_order(self, tmp_path):
+        """Testa upsert por entrada, ordem de inserção e compactação"""
+        store = EntryStore(tmp_path / "s.sqlite", compact_every=2)
+        store.put("b", {"v": 1})
+        store.put("a", {"v": 2})
+        store.put("b", {"v": 3})
+        assert list(store.items()) == [("b", {"v": 3}), ("a", {"v": 2})]
+        store.close()
+
+        other = EntryStore(tmp_path / "s.sqlite")
+        assert other.get("b") == {"v": 3} and len(other) == 2
+
+    def test_models_and_cache_shared_between_instances(self, tmp_path):
+        """Testa que modelo e fingerprint gravados valem para outra instância sem _save_*"""
+        pdf = _make_pdf(tmp_path / "a.pdf")
+        kwargs = dict(db_path=str(tmp_path / "db.json"), cache_path=str(tmp_path / "cache.json"))
+        first = PDFModelIdentifier(**kwargs)
+        model_id = first.classify_pdf(pdf, "CPFL")["model_id"]
+
+        second = PDFModelIdentifier(**kwargs)
+        result = second.classify_pdf(pdf, "CPFL")
+        assert result["model_id"] == model_id and not result["is_new_model"]
+        assert second.get_cache_stats()["hits"] == 1
+        first.close()
+        second.close()
+
+    def test_context_manager_closes_stores(self, tmp_path):
+        """Testa que o with fecha os bancos (no Windows a pasta só sai depois disso)"""
+        kwargs = dict(db_path=str(tmp_path / "db.json"), cache_path=str(tmp_path / "cache.json"))
+        with PDFModelIdentifier(**kwargs) as identifier:
+            identifier.classify_pdf(_make_pdf(tmp_path / "a.pdf"), "CPFL")
+        assert identifier._db_store._conn is None and identifier._cache_store is None
+
+    def test_migrates_legacy_json(self, tmp_path):
+        """Testa a migração dos JSON do formato antigo"""
+        pdf = _make_pdf(tmp_path / "a.pdf")
+        kwargs = dict(db_path=str(tmp_path / "db.json"), cache_path=str(tmp_path / "cache.json"))
+        identifier = PDFModelIdentifier(**kwargs)
+        fingerprint = identifier._create_fingerprint(pdf, "CPFL")
+        path, stamp = identifier._get_file_key(pdf)
+        identifier.close()
+        (tmp_path / "db.sqlite").unlink()
+        (tmp_path / "cache.sqlite").unlink()
+
+        models = {"CPFL_1p_x": {"model_id": "CPFL_1p_x", "distributor": "CPFL",
+                                "fingerprint": fingerprint.to_dict(), "usage_count": 0}}
+        (tmp_path / "db.json").write_text(json.dumps({"models": models, "metadata": {"created": "2025"}}))
+        (tmp_path / "cache.json").write_text(json.dumps({f"{path}|{stamp}": fingerprint.to_dict()}))
+
+        # O formato antigo usava find_tables(): só vale com exact_tables=True
+        migrated = PDFModelIdentifier(**kwargs, exact_tables=True)
+        assert migrated.models_db == {"models": models, "metadata": {"created": "2025"}}
+        assert migrated._get_cached_fingerprint(pdf) == fingerprint
+        migrated.close()
+
+    def test_cache_entry_requires_same_options(self, tmp_path):
+        """Testa que fingerprint de outro modo de hash ou de tabelas não é reusado"""
+        pdf = _make_pdf(tmp_path / "a.pdf")
+        kwargs = dict(db_path=str(tmp_path / "db.json"), cache_path=str(tmp_path / "cache.json"))
+        identifier = PDFModelIdentifier(**kwargs)
+        assert identifier.visual_hash_mode == 'exact'
+        identifier.classify_pdf(pdf, "CPFL")
+        identifier.close()
+
+        # Cada miss regrava a entrada com as próprias opções
+        for options, hits in (({}, 1), ({'visual_hash_mode': 'fast'}, 0), ({'exact_tables': True}, 0)):
+            other = PDFModelIdentifier(**kwargs, **options)
+            other._create_fingerprint(pdf, "CPFL")
+            assert other.get_cache_stats()["hits"] == hits
+            other.close()
@@ -0,0 +1,128 @@
+"""
+Testes unitários para o orçamento de tempo de regex (regex_guard)
+"""
+import re
+
+import pytest
+
+from raizen_power.extraction.map_manager import CompiledMap, MapManager, MapValidationError
+from raizen_power.extraction.patterns import PatternRegistry
+from raizen_power.utils import regex_guard
+from raizen_power.utils.regex_guard import (
+    RegexTimeout,
+    adversarial_inputs,
+    guard_available,
+    guarded_search,
+    measure_worst,
+    measure_worst_many,
+)
+
+# Backtracking exponencial: cada "a" extra dobra o tempo até a falha
+CATASTROPHIC = r'(a+)+$'
+CATASTROPHIC_TEXT = 'a' * 40 + '!'
+
+requires_guard = pytest.mark.skipif(not guard_available(), reason="SIGALRM indisponível")
+
+
+@requires_guard
+class TestRegexGuard:
+    """Testes para guarded_search e measure_worst"""
+
+    def test_guarded_search_times_out(self):
+        """Testa que a busca catastrófica é interrompida e a normal não"""
+        with pytest.raises(RegexTimeout):
+            guarded_search(re.compile(CATASTROPHIC), CATASTROPHIC_TEXT, budget_ms=50)
+        assert guarded_search(re.compile(r'CNPJ'), "CNPJ: 1", budget_ms=50)
+
+    def test_adversarial_inputs_flag_catastrophic(self):
+        """Testa que textos adversariais separam padrão patológico de padrão linear"""
+        slow = measure_worst('lento', re.compile(CATASTROPHIC), adversarial_inputs(CATASTROPHIC), cap_ms=100)
+        fast_regex = r'CNPJ[:\s]*(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})'
+        fast = measure_worst('rapido', re.compile(fast_regex), adversarial_inputs(fast_regex), cap_ms=100)
+        assert slow.timeouts and slow.over_budget(50)
+        assert not fast.over_budget(50)
+
+
+@requires_guard
+class TestGuardedExtraction:
+    """Testes para a guarda por padrão na extração e no save_map"""
+
+    def test_registry_counts_timeout_as_miss(self):
+        """Testa que o registro não trava e contabiliza o estouro"""
+        registry = PatternRegistry(budget_ms=50)
+        compiled = ('TESTE', re.compile(CATASTROPHIC))
+        assert registry.search(compiled, CATASTROPHIC_TEXT) is None
+        assert registry.get_stats()['TESTE'] == {'hits': 0, 'misses': 1, 'timeouts': 1}
+
+    def test_compiled_map_skips_pathological_field(self, monkeypatch):
+        """Testa que um campo patológico fica None e os demais são extraídos"""
+        monkeypatch.setattr(CompiledMap, 'budget_ms', 50)
+        compiled = CompiledMap({'campos': {
+            'lento': {'regex': CATASTROPHIC},
+            'cnpj': {'regex': r'CNPJ[:\s]*([\d./-]+)'},
+        }})
+        assert compiled.extract(CATASTROPHIC_TEXT + ' CNPJ: 12.345.678/0001-90') == {
+            'lento': None, 'cnpj': '12.345.678/0001-90'
+        }
+
+    def test_save_map_rejects_costly_regex(self, tmp_path):
+        """Testa que save_map rejeita regex acima do orçamento mesmo sem amostra"""
+        manager = MapManager(tmp_path)
+        with pytest.raises(MapValidationError, match='REGEX_COST'):
+            manager.save_map('CEMIG_05p', {'lento': {'regex': CATASTROPHIC}})
+        assert (tmp_path / 'CEMIG_05p_v1_REJECTED.json').exists()
+
+        path = manager.save_map('CEMIG_05p', {'cnpj': {'regex': r'CNPJ[:\s]*([\d./-]+)'}})
+        assert path.name == 'CEMIG_05p_v1.json'
+
+
+class TestWithoutSignalGuard:
+    """Testes para a validação do save_map sem SIGALRM (como no Windows)"""
+
+    def test_save_map_rejects_costly_regex(self, tmp_path, monkeypatch):
+        """Testa que sem guarda a medição roda em processo separado e rejeita o padrão"""
+        monkeypatch.setattr(regex_guard, 'guard_available', lambda: False)
+        manager = MapManager(tmp_path)
+        with pytest.raises(MapValidationError, match='REGEX_COST'):
+            manager.save_map('CEMIG_05p', {
+                'cnpj': {'regex': r'CNPJ[:\s]*([\d./-]+)'},
+                'lento': {'regex': CATASTROPHIC},
+            })
+        rejected = (tmp_path / 'CEMIG_05p_v1_REJECTED.json').read_text(encoding='utf-8')
+        assert "'lento'" in rejected and "'cnpj'" not in rejected
+
+    def test_overdue_measurement_is_terminated(self, monkeypatch):
+        """Testa que padrões que passam do prazo contam como timeout e não travam"""
+        monkeypatch.setattr(regex_guard, 'guard_available', lambda: False)
+        monkeypatch.setattr(regex_guard, 'ISOLATED_STARTUP_S', 0.0)
+        jobs = [(name, re.compile(CATASTROPHIC), [CATASTROPHIC_TEXT]) for name in ('a', 'b')]
+
+        costs = measure_worst_many(jobs, cap_ms=1)
+        assert [cost.pattern_id for cost in costs] == ['a', 'b']
+        assert all(cost.timeouts == 1 for cost in costs)
+
+    def test_profiler_measures_without_guard(self, monkeypatch):
+        """Testa que o regex_profiler não trava sem guarda e marca o padrão catastrófico"""
+        from raizen_power.analysis.regex_profiler import profile_patterns
+
+        monkeypatch.setattr(regex_guard, 'guard_available', lambda: False)
+        patterns = [('lento', re.compile(CATASTROPHIC)), ('cnpj', re.compile(r'CNPJ[:\s]*([\d./-]+)'))]
+        report = {row['padrao']: row for row in profile_patterns(patterns, ["CNPJ: 1"], budget_ms=5)}
+        assert report['lento']['acima_orcamento'] and report['lento']['adversarial']['timeouts']
+        assert not report['cnpj']['acima_orcamento']
+
+    def test_unguarded_search_warns_once(self, monkeypatch, caplog):
+        """Testa que a busca sem guarda (fora da thread principal) avisa uma única vez"""
+        import threading
+
+        monkeypatch.setattr(regex_guard, '_unguarded_warned', False)
+
+        def search_twice():
+            for _ in range(2):
+                assert guarded_search(re.compile(r'CNPJ'), "CNPJ: 1", budget_ms=50)
+
+        with caplog.at_level('WARNING', logger=regex_guard.__name__):
+            thread = threading.Thread(target=search_twice)
+            thread.start()
+            thread.join()
+        assert len([r for r in caplog.records if 'indisponível' in r.getMessage()]) == 1
@@ -0,0 +1,32 @@
+"""
+Testes unitários para a sanitização de CNPJ/CPF (utils/text_sanitizer.py)
+"""
+import pytest
+
+from raizen_power.utils.text_sanitizer import TextSanitizer
+
+
+TEXT = "CNPJ 12.345.678/0001-90, UC 12345678\nCPF 123.456.789-01 e 98765432000198 fim"
+
+
+class TestTextSanitizer:
+    """Testes para TextSanitizer.sanitize"""
+
+    def test_masks_and_collects_cnpjs(self):
+        """Testa máscaras de CNPJ formatado/contínuo e CPF em uma passada"""
+        clean, cnpjs = TextSanitizer.sanitize(TEXT)
+        assert clean == "CNPJ <CNPJ>, UC 12345678\nCPF <CPF> e <CNPJ> fim"
+        assert cnpjs == {'12345678000190', '98765432000198'}
+
+    def test_offset_map(self):
+        """Testa que posições do texto mascarado voltam ao texto original"""
+        clean, _, offsets = TextSanitizer.sanitize_with_offsets(TEXT)
+        for word in ("UC 12345678", "CPF", "fim"):
+            position = offsets.to_original(clean.index(word))
+            assert TEXT[position:position + len(word)] == word
+        # Dentro da máscara aponta para o trecho original
+        assert TEXT[offsets.to_original(clean.index("<CPF>"))] == "1"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,52 @@
+"""
+Testes unitários para a instrumentação de tempo por etapa (utils/timing.py)
+"""
+import json
+
+import pytest
+
+from raizen_power.utils.timing import StageTimer, TimingCollector
+
+
+class TestStageTimer:
+    """Testes para StageTimer"""
+
+    def test_stages_accumulate(self):
+        """Testa que etapas repetidas somam e que finish registra o total"""
+        timer = StageTimer()
+        with timer.stage('validacao'):
+            pass
+        timer.add('validacao', 1.0)
+        timings = timer.finish()
+        assert timings['validacao'] >= 1.0
+        assert 'total' in timings
+
+    def test_stage_recorded_on_exception(self):
+        """Testa que o tempo é registrado mesmo se a etapa falhar"""
+        timer = StageTimer()
+        with pytest.raises(ValueError):
+            with timer.stage('abertura'):
+                raise ValueError("PDF corrompido")
+        assert 'abertura' in timer.timings
+
+
+class TestTimingCollector:
+    """Testes para TimingCollector"""
+
+    def test_summary_percentiles_and_slowest(self, tmp_path):
+        """Testa p50/p95/max por etapa e ranking dos PDFs mais lentos"""
+        collector = TimingCollector(top_n=2)
+        for i in range(1, 21):
+            collector.add(f"{i}.pdf", {'texto': i / 10, 'regex': 0.01, 'total': i / 10 + 0.01})
+        collector.add("erro.pdf", {})
+
+        summary = collector.save(tmp_path / "timings.json")
+        assert summary['arquivos'] == 20
+        assert summary['etapas']['texto'] == {'p50': 1.0, 'p95': 1.9, 'max': 2.0, 'total': 21.0}
+        assert [f['arquivo'] for f in summary['mais_lentos']] == ["20.pdf", "19.pdf"]
+        assert summary['mais_lentos'][0]['etapa_dominante'] == 'texto'
+        assert json.loads((tmp_path / "timings.json").read_text(encoding='utf-8')) == summary
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,117 @@
+"""
+Testes unitários para o modo em duas fases do UCExtractorV5 (extraction/uc_extractor_v5.py)
+"""
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import pytest
+
+from raizen_power.extraction import uc_extractor_v5
+from raizen_power.extraction.uc_extractor_v5 import (
+    UCExtractorV5, extract_batch_two_phase, apply_blacklist
+)
+from raizen_power.utils.blacklist import DynamicBlacklist
+
+
+def _write_pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def _corpus(tmp_path, count=12):
+    """Todos os PDFs citam a instalação 40000001; cada um tem a sua própria."""
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"contrato_{i:02d}.pdf"
+        _write_pdf(path, f"Instalação: 40000001\nInstalação: {50000000 + i}")
+        paths.append(str(path))
+    return paths
+
+
+_real_extract_chunk = uc_extractor_v5._extract_chunk
+
+
+def _crashing_chunk(pdf_paths, distributor="CPFL"):
+    """Tarefa que derruba o processo do worker no PDF "crash.pdf"."""
+    if any(os.path.basename(path) == 'crash.pdf' for path in pdf_paths):
+        os._exit(1)
+    return _real_extract_chunk(pdf_paths, distributor)
+
+
+def _blacklist(tmp_path):
+    return DynamicBlacklist(blacklist_file=tmp_path / "blacklist.json", auto_load=False)
+
+
+class TestTwoPhase:
+    """Testes para a coleta paralela + aplicação da blacklist final"""
+
+    def test_recurring_code_filtered_in_every_document(self, tmp_path):
+        """Testa que o código recorrente sai de todos os PDFs, inclusive os primeiros"""
+        paths = _corpus(tmp_path)
+        blacklist = _blacklist(tmp_path)
+
+        with ThreadPoolExecutor(2) as executor:
+            results = extract_batch_two_phase(paths, blacklist=blacklist, chunk_size=5, executor=executor)
+
+        assert [r.file for r in results] == [f"contrato_{i:02d}.pdf" for i in range(12)]
+        assert all(r.ucs == [str(50000000 + i)] for i, r in enumerate(results))
+        assert all(r.ruido_filtrado == 1 for r in results)
+        assert blacklist.total_docs == 12
+        assert blacklist.is_blacklisted('40000001')
+        assert (tmp_path / "blacklist.json").exists()
+
+    def test_independent_of_order_and_chunking(self, tmp_path):
+        """Testa que ordem dos PDFs e tamanho das tarefas não alteram o resultado"""
+        paths = _corpus(tmp_path)
+
+        with ThreadPoolExecutor(2) as executor:
+            forward = extract_batch_two_phase(paths, blacklist=_blacklist(tmp_path), chunk_size=3, executor=executor)
+            backward = extract_batch_two_phase(paths[::-1], blacklist=_blacklist(tmp_path), chunk_size=7, executor=executor)
+
+        by_file = {r.file: r.ucs for r in backward}
+        assert {r.file: r.ucs for r in forward} == by_file
+
+    def test_sequential_mode_unchanged(self, tmp_path):
+        """Testa que extract_from_pdf = candidatas filtradas pela blacklist corrente"""
+        path = tmp_path / "contrato.pdf"
+        _write_pdf(path, "Instalação: 40000001\nInstalação: 50000000")
+
+        extractor = UCExtractorV5(use_dynamic_blacklist=False)
+        extractor.dynamic_blacklist = _blacklist(tmp_path)
+        extractor.dynamic_blacklist.blacklist = {'40000001'}
+
+        result = extractor.extract_from_pdf(str(path))
+        candidates = extractor.extract_candidates(str(path))
+
+        assert result.ucs == ['50000000'] and result.ruido_filtrado == 1
+        assert candidates.ucs == ['40000001', '50000000']
+        assert apply_blacklist(candidates, extractor.dynamic_blacklist).ucs == result.ucs
+        assert extractor.dynamic_blacklist.total_docs == 1
+
+    def test_external_executor_uses_distributor(self, tmp_path, monkeypatch):
+        """Testa que a distribuidora chega aos workers de um executor externo"""
+        monkeypatch.setattr(uc_extractor_v5, '_WORKER_EXTRACTOR', None)
+        with ThreadPoolExecutor(1) as executor:
+            extract_batch_two_phase(_corpus(tmp_path, 2), distributor="CEMIG",
+                                    blacklist=_blacklist(tmp_path), executor=executor)
+        assert uc_extractor_v5._WORKER_EXTRACTOR.distributor == "CEMIG"
+
+    @pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason="requer workers criados por fork")
+    def test_crashing_worker_becomes_error_results(self, tmp_path, monkeypatch):
+        """Testa que um worker morto vira erro por PDF sem descartar o lote"""
+        paths = _corpus(tmp_path, 40)
+        crash = tmp_path / "crash.pdf"
+        _write_pdf(crash, "Instalação: 40000001")
+        paths.insert(5, str(crash))
+        monkeypatch.setattr(uc_extractor_v5, '_extract_chunk', _crashing_chunk)
+
+        results = extract_batch_two_phase(paths, max_workers=2, blacklist=_blacklist(tmp_path), chunk_size=1)
+
+        assert [r.path for r in results] == paths
+        assert results[5].errors and not results[5].ucs
+        # Só as tarefas em voo no pool que caiu falham; o restante segue num pool novo
+        assert not results[-1].errors and results[-1].ucs == ['50000039']
@@ -0,0 +1,89 @@
+"""
+Testes unitários para o pipeline de múltiplas UCs (extraction/uc_multi_extractor.py)
+"""
+import fitz
+import pytest
+
+from raizen_power.extraction.uc_multi_extractor import UCMultiExtractor
+from raizen_power.utils.numeric_tokens import NumericTokenIndex
+
+
+def _match(text, extractor=None):
+    extractor = extractor or UCMultiExtractor()
+    runs = NumericTokenIndex(text).tokens
+    return {match.uc for match in extractor._match_text_patterns(text, runs, 0)}
+
+
+class TestTextPatterns:
+    """Testes para os padrões aplicados sobre as sequências de dígitos"""
+
+    def test_isolated_and_labeled(self):
+        """Testa padrão isolado, rótulo e lista (rótulo captura 10 primeiros dígitos)"""
+        assert _match("UC: 12345678") == {'12345678'}
+        assert _match("Instalação 123456789012") == {'1234567890'}
+        assert _match("• 87654321") == {'87654321'}
+        assert _match("x12345678") == set()
+
+    def test_formatted_with_check_digit(self):
+        """Testa XXXXXX-DV: últimos 8 dígitos antes do hífen, sem sobreposição"""
+        extractor = UCMultiExtractor(min_digits=6)
+        assert _match("cód 1234567890-1", extractor) == {'1234567890', '34567890'}
+        # O primeiro match consome "12" da sequência seguinte
+        assert _match("cód 1234567-12345678-9", extractor) == {'1234567', '345678', '12345678'}
+
+
+class TestExtractFromPdf:
+    """Testes para a passada única sobre o PDF"""
+
+    def test_single_pass_text_and_tables(self, tmp_path):
+        """Testa regex + tabelas no mesmo documento e páginas com UCs"""
+        path = tmp_path / "contrato.pdf"
+        with fitz.open() as doc:
+            doc.new_page().insert_text((72, 72), "Anexo I - Instalação: 30012345")
+            doc.new_page().insert_text((72, 72), "Sem dados relevantes")
+            doc.save(path)
+
+        result = UCMultiExtractor().extract_from_pdf(str(path))
+        assert result.ucs == ['30012345']
+        assert result.method == "pymupdf"
+        assert result.pages_with_ucs == [0]
+        assert result.errors == []
+
+    def test_provenance_per_result(self, tmp_path):
+        """Testa que a origem fica no resultado e o extrator não acumula estado"""
+        path = tmp_path / "contrato.pdf"
+        with fitz.open() as doc:
+            doc.new_page().insert_text((72, 72), "UC: 30012345")
+            doc.save(path)
+
+        extractor = UCMultiExtractor()
+        for _ in range(3):
+            result = extractor.extract_from_pdf(str(path))
+        assert {(p.uc, p.page, p.pattern) for p in result.provenance} == {
+            ('30012345', 0, 'padrao'), ('30012345', 0, 'label_uc')
+        }
+        assert all(p.offset == 4 for p in result.provenance)
+        assert len(extractor.metadata) == 0
+
+    def test_debug_context_is_bounded(self, tmp_path):
+        """Testa o buffer circular opcional com o contexto dos matches"""
+        path = tmp_path / "contrato.pdf"
+        with fitz.open() as doc:
+            doc.new_page().insert_text((72, 72), "UC: 30012345")
+            doc.save(path)
+
+        extractor = UCMultiExtractor(debug_context=3)
+        for _ in range(5):
+            extractor.extract_from_pdf(str(path))
+        assert len(extractor.metadata) == 3
+        assert extractor.metadata[-1]['context'].startswith("UC: 30012345")
+
+    def test_open_error(self, tmp_path):
+        """Testa que falha de abertura vira erro no resultado"""
+        result = UCMultiExtractor().extract_from_pdf(str(tmp_path / "inexistente.pdf"))
+        assert result.ucs == []
+        assert result.errors and result.errors[0].startswith("Extraction error")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])